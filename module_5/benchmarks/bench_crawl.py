@@ -0,0 +1,147 @@
+"""Benchmark: crawl modes against the local GradCafe stand-in.
+
+Starts ``gradcafe_standin.py`` in its own process (so the server does
+not share this process's GIL), points the scraper at it through
+SCRAPE_BASE_DOMAIN and crawls the same pages with each mode:
+
+* ``serial``   - scrape.scrape_data per page, one detail download at a time
+* ``threaded`` - scrape.scrape_data with the detail worker pool
+* ``async``    - crawl.crawl (next survey page overlaps the details)
+
+For each mode it reports survey pages/s, rows/s, requests/s and the
+p50/p99 latency of individual fetches. Pacing is effectively off
+(SCRAPE_RATE=1000) unless ``--paced`` keeps the adaptive controller's
+defaults. Pass ``--archive DIR`` to replay recorded pages.
+
+Run from module_5:
+
+    PYTHONPATH=src python benchmarks/bench_crawl.py --pages 20 \\
+        --latency-ms 30 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import time
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _start_standin(args):
+    """Launch the stand-in server; return (process, base_url)."""
+    cmd = [sys.executable, os.path.join(_HERE, "gradcafe_standin.py"),
+           "--port", "0", "--pages", str(args.pages),
+           "--rows-per-page", str(args.rows_per_page),
+           "--result-kb", str(args.result_kb),
+           "--latency-ms", str(args.latency_ms),
+           "--jitter-ms", str(args.jitter_ms),
+           "--error-rate", str(args.error_rate)]
+    if args.archive:
+        cmd += ["--archive", args.archive]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True,
+                            env=dict(os.environ))
+    return proc, proc.stdout.readline().strip()
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _timed(download, latencies):
+    """Wrap download_html to record every fetch's wall time."""
+    def fetch(url):
+        start = time.perf_counter()
+        try:
+            return download(url)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    return fetch
+
+
+def _crawl(mode, args, scrape, crawl):
+    """Crawl every stand-in page with one mode; return the rows."""
+    if mode == "async":
+        return asyncio.run(crawl.crawl(1, args.pages * args.rows_per_page,
+                                       set(), rate=0, workers=args.workers))
+    workers = 1 if mode == "serial" else args.workers
+    rows = []
+    for page in range(1, args.pages + 1):
+        page_rows, _ = scrape.scrape_data(scrape.survey_page_url(page),
+                                          set(), workers=workers)
+        rows.extend(page_rows)
+    return rows
+
+
+def _run_mode(mode, args, scrape, crawl, rate_control):
+    """Time one mode; return its report line."""
+    rate_control.reset_controller()
+    latencies = []
+    real_download = scrape.download_html
+    scrape.download_html = _timed(real_download, latencies)
+    start = time.perf_counter()
+    try:
+        # The crawlers print progress per page; keep the report readable.
+        with contextlib.redirect_stdout(io.StringIO()):
+            rows = _crawl(mode, args, scrape, crawl)
+    finally:
+        scrape.download_html = real_download
+    elapsed = time.perf_counter() - start
+    return (f"  {mode:<9} {args.pages / elapsed:7.2f} pages/s "
+            f"{len(rows) / elapsed:8.1f} rows/s "
+            f"{len(latencies) / elapsed:8.1f} req/s  "
+            f"p50 {_percentile(latencies, 50) * 1000:6.1f} ms  "
+            f"p99 {_percentile(latencies, 99) * 1000:6.1f} ms")
+
+
+def main():
+    """Start the stand-in and benchmark each crawl mode against it."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--rows-per-page", type=int, default=20)
+    parser.add_argument("--result-kb", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--archive", default=None)
+    parser.add_argument("--modes", default="serial,threaded,async")
+    parser.add_argument("--paced", action="store_true",
+                        help="keep the adaptive rate controller defaults")
+    parser.add_argument("--listing", action="store_true",
+                        help="let listing.py skip result pages "
+                             "(default: fetch every result page)")
+    args = parser.parse_args()
+
+    proc, base_url = _start_standin(args)
+    try:
+        # Read by the Scraper modules at import time.
+        os.environ["SCRAPE_BASE_DOMAIN"] = base_url
+        os.environ["SCRAPE_PER_HOST_LIMIT"] = str(args.workers)
+        if not args.listing:
+            os.environ["SCRAPE_DETAIL_REQUIRED"] = "always"
+        if not args.paced:
+            os.environ["SCRAPE_RATE"] = os.environ["SCRAPE_MAX_RATE"] = "1000"
+        # Imported only now: these modules read the environment above
+        # at import time.
+        from Scraper import crawl, rate_control, scrape
+
+        print(f"Stand-in at {base_url}: {args.pages} pages x "
+              f"{args.rows_per_page} rows, {args.latency_ms:.0f}"
+              f"+{args.jitter_ms:.0f} ms latency, "
+              f"{args.error_rate:.1%} errors")
+        for mode in args.modes.split(","):
+            print(_run_mode(mode.strip(), args, scrape, crawl, rate_control))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark: ten extract_* searches vs. the one-scan field extractor.
+
+Generates GradCafe-shaped result texts (the whitespace-normalized
+``result_text_raw`` clean.py reads), checks that ``field_extract``
+returns what the ``clean.extract_*`` functions return for every text,
+then times both, best of ``--repeat`` passes.
+
+Run from module_5:
+
+    PYTHONPATH=src python benchmarks/bench_field_extract.py
+    PYTHONPATH=src python benchmarks/bench_field_extract.py --texts 20000
+"""
+
+import argparse
+import random
+import time
+
+from Scraper import clean, field_extract
+
+_DECISIONS = ["Accepted", "Rejected", "Wait listed", "Interview", "Other"]
+_TERMS = ["Fall", "Spring", "Summer", "Winter", "Autumn", "fall"]
+_NOTES = ["Funding offered, visit weekend in March.",
+          "Got the email at 2am!! Fall 2025 cohort was tiny.",
+          "No interview. 20 people admitted this year.", ""]
+
+
+def _text(rng: random.Random, rid: int) -> str:
+    """One result text; optional fields are left out at random."""
+    parts = [f"Home Survey Result {rid} Institution University {rid % 977}",
+             "Program Computer Science",
+             f"Degree Type {rng.choice(['PhD', 'Masters', 'M.S.'])}"]
+    if rng.random() < 0.9:
+        parts.append("Degree's Country of Origin "
+                     f"{rng.choice(['International', 'Domestic'])}")
+    parts.append(f"Decision {rng.choice(_DECISIONS)} Notification on "
+                 f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/"
+                 f"{rng.randint(2018, 2026)} via E-mail")
+    if rng.random() < 0.7:
+        parts.append(f"Undergrad GPA {rng.uniform(2.5, 4.0):.2f}")
+    if rng.random() < 0.4:
+        parts.append(f"GRE General: {rng.randint(290, 340)} "
+                     f"GRE Verbal: {rng.randint(140, 170)} "
+                     f"Analytical Writing: {rng.choice(['3.5', '4.0', '5'])}")
+    if rng.random() < 0.8:
+        parts.append(f"Notes {rng.choice(_NOTES)} Timeline")
+    parts.append(f"{rng.choice(_TERMS)} {rng.randint(2018, 2027)} "
+                 "Added on Jan 2 Report About Privacy")
+    return " ".join(parts)
+
+
+def _one_by_one(text):
+    """The ten searches extract_row_fields used to run."""
+    return (clean.extract_decision(text),
+            clean.extract_notification_date(text),
+            clean.extract_degree_type(text),
+            clean.extract_country_origin(text),
+            clean.extract_notes(text),
+            clean.extract_undergrad_gpa(text),
+            clean.extract_gre_general(text),
+            clean.extract_gre_verbal(text),
+            clean.extract_gre_aw(text),
+            clean.extract_term_year(text))
+
+
+def _best(func, texts, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """Check parity, then time both extractors on the same texts."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = [_text(rng, 990000 - i) for i in range(args.texts)]
+    for text in texts:
+        if tuple(field_extract.extract(text)) != _one_by_one(text):
+            raise SystemExit(f"field_extract differs on {text!r}")
+    size_mb = sum(len(t) for t in texts) / 1e6
+    print(f"{len(texts)} texts, {size_mb:.1f} MB, identical fields")
+
+    times = {}
+    for label, func in (("search", _one_by_one),
+                        ("one-scan", field_extract.extract)):
+        times[label] = _best(func, texts, args.repeat)
+        print(f"  {label:<9} {len(texts) / times[label]:10.0f} texts/s  "
+              f"{times[label]:6.2f} s")
+    print(f"  speedup one-scan vs search: "
+          f"{times['search'] / times['one-scan']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Benchmark: fresh urllib connections vs. the keep-alive pool over HTTPS.
+
+Starts a local HTTPS stand-in (self-signed certificate made with the
+``openssl`` CLI), then fetches the same page N times with
+``urllib.request.urlopen`` and N times with ``Scraper.http_pool``.
+The server counts accepted TLS connections, which equals the number of
+handshakes each client paid for.
+
+Run from module_5:
+
+    PYTHONPATH=src python benchmarks/bench_http_pool.py --requests 200
+"""
+
+import argparse
+import os
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from Scraper import http_pool
+
+PAGE = b"<html>" + b"x" * 20000 + b"</html>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serve one fixed page with HTTP/1.1 keep-alive."""
+
+    protocol_version = "HTTP/1.1"
+    # Buffer headers and body into one write.
+    wbufsize = 1 << 16
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+
+class _CountingServer(ThreadingHTTPServer):
+    """HTTPS server that counts accepted (handshaken) connections."""
+
+    daemon_threads = True
+
+    def __init__(self, addr, context):
+        super().__init__(addr, _Handler)
+        self.context = context
+        self.handshakes = 0
+
+    def get_request(self):
+        sock, addr = super().get_request()
+        # Like a production server: no Nagle delay on multi-record
+        # TLS responses over a kept-alive connection.
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.handshakes += 1
+        return self.context.wrap_socket(sock, server_side=True), addr
+
+
+def _make_cert(directory):
+    """Create a throwaway self-signed certificate for localhost."""
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+         "-keyout", key, "-out", cert, "-days", "1",
+         "-subj", "/CN=localhost",
+         "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1"],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+def _run(label, fetch, server, n):
+    """Time n fetches and report handshakes paid by this client."""
+    before = server.handshakes
+    start = time.perf_counter()
+    for _ in range(n):
+        fetch()
+    elapsed = time.perf_counter() - start
+    handshakes = server.handshakes - before
+    print(f"{label:<18} {n:>5} req  {elapsed:7.3f}s  "
+          f"{elapsed / n * 1000:7.2f} ms/req  {handshakes:>5} handshakes")
+    return elapsed
+
+
+def main():
+    """Run both clients against the local HTTPS stand-in."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = _make_cert(tmp)
+        server_ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        server_ctx.load_cert_chain(cert, key)
+        client_ctx = ssl.create_default_context(cafile=cert)
+
+        server = _CountingServer(("127.0.0.1", 0), server_ctx)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"https://127.0.0.1:{server.server_address[1]}/survey/"
+
+        def fresh():
+            with urllib.request.urlopen(url, context=client_ctx) as resp:
+                resp.read()
+
+        pool = http_pool.ConnectionPool(ssl_context=client_ctx)
+
+        def pooled():
+            with http_pool.urlopen(url, pool=pool) as resp:
+                resp.read()
+
+        fresh_s = _run("urllib (fresh)", fresh, server, args.requests)
+        pooled_s = _run("http_pool", pooled, server, args.requests)
+        print(f"speedup: {fresh_s / pooled_s:.2f}x  pool stats: {pool.stats}")
+
+        pool.close_all()
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
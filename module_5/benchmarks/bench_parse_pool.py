@@ -0,0 +1,67 @@
+"""Benchmark: parsing on fetch threads vs. the process parse pool.
+
+Simulates the detail-page stage: a thread pool "downloads" pages (a
+short sleep standing in for network time) and then parses them, either
+on the same thread (current default) or through ``Scraper.parse_pool``
+with 1, 2, 4, ... processes. Uses the BeautifulSoup backend by default
+because that is where the GIL contention shows.
+
+Run from module_5:
+
+    PYTHONPATH=src python benchmarks/bench_parse_pool.py --pages 400
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from bench_parsers import _generated_pages
+from Scraper import parse_pool, parsers
+
+
+def _run(pages, threads, latency, pool=None):
+    """Fetch-and-parse every page; return pages per second."""
+    backend = parsers.get_backend()
+
+    def fetch(page):
+        time.sleep(latency)
+        return backend.page_text(page) if pool is None \
+            else pool.page_text(page)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as fetchers:
+        results = list(fetchers.map(fetch, pages))
+    for result in results:
+        if isinstance(result, Future):
+            result.result()
+    return len(pages) / (time.perf_counter() - start)
+
+
+def main():
+    """Compare in-thread parsing with 1..N parser processes."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.01,
+                        help="simulated download time per page (s)")
+    parser.add_argument("--parser", default="soup")
+    args = parser.parse_args()
+    os.environ["SCRAPE_PARSER"] = args.parser
+
+    survey, _ = _generated_pages(args.pages)
+    baseline = _run(survey, args.threads, args.latency)
+    print(f"{'in-thread':<12} {baseline:8.1f} pages/s")
+    processes = 1
+    while processes <= (os.cpu_count() or 1):
+        pool = parse_pool.ParsePool(processes)
+        pool.page_text("<p>warm up</p>").result()
+        rate = _run(survey, args.threads, args.latency, pool)
+        pool.close()
+        print(f"{processes:>2} processes {rate:8.1f} pages/s  "
+              f"({rate / baseline:.2f}x)")
+        processes *= 2
+
+
+if __name__ == "__main__":
+    main()
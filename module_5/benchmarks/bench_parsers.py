@@ -0,0 +1,126 @@
+"""Benchmark: BeautifulSoup vs. streaming parser backends.
+
+Parses recorded pages with every backend in ``Scraper.parsers`` and
+reports throughput and peak Python memory (tracemalloc) per backend,
+after checking that all backends return identical results.
+
+Result pages come from an HTML archive (``--archive``, written by the
+scraper when SCRAPE_ARCHIVE_DIR is set). Without one, GradCafe-shaped
+survey and result pages are generated so the script runs anywhere.
+
+Run from module_5:
+
+    PYTHONPATH=src python benchmarks/bench_parsers.py --pages 200
+    PYTHONPATH=src python benchmarks/bench_parsers.py --archive html_archive
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from Scraper import archive, parsers
+
+_SURVEY_ROW = """
+  <tr>
+    <td><div class="tw-font-medium">University {n}</div></td>
+    <td><span>Computer Science</span> <svg><path d="M0 0"/></svg>
+        <span>PhD</span></td>
+    <td class="tw-text-gray-500">January {day}, 2026</td>
+    <td><div class="tw-inline-flex">Accepted on {day} Jan</div></td>
+    <td><a href="/survey/?q=cs">Search</a>
+        <a href="/result/{rid}">See More</a></td>
+  </tr>
+  <tr class="tw-border-none">
+    <td colspan="5"><div>Fall 2026</div><div>International</div>
+        <div>GPA 3.{day}</div><p>Interview went well &amp; offer came
+        by email.</p></td>
+  </tr>"""
+
+_RESULT_PAGE = """<!DOCTYPE html><html><head><title>Result {rid}</title>
+<script>window.__DATA__ = {{"id": {rid}}};</script>
+<style>.tw-grid {{ display: grid; }}</style></head><body>
+<nav><a href="/">Home</a><a href="/survey/">Survey</a></nav>
+<main><dl>
+<dt>Institution</dt><dd>University {rid}</dd>
+<dt>Program</dt><dd>Computer Science</dd>
+<dt>Degree Type</dt><dd>PhD</dd>
+<dt>Decision</dt><dd>Accepted on 29 Jan</dd>
+<dt>Undergrad GPA</dt><dd>3.87</dd>
+<dt>GRE General</dt><dd>328</dd>
+<dt>Notes</dt><dd>{notes}</dd>
+</dl></main><footer>&copy; GradCafe</footer></body></html>"""
+
+
+def _survey_page(page: int) -> str:
+    rows = "".join(_SURVEY_ROW.format(n=page * 20 + i, day=i % 28 + 1,
+                                      rid=990000 - page * 20 - i)
+                   for i in range(20))
+    return ("<!DOCTYPE html><html><head><script>var x = 1;</script>"
+            "</head><body><table><thead><tr><th>Institution</th></tr>"
+            f"</thead><tbody>{rows}</tbody></table></body></html>")
+
+
+def _generated_pages(count: int) -> tuple[list[str], list[str]]:
+    survey = [_survey_page(p) for p in range(count)]
+    notes = "Funding offered, visit weekend in March. " * 20
+    results = [_RESULT_PAGE.format(rid=990000 - i, notes=notes)
+               for i in range(count)]
+    return survey, results
+
+
+def _archived_pages(directory: str, count: int) -> list[str]:
+    store = archive.HtmlArchive(directory)
+    return [store.read(entry) for entry in store.entries()[:count]]
+
+
+def _measure(label, func, pages):
+    """Time one untraced pass, then trace a second pass for peak memory."""
+    start = time.perf_counter()
+    for page in pages:
+        func(page)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    for page in pages:
+        func(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size_mb = sum(len(p) for p in pages) / 1e6
+    print(f"  {label:<8} {len(pages) / elapsed:9.1f} pages/s  "
+          f"{size_mb / elapsed:7.2f} MB/s  peak {peak / 1e6:7.2f} MB")
+    return elapsed
+
+
+def _compare(kind, method, pages):
+    """Check parity, then time every backend on the same pages."""
+    if not pages:
+        return
+    size_mb = sum(len(p) for p in pages) / 1e6
+    print(f"{kind}: {len(pages)} pages, {size_mb:.2f} MB")
+    backends = list(parsers.BACKENDS.values())
+    reference = [getattr(backends[0], method)(p) for p in pages]
+    for backend in backends[1:]:
+        if [getattr(backend, method)(p) for p in pages] != reference:
+            raise SystemExit(f"{backend.name} differs from "
+                             f"{backends[0].name} on {kind} pages")
+    times = {b.name: _measure(b.name, getattr(b, method), pages)
+             for b in backends}
+    print(f"  speedup stream vs soup: {times['soup'] / times['stream']:.2f}x")
+
+
+def main():
+    """Run every backend over the same recorded pages."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--archive", default=None,
+                        help="read result pages from this HTML archive")
+    args = parser.parse_args()
+
+    survey, results = _generated_pages(args.pages)
+    if args.archive:
+        results = _archived_pages(args.archive, args.pages)
+    _compare("survey", "survey_rows", survey)
+    _compare("result", "page_text", results)
+
+
+if __name__ == "__main__":
+    main()
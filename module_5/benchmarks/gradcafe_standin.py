@@ -0,0 +1,242 @@
+"""Local GradCafe stand-in: survey and result pages over plain HTTP.
+
+Serves ``/survey/`` (``?page=N``) and ``/result/<id>`` in the markup
+the scraper parses, with configurable page size, response latency and
+error rate, so crawls can be benchmarked without touching the real
+site. Pages are generated (ids counting down from ``--top-id``) or
+replayed from an HTML archive recorded with SCRAPE_ARCHIVE_DIR
+(``--archive``). Responses are gzip'd when the client offers it.
+
+Run from module_5 and point the scraper at it:
+
+    PYTHONPATH=src python benchmarks/gradcafe_standin.py --port 8765 \\
+        --latency-ms 40 --error-rate 0.01
+    SCRAPE_BASE_DOMAIN=http://127.0.0.1:8765 python src/Scraper/scrape.py
+
+The first line printed is the base URL (useful with ``--port 0``).
+"""
+
+import argparse
+import functools
+import gzip
+import html
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from Scraper import archive
+
+_SURVEY_ROW = """
+  <tr>
+    <td><div class="tw-font-medium">{university}</div></td>
+    <td><span>{program}</span> <svg><path d="M0 0"/></svg></td>
+    <td class="tw-text-gray-500">{date}</td>
+    <td><div class="tw-inline-flex">{status}</div></td>
+    <td>{comments} <a href="/survey/?q=x">Search</a>
+        <a href="/result/{rid}">See More</a></td>
+  </tr>
+  <tr class="tw-border-none">
+    <td colspan="5">{detail}</td>
+  </tr>"""
+
+_RESULT_PAGE = """<!DOCTYPE html><html><head><title>Result {rid}</title>
+<script>window.__DATA__ = {{"id": {rid}}};</script></head><body>
+<main><dl>
+<dt>Institution</dt><dd>University {n}</dd>
+<dt>Program</dt><dd>Computer Science</dd>
+<dt>Degree Type</dt><dd>PhD</dd>
+<dt>Degree's Country of Origin</dt><dd>International</dd>
+<dt>Decision</dt><dd>Accepted</dd>
+<dt>Notification</dt><dd>on 01/{day:02d}/2026</dd>
+<dt>Undergrad GPA</dt><dd>3.{day:02d}</dd>
+<dt>GRE General:</dt><dd>32{digit}</dd>
+<dt>Notes</dt><dd>{notes}</dd>
+<dt>Timeline</dt><dd>Fall 2026</dd>
+</dl></main></body></html>"""
+
+_EMPTY_PAGE = "<!DOCTYPE html><html><body><table></table></body></html>"
+_RESULT_PATH = re.compile(r"^/result/(\d+)/?$")
+
+
+class StandIn:
+    """Page source plus the latency/error behaviour of the stand-in."""
+
+    def __init__(self, pages=50, rows_per_page=20, result_kb=8,
+                 top_id=990000, archive_dir=None):
+        self.pages = pages
+        self.rows_per_page = rows_per_page
+        self.result_kb = result_kb
+        self.top_id = top_id
+        self.store = None
+        self.entries = []
+        self.by_id = {}
+        if archive_dir:
+            self.store = archive.HtmlArchive(archive_dir)
+            self.entries = self.store.entries()
+            self.by_id = {e["result_id"]: e for e in self.entries}
+            self.pages = -(-len(self.entries) // rows_per_page)
+
+    # ---------------- generated pages ----------------
+    def _generated_row(self, rid: int) -> str:
+        n = self.top_id - rid
+        day = n % 28 + 1
+        return _SURVEY_ROW.format(
+            university=f"University {n % 300}",
+            program="Computer Science PhD" if n % 3 else "Physics Masters",
+            date=f"January {day}, 2026",
+            status=f"Accepted on {day} Jan" if n % 4 else "Rejected",
+            comments="", rid=rid,
+            detail=(f"<div>Fall 2026</div><div>"
+                    f"{'International' if n % 2 else 'American'}</div>"
+                    f"<div>GPA 3.{day:02d}</div><p>Applied early.</p>"
+                    if n % 5 else "<div>Fall 2026</div>"),
+        )
+
+    def _generated_result(self, rid: int) -> str | None:
+        n = self.top_id - rid
+        if not 0 <= n < self.pages * self.rows_per_page:
+            return None
+        notes = "Funding offered, visit weekend in March. "
+        notes *= max(1, self.result_kb * 1024 // len(notes))
+        return _RESULT_PAGE.format(rid=rid, n=n % 300, day=n % 28 + 1,
+                                   digit=n % 10, notes=notes)
+
+    # ---------------- recorded pages ----------------
+    def _recorded_row(self, entry: dict) -> str:
+        row = entry["row"]
+        return _SURVEY_ROW.format(
+            university=html.escape(row.get("university_raw") or ""),
+            program=html.escape(row.get("program_raw") or ""),
+            date=html.escape(row.get("date_added_raw") or ""),
+            status=html.escape(row.get("status_raw") or ""),
+            comments=html.escape(row.get("comments_raw") or ""),
+            rid=entry["result_id"], detail="",
+        )
+
+    # ---------------- public ----------------
+    @functools.lru_cache(maxsize=4096)
+    def survey(self, page: int) -> str:
+        """Survey page HTML (an empty table past the last page)."""
+        if not 1 <= page <= self.pages:
+            return _EMPTY_PAGE
+        first = (page - 1) * self.rows_per_page
+        if self.store is not None:
+            entries = self.entries[first:first + self.rows_per_page]
+            rows = "".join(self._recorded_row(e) for e in entries)
+        else:
+            rows = "".join(self._generated_row(self.top_id - first - i)
+                           for i in range(self.rows_per_page))
+        return ("<!DOCTYPE html><html><body><table><thead><tr>"
+                f"<th>Institution</th></tr></thead><tbody>{rows}</tbody>"
+                "</table></body></html>")
+
+    @functools.lru_cache(maxsize=4096)
+    def result(self, rid: int) -> str | None:
+        """Result page HTML, or None for an unknown id (404)."""
+        if self.store is None:
+            return self._generated_result(rid)
+        entry = self.by_id.get(rid)
+        return self.store.read(entry) if entry is not None else None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Route GradCafe paths to the StandIn with latency and errors."""
+
+    protocol_version = "HTTP/1.1"
+    wbufsize = 1 << 16
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: str, extra=()):
+        data = body.encode("utf-8")
+        gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+        if gzipped:
+            data = gzip.compress(data, compresslevel=6)
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        for name, value in extra:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+        if random.random() < server.error_rate:
+            self._send(503, "busy", [("Retry-After", "0")])
+            return
+        parts = urlsplit(self.path)
+        match = _RESULT_PATH.match(parts.path)
+        if parts.path.rstrip("/") == "/survey":
+            page = int(parse_qs(parts.query).get("page", ["1"])[0])
+            self._send(200, server.standin.survey(page))
+        elif match and server.standin.result(int(match.group(1))):
+            self._send(200, server.standin.result(int(match.group(1))))
+        else:
+            self._send(404, "not found")
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Threaded HTTP server around one StandIn."""
+
+    daemon_threads = True
+
+    def __init__(self, addr, standin: StandIn, latency_ms=0.0,
+                 jitter_ms=0.0, error_rate=0.0):
+        super().__init__(addr, _Handler)
+        self.standin = standin
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+
+    @property
+    def base_url(self) -> str:
+        """URL to put in SCRAPE_BASE_DOMAIN."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def main():
+    """Serve until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--rows-per-page", type=int, default=20)
+    parser.add_argument("--result-kb", type=int, default=8,
+                        help="approximate size of generated result pages")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of requests answered with 503")
+    parser.add_argument("--top-id", type=int, default=990000,
+                        help="newest generated result_id")
+    parser.add_argument("--archive", default=None,
+                        help="replay pages from this HTML archive")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    standin = StandIn(args.pages, args.rows_per_page, args.result_kb,
+                      args.top_id, args.archive)
+    server = StandInServer((args.host, args.port), standin, args.latency_ms,
+                           args.jitter_ms, args.error_rate)
+    print(server.base_url, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
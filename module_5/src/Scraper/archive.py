@@ -0,0 +1,113 @@
+"""Append-only compressed archive of raw result-page HTML.
+
+Every downloaded detail page is zlib-compressed and appended to the
+current segment file (``seg-00001.bin``, ...). ``index.jsonl`` records
+where each page lives plus the listing-row fields scraped alongside it,
+so ``raw_scraped_data.json`` can be rebuilt with new parsing rules
+without re-crawling (see ``Scraper.reparse``).
+
+Rows whose result page was never downloaded because the survey listing
+had every required field (``Scraper.listing``) are archived too: their
+record holds the result text built from the listing, and their entry
+has ``"source": "listing"`` instead of ``"page"``. Reparse keeps that
+text as it is, so those rows stay in the rebuilt dataset.
+"""
+
+import json
+import os
+import threading
+import zlib
+
+INDEX_FILE = "index.jsonl"
+# Start a new segment once the current one passes this size.
+SEGMENT_BYTES = int(os.getenv("SCRAPE_ARCHIVE_SEGMENT_MB", "64")) * 1024 * 1024
+
+# Shared archive instance for the process (created on first use).
+_ARCHIVE = [None]
+_ARCHIVE_LOCK = threading.Lock()
+
+
+def _segment_name(number: int) -> str:
+    return f"seg-{number:05d}.bin"
+
+
+class HtmlArchive:
+    """Writer/reader for one archive directory."""
+
+    def __init__(self, directory: str, segment_bytes: int = SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        existing = sorted(n for n in os.listdir(directory)
+                          if n.startswith("seg-") and n.endswith(".bin"))
+        self._segment = int(existing[-1][4:9]) if existing else 1
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def put(self, row_data: dict, html_text: str,
+            source: str = "page") -> dict:
+        """Append one page and its listing row; return the index entry.
+
+        source is "page" for result-page HTML and "listing" for result
+        text built from the survey listing.
+        """
+        blob = zlib.compress(html_text.encode("utf-8"), 6)
+        row = {k: v for k, v in row_data.items() if k != "result_text_raw"}
+        with self._lock:
+            seg_path = self._path(_segment_name(self._segment))
+            if os.path.exists(seg_path) and \
+                    os.path.getsize(seg_path) >= self.segment_bytes:
+                self._segment += 1
+                seg_path = self._path(_segment_name(self._segment))
+            with open(seg_path, "ab") as seg:
+                offset = seg.tell()
+                seg.write(blob)
+            entry = {"result_id": row.get("result_id"),
+                     "segment": _segment_name(self._segment),
+                     "offset": offset, "length": len(blob),
+                     "source": source, "row": row}
+            with open(self._path(INDEX_FILE), "a", encoding="utf-8") as idx:
+                idx.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+    def entries(self) -> list[dict]:
+        """Latest index entry per result_id, newest result_id first."""
+        latest = {}
+        try:
+            with open(self._path(INDEX_FILE), "r", encoding="utf-8") as idx:
+                for line in idx:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    latest[entry["result_id"]] = entry
+        except FileNotFoundError:
+            return []
+        return sorted(latest.values(), key=lambda e: -(e["result_id"] or 0))
+
+    def read(self, entry: dict) -> str:
+        """Return the archived HTML for one index entry."""
+        return read_blob(self.directory, entry)
+
+
+def read_blob(directory: str, entry: dict, seg=None) -> str:
+    """Read and decompress one record (optionally from an open segment)."""
+    if seg is None:
+        with open(os.path.join(directory, entry["segment"]), "rb") as f:
+            return read_blob(directory, entry, f)
+    seg.seek(entry["offset"])
+    return zlib.decompress(seg.read(entry["length"])).decode("utf-8")
+
+
+# The scraper opts in by setting SCRAPE_ARCHIVE_DIR.
+def get_archive():
+    """Return the process-wide archive, or None when archiving is off."""
+    directory = os.getenv("SCRAPE_ARCHIVE_DIR")
+    if not directory:
+        return None
+    with _ARCHIVE_LOCK:
+        if _ARCHIVE[0] is None or _ARCHIVE[0].directory != directory:
+            _ARCHIVE[0] = HtmlArchive(directory)
+        return _ARCHIVE[0]
@@ -0,0 +1,184 @@
+"""Fetch result pages for ids missing from the master dataset.
+
+GradCafe result_ids are close to dense, so the gaps between the ids in
+the master index (id_index.py) are mostly posts we never scraped. This
+mode walks those gaps and downloads ``/result/<id>`` directly, in
+parallel, without paging through the survey.
+
+Ids that answer 404/410 were deleted on GradCafe. They are remembered
+in ``<master>.gone`` (one id per line) and skipped by later runs, so
+each dead id costs one request ever.
+
+    python -m Scraper.backfill --limit 500
+
+writes the recovered rows to raw_scraped_data.json for clean.py.
+"""
+
+import argparse
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+
+try:
+    from . import id_index, scrape
+except ImportError:  # pragma: no cover - run directly from Scraper/
+    import id_index
+    import scrape
+
+# Status codes GradCafe answers for deleted posts.
+GONE_STATUSES = frozenset({404, 410})
+
+# Result pages list the institution and program as labelled fields.
+_INSTITUTION_RE = re.compile(r"Institution\s+(.+?)\s+Program\s+(.+?)\s+"
+                             r"Degree\s+Type")
+
+
+def gone_path(master_path: str) -> str:
+    """Path of the negative cache for a master file."""
+    return master_path + ".gone"
+
+
+def result_url(result_id: int) -> str:
+    """Return the result page URL for an id."""
+    return f"{scrape.BASE_DOMAIN}/result/{result_id}"
+
+
+# known is any ascending iterable of ids (an IdIndex iterates its mmap).
+def missing_ranges(known, low: int | None = None, high: int | None = None):
+    """Yield inclusive (first, last) id ranges absent from known.
+
+    Without low/high only the gaps between the smallest and largest
+    known id are returned.
+    """
+    prev = None if low is None else low - 1
+    for result_id in known:
+        if high is not None and result_id > high:
+            break
+        if prev is not None and result_id > prev + 1:
+            yield prev + 1, result_id - 1
+        prev = result_id if prev is None else max(prev, result_id)
+    if prev is not None and high is not None and prev < high:
+        yield prev + 1, high
+
+
+class GoneIds:
+    """Append-only set of ids known to be deleted."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._ids = set()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._ids.update(int(line) for line in f if line.strip())
+        except FileNotFoundError:
+            pass
+
+    def __contains__(self, result_id) -> bool:
+        return result_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add_many(self, result_ids) -> None:
+        """Record newly found deleted ids."""
+        fresh = sorted(set(result_ids) - self._ids)
+        if not fresh:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(f"{rid}\n" for rid in fresh)
+        self._ids.update(fresh)
+
+
+def missing_ids(ranges, gone: GoneIds, limit: int):
+    """Up to limit ids from ranges, newest first, skipping gone ids."""
+    picked = []
+    for first, last in sorted(ranges, reverse=True):
+        for result_id in range(last, first - 1, -1):
+            if len(picked) >= limit:
+                return picked
+            if result_id not in gone:
+                picked.append(result_id)
+    return picked
+
+
+# A result page on its own has no survey row, so the row is built from
+# the page text: clean.py reads everything else from result_text_raw.
+def row_from_result_page(result_id: int, text: str) -> dict:
+    """Build a raw row from a result page's text."""
+    match = _INSTITUTION_RE.search(text or "")
+    return {
+        "result_id": result_id,
+        "university_raw": match.group(1) if match else None,
+        "program_raw": match.group(2) if match else None,
+        "date_added_raw": None,
+        "status_raw": None,
+        "comments_raw": None,
+        "application_url_raw": result_url(result_id),
+        "result_text_raw": text,
+        "term_inferred": scrape.extract_term_from_text(text),
+    }
+
+
+# Returns the row, "gone" for a deleted post, or None when the fetch
+# failed for another reason (retried on the next run).
+def fetch_result(result_id: int):
+    """Download one result page by id."""
+    url = result_url(result_id)
+    try:
+        html_text = scrape.download_html(url)
+    except HTTPError as e:
+        return "gone" if e.code in GONE_STATUSES else None
+    except (URLError, OSError, RuntimeError):
+        return None
+    row = {"result_id": result_id, "application_url_raw": url}
+    return row_from_result_page(result_id, scrape.result_text(row, html_text))
+
+
+# Every request goes to the same host, so the worker count is also the
+# per-host concurrency; download_html paces them (rate_control.py).
+def backfill(master_path: str, limit: int,
+             workers: int = scrape.PER_HOST_LIMIT,
+             low: int | None = None, high: int | None = None) -> tuple:
+    """Fetch up to limit missing ids; return (rows, stats)."""
+    gone = GoneIds(gone_path(master_path))
+    with id_index.IdIndex(master_path) as index:
+        ids = missing_ids(missing_ranges(index, low, high), gone, limit)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(fetch_result, ids))
+
+    rows = [r for r in results if isinstance(r, dict)]
+    dead = [rid for rid, r in zip(ids, results) if r == "gone"]
+    gone.add_many(dead)
+    stats = {"requested": len(ids), "found": len(rows), "gone": len(dead),
+             "failed": len(ids) - len(rows) - len(dead)}
+    return rows, stats
+
+
+def main(argv=None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Fetch result pages for "
+                                                 "ids missing from the "
+                                                 "master dataset.")
+    parser.add_argument("--master", default=scrape.MASTER_DATA_FILE)
+    parser.add_argument("--out", default=scrape.FINAL_FILE)
+    parser.add_argument("--limit", type=int, default=scrape.TARGET,
+                        help="most ids to request in this run")
+    parser.add_argument("--workers", type=int, default=scrape.PER_HOST_LIMIT)
+    parser.add_argument("--low", type=int, default=None,
+                        help="also check ids from here up to the oldest "
+                             "known id")
+    parser.add_argument("--high", type=int, default=None,
+                        help="also check ids above the newest known id")
+    args = parser.parse_args(argv)
+
+    rows, stats = backfill(args.master, args.limit, args.workers,
+                           args.low, args.high)
+    scrape.save_data(rows, args.out)
+    print(f"Backfill: {stats['found']} recovered, {stats['gone']} deleted, "
+          f"{stats['failed']} failed of {stats['requested']} ids. "
+          f"Saved to {args.out}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
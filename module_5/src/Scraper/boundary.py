@@ -0,0 +1,179 @@
+"""Locate survey pages by result_id or date in O(log pages) fetches.
+
+Survey pages list results newest first, so "the page where ids drop to
+X" is monotonic in the page number. ``gallop`` probes pages start, +1,
++2, +4, ... until it overshoots and then binary-searches the last
+interval, fetching only survey pages (never detail pages).
+
+An empty page is not taken as the end of the survey on its own word: a
+transient error page or blank response looks the same. The next page is
+probed too, and only two empty pages in a row mean the end; otherwise
+the empty page is judged by its neighbour, which can only move the
+answer to an earlier (newer) page.
+
+``new`` also lists the ids the survey shows between the boundary and
+the newest known id that are missing from the master index, so holes
+left by earlier runs can be backfilled.
+
+    python -m Scraper.boundary new
+    python -m Scraper.boundary id 950000
+    python -m Scraper.boundary date "January 5, 2026"
+
+prints the page to pass to ``scrape.py --start-page``.
+"""
+
+import argparse
+
+try:
+    from . import id_index, scrape
+except ImportError:  # pragma: no cover - run directly from Scraper/
+    import id_index
+    import scrape
+
+# Upper bound for probing, far past the site's real page count.
+MAX_PAGE = 1 << 20
+# Survey pages from the boundary on that are checked for missing ids.
+GAP_PAGES = 1
+
+
+class PageProbe:
+    """Fetch survey pages once each and summarise their rows."""
+
+    def __init__(self, fetch=None):
+        self.fetch = fetch or scrape.download_html
+        self.seen = {}
+
+    def bounds(self, page: int):
+        """Id and date range (plus ids) of a page, or None without rows."""
+        if page not in self.seen:
+            html_text = self.fetch(scrape.survey_page_url(page))
+            rows, _ = scrape.parse_survey_page(html_text, ())
+            ids = [r["result_id"] for r in rows]
+            dates = [d for d in (scrape.parse_date_added(r["date_added_raw"])
+                                 for r in rows) if d is not None]
+            self.seen[page] = None if not ids else {
+                "ids": ids, "max_id": max(ids), "min_id": min(ids),
+                "newest": max(dates, default=None),
+                "oldest": min(dates, default=None),
+            }
+        return self.seen[page]
+
+    @property
+    def fetches(self) -> int:
+        """Survey pages downloaded so far."""
+        return len(self.seen)
+
+
+def gallop(probe: PageProbe, reached, start: int = 1,
+           max_page: int = MAX_PAGE):
+    """First page >= start for which reached(bounds) holds.
+
+    A page without rows is judged by the next page; two empty pages in
+    a row (past the end of the survey) count as reached. Returns None if
+    no page up to max_page qualifies.
+    """
+    def hit(page):
+        bounds = probe.bounds(page)
+        if bounds is None:
+            bounds = probe.bounds(page + 1)
+        return bounds is None or reached(bounds)
+
+    if hit(start):
+        return start
+    # Exponential phase: lo never qualifies, hi is the next probe.
+    lo, step = start, 1
+    hi = start + step
+    while hi < max_page and not hit(hi):
+        lo, step = hi, step * 2
+        hi = start + step
+    if hi >= max_page:
+        hi = max_page
+        if not hit(hi):
+            return None
+    # Binary phase over (lo, hi].
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if hit(mid):
+            hi = mid
+        else:
+            lo = mid
+    return hi
+
+
+def find_page_for_id(probe: PageProbe, result_id: int, start: int = 1):
+    """First page listing a result_id at or below result_id."""
+    return gallop(probe, lambda b: b["min_id"] <= result_id, start)
+
+
+def find_page_for_date(probe: PageProbe, date, start: int = 1):
+    """First page with an entry added on or before date."""
+    return gallop(probe, lambda b: b["oldest"] is not None
+                  and b["oldest"] <= date, start)
+
+
+def find_new_data_boundary(probe: PageProbe, master_path: str):
+    """First page that reaches data already in the master dataset."""
+    with id_index.IdIndex(master_path) as index:
+        newest = index.newest()
+    if newest is None:
+        return None
+    return find_page_for_id(probe, newest)
+
+
+def find_gaps(probe: PageProbe, master_path: str, page: int,
+              pages: int = GAP_PAGES) -> list[int]:
+    """Ids listed on pages [page, page + pages) that are at or below the
+    newest known id but missing from the master index, newest first."""
+    missing = set()
+    with id_index.IdIndex(master_path) as index:
+        newest = index.newest()
+        if newest is None:
+            return []
+        for number in range(page, page + pages):
+            bounds = probe.bounds(number)
+            if bounds is None:
+                break
+            missing.update(rid for rid in bounds["ids"]
+                           if rid <= newest and rid not in index)
+    return sorted(missing, reverse=True)
+
+
+def main(argv=None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Find survey pages by "
+                                                 "result_id or date.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    new = sub.add_parser("new", help="first page with already known data")
+    new.add_argument("--master", default=scrape.MASTER_DATA_FILE)
+    new.add_argument("--gap-pages", type=int, default=GAP_PAGES,
+                     help="pages from the boundary checked for ids "
+                          "missing from the master")
+    by_id = sub.add_parser("id", help="first page at or below a result_id")
+    by_id.add_argument("result_id", type=int)
+    by_date = sub.add_parser("date", help="first page on or before a date")
+    by_date.add_argument("date", help='e.g. "January 31, 2026"')
+    args = parser.parse_args(argv)
+
+    probe = PageProbe()
+    gaps = []
+    if args.command == "new":
+        page = find_new_data_boundary(probe, args.master)
+        if page is not None:
+            gaps = find_gaps(probe, args.master, page, args.gap_pages)
+    elif args.command == "id":
+        page = find_page_for_id(probe, args.result_id)
+    else:
+        date = scrape.parse_date_added(args.date)
+        if date is None:
+            parser.error(f"unrecognised date: {args.date!r}")
+        page = find_page_for_date(probe, date)
+    print(f"page {page} ({probe.fetches} survey pages fetched)")
+    if gaps:
+        print(f"{len(gaps)} ids missing from the master between the "
+              f"boundary and the newest known id: "
+              f"{' '.join(map(str, gaps))}")
+        print("python -m Scraper.backfill fetches them.")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
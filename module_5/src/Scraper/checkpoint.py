@@ -0,0 +1,133 @@
+"""Incremental JSONL output and crash-safe checkpoints for a crawl.
+
+Rows are appended to ``<output>.jsonl`` one page at a time and nothing
+is kept in memory. After each page is on disk (fsync'd), a small state
+file ``<output>.checkpoint`` is atomically replaced with the next page
+to fetch, the row count and the JSONL size. A resumed run truncates
+the JSONL back to the last checkpoint (dropping a half-written page)
+and continues from the recorded page; if the JSONL is missing or
+shorter than the checkpoint says, it starts fresh instead. The ids it
+already saved are looked up in an on-disk index (``saved_ids``).
+``finish`` streams the JSONL into the JSON array clean.py expects.
+"""
+
+import json
+import os
+
+try:
+    from . import id_index
+except ImportError:  # pragma: no cover - run directly from Scraper/
+    import id_index
+
+
+def _fsync_dir(path: str) -> None:
+    """Flush a directory entry change (rename) to disk where supported."""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return  # e.g. Windows cannot open directories
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class CrawlCheckpoint:
+    """JSONL row sink plus resumable crawl position for one output file."""
+
+    def __init__(self, out_path: str):
+        self.out_path = out_path
+        base = out_path[:-5] if out_path.endswith(".json") else out_path
+        self.rows_path = base + ".jsonl"
+        self.state_path = out_path + ".checkpoint"
+        self.state = self._fresh_state(1)
+
+    @staticmethod
+    def _fresh_state(page: int) -> dict:
+        return {"next_page": page, "rows": 0, "offset": 0}
+
+    def _write_state(self) -> None:
+        """Atomically replace the state file with the current state."""
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.state_path)
+        _fsync_dir(self.state_path)
+
+    def start(self, page: int = 1) -> dict:
+        """Begin a new run: empty the JSONL and checkpoint the start."""
+        with open(self.rows_path, "w", encoding="utf-8"):
+            pass
+        self.state = self._fresh_state(page)
+        self._write_state()
+        return self.state
+
+    def resume(self) -> dict:
+        """Load the last checkpoint, or start fresh when there is none."""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            print("No checkpoint to resume from. Starting fresh.")
+            return self.start()
+        # truncate() would pad a short file with NUL bytes.
+        try:
+            size = os.path.getsize(self.rows_path)
+        except FileNotFoundError:
+            size = -1
+        if size < self.state["offset"]:
+            print(f"{self.rows_path} is missing or shorter than its "
+                  f"checkpoint. Starting fresh.")
+            return self.start()
+        # Rows written after the last checkpoint belong to a page that
+        # will be fetched again.
+        with open(self.rows_path, "a", encoding="utf-8") as f:
+            f.truncate(self.state["offset"])
+        return self.state
+
+    def saved_ids(self) -> id_index.IdIndex:
+        """Index of the result_ids written so far; close it when done.
+
+        The ids stay on disk (``<rows>.jsonl.ids``), so a resumed run
+        does not hold every saved id in memory.
+        """
+        return id_index.IdIndex(self.rows_path)
+
+    def append_page(self, page: int, rows: list[dict]) -> None:
+        """Durably append one page of rows, then checkpoint after it."""
+        with open(self.rows_path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+            offset = f.tell()
+        self.state.update(next_page=page + 1,
+                          rows=self.state["rows"] + len(rows),
+                          offset=offset)
+        self._write_state()
+
+    def finish(self) -> int:
+        """Write the JSON array output from the JSONL; return row count."""
+        count = 0
+        tmp = self.out_path + ".tmp"
+        with open(self.rows_path, "r", encoding="utf-8") as src, \
+                open(tmp, "w", encoding="utf-8") as out:
+            out.write("[")
+            for line in src:
+                row = json.loads(line)
+                out.write(",\n" if count else "\n")
+                # Same layout as json.dump(rows, indent=2).
+                out.write("  " + json.dumps(row, ensure_ascii=False,
+                                            indent=2).replace("\n", "\n  "))
+                count += 1
+            out.write("\n]" if count else "]")
+        os.replace(tmp, self.out_path)
+        # The run is complete; a later --resume starts a new one.
+        os.remove(self.state_path)
+        try:
+            os.remove(id_index.index_path(self.rows_path))
+        except FileNotFoundError:
+            pass
+        return count
@@ -1,15 +1,30 @@
 """Clean scraped GradCafe data and load into JSON/PostgreSQL."""
 
-from urllib.request import urlopen, Request
+from urllib.request import Request
 import getpass
 import json
 import re
+import shutil
 import time
 import os
 from datetime import datetime
 import psycopg
 from psycopg import sql
 
+try:
+    from . import (field_extract, id_index, llm_batching, llm_cache,
+                   llm_dispatch, profiler, warm_start)
+    from .http_pool import urlopen
+except ImportError:  # pragma: no cover - run directly from Scraper/
+    import field_extract
+    import id_index
+    import llm_batching
+    import llm_cache
+    import llm_dispatch
+    import profiler
+    import warm_start
+    from http_pool import urlopen
+
 # Create batches of data to control volume of data being cleaned.
 # Avoids overwhelming the LLM.
 def chunked(lst, size):
@@ -227,7 +242,7 @@ def save_data(final_rows, output_path):
 # Stands by for results to come back, parses the data, and then sends
 # another chunk
 def _llm_post_rows(llm_url: str, rows_payload: list[dict],
-                   timeout_s: int = 300) -> list[dict]:
+                   timeout_s: float = 300, attempts: int = 5) -> list[dict]:
     """Send rows to the local LLM and return cleaned results."""
 
     # Prepare payload for LLM as per format expected in app.py.
@@ -249,7 +264,7 @@ def _llm_post_rows(llm_url: str, rows_payload: list[dict],
 
     # Send HTTP request to LLM to get response. Decode JSON
     # into Python and prints error.
-    for attempt in range(5):
+    for attempt in range(attempts):
         try:
             with urlopen(req, timeout=timeout_s) as resp:
                 text = resp.read().decode("utf-8")
@@ -261,226 +276,269 @@ def _llm_post_rows(llm_url: str, rows_payload: list[dict],
         # Identifies errors after attempts and records error.
         except (RuntimeError, OSError) as e:
             last_err = e
+            # No point sleeping after the last attempt.
+            if attempt + 1 == attempts:
+                break
             wait = 2 ** attempt
             print(f"LLM request failed ({e}). Retrying in {wait}s...")
             time.sleep(wait)
     # Final error that cannot be resolved.
-    raise RuntimeError(f"LLM batch failed after retries: {last_err}")
+    raise RuntimeError(f"LLM batch failed after retries: "
+                       f"{last_err}") from last_err
+
+# Rules-only answer for an input the LLM keeps failing on: the same
+# split as the server's _split_fallback (program before the first
+# comma, " at " or " @ ", university after it).
+def rules_standardize(text):
+    """Return (program, university) for text without the LLM."""
+    s = re.sub(r"\s+", " ", text or "").strip().strip(",")
+    parts = [p.strip() for p in re.split(r",| at | @ ", s) if p.strip()]
+    prog = parts[0].title() if parts else ""
+    uni = re.sub(r"\bOf\b", "of", parts[1].title()) if len(parts) > 1 \
+        else "Unknown"
+    return prog, uni
+
+
+def _rules_row(payload_row):
+    """LLM-shaped output row for one payload row, answered by rules."""
+    prog, uni = rules_standardize(payload_row.get("program"))
+    return {**payload_row, "llm-generated-program": prog,
+            "llm-generated-university": uni, "rules-fallback": True}
+
+
+# Standardize spacing in the raw text fields and isolate the Program
+# data. Returns the "program, university" pair sent to the local LLM.
+def prepare_row(row):
+    """Normalize one raw row in place and return its LLM input string."""
+    row["program_raw"] = clean_whitespace(row.get("program_raw"))
+    row["comments_raw"] = clean_whitespace(row.get("comments_raw"))
+    row["status_raw"] = clean_whitespace(row.get("status_raw"))
+    row["result_text_raw"] = clean_whitespace(row.get("result_text_raw"))
+    row["program_raw"] = clean_program_cell(row.get("program_raw"))
+
+    # Extract university and program names from raw data
+    # and account when info is not available.
+    uni = row.get("university_raw") or ""
+    prog = row.get("program_raw") or ""
+
+    # Pair up the program and university to ensure they're printed
+    # in the outputs as per the assignment sample output.
+    return f"{prog}, {uni}".strip().strip(",")
+
+
+# The LLM server's health check reports a hash of its model, prompt and
+# canonical lists; cached answers are only reused for the same one.
+def llm_model_version(llm_url):
+    """Model version of the LLM server behind llm_url, or None."""
+    health_url = llm_url.rsplit("/", 1)[0] + "/"
+    try:
+        with urlopen(health_url, timeout=5) as resp:
+            info = json.loads(resp.read().decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+    return info.get("model_version") if isinstance(info, dict) else None
+
+
+# Send unique prog-uni pairs to the local LLM in batches (at most
+# chunk_size rows when given) and map each pair to its cleaned
+# (program, university). Pairs answered in an earlier run come from the
+# persistent LLM cache, then from the answers already stored in the
+# master dataset. Callers that standardize many micro-batches ask for
+# the model version once and pass it as version ("" when the server
+# reported none); None asks the health check here.
+def standardize(unique_inputs, llm_url, chunk_size=None, version=None):
+    """Return {input: (program_clean, university_clean)} from the LLM."""
+    if unique_inputs and version is None:
+        version = llm_model_version(llm_url)
+    cache = llm_cache.get_cache(version) if unique_inputs else None
+    cached = cache.lookup(unique_inputs) if cache is not None else {}
+    todo = [s for s in unique_inputs if s not in cached]
+    if cached:
+        print(f"LLM cache: {len(cached)} of {len(unique_inputs)} "
+              f"unique inputs already standardized")
+    # Inputs the LLM already answered for rows in the master dataset.
+    known = warm_start.get_lookup(prepare_row) if todo else {}
+    history = {s: known[s] for s in todo if s in known}
+    if history:
+        todo = [s for s in todo if s not in history]
+        print(f"Warm start: {len(history)} more answered in master data")
+
+    # Package each unique "program, university" string under the key
+    # "program" to match the input format expected by the local LLM.
+    payload_rows = [{"program": s} for s in todo]
+    # Several batches are in flight at once (llm_dispatch.py), so the
+    # server never waits for the next request; results stay in order.
+    # Batch sizes follow the observed latency and a failing batch is
+    # bisected down to the rows that fail (llm_batching.py).
+    sizer = llm_batching.get_sizer()
+    post = llm_batching.bisecting(_llm_post_rows, sizer, _rules_row)
+    results = []
+    with profiler.stage("llm_standardize", len(payload_rows)) as counts:
+        for out in llm_dispatch.dispatch(
+                post, sizer.batches(payload_rows, chunk_size),
+                llm_dispatch.endpoints(llm_url)):
+            results.extend(out)
+            print(f"Progress (unique LLM): "
+                  f"{len(results)} / {len(payload_rows)}")
+        counts["rows_out"] = len(results)
+
+    fresh, answered = {}, dict(history)
+    for src, out in zip(todo, results):
+        fresh[src] = (out.get("llm-generated-program"),
+                      out.get("llm-generated-university"))
+        # Rules answers are not cached: the LLM gets another try next run.
+        if not out.get("rules-fallback"):
+            answered[src] = fresh[src]
+    if cache is not None:
+        cache.store(answered)
+    return {**cached, **history, **fresh}
+
+
+# Extract and clean the required data fields pulled from the raw
+# "notes" section from the URLs in the student applications.
+def extract_row_fields(row):
+    """Fill the regex-extracted fields of one row in place."""
+    # One scan of the text finds what the extract_* functions would.
+    fields = field_extract.extract(row.get("result_text_raw"))
+    decision = fields.decision
+    notification_date = fields.notification_date
+
+    # Standardizes formatting of the word "accepted" by using
+    # the title function (capitalizes first letter and rest of the
+    # word is lower case.
+    if decision is not None:
+        decision = decision.title()
+
+    # Standardizes formatting of decision and notification_date
+    # as per the assignment sample output. If both data fields
+    # exist, they are paired. If only decision exists, then it
+    # will say "Accepted".
+    if decision is not None and notification_date is not None:
+        row["Applicant Status"] = f"{decision} on {notification_date}"
+    elif decision is not None:
+        row["Applicant Status"] = decision
+    else:
+        row["Applicant Status"] = None
+
+    # Populate accepted/rejected with their respective dates in the
+    # dictionary.
+    if decision == "Accepted":
+        row["Accepted: Acceptance Date"] = notification_date
+        row["Rejected: Rejection Date"] = None
+    elif decision == "Rejected":
+        row["Accepted: Acceptance Date"] = None
+        row["Rejected: Rejection Date"] = notification_date
+    else:
+        row["Accepted: Acceptance Date"] = None
+        row["Rejected: Rejection Date"] = None
+
+    row["Masters or PhD (if available)"] = fields.degree_type
+
+    # Format origin of degree to be either Domestic or American
+    # as per assignment sample output.
+    origin = fields.origin
+    if origin == "Domestic":
+        origin = "American"
+
+    # Extra remaining fields and populate dictionary.
+    row["Comments (if available)"] = fields.notes
+    row["International / American Student (if available)"] = origin
+    row["GPA (if available)"] = fields.gpa
+    row["GRE Score (if available)"] = fields.gre_general
+    row["GRE V Score (if available)"] = fields.gre_verbal
+    row["GRE AW (if available)"] = fields.gre_aw
+    term = row.get("term_inferred") or fields.term
+    row["Semester and Year of Program Start (if available)"] = term
+
+
+# Package one cleaned row in the layout of the two required json files.
+def build_final_row(row):
+    """Return the output row for one cleaned row."""
+    prog = row.get("program_clean")
+    uni = row.get("university_clean")
+
+    # Combine the program and university to match sample output.
+    # Account for unavailable data fields.
+    if prog and uni:
+        combined_program = f"{prog}, {uni}"
+    elif prog:
+        combined_program = prog
+    elif uni:
+        combined_program = uni
+    else:
+        combined_program = None
+
+    return {
+        "result_id": row.get("result_id"),
+        "program": combined_program,
+        "comments": row.get("Comments (if available)"),
+        "date_added": row.get("date_added_raw"),
+        "url": row.get("application_url_raw"),
+        "status": row.get("Applicant Status"),
+        "term": row.get("Semester and Year of Program Start "
+                        "(if available)"),
+        "US/International": row.get("International / American Student "
+                                    "(if available)"),
+        "GRE Score": normalize_zero(row.get("GRE Score "
+                                            "(if available)")),
+        "GRE V Score": normalize_zero(row.get("GRE V Score "
+                                              "(if available)")),
+        "Degree": row.get("Masters or PhD (if available)"),
+        "GPA": normalize_zero(row.get("GPA (if available)")),
+        "GRE AW": normalize_zero(row.get("GRE AW (if available)")),
+        "llm-generated-program": row.get("program_clean"),
+        "llm-generated-university": row.get("university_clean"),
+    }
+
+
+# applicant_data.json does not have the llm-generated program and
+# university.
+def without_llm_fields(final_row):
+    """Copy of final_row without the llm-generated fields."""
+    row = dict(final_row)
+    row.pop("llm-generated-program", None)
+    row.pop("llm-generated-university", None)
+    return row
+
 
 # Takes raw dataset rows from scrape.py, extracts desired entry
 # text, extracts desired entry text from "Notes" section inside
 # student URL links, sends program and university names to local
-# LLM (app.py) to clean, and produces two json outputs.
+# LLM (app.py) to clean, and produces two json outputs. Each step is
+# a per-row function, so pipeline.py can run them on rows as they
+# are scraped.
 def clean_data(extracted_fields_raw,
                llm_url="http://127.0.0.1:8000/standardize"):
     """Clean raw rows and return cleaned outputs."""
 
-    # Standardize formatting by calling clean_whitespace to remove
-    # unnecessary whitespace and standardize spacing.
-    for row in extracted_fields_raw:
-        row["program_raw"] = clean_whitespace(row.get("program_raw"))
-        row["comments_raw"] = clean_whitespace(row.get("comments_raw"))
-        row["status_raw"] = clean_whitespace(row.get("status_raw"))
-        row["result_text_raw"] = clean_whitespace(row.get("result_text_raw"))
-
-    # Extract and clean Program data
-    for row in extracted_fields_raw:
-        row["program_raw"] = clean_program_cell(row.get("program_raw"))
-
-    # Prepare and package program and university data to send to app.py
-    # Execute deduplication to ensure program-university pairs are sent
-    # to llm only once.
-    llm_inputs = []
-
-    # Create a dictionary where the key is a program-university pair.
-    # The value is a list of row indices where that pair appears.
-    # This ensures only one program-uni pair goes into the local LLM.
-    # Once cleaned, results are mapped back to all matching rows.
-    llm_key_to_indices = {}
-
-    # Iterate over all scraped rows of uncleaned data. Enumerate
-    # to add an index for mapping later in code.
-    for i, row in enumerate(extracted_fields_raw):
-        # Extract university and program names from raw data
-        # and account when info is not available.
-        uni = row.get("university_raw") or ""
-        prog = row.get("program_raw") or ""
-
-        # Pair up the program and university to ensure they're printed
-        # in the outputs as per the assignment sample output.
-        llm_input_str = f"{prog}, {uni}".strip().strip(",")
-
-        llm_inputs.append(llm_input_str)
-
-        # This facilitates deduplication to ensure only one prog-uni
-        # pair gets sent to the local llm. This portion of code
-        # tracks all the rows in which a unique program-university
-        # pair exists.
-        if llm_input_str not in llm_key_to_indices:
-            llm_key_to_indices[llm_input_str] = []
-        llm_key_to_indices[llm_input_str].append(i)
-
-    # The keys are the prog-uni pairs. keys() method pulls out all
-    # these pairs and list() puts them in a list. These will be the
-    # deduplicated prog-uni pairs that are sent into the local llm.
-    unique_llm_inputs = list(llm_key_to_indices.keys())
+    # One LLM input string per row, in row order. The regex fields only
+    # read result_text_raw, so they are extracted here too.
+    with profiler.stage("regex_clean", len(extracted_fields_raw)) as counts:
+        llm_inputs = [prepare_row(row) for row in extracted_fields_raw]
+        for row in extracted_fields_raw:
+            extract_row_fields(row)
+        counts["rows_out"] = len(llm_inputs)
+
+    # Deduplication: each program-university pair goes into the local
+    # LLM once; results are mapped back to all matching rows.
+    unique_llm_inputs = list(dict.fromkeys(llm_inputs))
 
     # Print total inputs vs unique (deduped) inputs to show how much the
     # LLM workload is reduced by deduplication.
     print(f"LLM inputs total: {len(llm_inputs)}")
     print(f"LLM inputs unique (deduped): {len(unique_llm_inputs)}")
 
-    # Package each unique "program, university" string under
-    # the key "program"
-    # to match the input format expected by the local LLM (app.py).
-    unique_payload_rows = [{"program": s} for s in unique_llm_inputs]
-
-    # Through trial and error, batch size of 100 allows clean run of all
-    # 30,000 entries.
-    chunk_size = 100
-    # Results aligned with unique_payload_rows order
-    unique_results = []
-
-    # Call def chunked() to send batches of 100 of the prog-uni pairs
-    # to the local LLM. Call def _llm_post_rows to receive the cleaned
-    # batch and then add to unique_results. Print progress check.
-    for batch in chunked(unique_payload_rows, chunk_size):
-        cleaned_batch = _llm_post_rows(llm_url, batch, timeout_s=300)
-        unique_results.extend(cleaned_batch)
-        print(f"Progress (unique LLM): "
-              f"{len(unique_results)} / {len(unique_payload_rows)}")
-
-    # Create a lookup of original prog-uni pairs to cleaned pairs.
-    # This lets us map cleaned results back to all matching rows.
-    llm_lookup = {}
-    for i, row_out in enumerate(unique_results):
-        # Connect original prog-uni pair to the llm-cleaned pair.
-        src_key = unique_llm_inputs[i]
-        prog_clean = row_out.get("llm-generated-program")
-        uni_clean = row_out.get("llm-generated-university")
-        # Store original prog-uni and post-llm cleaned prog uni-pair
-        # into dictionary
-        llm_lookup[src_key] = (prog_clean, uni_clean)
+    # Batch sizes adapt to the LLM's speed (llm_batching.py).
+    llm_lookup = standardize(unique_llm_inputs, llm_url)
 
     # Use llm lookup dictionary to produce the llm-cleaned programs
     # and universities
-    for i, src in enumerate(llm_inputs):
-        prog_clean, uni_clean = llm_lookup.get(src, (None, None))
-        extracted_fields_raw[i]["program_clean"] = prog_clean
-        extracted_fields_raw[i]["university_clean"] = uni_clean
-
-    # This block of code is going to extract and clean the required
-    # data fields pulled from the raw "notes" section from the URLs
-    # in the student applications.
-    for row in extracted_fields_raw:
-        text = row.get("result_text_raw")
-
-        # Call extract_decision() function to pull out decision text if
-        # student was accepted or not. Same for notification_date
-        decision = extract_decision(text)
-        notification_date = extract_notification_date(text)
-
-        # Standardizes formatting of the word "accepted" by using
-        # the title function (capitalizes first letter and rest of the
-        # word is lower case.
-        if decision is not None:
-            decision = decision.title()
-
-        # Standardizes formatting of decision and notification_date
-        # as per the assignment sample output. If both data fields
-        # exist, they are paired. If only decision exists, then it
-        # will say "Accepted".
-        # "Accepted"
-        if decision is not None and notification_date is not None:
-            row["Applicant Status"] = f"{decision} on {notification_date}"
-        elif decision is not None:
-            row["Applicant Status"] = decision
-        else:
-            row["Applicant Status"] = None
-
-        # Populate accepted/rejected with their respective dates in the
-        # dictionary.
-        if decision == "Accepted":
-            row["Accepted: Acceptance Date"] = notification_date
-            row["Rejected: Rejection Date"] = None
-        elif decision == "Rejected":
-            row["Accepted: Acceptance Date"] = None
-            row["Rejected: Rejection Date"] = notification_date
-        else:
-            row["Accepted: Acceptance Date"] = None
-            row["Rejected: Rejection Date"] = None
-
-        # call extract_degree_type() to extract type of degree text
-        row["Masters or PhD (if available)"] = extract_degree_type(text)
-
-        # Format origin of degree to be either Domestic or American
-        # as per assignment sample output.
-        origin = extract_country_origin(text)
-        if origin == "Domestic":
-            origin = "American"
-
-        # Extra remaining fields and populate dictionary.
-        row["Comments (if available)"] = extract_notes(text)
-        row["International / American Student (if available)"] = origin
-        row["GPA (if available)"] = extract_undergrad_gpa(text)
-        row["GRE Score (if available)"] = extract_gre_general(text)
-        row["GRE V Score (if available)"] = extract_gre_verbal(text)
-        row["GRE AW (if available)"] = extract_gre_aw(text)
-        term = row.get("term_inferred") or extract_term_year(text)
-        row["Semester and Year of Program Start (if available)"] = term
-
-    # Final step to package data and print the two required json files.
-    final_rows = []
-
-    for row in extracted_fields_raw:
-
-        prog = row.get("program_clean")
-        uni = row.get("university_clean")
-
-        # Combine the program and university to match sample output.
-        # Account for unavailable data fields.
-        if prog and uni:
-            combined_program = f"{prog}, {uni}"
-        elif prog:
-            combined_program = prog
-        elif uni:
-            combined_program = uni
-        else:
-            combined_program = None
-
-        # Final rows required to generate the two required json files.
-        final_row = {
-            "result_id": row.get("result_id"),
-            "program": combined_program,
-            "comments": row.get("Comments (if available)"),
-            "date_added": row.get("date_added_raw"),
-            "url": row.get("application_url_raw"),
-            "status": row.get("Applicant Status"),
-            "term": row.get("Semester and Year of Program Start "
-                            "(if available)"),
-            "US/International": row.get("International / American Student "
-                                        "(if available)"),
-            "GRE Score": normalize_zero(row.get("GRE Score "
-                                                "(if available)")),
-            "GRE V Score": normalize_zero(row.get("GRE V Score "
-                                                  "(if available)")),
-            "Degree": row.get("Masters or PhD (if available)"),
-            "GPA": normalize_zero(row.get("GPA (if available)")),
-            "GRE AW": normalize_zero(row.get("GRE AW (if available)")),
-            "llm-generated-program": row.get("program_clean"),
-            "llm-generated-university": row.get("university_clean"),
-        }
+    for row, src in zip(extracted_fields_raw, llm_inputs):
+        row["program_clean"], row["university_clean"] = \
+            llm_lookup.get(src, (None, None))
 
-        final_rows.append(final_row)
-
-    # applicant_data.json does not have the llm-generated program
-    # and university. Use .pop() to remove them.
-    final_rows_no_llm = []
-    for r in final_rows:
-        r2 = dict(r)
-        r2.pop("llm-generated-program", None)
-        r2.pop("llm-generated-university", None)
-        final_rows_no_llm.append(r2)
+    final_rows = [build_final_row(row) for row in extracted_fields_raw]
+    final_rows_no_llm = [without_llm_fields(r) for r in final_rows]
 
     # Verify the same number of rows were produced.
     print(f"Final rows written: "
@@ -517,36 +575,69 @@ def _to_float(x):
     except (ValueError, TypeError):
         return None
 
-# Add newly scraped data to the oriignal 30K entry JSON file.
-# Add newly scraped data to the original master JSON file.
+def _next_token(f):
+    """Return the next non-whitespace character of f ("" at the end)."""
+    for char in iter(lambda: f.read(1), ""):
+        if not char.isspace():
+            return char
+    return ""
+
+# Write the new rows, then copy the existing master array behind them
+# as text. The old rows are never parsed, so prepending costs the same
+# however large the master file is. Output keeps json.dump's indent=2
+# layout.
+def _prepend_rows_to_master(new_rows, master_path):
+    """Rewrite master_path as new_rows followed by its existing rows."""
+    tmp = master_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as out:
+        out.write("[")
+        for i, row in enumerate(new_rows):
+            out.write(",\n  " if i else "\n  ")
+            out.write(json.dumps(row, ensure_ascii=False, indent=2)
+                      .replace("\n", "\n  "))
+        copied = False
+        try:
+            with open(master_path, "r", encoding="utf-8") as old:
+                # Old rows follow the opening "["; "]" means there are none.
+                if _next_token(old) == "[":
+                    char = _next_token(old)
+                    if char not in ("", "]"):
+                        out.write(",\n  " if new_rows else "\n  ")
+                        out.write(char)
+                        shutil.copyfileobj(old, out)
+                        copied = True
+        except FileNotFoundError:
+            pass
+        if not copied:
+            out.write("\n]" if new_rows else "]")
+    os.replace(tmp, master_path)
+
+# Add newly scraped data to the original master JSON file. Duplicates
+# are checked against the master's sidecar id index (id_index.py)
+# instead of loading all 30K+ rows, and the index is updated in place.
 def append_rows_to_master(new_rows,
                           master_path="llm_extend_applicant_data.json"):
     """Append new rows to the master JSON file with dedupe."""
 
-    master_rows = load_data(master_path)
+    with id_index.IdIndex(master_path) as existing_ids:
+        rows_to_add = []
+        added_ids = set()
 
-    existing_ids = {
-        r.get("result_id")
-        for r in master_rows
-        if r.get("result_id") is not None
-    }
+        # Only add rows not already in master file
+        for r in new_rows:
+            rid = r.get("result_id")
+            if rid is None:
+                continue
 
-    rows_to_add = []
+            if rid not in existing_ids and rid not in added_ids:
+                rows_to_add.append(r)
+                added_ids.add(rid)
 
-    # Only add rows not already in master file
-    for r in new_rows:
-        rid = r.get("result_id")
-        if rid is None:
-            continue
-
-        if rid not in existing_ids:
-            rows_to_add.append(r)
-            existing_ids.add(rid)
+        # Put newest rows at the top
+        if rows_to_add or not os.path.exists(master_path):
+            _prepend_rows_to_master(rows_to_add, master_path)
+            existing_ids.add(added_ids)
 
-    # Put newest rows at the top
-    master_rows = rows_to_add + master_rows
-
-    save_data(master_rows, master_path)
     print(f"Appended {len(rows_to_add)} new rows to master JSON")
 
     # Return newly added rows
@@ -560,34 +651,24 @@ def append_rows_to_master(new_rows,
 MAX_INSERT_ROWS = 10000
 
 
-def insert_rows_into_postgres(rows, table_name="applicants"):
-    """Insert cleaned rows into PostgreSQL with upsert."""
-
-    # If there is nothing new to insert, stop early.
-    if not rows:
-        print("No new rows to insert into Postgres.")
-        return 0
-
-    # Enforce maximum allowed limit per call (Step 2 requirement).
-    rows = rows[:MAX_INSERT_ROWS]
-
+def connect_postgres():
+    """Open a PostgreSQL connection from the PG* environment variables."""
     # Database connection settings (Step 3: no hard-coded credentials).
     # All values from env vars; PGUSER falls back to OS user if unset.
-    dbname = os.getenv("PGDATABASE", "module_3")
-    user = os.getenv("PGUSER") or getpass.getuser()
-    password = os.getenv("PGPASSWORD")  # often None locally
-    host = os.getenv("PGHOST", "localhost")
-    port = int(os.getenv("PGPORT", "5432"))
-
-    # Connect to PostgreSQL
-    conn = psycopg.connect(
-        dbname=dbname,
-        user=user,
-        password=password,
-        host=host,
-        port=port,
+    return psycopg.connect(
+        dbname=os.getenv("PGDATABASE", "module_3"),
+        user=os.getenv("PGUSER") or getpass.getuser(),
+        password=os.getenv("PGPASSWORD"),  # often None locally
+        host=os.getenv("PGHOST", "localhost"),
+        port=int(os.getenv("PGPORT", "5432")),
     )
 
+
+# Upsert rows with an open cursor; the caller owns the connection and
+# commits. The streaming pipeline keeps one connection for its whole
+# load stage and calls this once per batch.
+def insert_rows(cur, rows, table_name="applicants"):
+    """Upsert cleaned rows with cur and return the affected row count."""
     # SQL built with Identifier so table name is safely quoted (no injection).
     # Values stay parameterized via %(name)s; only the table name is composed.
     tbl = sql.Identifier(table_name)
@@ -641,6 +722,51 @@ def insert_rows_into_postgres(rows, table_name="applicants"):
         EXCLUDED.llm_generated_university)
     """).format(t=tbl)
 
+    inserted = 0
+    for r in rows:
+        # Skip rows that do not have a unique result_id.
+        rid = r.get("result_id")
+        if rid is None:
+            continue
+
+        # Convert JSON data into database-ready values
+        params = {
+            "result_id": rid,
+            "program": r.get("program"),
+            "comments": r.get("comments"),
+            "date_added": _parse_date(r.get("date_added")),
+            "url": r.get("url"),
+            "status": r.get("status"),
+            "term": r.get("term"),
+            "us_or_international": r.get("US/International"),
+            "gpa": _to_float(r.get("GPA")),
+            "gre": _to_float(r.get("GRE Score")),
+            "gre_v": _to_float(r.get("GRE V Score")),
+            "gre_aw": _to_float(r.get("GRE AW")),
+            "degree": r.get("Degree"),
+            "llm_generated_program": r.get("llm-generated-program"),
+            "llm_generated_university": r.get("llm-generated-university"),
+        }
+
+        cur.execute(stmt, params)
+        inserted += cur.rowcount
+    return inserted
+
+
+def insert_rows_into_postgres(rows, table_name="applicants"):
+    """Insert cleaned rows into PostgreSQL with upsert."""
+
+    # If there is nothing new to insert, stop early.
+    if not rows:
+        print("No new rows to insert into Postgres.")
+        return 0
+
+    # Enforce maximum allowed limit per call (Step 2 requirement).
+    rows = rows[:MAX_INSERT_ROWS]
+
+    # Connect to PostgreSQL
+    conn = connect_postgres()
+
     inserted = 0
 
     try:
@@ -649,43 +775,12 @@ def insert_rows_into_postgres(rows, table_name="applicants"):
             # Cursor is used to execute SQL commands
             with conn.cursor() as cur:
 
-                # Insert each cleaned row
-                for i, r in enumerate(rows, start=1):
-                    # Skip rows that do not have a unique result_id.
-                    rid = r.get("result_id")
-                    if rid is None:
-                        continue
-
-                    # Convert JSON data into database-ready values
-                    params = {
-                        "result_id": rid,
-                        "program": r.get("program"),
-                        "comments": r.get("comments"),
-                        "date_added": _parse_date(r.get("date_added")),
-                        "url": r.get("url"),
-                        "status": r.get("status"),
-                        "term": r.get("term"),
-                        "us_or_international": r.get("US/International"),
-                        "gpa": _to_float(r.get("GPA")),
-                        "gre": _to_float(r.get("GRE Score")),
-                        "gre_v": _to_float(r.get("GRE V Score")),
-                        "gre_aw": _to_float(r.get("GRE AW")),
-                        "degree": r.get("Degree"),
-                        "llm_generated_program": r.get(
-                            "llm-generated-program"
-                        ),
-                        "llm_generated_university": r.get(
-                            "llm-generated-university"
-                        ),
-                    }
-
-                    cur.execute(stmt, params)
-                    inserted += cur.rowcount
-
-                    # Progress print.
-                    if i % 100 == 0 or i == len(rows):
-                        print(f"Postgres progress: {i}/{len(rows)} "
-                              f"rows processed")
+                # Insert in steps of 100 rows, printing progress.
+                for i in range(0, len(rows), 100):
+                    inserted += insert_rows(cur, rows[i:i + 100], table_name)
+                    done = min(i + 100, len(rows))
+                    print(f"Postgres progress: {done}/{len(rows)} "
+                          f"rows processed")
 
         print(f"Inserted {inserted} new rows into PostgreSQL.")
         return inserted
@@ -702,16 +797,25 @@ def main():
     )
 
     # Update master JSON file
-    append_rows_to_master(
-        final_rows,
-        "llm_extend_applicant_data.json"
-    )
+    with profiler.stage("master_append", len(final_rows)) as counts:
+        counts["rows_out"] = len(append_rows_to_master(
+            final_rows,
+            "llm_extend_applicant_data.json"
+        ))
 
     # Keeping original final output for mod_2 just in case.
     save_data(final_rows_no_llm, "applicant_data.json")
 
     # Push only new rows to database
-    insert_rows_into_postgres(final_rows)
+    with profiler.stage("postgres_insert", len(final_rows)) as counts:
+        counts["rows_out"] = insert_rows_into_postgres(final_rows)
+
+    cache = llm_cache.current_cache()
+    if cache is not None:
+        print(cache.stats_report())
+    sizer = llm_batching.current_sizer()
+    if sizer is not None:
+        print(sizer.stats_report())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,199 @@
+"""Asyncio crawl engine for the GradCafe survey paginator."""
+
+import asyncio
+import os
+import time
+from urllib.error import HTTPError, URLError
+
+try:
+    from . import listing, parse_pool, rate_control, scrape, telemetry
+except ImportError:  # pragma: no cover - run directly from Scraper/
+    import listing
+    import parse_pool
+    import rate_control
+    import scrape
+    import telemetry
+
+# download_html paces every request through the adaptive controller in
+# rate_control.py. CRAWL_REQUESTS_PER_SECOND adds an optional fixed
+# ceiling on top of it (0 = none).
+REQUESTS_PER_SECOND = float(os.getenv("CRAWL_REQUESTS_PER_SECOND", "0"))
+
+# Same give-up rule as the scrape.py __main__ loop.
+MAX_EMPTY_PAGES = 5
+
+
+class RateBudget:
+    """Space requests out so the whole crawl stays under a fixed rate."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+
+    # Hand out the next free send slot. Nothing awaits between reading
+    # and updating _next, so no lock is needed inside one event loop.
+    def reserve(self) -> float:
+        """Claim the next slot and return how long to wait for it."""
+        now = time.monotonic()
+        start = max(now, self._next)
+        self._next = start + self.interval
+        return start - now
+
+    async def acquire(self) -> None:
+        """Wait until this caller may send its request."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# Every download goes through the budget and then runs the blocking
+# download_html in a worker thread so the event loop keeps going.
+async def _fetch(budget: RateBudget, url: str) -> str:
+    """Download one URL under the shared rate budget."""
+    await budget.acquire()
+    return await asyncio.to_thread(scrape.download_html, url)
+
+
+# Hand a page to the parser processes. Submitting blocks while the
+# pool's queue is full, so it runs in a thread to keep the loop free.
+async def _parse_in_pool(parsing, method: str, html_text: str):
+    """Run a parser backend method in the parse pool."""
+    future = await asyncio.to_thread(getattr(parsing, method), html_text)
+    return await asyncio.wrap_future(future)
+
+
+# Download the detail pages for one survey page. Rows are filled in
+# place, so their order never changes; rows already filled from the
+# survey listing are skipped.
+async def _fetch_details(budget: RateBudget, rows: list[dict],
+                         workers: int) -> None:
+    """Fill result_text_raw for rows with at most `workers` in flight."""
+    slots = asyncio.Semaphore(max(1, workers))
+    parsing = parse_pool.get_parse_pool()
+
+    async def one(row_data):
+        async with slots:
+            try:
+                html_text = await _fetch(budget,
+                                         row_data["application_url_raw"])
+                # Parsing and archive writes block, so they run on a
+                # worker thread and the event loop keeps downloading.
+                if parsing is None:
+                    text = await asyncio.to_thread(scrape.result_text,
+                                                   row_data, html_text)
+                else:
+                    await asyncio.to_thread(scrape.archive_page, row_data,
+                                            html_text)
+                    text = await _parse_in_pool(parsing, "page_text",
+                                                html_text)
+                row_data["result_text_raw"] = text
+            # Guards against links that fail or server/network failures.
+            except (HTTPError, URLError, OSError):
+                row_data["result_text_raw"] = None
+            # A page the parser fails on is skipped the same way.
+            except parse_pool.PARSE_ERRORS as e:
+                print(f"Could not parse "
+                      f"{row_data['application_url_raw']}: {e!r}")
+                row_data["result_text_raw"] = None
+
+    await asyncio.gather(*(one(row_data)
+                           for row_data in listing.rows_to_fetch(rows)))
+
+
+def _start_page_fetch(budget: RateBudget, page: int) -> asyncio.Task:
+    """Start downloading a survey page in the background."""
+    return asyncio.create_task(_fetch(budget, scrape.survey_page_url(page)))
+
+
+# The survey HTML for page N+1 downloads while the detail pages of page
+# N are still in flight. Parsing stays strictly in page order so rows
+# from page N are in known_ids before page N+1 is checked, exactly like
+# the serial loop. Cancelling the task running crawl() cancels the
+# prefetch and any detail downloads that are still pending.
+# With a checkpoint.CrawlCheckpoint as progress, each finished page is
+# appended to its JSONL file instead of being kept, rows already saved
+# count toward target, and the returned list is empty. skip_ids (rows
+# saved before a resume) are left out without stopping the crawl.
+async def crawl(start_page: int = 1, target: int = 1000,
+                known_ids: set | None = None, *,
+                rate: float = REQUESTS_PER_SECOND,
+                workers: int = scrape.DETAIL_WORKERS,
+                progress=None, skip_ids=frozenset()) -> list[dict]:
+    """Crawl survey pages from start_page until target rows or known data."""
+    known_ids = set() if known_ids is None else known_ids
+    budget = RateBudget(rate)
+    all_rows = []
+    collected = progress.state["rows"] if progress is not None else 0
+    page = start_page
+    empty_pages = 0
+    pending = _start_page_fetch(budget, page)
+
+    try:
+        while collected < target:
+            page_url = scrape.survey_page_url(page)
+            print("Scraping:", page_url)
+
+            # A failed page is skipped and slows the request rate.
+            try:
+                html_text = await pending
+            except (HTTPError, URLError, OSError) as e:
+                rate_control.get_controller().failure()
+                print(f"Page scrape failed ({page_url}): {e}. "
+                      f"Slowing down...")
+                page += 1
+                pending = _start_page_fetch(budget, page)
+                continue
+
+            parsing = parse_pool.get_parse_pool()
+            tr_rows = None if parsing is None else \
+                await _parse_in_pool(parsing, "survey_rows", html_text)
+            page_rows, stop_now = scrape.parse_survey_page(
+                html_text, known_ids, tr_rows, skip_ids)
+            if stop_now and not page_rows:
+                print("Reached previously scraped data. Stopping.")
+                break
+
+            # Account for the possibility of empty pages; like a failed
+            # page, each one slows the request rate.
+            if not page_rows:
+                empty_pages += 1
+                print(f"No usable rows on {page_url}. Slowing down... "
+                      f"({empty_pages}/{MAX_EMPTY_PAGES})")
+                if empty_pages >= MAX_EMPTY_PAGES:
+                    print("Too many empty pages in a row. Exiting early.")
+                    break
+                rate_control.get_controller().failure()
+                page += 1
+                pending = _start_page_fetch(budget, page)
+                continue
+            empty_pages = 0
+
+            # Overlap: start the next survey page before the details.
+            pending = None
+            if not stop_now and collected + len(page_rows) < target:
+                pending = _start_page_fetch(budget, page + 1)
+
+            # Rows past the target are never saved; skip their details.
+            page_rows = page_rows[:target - collected]
+            await _fetch_details(budget, page_rows, workers)
+            if progress is None:
+                all_rows.extend(page_rows)
+            else:
+                # fsync off the event loop thread.
+                await asyncio.to_thread(progress.append_page, page,
+                                        page_rows)
+            collected += len(page_rows)
+            known_ids.update(r["result_id"] for r in page_rows)
+            # Live view for the Flask app (no-op without a report file).
+            telemetry.publish()
+            print("Total entries so far:", collected)
+
+            if stop_now:
+                print("Reached previously scraped data. Stopping.")
+                break
+            page += 1
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+
+    return all_rows
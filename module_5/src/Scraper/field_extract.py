@@ -0,0 +1,88 @@
+"""Every regex field of ``result_text_raw`` from one scan of the text.
+
+``clean.extract_row_fields`` used to call ten ``extract_*`` functions,
+each looking up its pattern in ``re``'s cache and searching the whole
+text again. ``_SCAN`` joins their patterns into one precompiled regex:
+each alternative is the word the pattern starts with (``Decision``,
+``Notification``, ``Degree``, ``Notes``, ``Undergrad``, ``GRE``,
+``Analytical``) followed by the rest of the pattern as a lookahead, so
+``extract`` walks the text once, stopping only where some field
+matches, with the field named by its group. Only the word is consumed
+and the words never overlap, so no match is skipped; the first match of
+each field wins, as with ``re.search``, and the answers are the same as
+the ``extract_*`` functions'.
+
+The term pattern is case-insensitive, which ``re`` scans slowly, so the
+term is found by its year instead: a match always ends in whitespace
+and ``20dd``, so the scan also stops at such a ``20`` and the term word
+is checked just before the whitespace.
+"""
+
+import re
+from collections import namedtuple
+
+# One row's fields, as the matching extract_* function returns them.
+ResultFields = namedtuple("ResultFields", [
+    "decision", "notification_date", "degree_type", "origin", "notes",
+    "gpa", "gre_general", "gre_verbal", "gre_aw", "term",
+], defaults=[None] * 10)
+
+_SCAN = re.compile(
+    r"Decision(?=\s+(?P<decision>.+?)\s+Notification)"
+    r"|Notification(?=\s+on\s+(?P<notification_date>\d{2}/\d{2}/\d{4}))"
+    r"|Degree(?=\s+Type\s+(?P<degree_type>[A-Za-z\.]+))"
+    r"|Degree(?='s\s+Country\s+of\s+Origin\s+(?P<origin>[A-Za-z]+))"
+    r"|Notes(?=\s+(?P<notes>(?s:.*?))\s+Timeline)"
+    r"|Undergrad(?=\s+GPA\s+(?P<gpa>[0-4]\.\d{1,2}))"
+    r"|GRE(?=\s+General:\s*(?P<gre_general>[0-9]+))"
+    r"|GRE(?=\s+Verbal:\s*(?P<gre_verbal>[0-9]+))"
+    r"|Analytical(?=\s+Writing:\s*(?P<gre_aw>[0-6](?:\.\d{1,2})?))"
+    # Every alternative starts with a literal, which re skips to fast.
+    r"|20(?<=\s20)(?=(?P<term>)\d{2}\b)"
+)
+_TERM = re.compile(r"\b(Spring|Summer|Fall|Autumn|Winter)\s+(20\d{2})\b",
+                   re.IGNORECASE)
+# Lengths of the term words (case folding keeps the length).
+_TERM_LENGTHS = (4, 6)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _term_before(text: str, year: int):
+    """The term match whose year starts at index year, or None."""
+    gap = year
+    while gap > 0 and text[gap - 1].isspace():
+        gap -= 1
+    for length in _TERM_LENGTHS:
+        if gap >= length:
+            match = _TERM.match(text, gap - length)
+            if match and match.start(2) == year:
+                return match
+    return None
+
+
+def extract(text) -> ResultFields:
+    """All extract_* fields of text, found in one scan."""
+    if text is None:
+        return ResultFields()
+    found = {}
+    for hit in _SCAN.finditer(text):
+        name = hit.lastgroup
+        if name in found:
+            continue
+        if name == "term":
+            match = _term_before(text, hit.start())
+            if match is None:
+                continue
+            term = match.group(1).title()
+            if term == "Autumn":
+                term = "Fall"
+            found[name] = f"{term} {match.group(2)}"
+        else:
+            found[name] = hit.group(name)
+        if len(found) == len(ResultFields._fields):
+            break
+    if "decision" in found:
+        found["decision"] = found["decision"].strip()
+    if "notes" in found:
+        found["notes"] = _WHITESPACE.sub(" ", found["notes"].strip())
+    return ResultFields(**found)
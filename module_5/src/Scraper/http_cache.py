@@ -0,0 +1,265 @@
+"""On-disk HTTP response cache with ETag/Last-Modified revalidation.
+
+Page bodies are stored once per content hash under ``objects/`` and an
+append-only ``index.jsonl`` journal maps each URL to its body and
+validators. The journal is replayed on open and compacted when it grows
+much larger than the live index, so a crash never loses more than the
+line being written.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Defaults; the scraper reads the real values from the environment.
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+INDEX_FILE = "index.jsonl"
+
+# Shared cache instance for the process (created on first use).
+_CACHE = [None]
+_CACHE_LOCK = threading.Lock()
+# Journal appends take their own lock, so a reader can log a use without
+# holding its cache's index lock.
+_JOURNAL_LOCK = threading.Lock()
+
+
+class ResponseCache:
+    """Content-addressed page cache keyed by URL with LRU eviction."""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age: float = 0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Entries younger than max_age seconds are served without asking
+        # the server at all; 0 means always revalidate.
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # url -> entry, least recently used first.
+        self._entries = OrderedDict()
+        # Bodies are shared by hash: reference counts per hash plus the
+        # total size of distinct bodies (stats["bytes"]) keep eviction
+        # O(1) per entry.
+        self._refs = {}
+        self.stats = {"hits": 0, "revalidated": 0, "stored": 0,
+                      "evicted": 0, "bytes": 0}
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self._load_index()
+
+    # ---------------- journal ----------------
+    def _index_path(self):
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def _load_index(self):
+        """Replay the journal into the in-memory index."""
+        lines = 0
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    lines += 1
+                    url = rec.pop("url")
+                    op = rec.pop("op")
+                    if op == "put":
+                        self._put(url, rec)
+                    elif op == "use" and url in self._entries:
+                        # last_used, plus stored_at after a 304.
+                        self._entries[url].update(rec)
+                        self._entries.move_to_end(url)
+                    elif op == "del":
+                        self._drop(url)
+        except FileNotFoundError:
+            return
+        if lines > 2 * len(self._entries) + 100:
+            self._compact()
+
+    def _append(self, op, url, **fields):
+        """Append one record to the journal."""
+        line = json.dumps({"op": op, "url": url, **fields}) + "\n"
+        with _JOURNAL_LOCK, \
+                open(self._index_path(), "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def _compact(self):
+        """Rewrite the journal with one put per live entry, in LRU order."""
+        tmp = self._index_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for url, entry in self._entries.items():
+                f.write(json.dumps({"op": "put", "url": url, **entry}) + "\n")
+        os.replace(tmp, self._index_path())
+
+    # ---------------- index bookkeeping ----------------
+    def _put(self, url, entry):
+        """Point url at entry, keeping hash reference counts current."""
+        self._drop(url)
+        self._entries[url] = entry
+        digest = entry["sha"]
+        if self._refs.get(digest, 0) == 0:
+            self.stats["bytes"] += entry["size"]
+        self._refs[digest] = self._refs.get(digest, 0) + 1
+
+    def _drop(self, url):
+        """Remove url; return its body hash if nothing else uses it."""
+        entry = self._entries.pop(url, None)
+        if entry is None:
+            return None
+        digest = entry["sha"]
+        self._refs[digest] -= 1
+        if self._refs[digest]:
+            return None
+        del self._refs[digest]
+        self.stats["bytes"] -= entry["size"]
+        return digest
+
+    # ---------------- objects ----------------
+    def _object_path(self, digest):
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    def _read_object(self, digest):
+        try:
+            with gzip.open(self._object_path(digest), "rt",
+                           encoding="utf-8") as f:
+                return f.read()
+        except (OSError, EOFError):
+            return None
+
+    def _write_object(self, digest, text):
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def _remove_object(self, digest):
+        try:
+            os.remove(self._object_path(digest))
+        except FileNotFoundError:
+            pass
+
+    # ---------------- public API ----------------
+    def validators(self, url: str) -> dict:
+        """Conditional-request headers for a cached URL ({} if none)."""
+        with self._lock:
+            entry = self._entries.get(url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def is_fresh(self, url: str) -> bool:
+        """True when the entry is young enough to skip revalidation."""
+        with self._lock:
+            entry = self._entries.get(url)
+        return bool(entry) and self.max_age > 0 and \
+            time.time() - entry["stored_at"] <= self.max_age
+
+    def get_text(self, url: str, revalidated: bool = False):
+        """Return the cached body for url and mark it recently used."""
+        # Only the lookup holds the index lock; the gzip read and the
+        # journal write do not block other threads' lookups.
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            digest = entry["sha"]
+        text = self._read_object(digest)
+        with self._lock:
+            if self._entries.get(url) is not entry:
+                # Replaced or dropped while we read: report a miss.
+                return None
+            if text is None:
+                self._drop(url)
+                self._append("del", url)
+                return None
+            used = {"last_used": time.time()}
+            if revalidated:
+                # The server just confirmed the body, so its max_age
+                # window starts again.
+                used["stored_at"] = used["last_used"]
+            entry.update(used)
+            self._entries.move_to_end(url)
+            self.stats["revalidated" if revalidated else "hits"] += 1
+        self._append("use", url, **used)
+        return text
+
+    def store(self, url: str, text: str, etag=None,
+              last_modified=None) -> None:
+        """Save a fresh body and its validators, then enforce the size cap."""
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        now = time.time()
+        entry = {"sha": digest, "etag": etag, "last_modified": last_modified,
+                 "size": len(data), "stored_at": now, "last_used": now}
+        with self._lock:
+            self._write_object(digest, text)
+            orphan = self._drop(url)
+            self._put(url, entry)
+            if orphan is not None and orphan != digest:
+                self._remove_object(orphan)
+            self._append("put", url, **entry)
+            self.stats["stored"] += 1
+            self._evict()
+
+    def forget(self, url: str) -> None:
+        """Drop one URL from the index."""
+        with self._lock:
+            if url in self._entries:
+                orphan = self._drop(url)
+                self._append("del", url)
+                if orphan is not None:
+                    self._remove_object(orphan)
+
+    def total_bytes(self) -> int:
+        """Uncompressed size of all distinct cached bodies."""
+        return self.stats["bytes"]
+
+    def _evict(self):
+        """Remove least recently used entries until under max_bytes."""
+        while self.stats["bytes"] > self.max_bytes:
+            url = next(iter(self._entries))
+            orphan = self._drop(url)
+            self._append("del", url)
+            self.stats["evicted"] += 1
+            # Delete the body file once its last URL is gone.
+            if orphan is not None:
+                self._remove_object(orphan)
+
+    def stats_report(self) -> str:
+        """One-line summary of cache activity for this run."""
+        s = self.stats
+        return (f"Cache: {s['hits']} fresh hits, {s['revalidated']} served "
+                f"on 304, {s['stored']} stored, {s['evicted']} evicted, "
+                f"{len(self._entries)} entries")
+
+
+# The scraper opts in by setting SCRAPE_CACHE_DIR. Size cap and the
+# no-revalidation window come from SCRAPE_CACHE_MAX_MB and
+# SCRAPE_CACHE_MAX_AGE (seconds).
+def get_cache():
+    """Return the process-wide cache, or None when caching is off."""
+    directory = os.getenv("SCRAPE_CACHE_DIR")
+    if not directory:
+        return None
+    with _CACHE_LOCK:
+        cache = _CACHE[0]
+        if cache is None or cache.directory != directory:
+            max_mb = float(os.getenv("SCRAPE_CACHE_MAX_MB", "512"))
+            cache = ResponseCache(
+                directory,
+                max_bytes=int(max_mb * 1024 * 1024),
+                max_age=float(os.getenv("SCRAPE_CACHE_MAX_AGE", "0")),
+            )
+            _CACHE[0] = cache
+    return cache
@@ -0,0 +1,216 @@
+"""Pooled keep-alive HTTP client shared by the scraper and cleaner.
+
+``urlopen`` is a drop-in for the subset of ``urllib.request.urlopen``
+this project uses, but it keeps TCP/TLS connections open per host so
+repeated requests to the same site skip the handshake.
+"""
+
+import http.client
+import io
+import os
+import ssl
+import threading
+import time
+from urllib.error import HTTPError, URLError
+from urllib.parse import urljoin, urlsplit
+from urllib.request import Request
+
+# Idle connections kept per host, and how long an idle connection may
+# sit unused before it is closed instead of reused.
+MAX_IDLE_PER_HOST = int(os.getenv("HTTP_POOL_MAX_IDLE", "8"))
+IDLE_TIMEOUT = float(os.getenv("HTTP_POOL_IDLE_TIMEOUT", "30"))
+
+# urllib follows these redirects automatically, so the pool does too.
+REDIRECT_CODES = {301, 302, 303, 307, 308}
+MAX_REDIRECTS = 5
+
+# Errors that mean a reused keep-alive socket was closed by the server
+# while it sat in the pool. The request is safe to send again once on a
+# fresh connection.
+_STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError,
+                 ConnectionAbortedError, BrokenPipeError)
+
+
+class PooledResponse:
+    """HTTP response that returns its connection to the pool when done."""
+
+    # lease is (pool, key, connection); it is cleared once handed back.
+    def __init__(self, lease, resp, url):
+        self._lease = lease
+        self._resp = resp
+        self.url = url
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = resp.headers
+
+    def getheader(self, name, default=None):
+        """Return a response header value."""
+        return self._resp.getheader(name, default)
+
+    def read(self, amt=None) -> bytes:
+        """Read the body (or up to amt bytes of it)."""
+        data = self._resp.read(amt)
+        if self._resp.isclosed():
+            self.close()
+        return data
+
+    def close(self) -> None:
+        """Hand the connection back, or drop it if the body is unread."""
+        if self._lease is None:
+            return
+        pool, key, conn = self._lease
+        reusable = self._resp.isclosed() and not self._resp.will_close
+        if reusable:
+            pool.release(key, conn)
+        else:
+            self._resp.close()
+            conn.close()
+        self._lease = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """Thread-safe pool of keep-alive connections, keyed by host."""
+
+    def __init__(self, max_idle_per_host: int = MAX_IDLE_PER_HOST,
+                 idle_timeout: float = IDLE_TIMEOUT,
+                 ssl_context: ssl.SSLContext | None = None):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self.ssl_context = ssl_context
+        self._idle = {}
+        self._lock = threading.Lock()
+        # Updated only under _lock: many fetch threads share one pool.
+        self.stats = {"created": 0, "reused": 0, "reconnects": 0,
+                      "evicted": 0}
+
+    def _count(self, name: str) -> None:
+        """Add one to a stats counter."""
+        with self._lock:
+            self.stats[name] += 1
+
+    def _new_connection(self, key, timeout):
+        """Open a new connection for (scheme, host, port)."""
+        scheme, host, port = key
+        self._count("created")
+        if scheme == "https":
+            return http.client.HTTPSConnection(
+                host, port, timeout=timeout, context=self.ssl_context
+            )
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _acquire(self, key, timeout):
+        """Return (connection, reused) for key, evicting stale idlers."""
+        now = time.monotonic()
+        conn = None
+        with self._lock:
+            idle = self._idle.get(key, [])
+            # Oldest connections sit at the front of the list.
+            while idle and now - idle[0][1] > self.idle_timeout:
+                idle.pop(0)[0].close()
+                self.stats["evicted"] += 1
+            if idle:
+                conn = idle.pop()[0]
+                self.stats["reused"] += 1
+        if conn is None:
+            return self._new_connection(key, timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def release(self, key, conn) -> None:
+        """Put a finished connection back into the idle list."""
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) >= self.max_idle_per_host:
+                conn.close()
+                return
+            idle.append((conn, time.monotonic()))
+
+    def idle_count(self, key=None) -> int:
+        """Number of idle connections (for one key, or in total)."""
+        with self._lock:
+            if key is not None:
+                return len(self._idle.get(key, []))
+            return sum(len(v) for v in self._idle.values())
+
+    def close_all(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            for idle in self._idle.values():
+                for conn, _ in idle:
+                    conn.close()
+            self._idle.clear()
+
+    def request(self, method: str, url: str, *, headers=None, body=None,
+                timeout: float = 60) -> PooledResponse:
+        """Send one request on a pooled connection and return the response."""
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        default_port = 443 if scheme == "https" else 80
+        key = (scheme, parts.hostname, parts.port or default_port)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        for attempt in range(2):
+            conn, reused = self._acquire(key, timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                resp = conn.getresponse()
+            except _STALE_ERRORS as e:
+                conn.close()
+                # The server dropped an idle keep-alive socket; retry once
+                # on a fresh connection.
+                if reused and attempt == 0:
+                    self._count("reconnects")
+                    continue
+                raise URLError(e) from e
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                raise URLError(e) from e
+            return PooledResponse((self, key, conn), resp, url)
+        raise URLError(f"connection reset twice: {url}")  # pragma: no cover
+
+
+# Shared pool used by every urlopen() call in the process.
+DEFAULT_POOL = ConnectionPool()
+
+
+# Same calling convention as urllib.request.urlopen for the parts this
+# project relies on: accepts a Request or URL string, follows redirects
+# and raises HTTPError for 3xx-without-redirect, 4xx and 5xx answers.
+def urlopen(req, timeout: float = 60,
+            pool: ConnectionPool | None = None) -> PooledResponse:
+    """Open a URL through the shared keep-alive connection pool."""
+    pool = pool or DEFAULT_POOL
+    if isinstance(req, str):
+        req = Request(req)
+    url = req.full_url
+    method = req.get_method()
+    body = req.data
+    headers = dict(req.header_items())
+
+    for _ in range(MAX_REDIRECTS + 1):
+        resp = pool.request(method, url, headers=headers, body=body,
+                            timeout=timeout)
+        if resp.status < 300:
+            return resp
+        location = resp.getheader("Location")
+        data = resp.read()
+        if resp.status in REDIRECT_CODES and location:
+            url = urljoin(url, location)
+            # Like urllib, a redirected POST is re-sent as a plain GET.
+            if resp.status in (301, 302, 303):
+                method, body = "GET", None
+            continue
+        raise HTTPError(url, resp.status, resp.reason, resp.headers,
+                        io.BytesIO(data))
+    raise URLError(f"too many redirects: {req.full_url}")
@@ -0,0 +1,198 @@
+"""Persistent index of the result_ids already in the master dataset.
+
+The index lives next to the master file (``<master>.ids``): a 32-byte
+header followed by the known ids as a sorted array of uint32 in native
+byte order. It is memory-mapped and searched with bisect, so checking
+an id costs O(log n) and no per-id Python objects.
+
+The header records the size and mtime of the master file the index was
+built from. If the master changes behind the index's back, the next
+open rebuilds the index from it once; clean.py updates the index in
+place right after it appends to the master.
+"""
+
+import bisect
+import heapq
+import itertools
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+from array import array
+
+MAGIC = b"GCIDX001"
+# magic, master size, master mtime_ns, id count
+_HEADER = struct.Struct("=8sQQQ")
+# ids are written in chunks of this many entries when merging.
+_CHUNK = 64 * 1024
+
+_RESULT_ID_RE = re.compile(r"/result/(\d+)")
+_MAX_ID = 2 ** 32 - 1
+
+
+def index_path(master_path: str) -> str:
+    """Path of the sidecar index for a master file."""
+    return master_path + ".ids"
+
+
+def _master_stamp(master_path: str) -> tuple[int, int]:
+    try:
+        st = os.stat(master_path)
+    except FileNotFoundError:
+        return 0, 0
+    return st.st_size, st.st_mtime_ns
+
+
+def _storable(result_id) -> bool:
+    """True for ids that fit the uint32 array."""
+    return isinstance(result_id, int) and 0 <= result_id <= _MAX_ID
+
+
+def _row_result_id(row: dict):
+    """result_id of a master row, falling back to its result URL."""
+    rid = row.get("result_id")
+    if isinstance(rid, int):
+        return rid
+    match = _RESULT_ID_RE.search(row.get("url")
+                                 or row.get("application_url_raw") or "")
+    return int(match.group(1)) if match else None
+
+
+def _ids_from_master(master_path: str) -> list[int]:
+    """Read every known id from the master JSON (used for rebuilds).
+
+    A ``.jsonl`` file (a crawl checkpoint's rows) is read line by line.
+    """
+    try:
+        with open(master_path, "r", encoding="utf-8") as f:
+            rows = (map(json.loads, f) if master_path.endswith(".jsonl")
+                    else json.load(f))
+            ids = {rid for rid in map(_row_result_id, rows)
+                   if _storable(rid)}
+    except (FileNotFoundError, ValueError):
+        return []
+    return sorted(ids)
+
+
+class IdIndex:
+    """Sorted, memory-mapped set of result_ids for one master file."""
+
+    def __init__(self, master_path: str):
+        self.master_path = master_path
+        self.path = index_path(master_path)
+        self._mm = None
+        self._ids = memoryview(b"").cast("I")
+        if not self._open():
+            self.rebuild()
+
+    # ---------------- file handling ----------------
+    def _open(self) -> bool:
+        """Map the index file; False if missing, corrupt or stale."""
+        try:
+            with open(self.path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return False
+        magic, size, mtime, count = _HEADER.unpack_from(
+            mm.read(_HEADER.size).ljust(_HEADER.size, b"\0"))
+        if magic != MAGIC or (size, mtime) != _master_stamp(self.master_path) \
+                or len(mm) != _HEADER.size + 4 * count:
+            mm.close()
+            return False
+        self._mm = mm
+        self._ids = memoryview(mm)[_HEADER.size:].cast("I")
+        return True
+
+    def close(self) -> None:
+        """Unmap the index file."""
+        self._ids.release()
+        self._ids = memoryview(b"").cast("I")
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def _write(self, sorted_ids, count: int) -> None:
+        """Atomically replace the index with sorted_ids."""
+        # Per-thread name: the streaming pipeline's crawl and load stages
+        # may rebuild a missing index at the same time.
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, *_master_stamp(self.master_path),
+                                 count))
+            ids = iter(sorted_ids)
+            while True:
+                chunk = array("I", itertools.islice(ids, _CHUNK))
+                if not chunk:
+                    break
+                chunk.tofile(f)
+        self.close()
+        os.replace(tmp, self.path)
+        self._open()
+
+    # ---------------- public API ----------------
+    def rebuild(self) -> None:
+        """Re-read the master file and rewrite the index from scratch."""
+        ids = _ids_from_master(self.master_path)
+        self._write(ids, len(ids))
+
+    def add(self, new_ids) -> None:
+        """Merge ids just appended to the master file into the index.
+
+        Call after the master file has been written, so the index is
+        stamped with its new size and mtime.
+        """
+        fresh = sorted({rid for rid in new_ids
+                        if _storable(rid) and rid not in self})
+        self._write(heapq.merge(iter(self._ids), fresh),
+                    len(self) + len(fresh))
+
+    def __contains__(self, result_id) -> bool:
+        if not _storable(result_id):
+            return False
+        pos = bisect.bisect_left(self._ids, result_id)
+        return pos < len(self._ids) and self._ids[pos] == result_id
+
+    def newest(self):
+        """Largest known result_id, or None for an empty index."""
+        return self._ids[-1] if len(self._ids) else None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        return iter(self._ids)
+
+
+class KnownIds:
+    """The master index plus ids collected during this run."""
+
+    def __init__(self, index: IdIndex):
+        self.index = index
+        self._extra = set()
+
+    def __contains__(self, result_id) -> bool:
+        return result_id in self._extra or result_id in self.index
+
+    def add(self, result_id) -> None:
+        """Remember one more id for the rest of the run."""
+        if result_id not in self.index:
+            self._extra.add(result_id)
+
+    def update(self, result_ids) -> None:
+        """Remember several ids."""
+        for result_id in result_ids:
+            self.add(result_id)
+
+    def __len__(self) -> int:
+        return len(self.index) + len(self._extra)
+
+    def __iter__(self):
+        return itertools.chain(self.index, self._extra)
@@ -0,0 +1,185 @@
+"""Fill result text from the survey listing instead of the result page.
+
+Each survey row is followed by a one-``<td>`` detail row with badges
+such as "Fall 2026", "International", "GPA 3.90", "GRE 328", "GRE V
+160" and "GRE AW 4.5" plus the applicant's comment; the status cell
+reads e.g. "Accepted on 29 Jan" and the program cell ends with the
+degree. ``listing_text`` rewrites those into the labelled layout of a
+result page, so the extractors in clean.py and field_extract.py read
+them unchanged.
+
+A row's result page is only downloaded when a required field is still
+missing from the listing text. SCRAPE_DETAIL_REQUIRED lists the
+required fields (comma separated, default ``decision,degree,origin``);
+``always`` downloads every result page as before. With the default,
+most rows' ``result_text_raw`` is this rebuilt listing text rather
+than the result page's text, so fields only on the result page are
+missing from it.
+
+With SCRAPE_ARCHIVE_DIR set, rows filled from the listing are archived
+with their listing text (``source: "listing"``), so ``reparse`` and the
+LLM warm start still see every row, not just the downloaded ones.
+"""
+
+import os
+import re
+import threading
+from datetime import datetime
+
+try:
+    from . import archive, field_extract
+except ImportError:  # pragma: no cover - run directly from Scraper/
+    import archive
+    import field_extract
+
+# Field name -> its field_extract.ResultFields attribute (the answer of
+# the matching clean.py extractor).
+FIELDS = {
+    "decision": "decision",
+    "notification": "notification_date",
+    "degree": "degree_type",
+    "origin": "origin",
+    "gpa": "gpa",
+    "gre": "gre_general",
+    "gre_v": "gre_verbal",
+    "gre_aw": "gre_aw",
+    "notes": "notes",
+    "term": "term",
+}
+DEFAULT_REQUIRED = "decision,degree,origin"
+
+_STATUS_RE = re.compile(r"\b(Accepted|Rejected|Wait\s*listed|Interview|"
+                        r"Other)\b(?:\s+on\s+(\d{1,2})\s+([A-Z][a-z]{2}))?")
+_DEGREE_RE = re.compile(r"\b(PhD|Masters|MFA|MBA|MEng|MSc|MS|MA|JD|EdD|"
+                        r"PsyD|IND|Other)\s*$")
+# Badges in the detail row; each match is removed before the rest is
+# kept as the comment. GRE V/AW come before plain GRE.
+_BADGES = {
+    "term": re.compile(r"\b(?:Spring|Summer|Fall|Autumn|Winter)\s+20\d{2}\b",
+                       re.IGNORECASE),
+    "origin": re.compile(r"\b(International|American|Domestic)\b"),
+    "gpa": re.compile(r"\bGPA\s+([0-4]\.\d{1,2})\b"),
+    "gre_v": re.compile(r"\bGRE\s+V\s+(\d{2,3})\b"),
+    "gre_aw": re.compile(r"\bGRE\s+AW\s+([0-6](?:\.\d{1,2})?)"),
+    "gre": re.compile(r"\bGRE\s+(\d{3})\b"),
+}
+
+# Per-run counters, shared by every thread.
+_STATS_LOCK = threading.Lock()
+LISTING_STATS = {"rows": 0, "from_listing": 0}
+
+
+def required_fields(spec: str | None = None):
+    """Fields the listing must supply; None means always fetch."""
+    spec = spec if spec is not None else \
+        os.getenv("SCRAPE_DETAIL_REQUIRED", DEFAULT_REQUIRED)
+    names = [n.strip().lower() for n in spec.split(",") if n.strip()]
+    if names == ["always"]:
+        return None
+    unknown = [n for n in names if n not in FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown SCRAPE_DETAIL_REQUIRED field(s): "
+                         f"{', '.join(unknown)}")
+    return tuple(names)
+
+
+def _notification(day: str, month: str, date_added_raw: str | None):
+    """MM/DD/YYYY for "29 Jan", taking the year from the date added."""
+    try:
+        added = datetime.strptime((date_added_raw or "").strip(),
+                                  "%B %d, %Y")
+        notified = datetime.strptime(f"{day} {month} {added.year}",
+                                     "%d %b %Y")
+    except ValueError:
+        return None
+    # A decision is never posted before it arrives: a later month
+    # belongs to the previous year.
+    if notified > added:
+        notified = notified.replace(year=added.year - 1)
+    return notified.strftime("%m/%d/%Y")
+
+
+def listing_text(row_data: dict, detail_text: str | None) -> str:
+    """Result-page style text built from one survey row and its detail."""
+    parts = []
+    degree = _DEGREE_RE.search(row_data.get("program_raw") or "")
+    if degree:
+        parts.append(f"Degree Type {degree.group(1)}")
+
+    rest = " ".join((detail_text or "").split())
+    found = {}
+    for name, pattern in _BADGES.items():
+        match = pattern.search(rest)
+        if match:
+            found[name] = match.group(match.lastindex or 0)
+            rest = (rest[:match.start()] + " " + rest[match.end():]).strip()
+    if "origin" in found:
+        parts.append(f"Degree's Country of Origin {found['origin']}")
+
+    status = _STATUS_RE.search(row_data.get("status_raw") or "")
+    if status:
+        date = _notification(status.group(2), status.group(3),
+                             row_data.get("date_added_raw")) \
+            if status.group(2) else None
+        parts.append(f"Decision {status.group(1)} Notification on "
+                     f"{date or ''}".rstrip())
+    if "gpa" in found:
+        parts.append(f"Undergrad GPA {found['gpa']}")
+    if "gre" in found:
+        parts.append(f"GRE General: {found['gre']}")
+    if "gre_v" in found:
+        parts.append(f"GRE Verbal: {found['gre_v']}")
+    if "gre_aw" in found:
+        parts.append(f"Analytical Writing: {found['gre_aw']}")
+    if "term" in found:
+        parts.append(f"Term {found['term']}")
+    if rest:
+        parts.append(f"Notes {rest} Timeline")
+    return " ".join(parts)
+
+
+def missing_fields(text: str, required) -> list[str]:
+    """Required fields the extractors cannot find in text."""
+    found = field_extract.extract(text)
+    return [name for name in required
+            if getattr(found, FIELDS[name]) is None]
+
+
+# Called by parse_survey_page for every new row.
+def fill_from_listing(row_data: dict, detail_text: str | None,
+                      required) -> bool:
+    """Set result_text_raw from the listing if it has every field."""
+    text = listing_text(row_data, detail_text)
+    if missing_fields(text, required):
+        return False
+    row_data["result_text_raw"] = text
+    return True
+
+
+def rows_to_fetch(rows: list[dict]) -> list[dict]:
+    """Rows still needing their result page; archives the ones skipped."""
+    todo = [r for r in rows if r.get("result_text_raw") is None]
+    html_archive = archive.get_archive()
+    if html_archive is not None:
+        for row in rows:
+            if row.get("result_text_raw") is not None:
+                html_archive.put(row, row["result_text_raw"], "listing")
+    with _STATS_LOCK:
+        LISTING_STATS["rows"] += len(rows)
+        LISTING_STATS["from_listing"] += len(rows) - len(todo)
+    return todo
+
+
+def reset_stats() -> None:
+    """Zero the counters at the start of a run."""
+    with _STATS_LOCK:
+        LISTING_STATS.update(rows=0, from_listing=0)
+
+
+def stats_report() -> str:
+    """One-line summary of result page downloads avoided this run."""
+    with _STATS_LOCK:
+        rows = LISTING_STATS["rows"]
+        skipped = LISTING_STATS["from_listing"]
+    return (f"Listing: {skipped} of {rows} result page downloads avoided "
+            f"(filled from the survey listing)")
@@ -0,0 +1,223 @@
+"""Adaptive LLM batch sizes and bisection of failing batches.
+
+``BatchSizer`` replaces the fixed ``chunk_size = 100``. After each
+batch it works out the size that would take ``target_seconds`` at the
+observed per-row latency: when that is larger the size grows by a
+quarter (up to ``max_size``), when smaller it drops to it at once. A
+failed or timed-out batch halves the size. Timeouts follow the same
+estimate (five times the expected batch time, 30 s to 300 s) instead of
+always waiting 300 s.
+
+``bisecting`` wraps ``clean._llm_post_rows``: a batch that fails after
+its retries is split in two and each half is sent once more, recursing
+until the rows that fail on their own are found. Those rows get the
+rules-only answer instead, so one poison row costs a few quick retries
+rather than the whole run. When LLM_FALLBACK_STREAK rows in a row
+fail alone, the LLM itself is failing and the run stops as before.
+
+A timeout says the server is slow or busy, not that a row is bad, so it
+is not bisected: the sizer shrinks and the batch is sent again in
+pieces of the new size after a backoff (LLM_TIMEOUT_BACKOFF seconds,
+doubling). LLM_TIMEOUT_RETRIES such rounds in a row stop the run.
+
+LLM_BATCH_SIZE, LLM_MIN_BATCH, LLM_MAX_BATCH and LLM_BATCH_SECONDS
+tune the sizer; LLM_RETRIES sets the attempts for a full batch.
+"""
+
+import os
+import threading
+import time
+from urllib.error import URLError
+
+# Shared sizer for the process (created on first use).
+_SIZER = [None]
+_SIZER_LOCK = threading.Lock()
+
+# Attempts for a batch before it is bisected; halves get one attempt.
+RETRIES = int(os.getenv("LLM_RETRIES", "2"))
+# Rows answered by rules in a row before the LLM is declared down.
+FALLBACK_STREAK = int(os.getenv("LLM_FALLBACK_STREAK", "10"))
+# Smaller resends of a timed-out batch, and the first wait before one.
+TIMEOUT_RETRIES = int(os.getenv("LLM_TIMEOUT_RETRIES", "3"))
+TIMEOUT_BACKOFF = float(os.getenv("LLM_TIMEOUT_BACKOFF", "5"))
+
+MIN_TIMEOUT = 30.0
+MAX_TIMEOUT = 300.0
+
+
+class BatchSizer:
+    """Batch size steered by per-row latency, halved on failure."""
+
+    def __init__(self, size: int = 100, min_size: int = 5,
+                 max_size: int = 400, target_seconds: float = 30.0):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_seconds = target_seconds
+        self.size = min(max(size, min_size), max_size)
+        # Smoothed seconds per row, None until a batch succeeds.
+        self.row_seconds = None
+        self._lock = threading.Lock()
+        self.stats = {"batches": 0, "ok": 0, "failed": 0, "bisected": 0,
+                      "fallback_rows": 0, "low": self.size,
+                      "high": self.size,
+                      # Rows answered by rules since the last success.
+                      "streak": 0}
+
+    def batches(self, rows, limit=None):
+        """Yield slices of rows, each as large as the current size."""
+        start = 0
+        while start < len(rows):
+            with self._lock:
+                size = min(self.size, limit or self.size)
+                self.stats["batches"] += 1
+            yield rows[start:start + size]
+            start += size
+
+    def timeout_for(self, rows: int) -> float:
+        """Seconds to wait for a batch of rows."""
+        with self._lock:
+            per_row = self.row_seconds
+        if per_row is None:
+            return MAX_TIMEOUT
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, 5 * per_row * rows))
+
+    def success(self, rows: int, seconds: float) -> None:
+        """A batch of rows answered in seconds: resize toward the target."""
+        with self._lock:
+            per_row = seconds / max(rows, 1)
+            self.row_seconds = per_row if self.row_seconds is None \
+                else 0.7 * self.row_seconds + 0.3 * per_row
+            fits = int(self.target_seconds / max(self.row_seconds, 1e-6))
+            if fits >= self.size:
+                self.size = min(self.max_size,
+                                self.size + max(1, self.size // 4))
+            else:
+                self.size = max(self.min_size, fits)
+            self.stats["ok"] += 1
+            self.stats["streak"] = 0
+            self._track()
+
+    def failure(self) -> None:
+        """A batch failed or timed out: halve the size."""
+        with self._lock:
+            self.size = max(self.min_size, self.size // 2)
+            self.stats["failed"] += 1
+            self._track()
+
+    def _track(self) -> None:
+        self.stats["low"] = min(self.stats["low"], self.size)
+        self.stats["high"] = max(self.stats["high"], self.size)
+
+    def bisected(self) -> None:
+        """Count a failed batch split in two."""
+        with self._lock:
+            self.stats["bisected"] += 1
+
+    def fallback(self) -> int:
+        """Count a row answered by rules; return the current streak."""
+        with self._lock:
+            self.stats["fallback_rows"] += 1
+            self.stats["streak"] += 1
+            return self.stats["streak"]
+
+    def stats_report(self) -> str:
+        """One-line summary of LLM batching this run."""
+        with self._lock:
+            s = dict(self.stats)
+            size = self.size
+        return (f"LLM batches: {s['batches']} sent, {s['ok']} ok, "
+                f"{s['failed']} failed, "
+                f"{s['bisected']} bisected, {s['fallback_rows']} rows "
+                f"answered by rules, size {size} now "
+                f"(range {s['low']}-{s['high']})")
+
+
+def timed_out(error: Exception) -> bool:
+    """True when a failed post ended in a timeout (its __cause__)."""
+    cause = error.__cause__
+    # Connect timeouts arrive wrapped in a URLError.
+    if isinstance(cause, URLError):
+        cause = cause.reason
+    return isinstance(cause, TimeoutError)
+
+
+def bisecting(post, sizer: BatchSizer, fallback, retries: int = RETRIES,
+              streak: int | None = None):
+    """Wrap post(url, batch, timeout_s, attempts) with resizing/bisection.
+
+    fallback(row) answers a single row that fails on its own.
+    """
+    streak = streak or FALLBACK_STREAK
+
+    def resend(url, batch, error, waits):
+        # Shrink, wait, and send the batch again in pieces of the new size.
+        sizer.failure()
+        if waits >= TIMEOUT_RETRIES:
+            raise RuntimeError(f"LLM timed out {waits + 1} times in a row, "
+                               f"last error: {error}") from error
+        wait = TIMEOUT_BACKOFF * 2 ** waits
+        print(f"LLM timed out on {len(batch)} rows ({error}); retrying "
+              f"in {wait:g}s at batch size {sizer.size}.")
+        time.sleep(wait)
+        out = []
+        for part in sizer.batches(batch):
+            out += send(url, part, True, waits + 1)
+        return out
+
+    def send(url, batch, top, waits=0):
+        start = time.perf_counter()
+        try:
+            out = post(url, batch, timeout_s=sizer.timeout_for(len(batch)),
+                       attempts=retries if top else 1)
+            if len(out) != len(batch):
+                raise RuntimeError(f"LLM returned {len(out)} rows for "
+                                   f"{len(batch)}")
+        except RuntimeError as e:
+            if timed_out(e):
+                return resend(url, batch, e, waits)
+            if top:
+                sizer.failure()
+            if len(batch) > 1:
+                sizer.bisected()
+                mid = len(batch) // 2
+                return send(url, batch[:mid], False) + \
+                    send(url, batch[mid:], False)
+            if sizer.fallback() >= streak:
+                raise RuntimeError(f"LLM failed on {streak} rows in a row, "
+                                   f"last error: {e}") from e
+            print(f"LLM failed on {batch[0]!r} ({e}); using rules.")
+            return [fallback(batch[0])]
+        sizer.success(len(batch), time.perf_counter() - start)
+        return out
+
+    # llm_dispatch calls post(url, batch, timeout_s=...); the sizer
+    # picks the timeout instead.
+    def post_batch(url, batch, timeout_s=None):
+        del timeout_s
+        return send(url, batch, True)
+
+    return post_batch
+
+
+def get_sizer() -> BatchSizer:
+    """Return the process-wide sizer, built from the environment."""
+    with _SIZER_LOCK:
+        if _SIZER[0] is None:
+            _SIZER[0] = BatchSizer(
+                size=int(os.getenv("LLM_BATCH_SIZE", "100")),
+                min_size=int(os.getenv("LLM_MIN_BATCH", "5")),
+                max_size=int(os.getenv("LLM_MAX_BATCH", "400")),
+                target_seconds=float(os.getenv("LLM_BATCH_SECONDS", "30")),
+            )
+        return _SIZER[0]
+
+
+def current_sizer():
+    """The sizer used so far by this process, or None."""
+    return _SIZER[0]
+
+
+def reset_sizer() -> None:
+    """Start the next run with a fresh sizer."""
+    with _SIZER_LOCK:
+        _SIZER[0] = None
@@ -0,0 +1,222 @@
+"""Persistent cache of LLM program/university standardizations.
+
+Every crawl sends the same "program, university" strings to the LLM
+again ("Computer Science, Stanford University" recurs constantly).
+This cache keeps each answer across runs in an append-only JSON lines
+journal, replayed on open and compacted when it grows much larger than
+the live entries, like the HTTP response cache.
+
+Answers are tagged with the model version the LLM server reports in
+its health check (a hash of backend, model, prompt, few-shot examples
+and canonical lists) plus LLM_CACHE_VERSION, so changing any of them
+drops the old answers on the next open. The least recently used
+entries are evicted beyond LLM_CACHE_MAX_ENTRIES.
+
+Run ``python llm_cache.py`` for the cache size and ``--clear`` to empty
+it.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 100_000
+# Empty LLM_CACHE_FILE turns the cache off. Relative to src/Scraper.
+CACHE_FILE = os.getenv("LLM_CACHE_FILE", "llm_cache.jsonl")
+MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES",
+                            str(DEFAULT_MAX_ENTRIES)))
+# Change by hand to drop answers the server's version does not cover.
+VERSION_SALT = os.getenv("LLM_CACHE_VERSION", "")
+
+# Entries per journal line when compacting.
+_COMPACT_CHUNK = 1000
+
+# Shared cache instance for the process (created on first use).
+_CACHE = [None]
+_CACHE_LOCK = threading.Lock()
+
+
+class StandardizeCache:
+    """LLM answers keyed by input string, for one model version."""
+
+    def __init__(self, path: str, version: str,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.version = version
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # input -> [program, university], least recently used first.
+        self._entries = OrderedDict()
+        self._lines = 0
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0,
+                      "invalidated": 0}
+        self._load()
+
+    # ---------------- journal ----------------
+    def _load(self):
+        """Replay the journal, dropping answers of other versions."""
+        stale = set()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    self._lines += 1
+                    self._replay(rec, stale)
+        except FileNotFoundError:
+            return
+        self.stats["invalidated"] = len(stale - self._entries.keys())
+        self._evict()
+        if stale or self._lines > 2 * len(self._entries) + 100:
+            self._compact()
+
+    def _replay(self, rec, stale):
+        """Apply one journal record to the in-memory entries."""
+        if rec["op"] == "put" and rec["version"] != self.version:
+            stale.update(rec["entries"])
+        elif rec["op"] == "put":
+            for key, value in rec["entries"].items():
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+        elif rec["op"] == "use":
+            for key in rec["keys"]:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+        elif rec["op"] == "del":
+            for key in rec["keys"]:
+                self._entries.pop(key, None)
+
+    def _append(self, rec):
+        """Append one record to the journal."""
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec) + "\n")
+        self._lines += 1
+
+    def _compact(self):
+        """Rewrite the journal as puts of the live entries, oldest first."""
+        tmp = self.path + ".tmp"
+        items = list(self._entries.items())
+        with open(tmp, "w", encoding="utf-8") as f:
+            for i in range(0, len(items), _COMPACT_CHUNK):
+                f.write(json.dumps({
+                    "op": "put", "version": self.version,
+                    "entries": dict(items[i:i + _COMPACT_CHUNK])}) + "\n")
+        os.replace(tmp, self.path)
+        self._lines = -(-len(items) // _COMPACT_CHUNK)
+
+    def _evict(self):
+        """Drop least recently used entries beyond max_entries."""
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            evicted.append(self._entries.popitem(last=False)[0])
+        self.stats["evicted"] += len(evicted)
+        return evicted
+
+    # ---------------- public API ----------------
+    def lookup(self, inputs) -> dict:
+        """Cached {input: (program, university)} for the inputs known."""
+        with self._lock:
+            found = {}
+            for key in inputs:
+                value = self._entries.get(key)
+                if value is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = tuple(value)
+            self.stats["hits"] += len(found)
+            self.stats["misses"] += len(inputs) - len(found)
+            if found:
+                self._append({"op": "use", "keys": list(found)})
+        return found
+
+    def store(self, answers: dict) -> None:
+        """Save {input: (program, university)}, then enforce the cap."""
+        if not answers:
+            return
+        entries = {key: list(value) for key, value in answers.items()}
+        with self._lock:
+            for key, value in entries.items():
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            self._append({"op": "put", "version": self.version,
+                          "entries": entries})
+            self.stats["stored"] += len(entries)
+            evicted = self._evict()
+            if evicted:
+                self._append({"op": "del", "keys": evicted})
+            if self._lines > 2 * len(self._entries) + 100:
+                self._compact()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats_report(self) -> str:
+        """One-line summary of cache activity for this run."""
+        s = self.stats
+        return (f"LLM cache: {s['hits']} hits, {s['misses']} misses, "
+                f"{s['stored']} stored, {s['evicted']} evicted, "
+                f"{s['invalidated']} invalidated, {len(self)} entries")
+
+
+# clean.standardize() passes the version the LLM server reports; with
+# no version (server unreachable or too old) answers are not cached.
+def get_cache(version):
+    """Return the process-wide cache, or None when caching is off."""
+    if not CACHE_FILE or not version:
+        return None
+    if VERSION_SALT:
+        version = f"{version}+{VERSION_SALT}"
+    with _CACHE_LOCK:
+        cache = _CACHE[0]
+        if (cache is None or cache.path != CACHE_FILE
+                or cache.version != version):
+            cache = StandardizeCache(CACHE_FILE, version, MAX_ENTRIES)
+            _CACHE[0] = cache
+    return cache
+
+
+def current_cache():
+    """The cache used so far by this process, or None."""
+    return _CACHE[0]
+
+
+def main(argv=None) -> int:
+    """Print the number of cached answers, or clear them."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--file", default=CACHE_FILE,
+                        help=f"cache journal (default {CACHE_FILE})")
+    parser.add_argument("--clear", action="store_true",
+                        help="delete every cached answer")
+    args = parser.parse_args(argv)
+    if args.clear:
+        try:
+            os.remove(args.file)
+        except FileNotFoundError:
+            pass
+        print(f"Cleared {args.file}.")
+        return 0
+    versions = {}
+    try:
+        with open(args.file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if rec["op"] == "put":
+                    versions.setdefault(rec["version"], set()).update(
+                        rec["entries"])
+    except FileNotFoundError:
+        print(f"No LLM cache at {args.file}.")
+        return 1
+    for version, keys in versions.items():
+        print(f"{version}: {len(keys)} answers stored")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
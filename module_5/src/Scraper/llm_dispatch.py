@@ -0,0 +1,81 @@
+"""Keep several LLM batches in flight across one or more servers.
+
+``clean.standardize`` used to post one batch, wait for its answer (up
+to 300 s) and only then serialize and send the next, so the model sat
+idle between batches. ``dispatch`` runs the batches on a pool of
+``inflight`` threads per endpoint: while the server works on one batch
+the next is already encoded, sent and queued behind it. Each batch
+goes to the endpoint with the fewest batches in flight, so a slower
+server simply takes fewer of them. At most twice the pool size of
+batches are submitted ahead of the one being waited on, and results
+come back in batch order. Every batch keeps ``_llm_post_rows``'s
+retries; a batch that still fails stops the rest.
+
+LLM_URLS lists extra endpoints (comma separated) and LLM_INFLIGHT sets
+the batches in flight per endpoint.
+"""
+
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Endpoints to spread batches over; empty means the caller's llm_url.
+URLS = [u.strip() for u in os.getenv("LLM_URLS", "").split(",")
+        if u.strip()]
+INFLIGHT = int(os.getenv("LLM_INFLIGHT", "2"))
+
+
+def endpoints(llm_url: str) -> list[str]:
+    """The endpoints to use for llm_url."""
+    return list(URLS) or [llm_url]
+
+
+class _Endpoints:
+    """Least-busy choice among endpoints, counted per batch."""
+
+    def __init__(self, urls):
+        self._busy = dict.fromkeys(urls, 0)
+        self._lock = threading.Lock()
+
+    def acquire(self) -> str:
+        """Pick the endpoint with the fewest batches in flight."""
+        with self._lock:
+            url = min(self._busy, key=self._busy.get)
+            self._busy[url] += 1
+        return url
+
+    def release(self, url: str) -> None:
+        """One batch sent to url has finished."""
+        with self._lock:
+            self._busy[url] -= 1
+
+
+def dispatch(post, batches, urls, inflight: int = INFLIGHT,
+             timeout_s: int = 300):
+    """Yield post(url, batch, timeout_s=...) for each batch, in order."""
+    pool_size = max(1, inflight) * len(urls)
+    chosen = _Endpoints(urls)
+
+    def send(batch):
+        url = chosen.acquire()
+        try:
+            return post(url, batch, timeout_s=timeout_s)
+        finally:
+            chosen.release(url)
+
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=pool_size,
+                            thread_name_prefix="llm") as pool:
+        try:
+            for batch in batches:
+                if len(pending) >= 2 * pool_size:
+                    yield pending.popleft().result()
+                pending.append(pool.submit(send, batch))
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # A failed batch (or a caller that stopped reading) must
+            # not wait for batches nobody will use.
+            for future in pending:
+                future.cancel()
@@ -6,14 +6,18 @@ Includes incremental JSONL CLI output.
 
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import re
 import sys
+import threading
+import time
 import difflib
 from typing import Any, Dict, List, Tuple
 
 from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
 from huggingface_hub import hf_hub_download
 from llama_cpp import Llama  # CPU-only by default if N_GPU_LAYERS=0
 
@@ -39,6 +43,10 @@ N_THREADS = int(os.getenv("N_THREADS", str(os.cpu_count() or 2)))
 N_CTX = int(os.getenv("N_CTX", "2048"))
 N_GPU_LAYERS = int(os.getenv("N_GPU_LAYERS", "0"))  # 0 → CPU-only
 
+# Stop serving after this many seconds without a request (0 = never);
+# Scraper/llm_supervisor.py reuses the server while it is warm.
+IDLE_SECONDS = float(os.getenv("LLM_IDLE_SECONDS", "600"))
+
 CANON_UNIS_PATH = os.getenv("CANON_UNIS_PATH", "canon_universities.txt")
 CANON_PROGS_PATH = os.getenv("CANON_PROGS_PATH", "canon_programs.txt")
 
@@ -120,7 +128,21 @@ FEW_SHOTS: List[Tuple[Dict[str, str], Dict[str, str]]] = [
     ),
 ]
 
+# Changes whenever the answers could: backend, model, prompt, examples,
+# canonical lists or post-normalization maps. Reported by the health
+# check so Scraper/llm_cache.py drops answers of an older version.
+MODEL_VERSION = hashlib.sha256(json.dumps([
+    LLM_BACKEND,
+    OPENAI_MODEL if LLM_BACKEND == "openai" else [MODEL_REPO, MODEL_FILE],
+    SYSTEM_PROMPT, FEW_SHOTS, CANON_UNIS, CANON_PROGS,
+    ABBREV_UNI, COMMON_UNI_FIXES, COMMON_PROG_FIXES,
+]).encode("utf-8")).hexdigest()[:16]
+
 _LLM_CACHE: List[Llama | None] = [None]
+# llama.cpp is not thread-safe; requests served on other threads wait
+# here, already parsed, so the model starts on them as soon as it is
+# free.
+_LLM_LOCK = threading.Lock()
 
 
 def _load_llm() -> Llama:
@@ -293,12 +315,13 @@ def _call_llm_local(program_text: str) -> Dict[str, str]:
     """Query the local TinyLlama and return standardized fields."""
     llm = _load_llm()
     messages = _build_messages(program_text)
-    out = llm.create_chat_completion(
-        messages=messages,
-        temperature=0.0,
-        max_tokens=128,
-        top_p=1.0,
-    )
+    with _LLM_LOCK:
+        out = llm.create_chat_completion(
+            messages=messages,
+            temperature=0.0,
+            max_tokens=128,
+            top_p=1.0,
+        )
     text = (out["choices"][0]["message"]["content"] or "").strip()
     try:
         match = JSON_OBJ_RE.search(text)
@@ -331,9 +354,63 @@ def _normalize_input(payload: Any) -> List[Dict[str, Any]]:
     return []
 
 
+# Lifecycle facts reported by the health check, plus the requests in
+# flight and when the last one started or ended (for the idle timer).
+_STATE: Dict[str, Any] = {"last_request": time.monotonic(), "in_flight": 0,
+                          "model_load_seconds": None, "server": None}
+_STATE_LOCK = threading.Lock()
+
+
+def _rss_bytes() -> int | None:
+    """Resident memory of this process, where /proc is available."""
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+@app.before_request
+def _touch() -> None:
+    """A request is in flight; the server is not idle until it ends."""
+    with _STATE_LOCK:
+        _STATE["in_flight"] += 1
+        _STATE["last_request"] = time.monotonic()
+
+
+@app.teardown_request
+def _untouch(_exc: Any = None) -> None:
+    """The idle timer starts again when the last request ends."""
+    with _STATE_LOCK:
+        _STATE["in_flight"] -= 1
+        _STATE["last_request"] = time.monotonic()
+
+
 @app.get("/")
 def health() -> Any:
-    """Simple liveness check."""
+    """Liveness check plus the facts the supervisor reports."""
+    return jsonify({
+        "ok": True,
+        "pid": os.getpid(),
+        "backend": LLM_BACKEND,
+        "model_version": MODEL_VERSION,
+        "rss_bytes": _rss_bytes(),
+        "model_load_seconds": _STATE["model_load_seconds"],
+        "idle_timeout": IDLE_SECONDS,
+    })
+
+
+@app.post("/shutdown")
+def shutdown() -> Any:
+    """Stop serving (local callers only)."""
+    if request.remote_addr not in ("127.0.0.1", "::1"):
+        return jsonify({"ok": False}), 403
+    server = _STATE["server"]
+    if server is not None:
+        # shutdown() waits for serve_forever() to return, so it cannot
+        # run on the request thread.
+        threading.Thread(target=server.shutdown, daemon=True).start()
     return jsonify({"ok": True})
 
 
@@ -354,6 +431,54 @@ def standardize() -> Any:
     return jsonify({"rows": out})
 
 
+def _signal_ready(port: int) -> None:
+    """Tell the launcher (LLM_READY_FD) that requests can be served."""
+    fd = os.getenv("LLM_READY_FD")
+    if not fd:
+        return
+    try:
+        os.write(int(fd), f"ready {port}\n".encode("ascii"))
+        os.close(int(fd))
+    except (OSError, ValueError):
+        pass  # launcher gone or not a pipe; /health still works
+
+
+def _idle_watchdog(server: Any, idle_seconds: float) -> None:
+    """Shut the server down after idle_seconds without a request."""
+    while True:
+        with _STATE_LOCK:
+            busy = _STATE["in_flight"] > 0
+            idle = time.monotonic() - _STATE["last_request"]
+        # A long standardize call is not idle time.
+        if busy:
+            time.sleep(min(idle_seconds, 30.0))
+            continue
+        if idle >= idle_seconds:
+            print(f"Idle for {idle:.0f}s; shutting down.")
+            server.shutdown()
+            return
+        time.sleep(min(idle_seconds - idle, 30.0))
+
+
+def serve(host: str, port: int) -> None:
+    """Load the model, bind the port, signal readiness, then serve."""
+    # Load before binding so "ready" means the first request will not
+    # pay for the model download/initialisation.
+    if LLM_BACKEND != "openai":
+        start = time.perf_counter()
+        _load_llm()
+        _STATE["model_load_seconds"] = time.perf_counter() - start
+    server = make_server(host, port, app, threaded=True)
+    _STATE["server"] = server
+    _STATE["last_request"] = time.monotonic()
+    if IDLE_SECONDS > 0:
+        threading.Thread(target=_idle_watchdog, args=(server, IDLE_SECONDS),
+                         daemon=True).start()
+    _signal_ready(server.server_port)
+    server.serve_forever()
+    server.server_close()
+
+
 def _cli_process_rows(rows: List[Dict[str, Any]],
                       sink: Any) -> None:
     """Process rows and write to sink."""
@@ -433,8 +558,7 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     if args.serve or args.file is None:
-        port = int(os.getenv("PORT", "8000"))
-        app.run(host="0.0.0.0", port=port, debug=False)
+        serve("0.0.0.0", int(os.getenv("PORT", "8000")))
     else:
         _cli_process_file(
             in_path=args.file,
@@ -0,0 +1,113 @@
+"""Reuse a warm local LLM server, start one only when needed.
+
+Every pipeline run (each Pull Data click) used to spawn its own
+``llm_hosting/app.py`` and leave it running. ``LlmSupervisor.ensure``
+first asks the health endpoint whether a server is already up and
+reuses it; otherwise it launches one (in its own session, so it
+outlives this run) and waits for its readiness pipe. The server stops
+itself after LLM_IDLE_SECONDS without a request; with
+LLM_IDLE_SECONDS=0 ``finish`` stops it at the end of the run instead.
+
+``stats_report`` prints whether the run paid the cold start, how long
+it took (and the model load inside it) and the server's resident
+memory.
+"""
+
+import json
+import os
+import time
+from urllib.request import Request, urlopen
+
+# Idle period after which the server shuts itself down (0 = at the end
+# of each run). The server inherits and reads the same variable.
+IDLE_SECONDS = float(os.getenv("LLM_IDLE_SECONDS", "600"))
+
+
+def _mib(value) -> str:
+    """Bytes as MiB text, or "n/a"."""
+    return f"{value / 2**20:.1f} MiB" if value else "n/a"
+
+
+class LlmSupervisor:
+    """Find, start and stop the local LLM server for one run."""
+
+    def __init__(self, start, wait, health_url="http://127.0.0.1:8000/",
+                 idle_seconds=IDLE_SECONDS):
+        # start() launches the server, wait(timeout_seconds) blocks
+        # until it is ready (Scraper/main.py's launcher functions).
+        self._start = start
+        self._wait = wait
+        self.health_url = health_url
+        self.idle_seconds = idle_seconds
+        self.stats = {"reused": None, "cold_start_seconds": None,
+                      "model_load_seconds": None, "rss_bytes": None,
+                      "pid": None, "stopped": False}
+
+    def health(self) -> dict | None:
+        """The running server's health info, or None if none answers."""
+        try:
+            with urlopen(self.health_url, timeout=2) as resp:
+                info = json.loads(resp.read().decode("utf-8") or "{}")
+        except (OSError, ValueError):
+            return None
+        return info if isinstance(info, dict) and info.get("ok") else None
+
+    def _record(self, info: dict | None) -> None:
+        for key in ("pid", "rss_bytes", "model_load_seconds"):
+            if info and info.get(key) is not None:
+                self.stats[key] = info[key]
+
+    def ensure(self, timeout_seconds=300) -> bool:
+        """Reuse a healthy server or start one; True once it is ready."""
+        info = self.health()
+        if info is not None:
+            # Called again later in a run: a cold start stays reported.
+            if self.stats["reused"] is None:
+                self.stats["reused"] = True
+            self._record(info)
+            print(f"Reusing warm LLM server (pid {info.get('pid')}).")
+            return True
+
+        self.stats["reused"] = False
+        start = time.perf_counter()
+        self._start()
+        if not self._wait(timeout_seconds=timeout_seconds):
+            return False
+        self.stats["cold_start_seconds"] = time.perf_counter() - start
+        self._record(self.health())
+        return True
+
+    def stop(self) -> bool:
+        """Ask the server to shut down; True if it accepted."""
+        req = Request(self.health_url.rstrip("/") + "/shutdown", data=b"",
+                      method="POST")
+        try:
+            with urlopen(req, timeout=5):
+                pass
+        except OSError:
+            return False
+        self.stats["stopped"] = True
+        return True
+
+    def finish(self) -> None:
+        """End of run: refresh memory use, stop now if not kept warm."""
+        self._record(self.health())
+        if self.idle_seconds <= 0:
+            self.stop()
+
+    def stats_report(self) -> str:
+        """One-line summary of the server's cost to this run."""
+        s = self.stats
+        load = s["model_load_seconds"]
+        load_text = f"{load:.1f}s" if load is not None else "n/a"
+        if s["reused"]:
+            head = f"reused warm server (model load {load_text} avoided)"
+        elif s["cold_start_seconds"] is not None:
+            head = (f"cold start {s['cold_start_seconds']:.1f}s "
+                    f"(model load {load_text})")
+        else:
+            head = "not ready"
+        tail = "stopped" if s["stopped"] else (
+            f"stops after {self.idle_seconds:.0f}s idle")
+        return (f"LLM server: {head}, pid {s['pid']}, "
+                f"RSS {_mib(s['rss_bytes'])}, {tail}")
@@ -3,8 +3,12 @@
 # os manages paths/files, subprocess enables running multiple scripts,
 # sys ensures the use of the current Python interpreter, time used for
 # wait periods, json used to validate output files of the scripts,
-# and urllib used to reach and execute the LLM server.
+# and urllib used to reach and execute the LLM server. select lets the
+# LLM server announce itself instead of being polled for.
+import argparse
+import asyncio
 import os
+import select
 import sys
 import time
 import json
@@ -12,15 +16,40 @@ import subprocess
 from urllib.request import urlopen
 
 try:
-    from . import clean  # when Scraper.main is imported as a package
+    # when Scraper.main is imported as a package
+    from . import (checkpoint, clean, crawl, http_cache, listing,
+                   llm_supervisor, parse_pool, pipeline, profiler,
+                   rate_control, scrape, telemetry, transfer)
 except ImportError:
-    import clean  # when main.py is run directly from Scraper/
+    # when main.py is run directly from Scraper/
+    import checkpoint
+    import clean
+    import crawl
+    import http_cache
+    import listing
+    import llm_supervisor
+    import parse_pool
+    import pipeline
+    import profiler
+    import rate_control
+    import scrape
+    import telemetry
+    import transfer
 
 RAW_FILE = "raw_scraped_data.json"
+MASTER_FILE = "llm_extend_applicant_data.json"
+# Safety cap so a crawl never runs forever (same as scrape.py).
+SCRAPE_TARGET = 1000
 LLM_DIR = "llm_hosting"
 LLM_SCRIPT = "app.py"
-SCRAPE_SCRIPT = "scrape.py"
 LLM_HEALTH_URL = "http://127.0.0.1:8000/"
+# "batch" crawls to RAW_FILE first and then runs clean.main();
+# "stream" runs crawl -> clean -> load in-process (pipeline.py). Batch
+# stays the default: only it checkpoints RAW_FILE and can resume.
+PIPELINE_MODE = os.getenv("SCRAPE_PIPELINE", "batch")
+
+# Read end of the readiness pipe of the LLM server we started.
+_LLM_READY_FD = [None]
 
 
 # This function ensure the local LLM starts and stays running in the
@@ -32,18 +61,64 @@ def start_llm_server():
     env["OMP_NUM_THREADS"] = "1"
     env["LLAMA_NUM_THREADS"] = "1"
 
+    # The server writes one line to LLM_READY_FD once the model is
+    # loaded and its port accepts connections. The parent closes its
+    # copy of the write end, so the pipe hits EOF if the server dies.
+    _close_ready_pipe()
+    read_fd, write_fd = os.pipe()
+    env["LLM_READY_FD"] = str(write_fd)
+
     # subprocess.Popen runs app.py and allows code to continue.
     # Local LLM must stay running while scrape.py then clean.py run.
     # must stay running while scrape.py then clean.py are executed.
-    return subprocess.Popen([sys.executable, LLM_SCRIPT], cwd=LLM_DIR,
-                            env=env)
+    _LLM_READY_FD[0] = read_fd
+    try:
+        # Own session: the server outlives this run so the next one can
+        # reuse it (llm_supervisor.py); it stops itself when idle.
+        return subprocess.Popen([sys.executable, LLM_SCRIPT], cwd=LLM_DIR,
+                                env=env, pass_fds=(write_fd,),
+                                start_new_session=True)
+    except OSError:
+        _close_ready_pipe()
+        raise
+    finally:
+        os.close(write_fd)
+
+
+def _close_ready_pipe():
+    """Forget (and close) the readiness pipe of a previous server."""
+    if _LLM_READY_FD[0] is not None:
+        os.close(_LLM_READY_FD[0])
+        _LLM_READY_FD[0] = None
 
 
-# Retries the LLM server until it is up and running.
+# Block on the server's readiness pipe: returns as soon as the model is
+# loaded, or as soon as the server exits (EOF) without getting there.
+def _wait_ready_pipe(read_fd, timeout_seconds):
+    """Wait for the "ready" line on read_fd; True if it arrived."""
+    ready, _, _ = select.select([read_fd], [], [], timeout_seconds)
+    line = os.read(read_fd, 64) if ready else None
+    _close_ready_pipe()
+    if line is None:
+        print("Timed out waiting for LLM server.")
+        return False
+    if not line.startswith(b"ready"):
+        print("LLM server exited before it was ready.")
+        return False
+    print(f"LLM server is ready ({line.decode('ascii', 'replace').strip()}).")
+    return True
+
+
+# Waits for the LLM server. A server started by start_llm_server()
+# announces itself over its readiness pipe; one started elsewhere is
+# polled on its health endpoint with a short, growing interval.
 def wait_for_llm(timeout_seconds=300):
-    """Poll the LLM health endpoint until ready or timed out."""
+    """Wait until the LLM server is ready or timed out."""
+    if _LLM_READY_FD[0] is not None:
+        return _wait_ready_pipe(_LLM_READY_FD[0], timeout_seconds)
 
     start = time.time()
+    delay = 0.05
     # Check the time per loop to determine how much time has elapsed.
     # Retries if opening the server fails.
     while time.time() - start < timeout_seconds:
@@ -53,38 +128,52 @@ def wait_for_llm(timeout_seconds=300):
             print("LLM server is ready.")
             return True
         except OSError:
-            time.sleep(5)
+            time.sleep(delay)
+            delay = min(delay * 2, 5)
 
     print("Timed out waiting for LLM server.")
     return False
 
-# Once LLM is running, execute scrape.py.
-def run_scrape():
-    """Run scrape.py as a subprocess and return its exit code."""
-    print("Running scrape.py")
-    # Pauses main.py until scrape.py is complete.
-    result = subprocess.run(
-        [sys.executable, SCRAPE_SCRIPT],
-        check=False
-    )
-    return result.returncode
-
-
-# Safety measure to ensure that the output of scrape.py
-# exists before moving on.
-def wait_for_file(path, timeout_seconds=300):
-    """Wait for a file to exist within a timeout window."""
-    print(f"Waiting for {path} to be created")
-    start = time.time()
 
-    while time.time() - start < timeout_seconds:
-        if os.path.exists(path):
-            print(f"Found {path}.")
-            return True
-        time.sleep(5)
+# Run the asyncio crawl engine in this process instead of spawning
+# scrape.py, then write the same raw JSON file clean.py expects. Pages
+# are checkpointed as they finish, so resume=True continues a crawl
+# that was killed part way.
+def run_crawl(target=SCRAPE_TARGET, resume=False):
+    """Crawl new GradCafe rows in-process and save them to RAW_FILE."""
+    print("Running crawl")
+    transfer.reset_stats()
+    listing.reset_stats()
+    rate_control.reset_controller()
+    telemetry.reset(telemetry.REPORT_FILE)
+    known_ids = scrape.load_known_ids(MASTER_FILE)
+    print(f"Loaded {len(known_ids)} known IDs from master dataset.")
+    progress = checkpoint.CrawlCheckpoint(RAW_FILE)
+    state = progress.resume() if resume else progress.start()
+    if state["rows"]:
+        print(f"Resuming at page {state['next_page']} with "
+              f"{state['rows']} rows already saved.")
+    with profiler.stage("scrape") as counts:
+        # Rows saved before a resume are skipped, not a reason to stop.
+        try:
+            with progress.saved_ids() as resumed_ids:
+                asyncio.run(crawl.crawl(state["next_page"], target,
+                                        known_ids, progress=progress,
+                                        skip_ids=resumed_ids))
+        finally:
+            parse_pool.close_parse_pool()
+        saved = counts["rows_out"] = progress.finish()
+    print(f"Done. Saved {saved} entries to {RAW_FILE}")
+    print(transfer.stats_report())
+    print(listing.stats_report())
+    print(rate_control.get_controller().stats_report())
+    cache = http_cache.get_cache()
+    if cache is not None:
+        print(cache.stats_report())
+    telemetry.publish(finished=True, extra=scrape.run_summary(saved))
+    print(f"Run report written to {telemetry.REPORT_FILE}")
+    return 0
 
-    print(f"Timed out waiting for {path}.")
-    return False
 
 # Safety check to ensure that the output of script is a valid
 # JSON file.
@@ -99,39 +188,91 @@ def json_sanity_check(path):
     return len(data)
 
 # Ensures that all python files are executed in the proper order.
-def main():
+def main(argv=None):
     """Run the full pipeline: start LLM, scrape, validate, clean."""
+    parser = argparse.ArgumentParser(description="Scrape, clean and load "
+                                                 "new GradCafe entries.")
+    parser.add_argument("--resume", action="store_true",
+                        default=bool(os.getenv("SCRAPE_RESUME")),
+                        help="continue a killed crawl from its checkpoint "
+                             "(batch mode; also SCRAPE_RESUME=1)")
+    args = parser.parse_args(argv)
+
     # Make sure relative paths work no matter where user runs this from.
     script_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(script_dir)
 
     print("\n=== Pipeline Start ===\n")
+    profiler.reset()
+
+    # Reuse a warm app.py server or start one, and wait until it is
+    # ready.
+    supervisor = llm_supervisor.LlmSupervisor(start_llm_server, wait_for_llm,
+                                              LLM_HEALTH_URL)
+    ready = False
+    try:
+        with profiler.stage("llm_startup"):
+            ready = supervisor.ensure()
+        if ready:
+            run_pipeline(supervisor, resume=args.resume)
+    finally:
+        if ready:
+            supervisor.finish()
+        print(supervisor.stats_report())
+        write_profile()
 
-    #Initiate app.py
-    start_llm_server()
 
-    # Waits for LLM server to be running.
-    if not wait_for_llm():
+# Save this run's stage profile, append it to the history and point
+# out stages that got slower than in recent runs.
+def write_profile():
+    """Write the run profile report and print regressions."""
+    try:
+        profiler.get_profiler().write()
+    except OSError as e:
+        print(f"Could not write the stage profile: {e}")
         return
+    print(f"Stage profile written to {profiler.REPORT_FILE} "
+          f"(history: {profiler.HISTORY_FILE})")
+    for line in profiler.regressions(profiler.load_history()):
+        print(f"Slower than recent runs: {line}")
 
-    # Execute scrape.py
-    code = run_scrape()
-    if code != 0:
-        print(f"scrape.py failed with exit code {code}")
+
+# Everything after the LLM server is ready.
+def run_pipeline(supervisor=None, resume=False):
+    """Scrape, validate and clean (or stream all three)."""
+    # Stream rows from the crawl through cleaning into the database.
+    if PIPELINE_MODE == "stream":
+        if resume:
+            print("Stream mode keeps no checkpoint; starting a new crawl.")
+        pipeline.run(MASTER_FILE, SCRAPE_TARGET)
+        print("Pipeline complete")
         return
 
-    # Wait until raw JSON file exists.
-    if not wait_for_file(RAW_FILE):
+    # Crawl new rows in-process, continuing a killed run if asked to.
+    # RAW_FILE is complete once run_crawl returns.
+    code = run_crawl(resume=resume)
+    if code != 0:
+        print(f"Crawl failed with exit code {code}")
         return
 
-    # Validate the output file of scrape.py
+    # Validate the output file of the crawl
     try:
-        n = json_sanity_check(RAW_FILE)
+        with profiler.stage("validate") as counts:
+            n = counts["rows_out"] = json_sanity_check(RAW_FILE)
         print(f"raw_scraped_data.json loaded successfully ({n} rows).")
     except (ValueError, OSError) as e:
         print(f"raw_scraped_data.json is not valid JSON: {e}")
         return
 
+    # Nothing talks to the LLM server during the crawl, so it may have
+    # stopped itself after LLM_IDLE_SECONDS; reuse or restart it.
+    if supervisor is not None:
+        with profiler.stage("llm_startup"):
+            ready = supervisor.ensure()
+        if not ready:
+            print("LLM server is not ready; skipping clean.py")
+            return
+
     # Run clean.py
     print("Running clean.py...")
     clean.main()
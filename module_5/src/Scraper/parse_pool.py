@@ -0,0 +1,99 @@
+"""Process pool that parses downloaded pages off the fetch threads.
+
+Fetch threads hand raw HTML to ``ParsePool.submit`` and go straight back
+to downloading; parsing runs in separate processes, so it no longer
+holds the GIL the fetch threads need. At most ``max_pending`` pages may
+wait for a parser: once that many are queued, ``submit`` blocks the
+fetching thread until a parser catches up.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor
+
+try:
+    from . import parsers
+except ImportError:  # pragma: no cover - run directly from Scraper/
+    import parsers
+
+# Shared pool for the process (created on first use).
+_POOL = [None]
+_POOL_LOCK = threading.Lock()
+
+# What a parse Future can raise: a dead parser process (BrokenExecutor),
+# a page too deeply nested to walk (RecursionError is a RuntimeError),
+# or a backend rejecting the markup.
+PARSE_ERRORS = (BrokenExecutor, RuntimeError, ValueError, OSError)
+
+
+# Runs in a parser process. The backend name is passed along so the
+# workers use the same backend as the parent.
+def _parse(backend_name: str, method: str, html_text: str):
+    """Run one backend method on a page."""
+    return getattr(parsers.get_backend(backend_name), method)(html_text)
+
+
+class ParsePool:
+    """Bounded hand-off from fetch threads to parser processes."""
+
+    def __init__(self, processes: int, max_pending: int | None = None):
+        self.processes = processes
+        # The pool is started while fetch threads are running, and
+        # forking a threaded process can copy held locks, so workers
+        # are spawned fresh.
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        # One token per page handed to the pool and not yet parsed.
+        self._pending = queue.Queue(maxsize=max_pending or 4 * processes)
+
+    def submit(self, method: str, html_text: str) -> Future:
+        """Queue a page for a parser; block while the queue is full."""
+        self._pending.put(None)
+        try:
+            future = self._executor.submit(
+                _parse, parsers.get_backend().name, method, html_text
+            )
+        except BaseException:
+            self._pending.get_nowait()
+            raise
+        future.add_done_callback(lambda _: self._pending.get_nowait())
+        return future
+
+    def page_text(self, html_text: str) -> Future:
+        """Visible text of a result page (see parsers.page_text)."""
+        return self.submit("page_text", html_text)
+
+    def survey_rows(self, html_text: str) -> Future:
+        """Parsed rows of a survey page (see parsers.survey_rows)."""
+        return self.submit("survey_rows", html_text)
+
+    def close(self) -> None:
+        """Wait for queued pages and stop the parser processes."""
+        self._executor.shutdown(wait=True)
+
+
+# The scraper opts in by setting SCRAPE_PARSE_WORKERS to the number of
+# parser processes (0 or unset keeps parsing on the fetch threads).
+def get_parse_pool():
+    """Return the process-wide parse pool, or None when it is off."""
+    processes = int(os.getenv("SCRAPE_PARSE_WORKERS", "0"))
+    if processes <= 0:
+        return None
+    with _POOL_LOCK:
+        if _POOL[0] is None or _POOL[0].processes != processes:
+            if _POOL[0] is not None:
+                _POOL[0].close()
+            _POOL[0] = ParsePool(processes)
+        return _POOL[0]
+
+
+def close_parse_pool() -> None:
+    """Shut the shared pool down at the end of a run."""
+    with _POOL_LOCK:
+        if _POOL[0] is not None:
+            _POOL[0].close()
+            _POOL[0] = None
@@ -0,0 +1,203 @@
+"""Parser backends for GradCafe survey and result pages.
+
+Each backend turns HTML into plain Python data, so scrape.py never
+touches a parse tree:
+
+* ``survey_rows(html_text)`` returns one ``{"cells": [...], "href": ...}``
+  dict per ``<tr>`` that has at least one ``<td>``. ``cells`` holds each
+  cell's text as ``td.get_text(" ").strip()`` and ``href`` is the first
+  link to a ``/result/`` page inside the row (or None).
+* ``page_text(html_text)`` returns the visible text of a whole page as
+  ``soup.get_text(" ").strip()``.
+
+``soup`` is the BeautifulSoup reference backend. ``stream`` produces the
+same output in one pass over the parser events without building a
+tree. SCRAPE_PARSER picks the backend (default ``stream``).
+"""
+
+import os
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+
+# Tags html.parser never pushes onto the open-element stack.
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen",
+    "link", "menuitem", "meta", "param", "source", "track", "wbr",
+    "basefont", "bgsound", "command", "frame", "image", "isindex",
+    "nextid", "spacer",
+})
+# Text inside these is not part of get_text() (script, CSS, templates
+# and ruby annotations).
+HIDDEN_TEXT_TAGS = frozenset({"script", "style", "template", "rt", "rp"})
+# Whitespace-only text is kept as-is inside these.
+PRESERVE_SPACE_TAGS = frozenset({"pre", "textarea"})
+_ASCII_SPACES = " \n\t\x0c\r"
+
+
+def _is_result_link(href) -> bool:
+    return bool(href) and "/result/" in href
+
+
+class SoupBackend:
+    """Reference backend: build a BeautifulSoup tree and walk it."""
+
+    name = "soup"
+
+    def survey_rows(self, html_text: str) -> list[dict]:
+        """Return cell texts and result link for every data row."""
+        soup = BeautifulSoup(html_text, "html.parser")
+        rows = []
+        for tr in soup.find_all("tr"):
+            cells = tr.find_all("td")
+            if not cells:
+                continue
+            link = tr.find("a", href=_is_result_link)
+            rows.append({
+                "cells": [td.get_text(" ").strip() for td in cells],
+                "href": link.get("href") if link else None,
+            })
+        return rows
+
+    def page_text(self, html_text: str) -> str:
+        """Return the visible text of a page."""
+        return BeautifulSoup(html_text, "html.parser").get_text(" ").strip()
+
+
+# Mirrors how BeautifulSoup's html.parser tree builder nests elements:
+# an end tag closes everything opened after the matching start tag, an
+# unmatched end tag is ignored, and a <td> or piece of text belongs to
+# every row or cell that is open around it (nested tables included).
+class _Scanner(HTMLParser):
+    """Event handler that collects rows and/or page text."""
+
+    def __init__(self, want_rows: bool, want_text: bool):
+        super().__init__(convert_charrefs=True)
+        # None switches that half of the work off.
+        self.rows = [] if want_rows else None
+        self.strings = [] if want_text else None
+        self._stack = []
+        # Rows and cells currently open, outermost first.
+        self._open = {"tr": [], "td": []}
+        self._buffer = []
+        self._hidden = 0
+        self._preserve = 0
+
+    # ---------------- text nodes ----------------
+    def _emit(self, text):
+        """Hand one finished text node to the page and open cells."""
+        if self._hidden:
+            return
+        if self.strings is not None:
+            self.strings.append(text)
+        for cell in self._open["td"]:
+            cell.append(text)
+
+    def _flush(self):
+        """End the current text node, as the tree builder does."""
+        if not self._buffer:
+            return
+        text = "".join(self._buffer)
+        self._buffer = []
+        # Whitespace-only nodes collapse to one newline or space.
+        if not self._preserve and not text.strip(_ASCII_SPACES):
+            text = "\n" if "\n" in text else " "
+        self._emit(text)
+
+    def handle_data(self, data):
+        self._buffer.append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.startswith("CDATA["):
+            self._emit(data[6:])
+
+    # ---------------- elements ----------------
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in VOID_TAGS:
+            return
+        cell = None
+        if self.rows is not None:
+            if tag == "tr":
+                cell = {"cells": [], "href": None}
+                self.rows.append(cell)
+                self._open["tr"].append(cell)
+            elif tag == "td":
+                cell = []
+                self._open["td"].append(cell)
+                for row in self._open["tr"]:
+                    row["cells"].append(cell)
+            elif tag == "a":
+                href = dict(attrs).get("href")
+                if _is_result_link(href):
+                    for row in self._open["tr"]:
+                        if row["href"] is None:
+                            row["href"] = href
+        self._hidden += tag in HIDDEN_TEXT_TAGS
+        self._preserve += tag in PRESERVE_SPACE_TAGS
+        self._stack.append((tag, cell))
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if not any(name == tag for name, _ in self._stack):
+            return
+        while True:
+            name, cell = self._stack.pop()
+            self._hidden -= name in HIDDEN_TEXT_TAGS
+            self._preserve -= name in PRESERVE_SPACE_TAGS
+            if cell is not None:
+                self._open[name].pop()
+            if name == tag:
+                return
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+class StreamBackend:
+    """Single-pass backend built on html.parser events (no tree)."""
+
+    name = "stream"
+
+    def survey_rows(self, html_text: str) -> list[dict]:
+        """Return cell texts and result link for every data row."""
+        scanner = _Scanner(want_rows=True, want_text=False)
+        scanner.feed(html_text)
+        scanner.close()
+        return [
+            {"cells": [" ".join(cell).strip() for cell in row["cells"]],
+             "href": row["href"]}
+            for row in scanner.rows if row["cells"]
+        ]
+
+    def page_text(self, html_text: str) -> str:
+        """Return the visible text of a page."""
+        scanner = _Scanner(want_rows=False, want_text=True)
+        scanner.feed(html_text)
+        scanner.close()
+        return " ".join(scanner.strings).strip()
+
+
+BACKENDS = {backend.name: backend
+            for backend in (SoupBackend(), StreamBackend())}
+DEFAULT_BACKEND = "stream"
+
+
+def get_backend(name: str | None = None):
+    """Return the backend called name, or the one SCRAPE_PARSER picks."""
+    name = name or os.getenv("SCRAPE_PARSER", DEFAULT_BACKEND)
+    try:
+        return BACKENDS[name.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Unknown SCRAPE_PARSER backend: {name!r}") from None
@@ -0,0 +1,321 @@
+"""Streaming scrape -> clean -> load pipeline, all in one process.
+
+Three stages run in their own threads and hand rows over through
+bounded queues, so no intermediate JSON file is written or re-read:
+
+* crawl - the asyncio crawl engine; each finished survey page is put
+  on the raw queue (blocking while it is full, which slows the crawl)
+* clean - ``clean.prepare_row`` / ``extract_row_fields`` per row, then
+  LLM standardization in micro-batches: a batch is sent when it is
+  full or when no row has arrived for ``flush_seconds``. Pairs already
+  standardized this run are not sent again, and pairs answered in an
+  earlier run come from the persistent LLM cache (``llm_cache.py``).
+* load - drops rows already in the master (or loaded earlier this
+  run) and upserts each batch into PostgreSQL over one connection,
+  committing per batch
+
+Rewriting the master JSON costs as much as the whole file, so the rows
+loaded this run are prepended to it once, when the stages stop (also
+after a failure, so the master matches what reached the database).
+``applicant_data.json`` holds the same rows without the LLM fields,
+like the batch path's output for the rows it cleaned.
+
+Unlike the batch path in ``main.py`` there is no raw_scraped_data.json
+checkpoint, so a killed run cannot be resumed (``main.py`` therefore
+only uses this pipeline when ``SCRAPE_PIPELINE=stream``).
+
+Every row carries the time it was scraped; the load stage records
+scrape-to-database latency in the ``row_latency_seconds`` histogram of
+the telemetry report. PIPELINE_QUEUE_SIZE, PIPELINE_LLM_BATCH,
+PIPELINE_LOAD_BATCH and PIPELINE_FLUSH_SECONDS tune the stages.
+"""
+
+import asyncio
+import os
+import queue
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from . import clean, crawl, listing, llm_batching, llm_cache, parse_pool
+    from . import profiler, rate_control, scrape, telemetry, transfer
+except ImportError:  # pragma: no cover - run directly from Scraper/
+    import clean
+    import crawl
+    import listing
+    import llm_batching
+    import llm_cache
+    import parse_pool
+    import profiler
+    import rate_control
+    import scrape
+    import telemetry
+    import transfer
+
+QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "200"))
+LLM_BATCH = int(os.getenv("PIPELINE_LLM_BATCH", "100"))
+LOAD_BATCH = int(os.getenv("PIPELINE_LOAD_BATCH", "50"))
+FLUSH_SECONDS = float(os.getenv("PIPELINE_FLUSH_SECONDS", "0.5"))
+
+# Marks the end of a stage's output.
+_DONE = object()
+
+
+class PipelineAborted(Exception):
+    """Another stage failed; this one stops too."""
+
+
+class _Channel:
+    """Bounded queue between two stages that gives up once aborted."""
+
+    def __init__(self, maxsize: int, abort: threading.Event):
+        self._queue = queue.Queue(maxsize=max(1, maxsize))
+        self._abort = abort
+
+    def abort(self) -> None:
+        """Stop every stage sharing this channel's abort flag."""
+        self._abort.set()
+
+    def put(self, item) -> None:
+        """Block while the queue is full (back-pressure upstream)."""
+        while True:
+            if self._abort.is_set():
+                raise PipelineAborted()
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def batches(self, size: int, flush_seconds: float):
+        """Yield lists of up to size items until the end marker.
+
+        A partial batch is yielded as soon as no item has arrived for
+        flush_seconds, so a slow producer never holds rows back.
+        """
+        batch = []
+        while True:
+            if self._abort.is_set():
+                raise PipelineAborted()
+            try:
+                item = self._queue.get(timeout=flush_seconds if batch
+                                       else 0.1)
+            except queue.Empty:
+                if batch:
+                    yield batch
+                    batch = []
+                continue
+            if item is _DONE:
+                if batch:
+                    yield batch
+                return
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+
+
+class StreamingPipeline:
+    """Crawl, clean and load new rows as they arrive."""
+
+    def __init__(self, master_path=scrape.MASTER_DATA_FILE,
+                 llm_url="http://127.0.0.1:8000/standardize",
+                 target=1000, *, queue_size=QUEUE_SIZE,
+                 llm_batch=LLM_BATCH, load_batch=LOAD_BATCH,
+                 flush_seconds=FLUSH_SECONDS, load_db=True):
+        self.config = {"master_path": master_path, "llm_url": llm_url,
+                       "target": target, "llm_batch": llm_batch,
+                       "load_batch": load_batch, "load_db": load_db,
+                       "flush_seconds": flush_seconds}
+        # Both channels share one abort flag.
+        abort = threading.Event()
+        self.raw = _Channel(queue_size, abort)
+        self.cleaned = _Channel(queue_size, abort)
+        # Standardized (program, university) per LLM input string.
+        self.llm_lookup = {}
+        self.loaded = []
+        self.stats = {"scraped": 0, "cleaned": 0, "saved": 0,
+                      "inserted": 0, "llm_calls": 0, "first_row": None}
+        self._start = None
+
+    # ---------------- stages ----------------
+    # crawl() calls this from a worker thread, so blocking on a full
+    # queue only stalls the crawl, not the event loop.
+    def _append_page(self, page: int, rows: list[dict]) -> None:
+        """Queue every row of a finished page with its scrape time."""
+        del page
+        scraped_at = time.monotonic()
+        for row in rows:
+            self.raw.put((scraped_at, row))
+        self.stats["scraped"] += len(rows)
+
+    def _crawl_stage(self) -> None:
+        known_ids = scrape.load_known_ids(self.config["master_path"])
+        print(f"Loaded {len(known_ids)} known IDs from master dataset.")
+        # Stands in for the checkpoint.CrawlCheckpoint crawl() expects.
+        sink = types.SimpleNamespace(state={"rows": 0},
+                                     append_page=self._append_page)
+        with profiler.stage("scrape") as counts:
+            try:
+                asyncio.run(crawl.crawl(1, self.config["target"], known_ids,
+                                        progress=sink))
+            finally:
+                parse_pool.close_parse_pool()
+                counts["rows_out"] = self.stats["scraped"]
+
+    def _clean_batch(self, batch, version: str) -> None:
+        with profiler.stage("regex_clean", len(batch)) as counts:
+            keys = [clean.prepare_row(row) for _, row in batch]
+            for _, row in batch:
+                clean.extract_row_fields(row)
+            counts["rows_out"] = len(keys)
+        new = [k for k in dict.fromkeys(keys) if k not in self.llm_lookup]
+        if new:
+            self.stats["llm_calls"] += 1
+            with telemetry.timer("llm_batch_seconds"):
+                self.llm_lookup.update(clean.standardize(
+                    new, self.config["llm_url"],
+                    chunk_size=self.config["llm_batch"], version=version))
+        for (scraped_at, row), key in zip(batch, keys):
+            row["program_clean"], row["university_clean"] = \
+                self.llm_lookup.get(key, (None, None))
+            self.cleaned.put((scraped_at, clean.build_final_row(row)))
+        self.stats["cleaned"] += len(batch)
+
+    def _clean_stage(self) -> None:
+        # One health check per run, not one per micro-batch.
+        version = None
+        for batch in self.raw.batches(self.config["llm_batch"],
+                                      self.config["flush_seconds"]):
+            if version is None:
+                version = clean.llm_model_version(
+                    self.config["llm_url"]) or ""
+            self._clean_batch(batch, version)
+
+    def _load_batch(self, batch, saved_ids, conn) -> None:
+        """Upsert the rows of batch whose id is not in saved_ids yet."""
+        added = []
+        for _, row in batch:
+            rid = row.get("result_id")
+            if rid is not None and rid not in saved_ids:
+                saved_ids.add(rid)
+                added.append(row)
+        if conn is not None and added:
+            with profiler.stage("postgres_insert", len(added)) as counts:
+                with conn.cursor() as cur:
+                    counts["rows_out"] = clean.insert_rows(cur, added)
+                conn.commit()
+            self.stats["inserted"] += counts["rows_out"]
+        self.stats["saved"] += len(added)
+        self.loaded.extend(added)
+        now = time.monotonic()
+        if self.stats["first_row"] is None:
+            self.stats["first_row"] = now - self._start
+        for scraped_at, _ in batch:
+            telemetry.observe("row_latency_seconds", now - scraped_at)
+        telemetry.incr("pipeline_rows_loaded", len(added))
+
+    def _load_stage(self) -> None:
+        # Master ids plus the ids loaded so far this run.
+        saved_ids = scrape.load_known_ids(self.config["master_path"])
+        # One connection for the whole stage, one commit per batch.
+        conn = clean.connect_postgres() if self.config["load_db"] else None
+        try:
+            for batch in self.cleaned.batches(self.config["load_batch"],
+                                              self.config["flush_seconds"]):
+                self._load_batch(batch, saved_ids, conn)
+        finally:
+            saved_ids.index.close()
+            if conn is not None:
+                conn.close()
+
+    def _write_master(self) -> None:
+        """Prepend every row loaded this run to the master JSON."""
+        if not self.loaded:
+            return
+        with profiler.stage("master_append", len(self.loaded)) as counts:
+            counts["rows_out"] = len(clean.append_rows_to_master(
+                self.loaded, self.config["master_path"]))
+
+    # ---------------- threading ----------------
+    def _run_stage(self, stage, output) -> None:
+        """Run one stage, then end its output or abort the others."""
+        finished = False
+        try:
+            stage()
+            finished = True
+        finally:
+            if not finished:
+                self.raw.abort()
+            elif output is not None:
+                output.put(_DONE)
+
+    def run(self) -> dict:
+        """Run all three stages to completion and return the stats."""
+        self._start = time.monotonic()
+        stages = ((self._crawl_stage, self.raw),
+                  (self._clean_stage, self.cleaned),
+                  (self._load_stage, None))
+        with ThreadPoolExecutor(max_workers=len(stages),
+                                thread_name_prefix="pipeline") as pool:
+            futures = [pool.submit(self._run_stage, stage, output)
+                       for stage, output in stages]
+        self._write_master()
+        # Stages stopped by another stage's failure raise PipelineAborted;
+        # report the failure that caused it.
+        errors = [f.exception() for f in futures if f.exception()]
+        errors.sort(key=lambda e: isinstance(e, PipelineAborted))
+        if errors:
+            raise errors[0]
+        return dict(self.stats)
+
+    def stats_report(self) -> str:
+        """One-line summary of the run, including row latency."""
+        hist = telemetry.get_telemetry().histograms.get("row_latency_seconds")
+        first = self.stats["first_row"]
+        latency = (f"row latency p50 {hist.percentile(50):.2f}s "
+                   f"p99 {hist.percentile(99):.2f}s"
+                   if hist is not None else "no rows loaded")
+        return (f"Pipeline: {self.stats['scraped']} scraped, "
+                f"{self.stats['saved']} new rows saved, "
+                f"{self.stats['inserted']} inserted, "
+                f"{self.stats['llm_calls']} LLM batches, {latency}"
+                + (f", first row loaded after {first:.1f}s"
+                   if first is not None else ""))
+
+
+# Replaces run_crawl -> json_sanity_check -> clean.main
+# in Scraper/main.py.
+def run(master_path=scrape.MASTER_DATA_FILE, target=1000,
+        llm_url="http://127.0.0.1:8000/standardize",
+        output_path="applicant_data.json") -> int:
+    """Stream new rows into the master JSON and PostgreSQL."""
+    transfer.reset_stats()
+    listing.reset_stats()
+    rate_control.reset_controller()
+    llm_batching.reset_sizer()
+    telemetry.reset(telemetry.REPORT_FILE)
+    pipe = StreamingPipeline(master_path, llm_url, target)
+    stats = pipe.run()
+    # Keeping original final output for mod_2 just in case.
+    clean.save_data([clean.without_llm_fields(r) for r in pipe.loaded],
+                    output_path)
+    print(pipe.stats_report())
+    print(transfer.stats_report())
+    print(listing.stats_report())
+    print(rate_control.get_controller().stats_report())
+    cache = llm_cache.current_cache()
+    if cache is not None:
+        print(cache.stats_report())
+    sizer = llm_batching.current_sizer()
+    if sizer is not None:
+        print(sizer.stats_report())
+    telemetry.publish(finished=True,
+                      extra={**scrape.run_summary(stats["saved"]),
+                             "pipeline": stats,
+                             "llm_cache": cache and dict(cache.stats),
+                             "llm_batches": sizer and dict(sizer.stats)})
+    print(f"Run report written to {telemetry.REPORT_FILE}")
+    return 0
@@ -0,0 +1,323 @@
+"""Per-stage wall time, CPU time, memory and row counts for a run.
+
+Scraper/main.py wraps each pipeline stage (LLM startup, scrape,
+validate, regex clean, LLM standardize, master append, Postgres
+insert) in ``profiler.stage(name)``. A stage entered several times (the
+streaming pipeline works in batches) accumulates into one record. At
+the end of the run ``write`` saves the report as JSON and appends it to
+a JSONL history, and ``regressions`` compares the run with the median
+of the previous ones.
+
+PIPELINE_PROFILE turns on per-stage captures (comma separated):
+``cprofile`` dumps ``<stage>.prof`` files (pstats format) and
+``tracemalloc`` records the Python allocation peak and writes the top
+allocation sites to ``<stage>.tracemalloc.txt``, both under
+PIPELINE_PROFILE_DIR/<run id>/. CPU time is process CPU during the
+stage, so stages that overlap in the streaming pipeline share it.
+
+Only one cProfile profiler can be active at a time (Python 3.12+
+raises otherwise), so a stage entered while another is being profiled
+(a nested stage, or an overlapping one in the streaming pipeline) runs
+unprofiled and is counted in its ``cprofile_skipped``.
+
+``process_peak_rss_bytes`` is the process's resident-set high-water
+mark when the stage last finished; it never falls, so it is not the
+stage's own memory. With ``tracemalloc`` on, ``py_alloc_peak_bytes``
+is the Python allocation peak during the stage. tracemalloc's peak is
+process-wide, so it is only recorded for a stage that ran with no
+other stage overlapping it; other entries (all of the streaming
+pipeline's stages, which overlap the crawl) count in
+``tracemalloc_skipped``. The allocation sites are written once per
+stage name, on its first recorded peak.
+
+Run ``python profiler.py`` to print the recorded history.
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+CAPTURE = os.getenv("PIPELINE_PROFILE", "")
+REPORT_FILE = os.getenv("PIPELINE_PROFILE_FILE", "run_profile.json")
+HISTORY_FILE = os.getenv("PIPELINE_PROFILE_HISTORY",
+                         "run_profile_history.jsonl")
+PROFILE_DIR = os.getenv("PIPELINE_PROFILE_DIR", "profiles")
+
+# A stage is flagged when it is this much slower than its baseline.
+REGRESSION_RATIO = 1.25
+# Ignore stages faster than this; their noise swamps the ratio.
+MIN_SECONDS = 0.5
+
+CAPTURES = ("cprofile", "tracemalloc")
+
+# Held by the stage whose cProfile profiler is active.
+_CPROFILE_LOCK = threading.Lock()
+# Stages traced right now and how many have been entered in total, so
+# a stage can tell whether another one overlapped it.
+_TRACE_LOCK = threading.Lock()
+_TRACE_STAGES = {"running": 0, "entered": 0}
+
+
+def peak_rss_bytes() -> int | None:
+    """Peak resident set size of this process so far (never falls)."""
+    if resource is None:  # pragma: no cover - Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _trace_enter() -> int | None:
+    """Count a stage in; its entry number if no other stage is running."""
+    with _TRACE_LOCK:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _TRACE_STAGES["running"] += 1
+        _TRACE_STAGES["entered"] += 1
+        if _TRACE_STAGES["running"] > 1:
+            return None
+        tracemalloc.reset_peak()
+        return _TRACE_STAGES["entered"]
+
+
+def _trace_exit(ticket: int | None) -> int | None:
+    """Count a stage out; its allocation peak if it ran alone."""
+    with _TRACE_LOCK:
+        _TRACE_STAGES["running"] -= 1
+        if ticket is None or _TRACE_STAGES["entered"] != ticket:
+            return None
+        return tracemalloc.get_traced_memory()[1]
+
+
+def parse_capture(spec: str | None) -> frozenset:
+    """Capture names from a PIPELINE_PROFILE value."""
+    names = {n.strip().lower() for n in (spec or "").split(",") if n.strip()}
+    unknown = names - set(CAPTURES)
+    if unknown:
+        raise ValueError(f"Unknown PIPELINE_PROFILE capture(s): "
+                         f"{', '.join(sorted(unknown))}")
+    return frozenset(names)
+
+
+class StageProfiler:
+    """Accumulates one record per stage name for the current run."""
+
+    def __init__(self, capture=CAPTURE, profile_dir=PROFILE_DIR):
+        self.capture = parse_capture(capture)
+        self.run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        self.started = time.time()
+        self.profile_dir = os.path.join(profile_dir, self.run_id)
+        self.stages = {}
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    def _record(self, name: str) -> dict:
+        with self._lock:
+            if name not in self.stages:
+                self.stages[name] = {
+                    "calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0,
+                    "rows_in": None, "rows_out": None,
+                    "process_peak_rss_bytes": None,
+                }
+            return self.stages[name]
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int | None = None):
+        """Time the block as stage name; set counts["rows_out"] inside."""
+        counts = {"rows_in": rows_in, "rows_out": None}
+        profile = None
+        if "cprofile" in self.capture:
+            if _CPROFILE_LOCK.acquire(blocking=False):
+                with self._lock:
+                    profile = self._profiles.setdefault(name,
+                                                        cProfile.Profile())
+                profile.enable()
+            else:
+                counts["cprofile_skipped"] = 1
+        tracing = "tracemalloc" in self.capture
+        ticket = _trace_enter() if tracing else None
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield counts
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            if profile is not None:
+                profile.disable()
+                _CPROFILE_LOCK.release()
+            if tracing:
+                alloc_peak = _trace_exit(ticket)
+                if alloc_peak is None:
+                    counts["tracemalloc_skipped"] = 1
+                else:
+                    counts["py_alloc_peak_bytes"] = alloc_peak
+            self._finish(name, wall, cpu, counts)
+
+    def _finish(self, name, wall, cpu, counts) -> None:
+        rec = self._record(name)
+        alloc_peak = counts.get("py_alloc_peak_bytes")
+        with self._lock:
+            first_peak = (alloc_peak is not None
+                          and "py_alloc_peak_bytes" not in rec)
+            rec["calls"] += 1
+            rec["wall_seconds"] += wall
+            rec["cpu_seconds"] += cpu
+            rec["process_peak_rss_bytes"] = peak_rss_bytes()
+            for key in ("rows_in", "rows_out"):
+                if counts[key] is not None:
+                    rec[key] = (rec[key] or 0) + counts[key]
+            for key in ("cprofile_skipped", "tracemalloc_skipped"):
+                if key in counts:
+                    rec[key] = rec.get(key, 0) + 1
+            if alloc_peak is not None:
+                rec["py_alloc_peak_bytes"] = max(
+                    rec.get("py_alloc_peak_bytes", 0), alloc_peak)
+        if first_peak:
+            self._write_allocations(name, tracemalloc.take_snapshot())
+
+    def _write_allocations(self, name: str, snapshot) -> None:
+        """Top allocation sites of the stage, one per line."""
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, f"{name}.tracemalloc.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            for stat in snapshot.statistics("lineno")[:25]:
+                f.write(f"{stat}\n")
+
+    def report(self) -> dict:
+        """The run report as a dict."""
+        with self._lock:
+            stages = {name: dict(rec) for name, rec in self.stages.items()}
+        return {
+            "run_id": self.run_id,
+            "started": datetime.fromtimestamp(
+                self.started, timezone.utc).isoformat(),
+            "wall_seconds": time.time() - self.started,
+            "cpu_seconds": time.process_time(),
+            "process_peak_rss_bytes": peak_rss_bytes(),
+            "capture": sorted(self.capture),
+            "stages": stages,
+        }
+
+    def write(self, report_path=None, history_path=None) -> dict:
+        """Save the report, append it to the history; return it."""
+        report_path = report_path or REPORT_FILE
+        history_path = history_path or HISTORY_FILE
+        for name, profile in self._profiles.items():
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profile.dump_stats(os.path.join(self.profile_dir,
+                                            f"{name}.prof"))
+        report = self.report()
+        tmp = report_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp, report_path)
+        with open(history_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report) + "\n")
+        return report
+
+
+def load_history(history_path=None) -> list[dict]:
+    """Every report in the history file, oldest first."""
+    try:
+        with open(history_path or HISTORY_FILE, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return []
+    reports = []
+    for line in lines:
+        try:
+            reports.append(json.loads(line))
+        except ValueError:
+            continue  # a torn last line from a killed run
+    return reports
+
+
+def regressions(history: list[dict], window: int = 5,
+                ratio: float = REGRESSION_RATIO) -> list[str]:
+    """Stages of the last run slower than the median of earlier runs."""
+    if len(history) < 2:
+        return []
+    latest, earlier = history[-1], history[-1 - window:-1]
+    found = []
+    for name, rec in latest["stages"].items():
+        past = [r["stages"][name]["wall_seconds"] for r in earlier
+                if name in r.get("stages", {})]
+        if not past:
+            continue
+        baseline = statistics.median(past)
+        now = rec["wall_seconds"]
+        if now >= MIN_SECONDS and now > baseline * ratio:
+            found.append(f"{name}: {now:.2f}s vs median {baseline:.2f}s "
+                         f"over {len(past)} run(s)")
+    return found
+
+
+def format_history(history: list[dict], last: int = 10) -> str:
+    """Wall seconds per stage for the last runs, one row per run."""
+    runs = history[-last:]
+    names = []
+    for report in runs:
+        names.extend(n for n in report["stages"] if n not in names)
+    lines = ["run_id            " + " ".join(f"{n[:14]:>14}" for n in names)]
+    for report in runs:
+        cells = []
+        for name in names:
+            rec = report["stages"].get(name)
+            cells.append(f"{rec['wall_seconds']:14.2f}" if rec
+                         else f"{'-':>14}")
+        lines.append(f"{report['run_id']:<18}" + " ".join(cells))
+    return "\n".join(lines)
+
+
+# Module-level profiler for the current run.
+_PROFILER = [StageProfiler()]
+
+
+def get_profiler() -> StageProfiler:
+    """The profiler of the current run."""
+    return _PROFILER[0]
+
+
+def reset(capture=CAPTURE) -> StageProfiler:
+    """Start profiling a new run."""
+    _PROFILER[0] = StageProfiler(capture)
+    return _PROFILER[0]
+
+
+def stage(name: str, rows_in: int | None = None):
+    """Profile a block as a stage of the current run."""
+    return get_profiler().stage(name, rows_in)
+
+
+def main(argv=None) -> int:
+    """Print the stage history and any regression of the last run."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--history", default=None,
+                        help=f"history file (default {HISTORY_FILE})")
+    parser.add_argument("--last", type=int, default=10)
+    args = parser.parse_args(argv)
+    history = load_history(args.history)
+    if not history:
+        print(f"No runs recorded in {args.history or HISTORY_FILE}.")
+        return 1
+    print(format_history(history, args.last))
+    for line in regressions(history):
+        print(f"REGRESSION {line}")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
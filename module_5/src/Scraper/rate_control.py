@@ -0,0 +1,122 @@
+"""Adaptive request pacing shared by every scraper download.
+
+``RateController`` spaces requests ``1 / rate`` seconds apart and
+adjusts the rate AIMD style: each healthy response adds ``step``
+requests/second (up to ``max_rate``), and each 429, 5xx or timeout
+halves it (down to ``min_rate``). A throttled request also blocks all
+senders for one new interval, or for as long as the server's
+Retry-After asks, so repeated failures back off exponentially without a
+separate retry sleep.
+
+SCRAPE_RATE, SCRAPE_MIN_RATE, SCRAPE_MAX_RATE and SCRAPE_RATE_STEP tune
+the controller (requests/second).
+"""
+
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Shared controller for the process (created on first use).
+_CONTROLLER = [None]
+_CONTROLLER_LOCK = threading.Lock()
+
+# Longest Retry-After we wait for; anything longer is capped.
+MAX_RETRY_AFTER = 300.0
+
+
+def retry_after_seconds(headers) -> float | None:
+    """Seconds requested by a Retry-After header, or None."""
+    value = (headers or {}).get("Retry-After")
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        seconds = float(value)
+    else:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        seconds = when.timestamp() - time.time()
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class RateController:
+    """Additive-increase / multiplicative-decrease request pacing."""
+
+    def __init__(self, rate: float = 2.0, min_rate: float = 0.2,
+                 max_rate: float = 10.0, step: float = 0.2):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.step = step
+        self.rate = min(max(rate, min_rate), max_rate)
+        self._next = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "throttled": 0,
+                      "retry_after": 0, "waited": 0.0,
+                      "low": self.rate, "high": self.rate}
+
+    def reserve(self) -> float:
+        """Claim the next send slot and return how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + 1.0 / self.rate
+            self.stats["requests"] += 1
+            self.stats["waited"] += start - now
+        return start - now
+
+    def wait(self) -> None:
+        """Block the calling thread until it may send a request."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def success(self) -> None:
+        """A healthy response: speed up by one step."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.step)
+            self.stats["ok"] += 1
+            self.stats["high"] = max(self.stats["high"], self.rate)
+
+    def failure(self, retry_after: float | None = None) -> None:
+        """A throttled or failed request: halve the rate and pause."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.stats["throttled"] += 1
+            self.stats["low"] = min(self.stats["low"], self.rate)
+            pause = 1.0 / self.rate
+            if retry_after is not None:
+                self.stats["retry_after"] += 1
+                pause = max(pause, retry_after)
+            self._next = max(self._next, time.monotonic() + pause)
+
+    def stats_report(self) -> str:
+        """One-line summary of pacing this run."""
+        with self._lock:
+            s = dict(self.stats)
+            rate = self.rate
+        return (f"Rate: {s['requests']} requests, {s['throttled']} "
+                f"throttled ({s['retry_after']} with Retry-After), "
+                f"{rate:.2f}/s now (range {s['low']:.2f}-{s['high']:.2f}/s), "
+                f"{s['waited']:.1f}s spent waiting")
+
+
+def get_controller() -> RateController:
+    """Return the process-wide controller, built from the environment."""
+    with _CONTROLLER_LOCK:
+        if _CONTROLLER[0] is None:
+            _CONTROLLER[0] = RateController(
+                rate=float(os.getenv("SCRAPE_RATE", "2")),
+                min_rate=float(os.getenv("SCRAPE_MIN_RATE", "0.2")),
+                max_rate=float(os.getenv("SCRAPE_MAX_RATE", "10")),
+                step=float(os.getenv("SCRAPE_RATE_STEP", "0.2")),
+            )
+        return _CONTROLLER[0]
+
+
+def reset_controller() -> None:
+    """Start the next run with a fresh controller."""
+    with _CONTROLLER_LOCK:
+        _CONTROLLER[0] = None
@@ -0,0 +1,92 @@
+"""Rebuild raw_scraped_data.json from the HTML archive on all cores.
+
+    python -m Scraper.reparse --archive DIR --out FILE [--processes N]
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from . import archive, scrape
+except ImportError:  # pragma: no cover - run directly from Scraper/
+    import archive
+    import scrape
+
+# Jobs per process, so a slow chunk does not hold up the rest.
+JOBS_PER_PROCESS = 4
+
+
+# Runs in a worker process: rebuild the raw rows for one chunk.
+def _reparse_chunk(job) -> list[dict]:
+    """Re-extract result text for a chunk of entries of one segment."""
+    directory, segment, entries = job
+    rows = []
+    with open(os.path.join(directory, segment), "rb") as seg:
+        for entry in entries:
+            row = dict(entry["row"])
+            stored = archive.read_blob(directory, entry, seg)
+            # Listing rows stored their result text, not a page.
+            row["result_text_raw"] = stored \
+                if entry.get("source") == "listing" \
+                else scrape.extract_text(stored)
+            rows.append(row)
+    return rows
+
+
+# A segment holds tens of thousands of pages, so one job per segment
+# would leave most cores idle. Each segment's entries are sorted by
+# offset and cut into chunks, so a worker still reads its part of the
+# file front to back.
+def _jobs(archive_dir: str, entries: list[dict], processes: int) -> list:
+    """(directory, segment, entries) jobs, about JOBS_PER_PROCESS each."""
+    by_segment = {}
+    for entry in entries:
+        by_segment.setdefault(entry["segment"], []).append(entry)
+    size = max(1, -(-len(entries) // (processes * JOBS_PER_PROCESS)))
+    jobs = []
+    for seg, group in by_segment.items():
+        group.sort(key=lambda e: e["offset"])
+        jobs.extend((archive_dir, seg, group[i:i + size])
+                    for i in range(0, len(group), size))
+    return jobs
+
+
+def reparse(archive_dir: str, out_path: str,
+            processes: int | None = None) -> int:
+    """Rebuild raw scraped rows from the archive using all cores."""
+    entries = archive.HtmlArchive(archive_dir).entries()
+    jobs = _jobs(archive_dir, entries, processes or os.cpu_count() or 1)
+
+    rebuilt = {}
+    # One process is just the serial loop; skip the pool start-up cost.
+    if processes == 1:
+        results = map(_reparse_chunk, jobs)
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(_reparse_chunk, jobs))
+    for rows in results:
+        for row in rows:
+            rebuilt[row.get("result_id")] = row
+
+    # Same newest-first order the crawler writes.
+    out_rows = [rebuilt[e["result_id"]] for e in entries]
+    scrape.save_data(out_rows, out_path)
+    print(f"Reparsed {len(out_rows)} archived pages into {out_path}")
+    return len(out_rows)
+
+
+def main(argv=None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Rebuild raw JSON from "
+                                                 "the HTML archive.")
+    parser.add_argument("--archive", default=os.getenv("SCRAPE_ARCHIVE_DIR",
+                                                       "html_archive"))
+    parser.add_argument("--out", default="raw_scraped_data.json")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args(argv)
+    reparse(args.archive, args.out, args.processes)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -1,26 +1,59 @@
 """Scrape GradCafe survey pages and extract raw application data."""
 
+import argparse
 import json
+import os
 import re
-import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
-
-from bs4 import BeautifulSoup
+from urllib.parse import urlsplit
+from urllib.request import Request
+
+try:
+    from . import (archive, checkpoint, http_cache, id_index, listing,
+                   parse_pool, parsers, rate_control, telemetry, transfer)
+    from .http_pool import urlopen
+except ImportError:  # pragma: no cover - run directly from Scraper/
+    import archive
+    import checkpoint
+    import http_cache
+    import id_index
+    import listing
+    import parse_pool
+    import parsers
+    import rate_control
+    import telemetry
+    import transfer
+    from http_pool import urlopen
 
 # Separate the base domain of the URL to facilitate code entering
-# different endpoints.
-BASE_DOMAIN = "https://www.thegradcafe.com"
+# different endpoints. SCRAPE_BASE_DOMAIN points the scraper at another
+# host, e.g. the local stand-in server in benchmarks/.
+BASE_DOMAIN = os.getenv("SCRAPE_BASE_DOMAIN",
+                        "https://www.thegradcafe.com").rstrip("/")
 BASE_SURVEY_URL = f"{BASE_DOMAIN}/survey"
 
+# Detail pages are downloaded by a small worker pool. DETAIL_WORKERS caps
+# the pool size and PER_HOST_LIMIT caps how many of those workers may hit
+# the same host at once, so raising one does not hammer GradCafe.
+DETAIL_WORKERS = int(os.getenv("SCRAPE_DETAIL_WORKERS", "4"))
+PER_HOST_LIMIT = int(os.getenv("SCRAPE_PER_HOST_LIMIT", "4"))
+
+# One semaphore per host shared by every worker thread, so the cap holds
+# across callers; its size is fixed by the first caller for that host.
+_HOST_SLOTS = {}
+_HOST_SLOTS_LOCK = threading.Lock()
+
 # Standardize the GET requests that are made by the code to the website.
 # This makes the requests look like its coming from a user on a MAC
 # using Mozilla. Avoids website from blocking requests due to
 # suspicion of bots.
 def _make_request(url: str, accept: str = "text/html,application/xhtml+xml,"
                                           "application/xml;q=0.9,*/*;q="
-                                          "0.8") -> Request:
+                                          "0.8",
+                  extra_headers: dict | None = None) -> Request:
     """Build a GET Request with browser-like headers."""
     headers = {
         "User-Agent": (
@@ -30,50 +63,95 @@ def _make_request(url: str, accept: str = "text/html,application/xhtml+xml,"
         ),
         "Accept": accept,
         "Accept-Language": "en-US,en;q=0.9",
+        # Result pages compress 5-10x; only offer codecs we can decode.
+        "Accept-Encoding": transfer.accept_encoding(),
         # Reduces chances of losing connection with the website and code
         # crashing.
         "Connection": "keep-alive",
         "Referer": f"{BASE_DOMAIN}/survey/",
     }
+    # e.g. If-None-Match / If-Modified-Since from the response cache.
+    headers.update(extra_headers or {})
     return Request(url, headers=headers, method="GET")
 
 # Download html in bytes and decode into utf-8
 def download_html(url: str) -> str:
-    """Download and decode HTML with retry handling."""
-    # Call _make_request function to execute a standardized GET
-    req = _make_request(url)
+    """Download and decode HTML with retry and cache handling."""
+    # With SCRAPE_CACHE_DIR set, a fresh cached copy skips the network
+    # and a stale one is revalidated with its ETag/Last-Modified.
+    cache = http_cache.get_cache()
+    if cache is not None and cache.is_fresh(url):
+        cached = cache.get_text(url)
+        if cached is not None:
+            telemetry.incr("cache_hits")
+            return cached
+    validators = cache.validators(url) if cache is not None else {}
 
-    # Account for server or network errors due to high volume of data
-    # scraping. Retry scrape with increasing amounts of wait time.
-    for attempt in range(5):
+    # Call _make_request function to execute a standardized GET
+    req = _make_request(url, extra_headers=validators)
+
+    # Every attempt waits for a slot from the shared rate controller,
+    # which speeds up while responses are healthy and slows down (and
+    # honours Retry-After) on throttling, see rate_control.py. Each
+    # attempt's latency and every retry's cause go to telemetry.py.
+    pacing = rate_control.get_controller()
+    for _ in range(5):
+        pacing.wait()
+        telemetry.incr("requests")
         try:
-            with urlopen(req, timeout=60) as resp:
-                # errors guards against characters utf-8 doesn't recognize
-                return resp.read().decode("utf-8", errors="replace")
+            with telemetry.timer("fetch_seconds"), \
+                    urlopen(req, timeout=60) as resp:
+                # Decompresses as it reads; undecodable utf-8 characters
+                # are replaced rather than raising.
+                html_text = transfer.read_text(resp)
+                pacing.success()
+                if cache is not None:
+                    headers = getattr(resp, "headers", None) or {}
+                    cache.store(url, html_text, headers.get("ETag"),
+                                headers.get("Last-Modified"))
+                return html_text
         # Addresses courses of action if code encounters server errors.
-        # Code will exponentially increase wait time before attempting
-        # again. Print status for awareness.
+        # Rate limiting (429) and server errors halve the request rate
+        # before the next attempt. Print status for awareness.
         except HTTPError as e:
-            if 500 <= e.code < 600:
-                wait = 2 ** attempt
-                print(f"HTTP {e.code} for {url}. Retrying in {wait}s...")
-                time.sleep(wait)
+            # 304 Not Modified: the cached copy is still current. If the
+            # body went missing meanwhile, fetch it again unconditionally.
+            if e.code == 304 and cache is not None:
+                pacing.success()
+                telemetry.incr("not_modified")
+                cached = cache.get_text(url, revalidated=True)
+                if cached is not None:
+                    return cached
+                req = _make_request(url)
+                continue
+            if e.code == 429 or 500 <= e.code < 600:
+                telemetry.incr("retries_http_429" if e.code == 429
+                               else "retries_http_5xx")
+                pacing.failure(rate_control.retry_after_seconds(e.headers))
+                print(f"HTTP {e.code} for {url}. Retrying at "
+                      f"{pacing.rate:.2f} requests/s...")
                 continue
+            telemetry.incr(f"http_{e.code}")
             raise
-        # Addresses network and connection errors.
-        except URLError as e:
-            wait = 2 ** attempt
-            print(f"Network error for {url}: {e}. Retrying in {wait}s...")
-            time.sleep(wait)
+        # Addresses network and connection errors, including timeouts.
+        except (URLError, TimeoutError) as e:
+            timed_out = isinstance(e, TimeoutError) or \
+                isinstance(getattr(e, "reason", None), TimeoutError)
+            telemetry.incr("retries_timeout" if timed_out
+                           else "retries_network")
+            pacing.failure()
+            print(f"Network error for {url}: {e}. Retrying at "
+                  f"{pacing.rate:.2f} requests/s...")
             continue
     # If errors are not retryable or solvable, code will not try again.
+    telemetry.incr("fetch_failures")
     raise RuntimeError(f"Failed to download after retries: {url}")
 
-# Convert html_text into beautifulsoup object to facilitate parsing.
+# Reduce a page to its visible text with the configured parser backend
+# (SCRAPE_PARSER, see parsers.py).
 def extract_text(html_text: str) -> str:
     """Return visible text from an HTML page."""
-    soup = BeautifulSoup(html_text, "html.parser")
-    return soup.get_text(" ").strip()
+    return parsers.get_backend().page_text(html_text)
 
 
 # Pull the unique result ID from URLs like:
@@ -135,44 +213,32 @@ def infer_term_from_row(program_text: str, status_text: str,
     return None
 
 # All desired fields exist between <tr> and <td> tags. Ignore the <tr>
-# <td> tags with no data. Pull all data between these tags.
+# <td> tags with no data. The parser backend returns each row as its
+# cell texts plus the first /result/ link.
 def _extract_tr_rows_from_html(html_text: str) -> list:
-    """Return <tr> rows that contain <td> cells."""
-    soup = BeautifulSoup(html_text, "html.parser")
-    rows = []
-    for tr in soup.find_all("tr"):
-        if len(tr.find_all("td")) > 0:
-            rows.append(tr)
-    return rows
+    """Return the parsed <tr> rows that contain <td> cells."""
+    return parsers.get_backend().survey_rows(html_text)
 
-# Find all data within <td> tags in each <tr> row and clean to extract
-# text.
+# Map the cell texts of one parsed row onto the raw row fields.
 def _row_dict_from_tr(tr) -> dict:
-    """Convert one <tr> into a raw row dict."""
-    cells = tr.find_all("td")
-    td_data = []
-    full_url = None
-    result_id = None
-    for td in cells:
-        td_data.append(td.get_text(" ").strip())
+    """Convert one parsed <tr> into a raw row dict."""
+    td_data = tr["cells"]
 
     # Target links to each user's application. Half of the desired
-    # fields exist in there. Target <a> tags with href attributes.
-    link_tag = tr.find("a", href=lambda h: h and "/result/" in h)
+    # fields exist in there.
+    href = tr["href"]
     full_url = None
-    if link_tag:
-        href = link_tag.get("href")
+    result_id = None
+    if href:
         # Build out complete url to facilitate code accessing the
         # student application links during scraping.
-        if href:
-            full_url = href if href.startswith("http") \
-                else (BASE_DOMAIN + href)
+        full_url = href if href.startswith("http") \
+            else (BASE_DOMAIN + href)
 
-    # Extract the unique ID from the URL so we can
-    # de-duplicate later
+        # Extract the unique ID from the URL so we can
+        # de-duplicate later
         result_id = extract_result_id(full_url)
 
-
     return {
         "result_id": result_id,
         "university_raw": td_data[0] if len(td_data) > 0 else None,
@@ -202,17 +268,100 @@ def extract_term_from_detail_row(detail_text: str):
     year = match.group(2)
     return f"{term} {year}"
 
-# Primary data scraper function.
-# Updated to stop scraping when it identifies a results_id that already
-# exists in the original JSON file.
-def scrape_data(url: str, known_ids: set) -> tuple[list[dict], bool]:
-    """Scrape one survey page and return rows plus a stop flag."""
-    html_text = download_html(url)
+# Hand out the shared semaphore that limits concurrent requests to the
+# host of the given URL. limit only sizes a host's slot when it is first
+# created; later callers share it whatever limit they pass.
+def _host_slot(url: str, limit: int) -> threading.BoundedSemaphore:
+    """Return the shared concurrency slot for the URL's host."""
+    host = urlsplit(url).netloc
+    with _HOST_SLOTS_LOCK:
+        slot = _HOST_SLOTS.get(host)
+        if slot is None:
+            slot = threading.BoundedSemaphore(limit)
+            _HOST_SLOTS[host] = slot
+    return slot
+
+# With SCRAPE_ARCHIVE_DIR set, raw result pages are archived so they
+# can be re-parsed later.
+def archive_page(row_data: dict, html_text: str) -> None:
+    """Archive a result page if archiving is enabled."""
+    html_archive = archive.get_archive()
+    if html_archive is not None:
+        html_archive.put(row_data, html_text)
+
+# Reduce a downloaded result page to plain text.
+def result_text(row_data: dict, html_text: str) -> str:
+    """Archive a result page (if enabled) and return its text."""
+    archive_page(row_data, html_text)
+    with telemetry.timer("result_parse_seconds"):
+        return extract_text(html_text)
+
+# Download one student application page and reduce it to plain text.
+# With a parse pool the page is handed to a parser process and the
+# thread moves on to the next download; the returned Future resolves
+# to the text. Pacing comes from the rate controller in download_html.
+def _fetch_detail_text(row_data: dict, per_host: int, parsing=None):
+    """Download one result page; return its text, a Future, or None."""
+    application_url = row_data.get("application_url_raw")
+    with _host_slot(application_url, per_host):
+        try:
+            html_text = download_html(application_url)
+            if parsing is None:
+                text = result_text(row_data, html_text)
+            else:
+                archive_page(row_data, html_text)
+                text = parsing.page_text(html_text)
+        # Guards against links that fail or server/network failures.
+        except (HTTPError, URLError, OSError):
+            text = None
+    return text
+
+# Fill in result_text_raw for every row. Rows whose text already came
+# from the survey listing (listing.py) are not downloaded. With more
+# than one worker the downloads overlap; pool.map keeps results in the
+# same order as rows. SCRAPE_PARSE_WORKERS moves parsing into separate
+# processes.
+def fetch_detail_pages(rows: list[dict], workers: int = DETAIL_WORKERS,
+                       per_host: int = PER_HOST_LIMIT) -> list[dict]:
+    """Download detail pages for rows, preserving row order."""
+    parsing = parse_pool.get_parse_pool()
+    todo = listing.rows_to_fetch(rows)
+    if workers <= 1 or len(todo) <= 1:
+        texts = [_fetch_detail_text(row, per_host, parsing) for row in todo]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            texts = list(pool.map(
+                lambda row: _fetch_detail_text(row, per_host, parsing), todo
+            ))
+    for row_data, text in zip(todo, texts):
+        if isinstance(text, Future):
+            # A page the parser fails on is skipped like a failed fetch.
+            try:
+                text = text.result()
+            except parse_pool.PARSE_ERRORS as e:
+                print(f"Could not parse "
+                      f"{row_data.get('application_url_raw')}: {e!r}")
+                text = None
+        row_data["result_text_raw"] = text
+    return rows
 
-    tr_rows = _extract_tr_rows_from_html(html_text)
+# Parse one survey page into raw rows without touching the network.
+# Stops at the first result_id that already exists in known_ids. Rows in
+# skip_ids (saved by a resumed run) are left out without stopping: new
+# posts may have pushed them onto a later page.
+def parse_survey_page(html_text: str, known_ids: set,
+                      tr_rows: list | None = None,
+                      skip_ids=frozenset()) -> tuple[list[dict], bool]:
+    """Parse survey HTML (or its parsed rows) into rows and a stop flag."""
+    if tr_rows is None:
+        with telemetry.timer("survey_parse_seconds"):
+            tr_rows = _extract_tr_rows_from_html(html_text)
+    telemetry.incr("survey_pages")
     # Addresses empty pages.
     if not tr_rows:
+        telemetry.observe("rows_per_page", 0, telemetry.ROWS_BOUNDS)
         return [], False
+    required = listing.required_fields()
 
     extracted = []
     should_stop = False
@@ -235,21 +384,29 @@ def scrape_data(url: str, known_ids: set) -> tuple[list[dict], bool]:
         if result_id in known_ids:
             should_stop = True
             break
+        if result_id in skip_ids:
+            i += 1
+            continue
 
         # Look at the NEXT tr for detail info
         term_found = None
+        detail_text = None
         if i + 1 < len(tr_rows):
-            next_tr = tr_rows[i + 1]
-            next_tds = next_tr.find_all("td")
+            next_tds = tr_rows[i + 1]["cells"]
 
             # Detail row usually has ONE td with lots of text
             if len(next_tds) == 1:
-                detail_text = next_tds[0].get_text(" ", strip=True)
+                detail_text = next_tds[0]
                 term_found = extract_term_from_detail_row(detail_text)
 
         # Save it on the row
         row_data["term_inferred"] = term_found
 
+        # When the listing already has the required fields, the result
+        # page is not downloaded (see listing.py).
+        if required is not None:
+            listing.fill_from_listing(row_data, detail_text, required)
+
         extracted.append(row_data)
 
         # Move to the next row.
@@ -258,18 +415,22 @@ def scrape_data(url: str, known_ids: set) -> tuple[list[dict], bool]:
             i += 2
         else:
             i += 1
+    telemetry.observe("rows_per_page", len(extracted), telemetry.ROWS_BOUNDS)
+    return extracted, should_stop
+
+# Primary data scraper function.
+# Updated to stop scraping when it identifies a results_id that already
+# exists in the original JSON file.
+def scrape_data(url: str, known_ids: set,
+                workers: int = DETAIL_WORKERS,
+                skip_ids=frozenset()) -> tuple[list[dict], bool]:
+    """Scrape one survey page and return rows plus a stop flag."""
+    extracted, should_stop = parse_survey_page(download_html(url), known_ids,
+                                               skip_ids=skip_ids)
+
     # Extract data from each student application link and put into
     # results_text_raw for cleaning later.
-    for row_data in extracted:
-        application_url = row_data.get("application_url_raw")
-        if application_url:
-            try:
-                result_html = download_html(application_url)
-                row_data["result_text_raw"] = extract_text(result_html)
-            # Guards against links that fail or server/network failures.
-            except (HTTPError, URLError, OSError):
-                row_data["result_text_raw"] = None
-            time.sleep(0.20)
+    fetch_detail_pages(extracted, workers=workers)
     return extracted, should_stop
 
 
@@ -292,75 +453,106 @@ def load_data(filename: str) -> list[dict]:
     except (ValueError, OSError):
         return []
 
-# Code execution portion.
-if __name__ == "__main__":
-    # Safety cap so it never runs forever
-    TARGET = 1000
-
-    # Dirty output from scrape.py, used by clean.py
-    FINAL_FILE = "raw_scraped_data.json"
-
-    # Safety measure that loads all scraped data before crash. Identify
-    # what page the start on if code/server crashes.
-    # Start fresh each run (no checkpoint resume)
-    all_rows = []
-
-
-    # Load IDs from the large master dataset to avoid
-    # scraping entries that already exist.
-    MASTER_DATA_FILE = "llm_extend_applicant_data.json"
-
-    existing_ids = set()
-
-    try:
-        master_data = load_data(MASTER_DATA_FILE)
-
-        for row in master_data:
-            rid = extract_result_id(
-                row.get("url") or row.get("application_url_raw")
-            )
-            if rid is not None:
-                existing_ids.add(rid)
-
-        print(f"Loaded {len(existing_ids)} known IDs from master dataset.")
-
-    except FileNotFoundError:  # pragma: no cover
-        # handled earlier in load_data()
-        print("Master dataset not found. Continuing without ID filtering.")
+# Build the survey URL for a page number. Page 1 has no query string.
+def survey_page_url(page_number: int) -> str:
+    """Return the GradCafe survey URL for a page number."""
+    return f"{BASE_SURVEY_URL}/" if page_number == 1 else \
+        f"{BASE_SURVEY_URL}/?page={page_number}"
+
+# Load IDs from the large master dataset to avoid scraping entries that
+# already exist. They come from the sidecar index next to the master
+# file (see id_index.py), which is only rebuilt when the master changed
+# outside clean.py. Ids added during the run are kept in memory.
+def load_known_ids(master_path: str) -> id_index.KnownIds:
+    """Return the result_ids already in the master dataset."""
+    return id_index.KnownIds(id_index.IdIndex(master_path))
+
+# Totals kept by the other helpers, added to the final telemetry report
+# (see telemetry.py).
+def run_summary(rows_saved: int) -> dict:
+    """Transfer, listing and pacing totals for the run report."""
+    return {
+        "rows_saved": rows_saved,
+        "transfer": dict(transfer.TRANSFER_STATS),
+        "listing": dict(listing.LISTING_STATS),
+        "rate": dict(rate_control.get_controller().stats),
+    }
 
-    page = 1
+# Safety cap so it never runs forever
+TARGET = 1000
+
+# Dirty output from scrape.py, used by clean.py. Rows are streamed to
+# raw_scraped_data.jsonl as pages finish and the JSON array is written
+# at the end (see checkpoint.py).
+FINAL_FILE = "raw_scraped_data.json"
+
+# Load IDs from the large master dataset to avoid
+# scraping entries that already exist.
+MASTER_DATA_FILE = "llm_extend_applicant_data.json"
+
+# Code execution portion. Each finished page is appended to the JSONL
+# output and checkpointed, so a crash loses at most the page in flight
+# and --resume continues from the next page.
+def main(argv=None) -> None:
+    """Scrape new GradCafe entries into FINAL_FILE."""
+    parser = argparse.ArgumentParser(description="Scrape new GradCafe "
+                                                 "survey entries.")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue a killed run from its checkpoint")
+    parser.add_argument("--start-page", type=int, default=1,
+                        help="first survey page of a new run (see "
+                             "boundary.py)")
+    args = parser.parse_args(argv)
+
+    transfer.reset_stats()
+    listing.reset_stats()
+    rate_control.reset_controller()
+    telemetry.reset(telemetry.REPORT_FILE)
+    existing_ids = load_known_ids(MASTER_DATA_FILE)
+    print(f"Loaded {len(existing_ids)} known IDs from master dataset.")
+
+    progress = checkpoint.CrawlCheckpoint(FINAL_FILE)
+    state = progress.resume() if args.resume else \
+        progress.start(args.start_page)
+    # Rows already written by the killed run are skipped, not a reason
+    # to stop.
+    resumed_ids = progress.saved_ids()
+    if state["rows"]:
+        print(f"Resuming at page {state['next_page']} with "
+              f"{state['rows']} rows already saved.")
+    page = state["next_page"]
 
     # Keep track of empty pages and use as a trigger to save work.
     empty_pages = 0
 
     # Scrape only NEW entries (stop when we hit an existing ID).
-    while len(all_rows) < TARGET:
+    while progress.state["rows"] < TARGET:
         # Distinguish between the URL for the first page and subsequent
         # pages. Print progress.
-        page_url = f"{BASE_SURVEY_URL}/" if page == 1 else \
-            f"{BASE_SURVEY_URL}/?page={page}"
+        page_url = survey_page_url(page)
         print("Scraping:", page_url)
 
         # Retry process in case server does not respond. Print location
         # of errors. Allow code to continue if page fails.
         try:
             # Updated call for existing results_ids.
-            page_rows, stop_now = scrape_data(page_url, existing_ids)
+            page_rows, stop_now = scrape_data(page_url, existing_ids,
+                                              skip_ids=resumed_ids)
         except (HTTPError, URLError, OSError) as e:  # pragma: no cover
             # defensive branch; hard to trigger in tests
-            print(f"Page scrape failed ({page_url}): {e}. Backing off 15s...")
-            time.sleep(15)
+            rate_control.get_controller().failure()
+            print(f"Page scrape failed ({page_url}): {e}. Slowing down...")
             page += 1
             continue
 
         # Account for the possibility of empty pages. Limit
-        # to 5 empty pages.
-        # Ensure to save progress.
+        # to 5 empty pages. An empty page may mean the site is pushing
+        # back, so it slows the request rate like a throttled response.
         if not page_rows:
             empty_pages += 1
-            print(f"No usable rows on {page_url}. Backing off 10s... "
+            rate_control.get_controller().failure()
+            print(f"No usable rows on {page_url}. Slowing down... "
                   f"({empty_pages}/5)")
-            time.sleep(10)
 
             if empty_pages >= 5:
                 print("Too many empty pages in a row. Exiting early.")
@@ -370,9 +562,11 @@ if __name__ == "__main__":
             continue
         empty_pages = 0
 
-        # Take all rows scraped from a page and add to dataset.
+        # Write the page's rows to disk and checkpoint past this page.
         # Scraper stops when previously scraped data exists.
-        all_rows.extend(page_rows)
+        progress.append_page(page,
+                             page_rows[:TARGET - progress.state["rows"]])
+        telemetry.publish()
 
         # Add new IDs so duplicates are not processed again
         for r in page_rows:
@@ -386,14 +580,25 @@ if __name__ == "__main__":
             print("Reached previously scraped data. Stopping.")
             break
 
-        print("Total entries so far:", len(all_rows))
+        print("Total entries so far:", progress.state["rows"])
 
 
-        # Pace the frequency of sever requests to avoid crashing.
+        # The rate controller paces the next survey request.
         page += 1
-        time.sleep(0.75)
 
     # Print status to indicate completion.
-    save_data(all_rows[:TARGET], FINAL_FILE)
-    saved_n = min(len(all_rows), TARGET)
+    resumed_ids.close()
+    saved_n = progress.finish()
+    parse_pool.close_parse_pool()
     print(f"Done. Saved {saved_n} entries to {FINAL_FILE}")
+    print(transfer.stats_report())
+    print(listing.stats_report())
+    print(rate_control.get_controller().stats_report())
+    if http_cache.get_cache() is not None:
+        print(http_cache.get_cache().stats_report())
+    telemetry.publish(finished=True, extra=run_summary(saved_n))
+    print(f"Run report written to {telemetry.REPORT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
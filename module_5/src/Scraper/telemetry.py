@@ -0,0 +1,169 @@
+"""Counters and histograms for a crawl, published as a JSON run report.
+
+The scraper records into one process-wide registry: fetch latency,
+response sizes and bytes, retries by cause, parse time per page and
+rows per page. ``publish`` atomically rewrites the report file, and the
+crawl loops call it after every page, so the Flask app (``/crawl-
+telemetry``) can read a live view while the crawl runs. The last write,
+with ``"finished": true``, is the run report.
+
+Histograms use fixed bucket bounds, so recording is O(buckets) with no
+per-sample storage; percentiles are read from the buckets (upper bound
+of the bucket holding the rank, capped at the observed maximum).
+"""
+
+import bisect
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Report file written by scrape.py / main.py (relative to their cwd).
+REPORT_FILE = os.getenv("SCRAPE_TELEMETRY_FILE", "crawl_report.json")
+
+# Bucket upper bounds.
+SECONDS_BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                  1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BOUNDS = tuple(1024 * 4 ** i for i in range(9))  # 1 KiB .. 64 MiB
+ROWS_BOUNDS = (0, 1, 2, 5, 10, 15, 20, 25, 50, 100)
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min and max."""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        # One bucket per bound plus an overflow bucket.
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.low = None
+        self.high = None
+
+    def observe(self, value: float) -> None:
+        """Record one sample."""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.low = value if self.low is None else min(self.low, value)
+        self.high = value if self.high is None else max(self.high, value)
+
+    def percentile(self, pct: float):
+        """Approximate pct-th percentile, or None without samples."""
+        if not self.count:
+            return None
+        rank = max(1, -(-self.count * pct // 100))
+        i = next(i for i, seen in enumerate(itertools.accumulate(self.counts))
+                 if seen >= rank)
+        bound = self.bounds[i] if i < len(self.bounds) else self.high
+        return min(bound, self.high)
+
+    def snapshot(self) -> dict:
+        """Plain-dict view for the JSON report."""
+        edges = [*self.bounds, "inf"]
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.low,
+            "max": self.high,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "buckets": [[le, n] for le, n in zip(edges, self.counts) if n],
+        }
+
+
+class Telemetry:
+    """Thread-safe registry of named counters and histograms."""
+
+    def __init__(self, report_path: str | None = None):
+        self._lock = threading.Lock()
+        # Absolute, so later publishes land in the run's directory.
+        self.report_path = os.path.abspath(report_path) if report_path \
+            else None
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        """Add amount to a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, value: float,
+                bounds=SECONDS_BOUNDS) -> None:
+        """Record value in a histogram (created with bounds on first use)."""
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram(bounds)
+            hist.observe(value)
+
+    def snapshot(self, finished: bool = False, extra=None) -> dict:
+        """The report as a dict."""
+        with self._lock:
+            report = {
+                "started": datetime.fromtimestamp(
+                    self.started, timezone.utc).isoformat(),
+                "updated": datetime.now(timezone.utc).isoformat(),
+                "elapsed_seconds": time.time() - self.started,
+                "finished": finished,
+                "counters": dict(sorted(self.counters.items())),
+                "histograms": {name: hist.snapshot() for name, hist
+                               in sorted(self.histograms.items())},
+            }
+        report.update(extra or {})
+        return report
+
+    def publish(self, finished: bool = False, extra=None):
+        """Atomically rewrite the report file; return the report."""
+        report = self.snapshot(finished, extra)
+        if self.report_path:
+            tmp = self.report_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            os.replace(tmp, self.report_path)
+        return report
+
+
+_TELEMETRY = [Telemetry()]
+
+
+def get_telemetry() -> Telemetry:
+    """The registry for the current run."""
+    return _TELEMETRY[0]
+
+
+def reset(report_path: str | None = None) -> Telemetry:
+    """Start a new run; publish() writes to report_path when given."""
+    _TELEMETRY[0] = Telemetry(report_path)
+    return _TELEMETRY[0]
+
+
+def incr(name: str, amount: int = 1) -> None:
+    """Add amount to a counter of the current run."""
+    get_telemetry().incr(name, amount)
+
+
+def observe(name: str, value: float, bounds=SECONDS_BOUNDS) -> None:
+    """Record a histogram sample for the current run."""
+    get_telemetry().observe(name, value, bounds)
+
+
+@contextmanager
+def timer(name: str):
+    """Record the wall time of the block (even if it raises)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def publish(finished: bool = False, extra=None):
+    """Rewrite the current run's report file (if it has one)."""
+    return get_telemetry().publish(finished, extra)
@@ -0,0 +1,140 @@
+"""Compressed transfer decoding and byte counters for scraped pages."""
+
+import codecs
+import threading
+import zlib
+from urllib.error import URLError
+
+try:
+    from . import telemetry
+except ImportError:  # pragma: no cover - run directly from Scraper/
+    import telemetry
+
+try:
+    import brotli
+except ImportError:
+    brotli = None  # brotli is optional; without it "br" is not offered
+
+# Bytes pulled off the socket per read() while streaming a body.
+CHUNK_SIZE = 64 * 1024
+
+# Per-run byte counters, shared by every download thread.
+_STATS_LOCK = threading.Lock()
+TRANSFER_STATS = {"responses": 0, "wire_bytes": 0, "decoded_bytes": 0,
+                  "by_encoding": {}}
+
+
+def accept_encoding() -> str:
+    """Return the Accept-Encoding value for the codecs we can decode."""
+    codecs_offered = ["gzip", "deflate"]
+    if brotli is not None:
+        codecs_offered.append("br")
+    return ", ".join(codecs_offered)
+
+
+class StreamDecoder:
+    """Undo one Content-Encoding chunk by chunk."""
+
+    def __init__(self, encoding: str):
+        self.encoding = (encoding or "identity").strip().lower()
+        self._obj = None
+        if self.encoding in ("gzip", "x-gzip"):
+            # 16 + MAX_WBITS tells zlib to expect a gzip header.
+            self._obj = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif self.encoding == "br":
+            if brotli is None:
+                raise ValueError("brotli response but brotli not installed")
+            self._obj = brotli.Decompressor()
+
+    def feed(self, data: bytes) -> bytes:
+        """Return the decoded bytes for the next compressed chunk."""
+        if self.encoding == "deflate" and self._obj is None and data:
+            # "deflate" is zlib-wrapped per the RFC, but some servers send
+            # a raw deflate stream. A zlib header is divisible by 31.
+            wrapped = (data[0] & 0x0F) == 8 and len(data) > 1 and \
+                ((data[0] << 8) | data[1]) % 31 == 0
+            self._obj = zlib.decompressobj(
+                zlib.MAX_WBITS if wrapped else -zlib.MAX_WBITS
+            )
+        if self._obj is None:
+            return data
+        if self.encoding == "br":
+            return self._obj.process(data)
+        return self._obj.decompress(data)
+
+    def flush(self) -> bytes:
+        """Return anything still buffered in the decompressor."""
+        if self._obj is None or self.encoding == "br":
+            return b""
+        return self._obj.flush()
+
+
+def _record(encoding: str, wire: int, decoded: int) -> None:
+    """Add one response to the run's byte counters."""
+    with _STATS_LOCK:
+        TRANSFER_STATS["responses"] += 1
+        TRANSFER_STATS["wire_bytes"] += wire
+        TRANSFER_STATS["decoded_bytes"] += decoded
+        per = TRANSFER_STATS["by_encoding"].setdefault(
+            encoding, {"responses": 0, "wire_bytes": 0, "decoded_bytes": 0}
+        )
+        per["responses"] += 1
+        per["wire_bytes"] += wire
+        per["decoded_bytes"] += decoded
+    telemetry.incr("bytes_wire", wire)
+    telemetry.incr("bytes_decoded", decoded)
+    telemetry.observe("response_bytes", decoded, telemetry.BYTES_BOUNDS)
+
+
+def _decode_errors() -> tuple:
+    """Exceptions the decompressors raise on a corrupt body."""
+    if brotli is None:
+        return (zlib.error,)
+    return (zlib.error, brotli.error)
+
+
+# Stream the body through the decompressor and an incremental UTF-8
+# decoder, so neither the compressed nor the decoded bytes are held as
+# one extra full-size copy. A corrupt compressed body raises URLError,
+# which download_html retries like any other broken transfer.
+def read_text(resp, charset: str = "utf-8") -> str:
+    """Read a response body, undo Content-Encoding and decode to text."""
+    headers = getattr(resp, "headers", None) or {}
+    decoder = StreamDecoder(headers.get("Content-Encoding"))
+    text = codecs.getincrementaldecoder(charset)(errors="replace")
+    parts = []
+    wire = decoded = 0
+    try:
+        while True:
+            chunk = resp.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            wire += len(chunk)
+            plain = decoder.feed(chunk)
+            decoded += len(plain)
+            parts.append(text.decode(plain))
+        tail = decoder.flush()
+    except _decode_errors() as e:
+        raise URLError(f"corrupt {decoder.encoding} body: {e}") from e
+    decoded += len(tail)
+    parts.append(text.decode(tail, final=True))
+    _record(decoder.encoding, wire, decoded)
+    return "".join(parts)
+
+
+def reset_stats() -> None:
+    """Zero the byte counters at the start of a run."""
+    with _STATS_LOCK:
+        TRANSFER_STATS.update(responses=0, wire_bytes=0, decoded_bytes=0,
+                              by_encoding={})
+
+
+def stats_report() -> str:
+    """One-line summary of compressed vs. decompressed bytes this run."""
+    with _STATS_LOCK:
+        wire = TRANSFER_STATS["wire_bytes"]
+        decoded = TRANSFER_STATS["decoded_bytes"]
+        responses = TRANSFER_STATS["responses"]
+    ratio = decoded / wire if wire else 0.0
+    return (f"Transfer: {responses} responses, {wire} bytes on the wire, "
+            f"{decoded} bytes decoded ({ratio:.1f}x)")
@@ -0,0 +1,203 @@
+"""Historical LLM answers from the master dataset, for reuse by clean.py.
+
+``llm_extend_applicant_data.json`` already holds the LLM's
+``llm-generated-program`` / ``llm-generated-university`` for every row
+ever cleaned, but not the input the LLM was given: the row's
+``program`` is the LLM's own output ("program, university"). The raw
+input lives in the scraper's raw rows (``university_raw`` and
+``program_raw``), which share the result URL with the master row:
+
+* the raw scrape dumps (LLM_WARM_START_RAW, by default
+  ``raw_scraped_data.json`` and module_2's
+  ``raw_scraped_data_checkpoint.json``)
+* the listing rows kept by the HTML archive (SCRAPE_ARCHIVE_DIR)
+
+``build_lookup`` joins the two on the URL and maps each raw row's LLM
+input (``clean.prepare_row``) to the answer, so ``clean.standardize``
+only sends inputs the model has never seen. Master rows whose raw row
+was not kept cannot be keyed and are skipped.
+
+The master and the dumps are JSON arrays written one row per
+``"\\n  {"`` line (``json.dump(..., indent=2)`` and
+``clean._prepend_rows_to_master``). Large files are split at those row
+boundaries and parsed by a pool of processes; each returns only
+compact tuples. The newest answer wins.
+"""
+
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from . import archive, profiler
+except ImportError:  # pragma: no cover - run directly from Scraper/
+    import archive
+    import profiler
+
+# Empty LLM_WARM_START_MASTER turns the warm start off.
+MASTER_FILE = os.getenv("LLM_WARM_START_MASTER",
+                        "llm_extend_applicant_data.json")
+# Raw scrape dumps holding the LLM inputs (comma separated).
+RAW_FILES = [p for p in os.getenv(
+    "LLM_WARM_START_RAW",
+    "raw_scraped_data.json,raw_scraped_data_checkpoint.json").split(",")
+    if p]
+# Parser processes for large masters (0 = one per CPU).
+WORKERS = int(os.getenv("LLM_WARM_START_WORKERS", "0"))
+# Smaller masters are parsed in this process; spawning costs more.
+PARALLEL_BYTES = 8 * 1024 * 1024
+
+# Start of every top-level row in the master layout.
+_ROW_START = b"\n  {"
+
+# Lookups built by this process, by master path.
+_LOOKUPS = {}
+_LOOKUP_LOCK = threading.Lock()
+
+
+def row_boundaries(path: str, parts: int) -> list[tuple[int, int]]:
+    """Split path into up to parts byte ranges that start at a row."""
+    size = os.path.getsize(path)
+    cuts = [0]
+    with open(path, "rb") as f:
+        for i in range(1, parts):
+            f.seek(max(size * i // parts, cuts[-1]))
+            # Read on until the next row start (rows are short).
+            window, start = b"", f.tell()
+            while True:
+                block = f.read(64 * 1024)
+                window += block
+                pos = window.find(_ROW_START)
+                if pos >= 0 or not block:
+                    break
+            if pos < 0:
+                break
+            cut = start + pos + 1  # keep the "\n" with the previous part
+            if cut > cuts[-1]:
+                cuts.append(cut)
+    cuts.append(size)
+    return list(zip(cuts, cuts[1:]))
+
+
+# Row pickers for parse_range; module level so parser processes can
+# load them by name.
+def answer_of(row: dict):
+    """(url, llm program, llm university) of a master row, or None."""
+    prog = row.get("llm-generated-program")
+    uni = row.get("llm-generated-university")
+    if row.get("url") and (prog or uni):
+        return row["url"], prog, uni
+    return None
+
+
+def raw_input_of(row: dict):
+    """(url, program_raw, university_raw) of a raw row, or None."""
+    if row.get("application_url_raw"):
+        return (row["application_url_raw"], row.get("program_raw"),
+                row.get("university_raw"))
+    return None
+
+
+# Runs in a parser process (or inline for small files).
+def parse_range(path: str, start: int, end: int,
+                pick=answer_of) -> list[tuple]:
+    """pick(row) of every row in a byte range, skipping None."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8").strip()
+    # A range holds whole rows, plus the array's "[" or "]" at the ends.
+    text = text.removeprefix("[").removesuffix("]").strip().rstrip(",")
+    if not text:
+        return []
+    picked = (pick(row) for row in json.loads(f"[{text}]"))
+    return [item for item in picked if item is not None]
+
+
+def read_rows(path: str, pick=answer_of, workers: int = WORKERS,
+              parallel_bytes: int = PARALLEL_BYTES) -> list[tuple]:
+    """pick(row) of every row of a JSON array file, parsed in parallel."""
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return []
+    workers = workers or os.cpu_count() or 1
+    ranges = row_boundaries(path, workers) if size >= parallel_bytes \
+        and workers > 1 else [(0, size)]
+    if len(ranges) == 1:
+        return parse_range(path, 0, size, pick)
+    # Spawned like the parse pool: the caller may be running threads.
+    with ProcessPoolExecutor(
+            max_workers=len(ranges),
+            mp_context=multiprocessing.get_context("spawn")) as pool:
+        parts = pool.map(parse_range, [path] * len(ranges),
+                         *zip(*ranges), [pick] * len(ranges))
+        return [item for part in parts for item in part]
+
+
+def _raw_inputs(raw_paths, workers: int, parallel_bytes: int) -> list:
+    """(url, program_raw, university_raw) of every kept raw row."""
+    inputs = []
+    for path in raw_paths:
+        try:
+            inputs += read_rows(path, raw_input_of, workers, parallel_bytes)
+        except ValueError as e:
+            print(f"Warm start: {path} is not valid JSON, skipped: {e}")
+    html_archive = archive.get_archive()
+    if html_archive is not None:
+        inputs += [item for item in (raw_input_of(e["row"])
+                                     for e in html_archive.entries())
+                   if item is not None]
+    return inputs
+
+
+def build_lookup(master_path: str, raw_key, raw_paths=None,
+                 workers: int = WORKERS,
+                 parallel_bytes: int = PARALLEL_BYTES) -> dict:
+    """Map raw LLM inputs to (program, university) answers in master_path.
+
+    raw_key(row) turns a raw row into the LLM input string
+    (``clean.prepare_row``); raw_paths defaults to RAW_FILES.
+    """
+    try:
+        # url -> (position in the master, newest first; answer)
+        answers = {}
+        for url, prog, uni in read_rows(master_path, answer_of, workers,
+                                        parallel_bytes):
+            answers.setdefault(url, (len(answers), (prog, uni)))
+    except ValueError as e:
+        print(f"Warm start skipped, {master_path} is not valid JSON: {e}")
+        return {}
+    if not answers:
+        return {}
+    best = {}
+    for url, program_raw, university_raw in _raw_inputs(
+            RAW_FILES if raw_paths is None else raw_paths,
+            workers, parallel_bytes):
+        if url in answers:
+            key = raw_key({"program_raw": program_raw,
+                           "university_raw": university_raw})
+            # The newest answer for an input wins.
+            if key and (key not in best or answers[url] < best[key]):
+                best[key] = answers[url]
+    return {key: answer for key, (_, answer) in best.items()}
+
+
+# clean.standardize() asks for the lookup only when some inputs missed
+# the persistent LLM cache; it is built once per process.
+def get_lookup(raw_key) -> dict:
+    """The historical lookup for MASTER_FILE ({} when turned off)."""
+    if not MASTER_FILE:
+        return {}
+    with _LOOKUP_LOCK:
+        if MASTER_FILE not in _LOOKUPS:
+            start = time.perf_counter()
+            with profiler.stage("warm_start") as counts:
+                lookup = build_lookup(MASTER_FILE, raw_key)
+                counts["rows_out"] = len(lookup)
+            print(f"Warm start: {len(lookup)} historical LLM answers from "
+                  f"{MASTER_FILE} in {time.perf_counter() - start:.2f}s")
+            _LOOKUPS[MASTER_FILE] = lookup
+        return _LOOKUPS[MASTER_FILE]
@@ -6,8 +6,10 @@ Routes:
     /scrape-status   Report whether a scrape is running.
     /pull-data       Start the scrape/clean pipeline.
     /update-analysis Allow UI to refresh analysis when idle.
+    /crawl-telemetry Live (or last) crawl telemetry report as JSON.
 """
 
+import json
 import os
 import subprocess
 import sys
@@ -38,6 +40,15 @@ def _module5_python():
     return sys.executable
 
 
+def _crawl_report_path():
+    """Path of the telemetry report the crawler writes (see telemetry.py)."""
+    # main.py runs in src/Scraper, so a relative name lives there.
+    scraper_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               'Scraper')
+    return os.path.join(scraper_dir, os.environ.get(
+        "SCRAPE_TELEMETRY_FILE", "crawl_report.json"))
+
+
 @contextmanager
 def _start_scraper_process():
     """Start the scrape subprocess; yield it without terminating on exit."""
@@ -341,6 +352,19 @@ def create_app():
         )
         return jsonify({"is_scraping": running})
 
+    # The crawler rewrites its telemetry report after every page, so
+    # this shows a running crawl live and the last run's report after.
+    @app.route('/crawl-telemetry')
+    def crawl_telemetry():
+        """Return the crawl telemetry report, or 404 if there is none."""
+        try:
+            with open(_crawl_report_path(), "r", encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            return make_response(jsonify({"available": False}), 404)
+        report["available"] = True
+        return jsonify(report)
+
     # Handles the "Pull Data" button click.
     @app.route('/pull-data', methods=['POST'])
     def pull_data():
@@ -0,0 +1,68 @@
+# Tests for Scraper.archive (raw HTML archive and reparse)
+
+import os
+
+import pytest
+
+import Scraper.archive as archive
+import Scraper.scrape as scrape
+
+
+def _row(rid):
+    return {
+        "result_id": rid,
+        "university_raw": f"U{rid}",
+        "program_raw": "CS",
+        "application_url_raw": f"https://www.thegradcafe.com/result/{rid}",
+        "term_inferred": "Fall 2026",
+        "result_text_raw": "dropped from the index",
+    }
+
+
+@pytest.fixture(autouse=True)
+def _reset_shared_archive(monkeypatch):
+    monkeypatch.setattr(archive, "_ARCHIVE", [None])
+    monkeypatch.delenv("SCRAPE_ARCHIVE_DIR", raising=False)
+
+
+@pytest.mark.analysis
+def test_put_read_and_rotate(tmp_path):
+    arc = archive.HtmlArchive(str(tmp_path), segment_bytes=10)
+    first = arc.put(_row(1), "<p>one</p>")
+    second = arc.put(_row(2), "<p>two</p>")
+    assert first["segment"] == "seg-00001.bin"
+    assert second["segment"] == "seg-00002.bin"
+    assert "result_text_raw" not in first["row"]
+    assert arc.read(first) == "<p>one</p>"
+
+    # A reopened archive keeps appending to the newest segment.
+    again = archive.HtmlArchive(str(tmp_path), segment_bytes=10_000)
+    third = again.put(_row(3), "<p>three</p>")
+    assert third["segment"] == "seg-00002.bin"
+    assert [e["result_id"] for e in again.entries()] == [3, 2, 1]
+
+
+@pytest.mark.analysis
+def test_entries_latest_wins_and_torn_line(tmp_path):
+    arc = archive.HtmlArchive(str(tmp_path))
+    assert arc.entries() == []
+    arc.put(_row(5), "<p>old</p>")
+    arc.put(_row(5), "<p>new</p>")
+    with open(tmp_path / "index.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"result_id": 9, "segm')
+    (entry,) = arc.entries()
+    assert arc.read(entry) == "<p>new</p>"
+
+
+@pytest.mark.analysis
+def test_scrape_archives_result_pages(tmp_path, monkeypatch):
+    assert archive.get_archive() is None
+    monkeypatch.setenv("SCRAPE_ARCHIVE_DIR", str(tmp_path / "a"))
+    arc = archive.get_archive()
+    assert arc is archive.get_archive()
+
+    text = scrape.result_text(_row(7), "<p>seven</p>")
+    assert text == "seven"
+    (entry,) = arc.entries()
+    assert entry["result_id"] == 7
+    assert os.path.exists(tmp_path / "a" / entry["segment"])
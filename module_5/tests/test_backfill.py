@@ -0,0 +1,117 @@
+# Tests for Scraper.backfill (direct fetch of missing result ids)
+
+import io
+import json
+from urllib.error import HTTPError, URLError
+
+import pytest
+
+import Scraper.backfill as backfill
+import Scraper.scrape as scrape
+
+PAGE = ("<html><body><dl><dt>Institution</dt><dd>MIT</dd>"
+        "<dt>Program</dt><dd>Computer Science</dd>"
+        "<dt>Degree Type</dt><dd>PhD</dd></dl>"
+        "<p>Fall 2026</p></body></html>")
+
+
+def _site(deleted=(), broken=(), calls=None):
+    def download(url):
+        rid = int(url.rsplit("/", 1)[1])
+        if calls is not None:
+            calls.append(rid)
+        if rid in deleted:
+            raise HTTPError(url, 404, "Not Found", {}, io.BytesIO())
+        if rid in broken:
+            raise URLError("reset")
+        return PAGE
+    return download
+
+
+def _master(tmp_path, ids):
+    path = tmp_path / "master.json"
+    path.write_text(json.dumps([{"result_id": i} for i in ids]),
+                    encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.analysis
+def test_missing_ranges():
+    assert list(backfill.missing_ranges([3, 4, 7, 10])) == [(5, 6), (8, 9)]
+    assert list(backfill.missing_ranges([3, 7], low=1, high=9)) == \
+        [(1, 2), (4, 6), (8, 9)]
+    assert list(backfill.missing_ranges([3, 7, 20], high=5)) == [(4, 5)]
+    assert list(backfill.missing_ranges([5, 9], low=7)) == [(7, 8)]
+    assert not list(backfill.missing_ranges([], high=5))
+
+
+@pytest.mark.analysis
+def test_missing_ids_newest_first_and_limited(tmp_path):
+    gone = backfill.GoneIds(str(tmp_path / "g"))
+    gone.add_many([9])
+    assert backfill.missing_ids([(2, 3), (8, 10)], gone, 3) == [10, 8, 3]
+    assert backfill.missing_ids([(2, 3)], gone, 10) == [3, 2]
+
+
+@pytest.mark.analysis
+def test_gone_ids_persist(tmp_path):
+    path = str(tmp_path / "m.json.gone")
+    gone = backfill.GoneIds(path)
+    gone.add_many([5, 3, 5])
+    gone.add_many([3])
+    assert open(path, encoding="utf-8").read() == "3\n5\n"
+    again = backfill.GoneIds(path)
+    assert 5 in again and 4 not in again and len(again) == 2
+
+
+@pytest.mark.analysis
+def test_row_from_result_page():
+    row = backfill.row_from_result_page(7, scrape.extract_text(PAGE))
+    assert row["university_raw"] == "MIT"
+    assert row["program_raw"] == "Computer Science"
+    assert row["term_inferred"] == "Fall 2026"
+    assert row["application_url_raw"] == f"{scrape.BASE_DOMAIN}/result/7"
+    assert backfill.row_from_result_page(8, None)["university_raw"] is None
+
+
+@pytest.mark.analysis
+def test_fetch_result_outcomes(monkeypatch):
+    monkeypatch.setattr(scrape, "download_html",
+                        _site(deleted={1}, broken={2}))
+    assert backfill.fetch_result(1) == "gone"
+    assert backfill.fetch_result(2) is None
+    assert backfill.fetch_result(3)["result_id"] == 3
+
+    def server_error(url):
+        raise HTTPError(url, 403, "Forbidden", {}, io.BytesIO())
+    monkeypatch.setattr(scrape, "download_html", server_error)
+    assert backfill.fetch_result(4) is None
+
+
+@pytest.mark.analysis
+def test_backfill_caches_deleted_ids(tmp_path, monkeypatch):
+    master = _master(tmp_path, [10, 6, 1])
+    calls = []
+    monkeypatch.setattr(scrape, "download_html",
+                        _site(deleted={8, 3}, broken={2}, calls=calls))
+    rows, stats = backfill.backfill(master, limit=100, workers=3)
+    assert sorted(calls) == [2, 3, 4, 5, 7, 8, 9]
+    assert [r["result_id"] for r in rows] == [9, 7, 5, 4]
+    assert stats == {"requested": 7, "found": 4, "gone": 2, "failed": 1}
+
+    # The deleted ids are never requested again; the failed one is.
+    calls.clear()
+    backfill.backfill(master, limit=100, workers=1)
+    assert 8 not in calls and 3 not in calls and 2 in calls
+
+
+@pytest.mark.analysis
+def test_main_writes_rows(tmp_path, monkeypatch, capsys):
+    master = _master(tmp_path, [5, 1])
+    out = tmp_path / "raw.json"
+    monkeypatch.setattr(scrape, "download_html", _site(deleted={3}))
+    backfill.main(["--master", master, "--out", str(out), "--high", "6"])
+    saved = json.loads(out.read_text(encoding="utf-8"))
+    assert [r["result_id"] for r in saved] == [6, 4, 2]
+    assert "3 recovered, 1 deleted, 0 failed of 4 ids" in \
+        capsys.readouterr().out
@@ -0,0 +1,163 @@
+# Tests for Scraper.boundary (galloping search over survey pages)
+
+import json
+from datetime import datetime
+
+import pytest
+
+import Scraper.boundary as boundary
+import Scraper.rate_control as rate_control
+import Scraper.scrape as scrape
+
+ROWS_PER_PAGE = 20
+LAST_PAGE = 500
+MONTHS = ["January", "February", "March", "April", "May", "June"]
+
+
+def _page_html(page):
+    """Survey page with ids falling 20 per page, dates 1 day per page."""
+    if page > LAST_PAGE:
+        return "<html></html>"
+    rows = []
+    for i in range(ROWS_PER_PAGE):
+        rid = 100_000 - (page - 1) * ROWS_PER_PAGE - i
+        day = LAST_PAGE - page
+        date = f"{MONTHS[day // 28 % 6]} {day % 28 + 1}, {2020 + day // 168}"
+        rows.append(f'<tr><td>U</td><td>P</td><td>{date}</td><td>S</td>'
+                    f'<td><a href="/result/{rid}">v</a></td></tr>')
+    return "<table>" + "".join(rows) + "</table>"
+
+
+def _site(calls):
+    def fetch(url):
+        page = int(url.split("page=")[1]) if "page=" in url else 1
+        calls.append(page)
+        return _page_html(page)
+    return fetch
+
+
+@pytest.mark.analysis
+@pytest.mark.parametrize("target_page", [1, 2, 3, 37, 256, 257, 499, 500])
+def test_find_page_for_id_is_logarithmic(target_page):
+    calls = []
+    probe = boundary.PageProbe(_site(calls))
+    rid = 100_000 - (target_page - 1) * ROWS_PER_PAGE - 7
+    assert boundary.find_page_for_id(probe, rid) == target_page
+    # Each page is fetched once and far fewer than a linear walk; empty
+    # pages past the end also cost their neighbour.
+    assert len(calls) == len(set(calls)) == probe.fetches
+    assert probe.fetches <= 3 * target_page.bit_length() + 1
+
+
+@pytest.mark.analysis
+def test_find_page_past_the_end_and_cap():
+    probe = boundary.PageProbe(_site([]))
+    # Older than anything listed: the first empty page is returned.
+    assert boundary.find_page_for_id(probe, 5) == LAST_PAGE + 1
+    # A cap below the answer means "not found".
+    assert boundary.gallop(probe, lambda b: b["min_id"] <= 5,
+                           max_page=300) is None
+    assert boundary.gallop(probe, lambda b: b["min_id"] <= 99_000,
+                           start=40, max_page=51) == 51
+
+
+@pytest.mark.analysis
+def test_find_page_for_date():
+    probe = boundary.PageProbe(_site([]))
+    page = boundary.find_page_for_date(probe, datetime(2021, 3, 5))
+    bounds = probe.bounds(page)
+    assert bounds["oldest"] <= datetime(2021, 3, 5)
+    assert probe.bounds(page - 1)["oldest"] > datetime(2021, 3, 5)
+
+
+@pytest.mark.analysis
+def test_page_without_dates_never_matches_date():
+    html = ('<table><tr><td>U</td><td>P</td><td>n/a</td>'
+            '<td><a href="/result/9">v</a></td></tr></table>')
+    probe = boundary.PageProbe(lambda url: html if "page=" not in url
+                               else "<html></html>")
+    assert probe.bounds(1)["oldest"] is None
+    assert boundary.find_page_for_date(probe, datetime(2030, 1, 1)) == 2
+
+
+@pytest.mark.analysis
+def test_find_new_data_boundary(tmp_path):
+    master = tmp_path / "master.json"
+    master.write_text(json.dumps([{"result_id": 99_000},
+                                  {"result_id": 10}]), encoding="utf-8")
+    probe = boundary.PageProbe(_site([]))
+    assert boundary.find_new_data_boundary(probe, str(master)) == 51
+    empty = tmp_path / "empty.json"
+    assert boundary.find_new_data_boundary(probe, str(empty)) is None
+
+
+@pytest.mark.analysis
+def test_main_cli(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(scrape, "download_html", _site([]))
+    master = tmp_path / "master.json"
+    master.write_text(json.dumps([{"result_id": 99_980}]), encoding="utf-8")
+
+    boundary.main(["new", "--master", str(master)])
+    out = capsys.readouterr().out
+    assert out.startswith("page 2 ")
+    # 99_980 is known, the ids below it on page 2 are not.
+    assert "19 ids missing" in out and "99979 99978" in out
+    assert "Scraper.backfill" in out
+    boundary.main(["id", "99000"])
+    assert capsys.readouterr().out.startswith("page 51 ")
+    boundary.main(["date", "January 1, 2020"])
+    assert capsys.readouterr().out.startswith("page 500 ")
+    with pytest.raises(SystemExit):
+        boundary.main(["date", "someday"])
+
+
+@pytest.mark.analysis
+def test_scrape_main_start_page(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(rate_control.time, "sleep", lambda _: None)
+    monkeypatch.setattr(scrape, "TARGET", 1)
+    urls = []
+
+    def fake_scrape_data(url, known_ids, skip_ids=frozenset()):
+        urls.append(url)
+        return [{"result_id": 1}], False
+
+    monkeypatch.setattr(scrape, "scrape_data", fake_scrape_data)
+    scrape.main(["--start-page", "42"])
+    assert urls == [scrape.survey_page_url(42)]
+
+
+@pytest.mark.analysis
+def test_blank_page_is_judged_by_its_neighbour():
+    calls = []
+    site = _site(calls)
+
+    def glitchy(url):
+        # Page 37 comes back blank, as a transient error page would.
+        return "<html></html>" if url.endswith("page=37") else site(url)
+
+    probe = boundary.PageProbe(glitchy)
+    rid = 100_000 - 39 * ROWS_PER_PAGE
+    assert boundary.find_page_for_id(probe, rid) == 40
+    assert 38 in calls
+    # A blank answer page is a safe start: its neighbour has the id.
+    rid = 100_000 - 36 * ROWS_PER_PAGE - 3
+    assert boundary.find_page_for_id(boundary.PageProbe(glitchy), rid) == 37
+
+
+@pytest.mark.analysis
+def test_find_gaps(tmp_path):
+    master = tmp_path / "master.json"
+    known = [99_990, 99_988, 99_985, 99_979, 99_970]
+    master.write_text(json.dumps([{"result_id": r} for r in known]),
+                      encoding="utf-8")
+    probe = boundary.PageProbe(_site([]))
+    page = boundary.find_new_data_boundary(probe, str(master))
+    assert page == 1
+    assert boundary.find_gaps(probe, str(master), page) == [
+        99_989, 99_987, 99_986, 99_984, 99_983, 99_982, 99_981]
+    assert boundary.find_gaps(probe, str(master), page, pages=2)[-1] == \
+        99_961
+    assert boundary.find_gaps(probe, str(master), LAST_PAGE + 1) == []
+    empty = tmp_path / "empty.json"
+    assert boundary.find_gaps(probe, str(empty), 1) == []
@@ -0,0 +1,182 @@
+# Tests for Scraper.checkpoint (JSONL output and resumable crawls)
+
+import asyncio
+import json
+
+import pytest
+
+import Scraper.checkpoint as checkpoint
+import Scraper.crawl as crawl
+import Scraper.rate_control as rate_control
+import Scraper.scrape as scrape
+
+
+def _rows(*ids):
+    return [{"result_id": rid, "program_raw": "CS é"} for rid in ids]
+
+
+def _saved(progress):
+    """result_ids in the checkpoint's JSONL, in file order."""
+    with open(progress.rows_path, encoding="utf-8") as f:
+        return [json.loads(line)["result_id"] for line in f]
+
+
+@pytest.mark.analysis
+def test_append_and_finish_match_save_data(tmp_path):
+    out = tmp_path / "raw.json"
+    progress = checkpoint.CrawlCheckpoint(str(out))
+    progress.start()
+    progress.append_page(1, _rows(9, 8))
+    progress.append_page(2, _rows(7) + [{"result_id": None}])
+
+    state = json.loads(open(progress.state_path, encoding="utf-8").read())
+    assert state["next_page"] == 3
+    assert state["rows"] == 4
+    assert set(state) == {"next_page", "rows", "offset"}
+
+    assert progress.finish() == 4
+    expected = tmp_path / "expected.json"
+    scrape.save_data(_rows(9, 8, 7) + [{"result_id": None}], str(expected))
+    assert out.read_text(encoding="utf-8") == \
+        expected.read_text(encoding="utf-8")
+    # A finished run leaves nothing to resume.
+    assert not (tmp_path / "raw.json.checkpoint").exists()
+
+
+@pytest.mark.analysis
+def test_finish_with_no_rows(tmp_path):
+    progress = checkpoint.CrawlCheckpoint(str(tmp_path / "raw"))
+    progress.start()
+    assert progress.finish() == 0
+    assert json.loads((tmp_path / "raw").read_text()) == []
+
+
+@pytest.mark.analysis
+def test_resume_drops_uncheckpointed_rows(tmp_path):
+    out = str(tmp_path / "raw.json")
+    first = checkpoint.CrawlCheckpoint(out)
+    first.start()
+    first.append_page(4, _rows(20, 19))
+    # Killed while writing page 5: rows hit the file, no checkpoint.
+    with open(first.rows_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(_rows(18)[0]) + "\n{\"result_id\": 1")
+
+    second = checkpoint.CrawlCheckpoint(out)
+    state = second.resume()
+    assert state["next_page"] == 5
+    assert _saved(second) == [20, 19]
+    # The skip set for the resumed crawl lives on disk, not in a set.
+    with second.saved_ids() as saved:
+        assert 20 in saved and 19 in saved and 18 not in saved
+        assert len(saved) == 2
+    assert (tmp_path / "raw.jsonl.ids").exists()
+    second.finish()
+    assert not (tmp_path / "raw.jsonl.ids").exists()
+
+
+@pytest.mark.analysis
+def test_resume_without_checkpoint_starts_fresh(tmp_path, capsys):
+    progress = checkpoint.CrawlCheckpoint(str(tmp_path / "raw.json"))
+    with progress.saved_ids() as saved:
+        assert len(saved) == 0
+    assert progress.resume()["next_page"] == 1
+    assert "Starting fresh" in capsys.readouterr().out
+
+
+@pytest.mark.analysis
+def test_fsync_dir_unsupported(tmp_path, monkeypatch):
+    def no_dirs(*_args):
+        raise OSError("directories cannot be opened here")
+
+    monkeypatch.setattr(checkpoint.os, "open", no_dirs)
+    progress = checkpoint.CrawlCheckpoint(str(tmp_path / "raw.json"))
+    assert progress.start()["rows"] == 0
+
+
+@pytest.mark.analysis
+def test_crawl_streams_pages_into_checkpoint(tmp_path, monkeypatch):
+    def fake_download_html(url):
+        if "/result/" in url:
+            return "<p>detail</p>"
+        page = int(url.split("page=")[1]) if "page=" in url else 1
+        rows = "".join(
+            f'<tr><td>U</td><td><a href="/result/{rid}">v</a></td></tr>'
+            for rid in range(100 - page * 10, 97 - page * 10, -1)
+        )
+        return f"<table>{rows}</table>"
+
+    monkeypatch.setattr(scrape, "download_html", fake_download_html)
+    progress = checkpoint.CrawlCheckpoint(str(tmp_path / "raw.json"))
+    progress.start(2)
+    progress.append_page(1, _rows(90))
+
+    kept = asyncio.run(crawl.crawl(2, 5, set(), rate=0, workers=2,
+                                   progress=progress))
+    assert kept == []
+    assert progress.state["rows"] == 5
+    assert progress.state["next_page"] == 4
+    assert _saved(progress) == [90, 80, 79, 78, 70]
+
+
+@pytest.mark.analysis
+def test_scrape_main_resume(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(rate_control.time, "sleep", lambda _: None)
+    monkeypatch.setattr(scrape, "TARGET", 3)
+    progress = checkpoint.CrawlCheckpoint(scrape.FINAL_FILE)
+    progress.start()
+    progress.append_page(6, _rows(50))
+
+    seen = []
+
+    def fake_scrape_data(url, known_ids, skip_ids=frozenset()):
+        seen.append((url, set(known_ids), set(skip_ids)))
+        return _rows(49, 48, 47), False
+
+    monkeypatch.setattr(scrape, "scrape_data", fake_scrape_data)
+    scrape.main(["--resume"])
+
+    # Resumed ids are skipped, never a reason to stop.
+    assert seen == [(scrape.survey_page_url(7), set(), {50})]
+    rows = json.loads((tmp_path / scrape.FINAL_FILE).read_text())
+    assert [r["result_id"] for r in rows] == [50, 49, 48]
+    assert "Resuming at page 7" in capsys.readouterr().out
+
+
+@pytest.mark.analysis
+@pytest.mark.parametrize("keep", [None, 3])
+def test_resume_short_jsonl_starts_fresh(tmp_path, capsys, keep):
+    progress = checkpoint.CrawlCheckpoint(str(tmp_path / "raw.json"))
+    progress.start()
+    progress.append_page(1, _rows(9, 8))
+    rows_path = tmp_path / "raw.jsonl"
+    if keep is None:
+        rows_path.unlink()
+    else:
+        with open(rows_path, "r+b") as f:
+            f.truncate(keep)
+
+    state = checkpoint.CrawlCheckpoint(str(tmp_path / "raw.json")).resume()
+    assert state["next_page"] == 1
+    assert state["rows"] == 0
+    assert b"\0" not in rows_path.read_bytes()
+    assert "Starting fresh" in capsys.readouterr().out
+
+
+@pytest.mark.analysis
+def test_crawl_skips_resumed_ids_without_stopping(tmp_path, monkeypatch):
+    def fake_download_html(url):
+        if "/result/" in url:
+            return "<p>detail</p>"
+        rows = "".join(
+            f'<tr><td>U</td><td><a href="/result/{rid}">v</a></td></tr>'
+            for rid in (12, 11, 10))
+        return f"<table>{rows}</table>"
+
+    monkeypatch.setattr(scrape, "download_html", fake_download_html)
+    progress = checkpoint.CrawlCheckpoint(str(tmp_path / "raw.json"))
+    progress.start()
+    progress.append_page(1, _rows(11))
+    asyncio.run(crawl.crawl(2, 3, set(), rate=0, workers=1,
+                            progress=progress, skip_ids={11}))
+    assert _saved(progress) == [11, 12, 10]
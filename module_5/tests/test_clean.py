@@ -1,8 +1,29 @@
 import json
 import pytest
 import Scraper.clean as clean
+import Scraper.llm_batching as llm_batching
+import Scraper.llm_cache as llm_cache
+import Scraper.warm_start as warm_start
 import runpy
 
+# Kept before the fixture below replaces it.
+_llm_model_version = clean.llm_model_version
+
+
+@pytest.fixture(autouse=True)
+def _no_llm_cache(monkeypatch, tmp_path):
+    """No LLM server to ask for its version, so nothing is cached."""
+    monkeypatch.setattr(llm_cache, "_CACHE", [None])
+    monkeypatch.setattr(llm_batching, "_SIZER", [None])
+    monkeypatch.setattr(warm_start, "_LOOKUPS", {})
+    monkeypatch.setattr(warm_start, "MASTER_FILE",
+                        str(tmp_path / "master.json"))
+    monkeypatch.setattr(warm_start, "RAW_FILES",
+                        [str(tmp_path / "raw_scraped_data.json")])
+    monkeypatch.setattr(llm_cache, "CACHE_FILE",
+                        str(tmp_path / "llm_cache.jsonl"))
+    monkeypatch.setattr(clean, "llm_model_version", lambda llm_url: None)
+
 
 # Test the chunked function to ensure it splits a list into groups
 # of a given size.
@@ -236,11 +257,173 @@ def test_llm_post_rows_all_retries_fail(monkeypatch):
         clean._llm_post_rows("http://fake-llm", [{"program": "X"}])
 
 
+# Test llm_model_version reads the version from the health check next
+# to the standardize endpoint.
+@pytest.mark.analysis
+def test_llm_model_version(monkeypatch):
+    bodies = {"http://llm/": b'{"ok": true, "model_version": "abc"}'}
+    asked = []
+
+    class FakeResponse:
+        def __init__(self, url):
+            self.url = url
+
+        def read(self):
+            return bodies[self.url]
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+    def fake_urlopen(url, timeout=5):
+        asked.append(url)
+        if url not in bodies:
+            raise OSError("down")
+        return FakeResponse(url)
+
+    monkeypatch.setattr(clean, "urlopen", fake_urlopen)
+    assert _llm_model_version("http://llm/standardize") == "abc"
+    assert asked == ["http://llm/"]
+    assert _llm_model_version("http://other/standardize") is None
+    bodies["http://llm/"] = b"[]"
+    assert _llm_model_version("http://llm/standardize") is None
+
+
+# Test standardize only sends pairs the LLM cache has not seen.
+@pytest.mark.analysis
+def test_standardize_uses_llm_cache(monkeypatch, capsys):
+    sent = []
+
+    def fake_llm_post_rows(llm_url, rows_payload, timeout_s=300, attempts=5):
+        sent.append([r["program"] for r in rows_payload])
+        return [{"llm-generated-program": r["program"].split(",")[0],
+                 "llm-generated-university": "Uni"} for r in rows_payload]
+
+    monkeypatch.setattr(clean, "_llm_post_rows", fake_llm_post_rows)
+    monkeypatch.setattr(clean, "llm_model_version", lambda llm_url: "v1")
+
+    first = clean.standardize(["CS, A", "Math, B"], "http://llm/standardize")
+    assert first == {"CS, A": ("CS", "Uni"), "Math, B": ("Math", "Uni")}
+    # A later run: only the new pair goes to the LLM.
+    monkeypatch.setattr(llm_cache, "_CACHE", [None])
+    second = clean.standardize(["Math, B", "Art, C"],
+                               "http://llm/standardize")
+    assert second == {"Math, B": ("Math", "Uni"), "Art, C": ("Art", "Uni")}
+    assert sent == [["CS, A", "Math, B"], ["Art, C"]]
+    assert "1 of 2 unique inputs already standardized" in \
+        capsys.readouterr().out
+    assert clean.standardize([], "http://llm/standardize") == {}
+
+    monkeypatch.setattr(clean, "load_data", lambda *a, **k: [])
+    monkeypatch.setattr(clean, "append_rows_to_master", lambda *a, **k: [])
+    monkeypatch.setattr(clean, "save_data", lambda *a, **k: None)
+    monkeypatch.setattr(clean, "insert_rows_into_postgres", lambda *a, **k: 0)
+    clean.main()
+    assert "LLM cache: 1 hits, 1 misses, 1 stored" in capsys.readouterr().out
+
+
+# Test standardize skips the health check when given a version.
+@pytest.mark.analysis
+def test_standardize_uses_the_given_version(monkeypatch):
+    monkeypatch.setattr(clean, "llm_model_version", None)
+    monkeypatch.setattr(clean, "_llm_post_rows",
+                        lambda llm_url, rows_payload, **kwargs: [
+                            {"llm-generated-program": "Art",
+                             "llm-generated-university": "Uni"}])
+    assert clean.standardize(["Art, C"], "http://llm/standardize",
+                             version="v2") == {"Art, C": ("Art", "Uni")}
+    assert llm_cache.current_cache().version == "v2"
+    monkeypatch.setattr(llm_cache, "_CACHE", [None])
+    # "" means the server reported no version: no cache, no health check.
+    assert clean.standardize(["Art, C"], "http://llm/standardize",
+                             version="") == {"Art, C": ("Art", "Uni")}
+    assert llm_cache.current_cache() is None
+
+
+# Test standardize reuses answers already stored in the master data.
+@pytest.mark.analysis
+def test_standardize_uses_master_answers(monkeypatch, tmp_path, capsys):
+    url = "https://www.thegradcafe.com/result/1"
+    clean.append_rows_to_master([{
+        "result_id": 1, "program": "Computer Science, A University",
+        "url": url, "llm-generated-program": "Computer Science",
+        "llm-generated-university": "A University"}],
+        str(tmp_path / "master.json"))
+    # The raw row the answer came from, as the scraper saved it.
+    clean.save_data([{"application_url_raw": url, "program_raw": "CS",
+                      "university_raw": "A"}],
+                    str(tmp_path / "raw_scraped_data.json"))
+    sent = []
+
+    def fake_llm_post_rows(llm_url, rows_payload, timeout_s=300, attempts=5):
+        sent.extend(r["program"] for r in rows_payload)
+        return [{"llm-generated-program": "Math",
+                 "llm-generated-university": "B"} for r in rows_payload]
+
+    monkeypatch.setattr(clean, "_llm_post_rows", fake_llm_post_rows)
+    out = clean.standardize(["CS, A", "Math, B"], "http://llm/standardize")
+    assert out == {"CS, A": ("Computer Science", "A University"),
+                   "Math, B": ("Math", "B")}
+    assert sent == ["Math, B"]
+    assert "1 more answered in master data" in capsys.readouterr().out
+
+
+# Test _llm_post_rows honours attempts and does not sleep after the
+# last one.
+@pytest.mark.analysis
+def test_llm_post_rows_attempts(monkeypatch):
+    sleeps = []
+
+    def fake_urlopen(req, timeout=300):
+        raise OSError("LLM down")
+
+    monkeypatch.setattr(clean, "urlopen", fake_urlopen)
+    monkeypatch.setattr(clean.time, "sleep", sleeps.append)
+    with pytest.raises(RuntimeError, match="LLM down"):
+        clean._llm_post_rows("http://fake-llm", [{"program": "X"}],
+                             attempts=3)
+    assert sleeps == [1, 2]
+
+
+# Test the rules-only answer used for rows the LLM fails on.
+@pytest.mark.analysis
+def test_rules_standardize():
+    assert clean.rules_standardize("computer  science, university of "
+                                   "toronto") == ("Computer Science",
+                                                  "University of Toronto")
+    assert clean.rules_standardize("math at mit,") == ("Math", "Mit")
+    assert clean.rules_standardize(None) == ("", "Unknown")
+
+
+# Test a row the LLM fails on gets the rules answer, which is not
+# cached, and the rest of the batch still goes through the LLM.
+@pytest.mark.analysis
+def test_standardize_bisects_poison_rows(monkeypatch):
+    def fake_llm_post_rows(llm_url, rows_payload, timeout_s=300, attempts=5):
+        if any(r["program"] == "bad row, x" for r in rows_payload):
+            raise RuntimeError("LLM batch failed after retries")
+        return [{"llm-generated-program": "LLM",
+                 "llm-generated-university": "Uni"} for _ in rows_payload]
+
+    monkeypatch.setattr(clean, "_llm_post_rows", fake_llm_post_rows)
+    monkeypatch.setattr(clean, "llm_model_version", lambda llm_url: "v1")
+    inputs = ["a, x", "bad row, x", "c, x", "d, x"]
+    out = clean.standardize(inputs, "http://llm/standardize")
+    assert out["bad row, x"] == ("Bad Row", "X")
+    assert out["a, x"] == out["d, x"] == ("LLM", "Uni")
+    cache = llm_cache.current_cache()
+    assert cache.stats["stored"] == 3
+    assert "bad row, x" not in cache.lookup(["bad row, x"])
+    assert llm_batching.current_sizer().stats["fallback_rows"] == 1
+
+
 # Test clean_data_basic cleans the data correctly.
 @pytest.mark.analysis
 def test_clean_data_basic(monkeypatch):
     # Fake LLM response to avoid real HTTP call
-    def fake_llm_post_rows(llm_url, rows_payload, timeout_s=300):
+    def fake_llm_post_rows(llm_url, rows_payload, timeout_s=300, attempts=5):
         # Return one cleaned row for each input row
         return [{
             "llm-generated-program": "CS",
@@ -292,7 +475,7 @@ def test_clean_data_basic(monkeypatch):
 @pytest.mark.analysis
 def test_clean_data_missing_decision_and_term_fallback(monkeypatch):
     # Fake LLM response
-    def fake_llm_post_rows(llm_url, rows_payload, timeout_s=300):
+    def fake_llm_post_rows(llm_url, rows_payload, timeout_s=300, attempts=5):
         return [{
             "llm-generated-program": "CS",
             "llm-generated-university": "Uni"
@@ -497,7 +680,7 @@ def test_insert_rows_into_postgres_skips_missing_id(monkeypatch):
 # This test checks decision-only branch sets status without date.
 def test_clean_data_decision_only(monkeypatch):
 
-    def fake_llm_post_rows(llm_url, rows_payload, timeout_s=300):
+    def fake_llm_post_rows(llm_url, rows_payload, timeout_s=300, attempts=5):
         return [{
             "llm-generated-program": "CS",
             "llm-generated-university": "Uni"
@@ -530,7 +713,7 @@ def test_clean_data_decision_only(monkeypatch):
 # This test checks rejected branch sets rejection date.
 def test_clean_data_rejected_branch(monkeypatch):
 
-    def fake_llm_post_rows(llm_url, rows_payload, timeout_s=300):
+    def fake_llm_post_rows(llm_url, rows_payload, timeout_s=300, attempts=5):
         return [{
             "llm-generated-program": "CS",
             "llm-generated-university": "Uni"
@@ -563,7 +746,7 @@ def test_clean_data_rejected_branch(monkeypatch):
 # This test checks program-only, uni-only, and neither cases.
 def test_clean_data_combined_program_branches(monkeypatch):
 
-    def fake_llm_post_rows(llm_url, rows_payload, timeout_s=300):
+    def fake_llm_post_rows(llm_url, rows_payload, timeout_s=300, attempts=5):
         return [
             {"llm-generated-program": "CS", "llm-generated-university": None},
             {"llm-generated-program": None, "llm-generated-university": "Uni"},
@@ -0,0 +1,202 @@
+# Tests for Scraper.crawl (asyncio crawl engine)
+
+import asyncio
+import threading
+from urllib.error import HTTPError
+
+import pytest
+
+import Scraper.crawl as crawl
+import Scraper.rate_control as rate_control
+import Scraper.scrape as scrape
+
+
+# Build a survey page with one listing row per result_id.
+def _survey_html(ids):
+    rows = "".join(
+        f"""
+        <tr>
+          <td>U{rid}</td><td>P{rid}</td><td>D</td><td>S</td><td>C</td>
+          <td><a href="/result/{rid}">View</a></td>
+        </tr>
+        """
+        for rid in ids
+    )
+    return f"<table>{rows}</table>"
+
+
+def _fake_site(pages, calls=None):
+    """Return a download_html stand-in serving survey pages by number."""
+    def fake_download_html(url):
+        if calls is not None:
+            calls.append(url)
+        if "/result/" in url:
+            return f"<p>detail {url.rsplit('/', 1)[-1]}</p>"
+        page = int(url.split("page=")[1]) if "page=" in url else 1
+        value = pages.get(page, "<html></html>")
+        if isinstance(value, Exception):
+            raise value
+        return value
+    return fake_download_html
+
+
+@pytest.fixture(autouse=True)
+def _fresh_rate():
+    """Slow-downs from one test must not leak into the next."""
+    rate_control.reset_controller()
+    yield
+    rate_control.reset_controller()
+
+
+@pytest.mark.analysis
+def test_rate_budget_spaces_requests(monkeypatch):
+    """Each reservation lands one interval after the previous one."""
+    now = [100.0]
+    monkeypatch.setattr(crawl.time, "monotonic", lambda: now[0])
+    budget = crawl.RateBudget(4)
+    assert budget.reserve() == 0
+    assert budget.reserve() == pytest.approx(0.25)
+    assert budget.reserve() == pytest.approx(0.5)
+    now[0] = 200.0
+    assert budget.reserve() == 0
+    assert crawl.RateBudget(0).interval == 0.0
+
+
+@pytest.mark.analysis
+def test_rate_budget_acquire_waits(monkeypatch):
+    """acquire() sleeps for the reserved delay."""
+    slept = []
+
+    async def fake_sleep(delay):
+        slept.append(delay)
+
+    monkeypatch.setattr(crawl.asyncio, "sleep", fake_sleep)
+    budget = crawl.RateBudget(2)
+
+    async def run():
+        await budget.acquire()
+        await budget.acquire()
+
+    asyncio.run(run())
+    assert len(slept) == 1
+    assert slept[0] == pytest.approx(0.5, abs=0.05)
+
+
+@pytest.mark.analysis
+def test_crawl_stops_on_known_id(monkeypatch):
+    """Rows before the first known id are kept and the crawl stops."""
+    pages = {1: _survey_html([10, 9]), 2: _survey_html([8, 7, 6])}
+    calls = []
+    monkeypatch.setattr(scrape, "download_html", _fake_site(pages, calls))
+
+    rows = asyncio.run(crawl.crawl(1, 100, {7}, rate=0, workers=2))
+
+    assert [r["result_id"] for r in rows] == [10, 9, 8]
+    assert [r["result_text_raw"] for r in rows] == [
+        "detail 10", "detail 9", "detail 8"
+    ]
+    # Page 3 is never requested once page 2 hits known data.
+    assert not any("page=3" in u for u in calls)
+
+
+@pytest.mark.analysis
+def test_crawl_stops_when_first_row_known(monkeypatch):
+    """A page that starts with known data ends the crawl immediately."""
+    pages = {1: _survey_html([5, 4])}
+    monkeypatch.setattr(scrape, "download_html", _fake_site(pages))
+
+    assert asyncio.run(crawl.crawl(1, 100, {5}, rate=0)) == []
+
+
+@pytest.mark.analysis
+def test_crawl_respects_target(monkeypatch):
+    """The crawl stops at target rows and does not prefetch past it."""
+    pages = {1: _survey_html([30, 29]), 2: _survey_html([28, 27])}
+    calls = []
+    monkeypatch.setattr(scrape, "download_html", _fake_site(pages, calls))
+
+    rows = asyncio.run(crawl.crawl(1, 3, None, rate=0))
+
+    assert [r["result_id"] for r in rows] == [30, 29, 28]
+    assert not any("page=3" in u for u in calls)
+    # Row 27 is past the target, so its result page is never fetched.
+    assert not any(u.endswith("/result/27") for u in calls)
+
+
+@pytest.mark.analysis
+def test_crawl_empty_and_failed_pages(monkeypatch):
+    """Failed pages are skipped; five empty pages end the crawl."""
+    pages = {
+        1: HTTPError("u", 500, "boom", hdrs=None, fp=None),
+        2: _survey_html([3]),
+    }
+    monkeypatch.setattr(scrape, "download_html", _fake_site(pages))
+
+    rows = asyncio.run(crawl.crawl(1, 100, set(), rate=0))
+
+    assert [r["result_id"] for r in rows] == [3]
+
+
+@pytest.mark.analysis
+def test_crawl_detail_failure_sets_none(monkeypatch):
+    """A failing detail page leaves result_text_raw as None."""
+    pages = {1: _survey_html([2])}
+    site = _fake_site(pages)
+
+    def fake_download_html(url):
+        if "/result/" in url:
+            raise OSError("gone")
+        return site(url)
+
+    monkeypatch.setattr(scrape, "download_html", fake_download_html)
+
+    rows = asyncio.run(crawl.crawl(1, 1, set(), rate=0))
+    assert rows[0]["result_text_raw"] is None
+
+
+@pytest.mark.analysis
+def test_detail_parsing_runs_off_the_event_loop(monkeypatch):
+    """result_text runs on a worker thread, not the loop's thread."""
+    monkeypatch.setattr(scrape, "download_html",
+                        _fake_site({1: _survey_html([3, 2])}))
+    parse = scrape.result_text
+    threads = []
+
+    def record_thread(row_data, html_text):
+        threads.append(threading.get_ident())
+        return parse(row_data, html_text)
+
+    monkeypatch.setattr(scrape, "result_text", record_thread)
+    rows = asyncio.run(crawl.crawl(1, 2, set(), rate=0))
+    assert [r["result_text_raw"] for r in rows] == ["detail 3", "detail 2"]
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
+
+
+@pytest.mark.analysis
+def test_crawl_cancellation_cancels_prefetch(monkeypatch):
+    """Cancelling the crawl task cancels the page prefetch too."""
+    started = {}
+
+    async def fake_fetch(budget, url):
+        if "/result/" in url:
+            started["detail"] = True
+            await asyncio.sleep(10)
+        if "page=2" in url:
+            started["prefetch"] = asyncio.current_task()
+            await asyncio.sleep(10)
+        return _survey_html([1])
+
+    monkeypatch.setattr(crawl, "_fetch", fake_fetch)
+
+    async def run():
+        task = asyncio.create_task(crawl.crawl(1, 100, set(), rate=0))
+        while "detail" not in started:
+            await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return started["prefetch"]
+
+    prefetch = asyncio.run(run())
+    assert prefetch.cancelled()
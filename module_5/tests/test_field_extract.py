@@ -0,0 +1,90 @@
+# Tests for Scraper.field_extract (one-scan result text extractor)
+
+import random
+
+import pytest
+
+import Scraper.clean as clean
+import Scraper.field_extract as field_extract
+
+SAMPLE = ("Institution MIT Program Computer Science Degree Type PhD "
+          "Degree's Country of Origin International Decision Accepted "
+          "Notification on 01/02/2026 via E-mail Undergrad GPA 3.87 "
+          "GRE General: 328 GRE Verbal: 160 Analytical Writing: 4.5 "
+          "Notes Funding  offered,\n visit in March. Timeline Fall 2026")
+
+# Labels, values and near misses the extractors must agree on.
+_TOKENS = ["Decision", "Notification", "on", "01/02/2026", "1/2/2026",
+           "Degree", "Type", "Degree's", "Country", "of", "Origin", "PhD",
+           "M.S.", "Domestic", "Notes", "Timeline", "Undergrad", "GPA",
+           "3.87", "5.1", "GRE", "General:", "General:328", "Verbal:",
+           "160", "Analytical", "Writing:", "4.5", "7", "Fall", "FALL",
+           "autumn", "Spring", "winter", "2026", "2020", "202020", "20",
+           "1999", "xFall", "Fall2026", "Accepted", "\n", "\t", "é",
+           "20261", "DecisionNotification", "GREGRE"]
+
+
+def _one_by_one(text):
+    return (clean.extract_decision(text),
+            clean.extract_notification_date(text),
+            clean.extract_degree_type(text),
+            clean.extract_country_origin(text),
+            clean.extract_notes(text),
+            clean.extract_undergrad_gpa(text),
+            clean.extract_gre_general(text),
+            clean.extract_gre_verbal(text),
+            clean.extract_gre_aw(text),
+            clean.extract_term_year(text))
+
+
+@pytest.mark.analysis
+def test_extract_sample():
+    assert field_extract.extract(SAMPLE) == (
+        "Accepted", "01/02/2026", "PhD", "International",
+        "Funding offered, visit in March.", "3.87", "328", "160", "4.5",
+        "Fall 2026")
+    assert field_extract.extract(None) == _one_by_one(None)
+    assert field_extract.extract("")._fields[-1] == "term"
+
+
+@pytest.mark.analysis
+@pytest.mark.parametrize("text", [
+    SAMPLE,
+    # The first label that matches wins, as with re.search.
+    "Degree Degree Type MS Degree Type PhD Decision Notification on x",
+    "Decision   Notification Decision Wait listed Notification",
+    "Term: 2020 2026 autumn  2027 Spring 2028",
+    "Summer\t2026, Fall 2027",
+    "Spring 20261 Fall 2025",
+    "Winter 1999 (2026) WINTER 2030",
+    "20 Fall 2026",
+    "Notes a\nb  c Timeline Notes d Timeline",
+    "Notes  Timeline",
+])
+def test_matches_one_by_one(text):
+    assert field_extract.extract(text) == _one_by_one(text)
+
+
+@pytest.mark.analysis
+def test_matches_one_by_one_on_random_texts():
+    rng = random.Random(25)
+    for _ in range(3000):
+        text = "".join(rng.choice(_TOKENS) + rng.choice(["", " ", "  "])
+                       for _ in range(rng.randint(0, 25)))
+        assert field_extract.extract(text) == _one_by_one(text), text
+
+
+@pytest.mark.analysis
+def test_extract_row_fields_uses_one_scan(monkeypatch):
+    calls = []
+    scan = field_extract.extract
+    monkeypatch.setattr(field_extract, "extract",
+                        lambda text: calls.append(text) or scan(text))
+    row = {"result_text_raw": SAMPLE}
+    clean.extract_row_fields(row)
+    assert calls == [SAMPLE]
+    assert row["Applicant Status"] == "Accepted on 01/02/2026"
+    assert row["Comments (if available)"] == \
+        "Funding offered, visit in March."
+    assert row["Semester and Year of Program Start (if available)"] == \
+        "Fall 2026"
@@ -92,6 +92,26 @@ def test_scrape_status_route_idle():
     assert resp.get_json() == {"is_scraping": False}
 
 
+@pytest.mark.web
+# Test that /crawl-telemetry serves the crawler's report file, and 404s
+# before any crawl has written one.
+def test_crawl_telemetry_route(monkeypatch, tmp_path):
+    report = tmp_path / "report.json"
+    monkeypatch.setenv("SCRAPE_TELEMETRY_FILE", str(report))
+    client = create_app().test_client()
+
+    resp = client.get("/crawl-telemetry")
+    assert resp.status_code == 404
+    assert resp.get_json() == {"available": False}
+
+    report.write_text('{"finished": false, "counters": {"requests": 3}}',
+                      encoding="utf-8")
+    resp = client.get("/crawl-telemetry")
+    assert resp.status_code == 200
+    assert resp.get_json()["counters"] == {"requests": 3}
+    assert resp.get_json()["available"] is True
+
+
 @pytest.mark.web
 # Test that /scrape-status is True when a process is running.
 def test_scrape_status_route_busy():
@@ -0,0 +1,258 @@
+# Tests for Scraper.http_cache (on-disk response cache)
+
+import io
+import os
+import runpy
+import sys
+from urllib.error import HTTPError
+
+import pytest
+
+import Scraper.http_cache as http_cache
+import Scraper.http_pool as http_pool
+import Scraper.rate_control as rate_control
+import Scraper.scrape as scrape
+
+
+@pytest.fixture(autouse=True)
+def _fresh_rate():
+    """Slow-downs from one test must not leak into the next."""
+    rate_control.reset_controller()
+    yield
+    rate_control.reset_controller()
+
+URL = "https://www.thegradcafe.com/result/1"
+
+
+@pytest.fixture(autouse=True)
+def _reset_shared_cache(monkeypatch):
+    monkeypatch.setattr(http_cache, "_CACHE", [None])
+    monkeypatch.delenv("SCRAPE_CACHE_DIR", raising=False)
+
+
+@pytest.mark.analysis
+def test_store_and_validators(tmp_path):
+    cache = http_cache.ResponseCache(str(tmp_path))
+    assert cache.validators(URL) == {}
+    assert cache.get_text(URL) is None
+
+    cache.store(URL, "<html>one</html>", etag='"v1"',
+                last_modified="Mon, 02 Feb 2026 00:00:00 GMT")
+    assert cache.validators(URL) == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 02 Feb 2026 00:00:00 GMT",
+    }
+    assert cache.get_text(URL) == "<html>one</html>"
+    assert cache.stats["hits"] == 1
+    assert cache.get_text(URL, revalidated=True) == "<html>one</html>"
+    assert cache.stats["revalidated"] == 1
+    assert "1 entries" in cache.stats_report()
+
+
+@pytest.mark.analysis
+def test_is_fresh_window(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(http_cache.time, "time", lambda: now[0])
+    cache = http_cache.ResponseCache(str(tmp_path), max_age=60)
+    assert not cache.is_fresh(URL)
+    cache.store(URL, "x")
+    assert cache.is_fresh(URL)
+    now[0] += 61
+    assert not cache.is_fresh(URL)
+    assert not http_cache.ResponseCache(str(tmp_path)).is_fresh(URL)
+
+    # A 304 confirms the body: the window restarts, also after reopen.
+    assert cache.get_text(URL, revalidated=True) == "x"
+    assert cache.is_fresh(URL)
+    reopened = http_cache.ResponseCache(str(tmp_path), max_age=60)
+    assert reopened.is_fresh(URL)
+    now[0] += 61
+    # A plain hit does not.
+    cache.get_text(URL)
+    assert not cache.is_fresh(URL)
+
+
+@pytest.mark.analysis
+def test_journal_replay_and_compaction(tmp_path):
+    cache = http_cache.ResponseCache(str(tmp_path))
+    for n in range(120):
+        cache.store(URL, f"body {n}")
+    cache.store("https://x/2", "other")
+    cache.get_text("https://x/2")
+    cache.forget("https://x/2")
+    cache.forget("https://x/missing")
+    with open(os.path.join(tmp_path, "index.jsonl"), "a") as f:
+        f.write('{"op": "put", "url"')  # torn write from a crash
+
+    reopened = http_cache.ResponseCache(str(tmp_path))
+    assert reopened.get_text(URL) == "body 119"
+    assert reopened.get_text("https://x/2") is None
+    # Replaying 120+ lines for one live entry triggers a compaction.
+    with open(os.path.join(tmp_path, "index.jsonl")) as f:
+        assert len(f.readlines()) <= 3
+    # Replaced bodies do not linger on disk.
+    objects = [n for _, _, files in os.walk(tmp_path / "objects")
+               for n in files]
+    assert len(objects) == 1
+
+
+@pytest.mark.analysis
+def test_lru_eviction_shares_bodies(tmp_path, monkeypatch):
+    clock = [0.0]
+
+    def tick():
+        clock[0] += 1
+        return clock[0]
+
+    monkeypatch.setattr(http_cache.time, "time", tick)
+    cache = http_cache.ResponseCache(str(tmp_path), max_bytes=25)
+    cache.store("https://x/a", "a" * 10)
+    cache.store("https://x/b", "b" * 10)
+    cache.store("https://x/a2", "a" * 10)  # same body as /a
+    assert cache.total_bytes() == 20
+    cache.get_text("https://x/a")          # /b is now least recent
+    cache.store("https://x/c", "c" * 10)
+    assert cache.get_text("https://x/b") is None
+    assert cache.get_text("https://x/a") == "a" * 10
+    assert cache.stats["evicted"] == 1
+    assert cache.total_bytes() == 20
+
+    # Evicting both users of one body deletes its file.
+    cache.max_bytes = 10
+    cache.store("https://x/d", "d" * 10)
+    assert cache.get_text("https://x/a") is None
+    assert cache.get_text("https://x/a2") is None
+
+
+@pytest.mark.analysis
+def test_lru_order_survives_reopen(tmp_path):
+    cache = http_cache.ResponseCache(str(tmp_path), max_bytes=25)
+    cache.store("https://x/a", "a" * 10)
+    cache.store("https://x/b", "b" * 10)
+    cache.get_text("https://x/a")
+    reopened = http_cache.ResponseCache(str(tmp_path), max_bytes=25)
+    assert list(reopened._entries) == ["https://x/b", "https://x/a"]
+    reopened.store("https://x/c", "c" * 10)
+    assert list(reopened._entries) == ["https://x/a", "https://x/c"]
+
+
+@pytest.mark.analysis
+def test_get_text_reads_outside_the_lock(tmp_path, monkeypatch):
+    cache = http_cache.ResponseCache(str(tmp_path))
+    cache.store(URL, "v1")
+    read = cache._read_object
+    locked = []
+
+    def replacing_read(digest):
+        locked.append(cache._lock.locked())
+        # Another thread stores a new body while this one decodes.
+        cache.store(URL, "v2")
+        return read(digest)
+
+    monkeypatch.setattr(cache, "_read_object", replacing_read)
+    assert cache.get_text(URL) is None
+    assert locked == [False]
+    assert cache.stats["hits"] == 0
+    monkeypatch.setattr(cache, "_read_object", read)
+    assert cache.get_text(URL) == "v2"
+
+
+@pytest.mark.analysis
+def test_missing_object_is_dropped(tmp_path):
+    cache = http_cache.ResponseCache(str(tmp_path))
+    cache.store(URL, "gone soon")
+    digest = cache._entries[URL]["sha"]
+    os.remove(cache._object_path(digest))
+    cache._remove_object(digest)  # already gone: no error
+    assert cache.get_text(URL) is None
+    assert cache.validators(URL) == {}
+
+
+@pytest.mark.analysis
+def test_get_cache_from_env(tmp_path, monkeypatch):
+    assert http_cache.get_cache() is None
+    monkeypatch.setenv("SCRAPE_CACHE_DIR", str(tmp_path / "c1"))
+    monkeypatch.setenv("SCRAPE_CACHE_MAX_MB", "1")
+    first = http_cache.get_cache()
+    assert first is http_cache.get_cache()
+    assert first.max_bytes == 1024 * 1024
+    monkeypatch.setenv("SCRAPE_CACHE_DIR", str(tmp_path / "c2"))
+    assert http_cache.get_cache() is not first
+
+
+class _Resp:
+    def __init__(self, body, headers=None):
+        self._buf = io.BytesIO(body)
+        self.headers = headers or {}
+
+    def read(self, amt=None):
+        return self._buf.read(amt)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+def _not_modified(req):
+    return HTTPError(req.full_url, 304, "Not Modified", hdrs=None, fp=None)
+
+
+@pytest.mark.analysis
+def test_download_html_uses_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCRAPE_CACHE_DIR", str(tmp_path))
+    sent = []
+
+    def fake_urlopen(req, timeout=60):
+        sent.append(req.get_header("If-none-match"))
+        if len(sent) == 1:
+            return _Resp(b"<p>v1</p>", {"ETag": '"e1"'})
+        raise _not_modified(req)
+
+    monkeypatch.setattr(scrape, "urlopen", fake_urlopen)
+
+    assert scrape.download_html(URL) == "<p>v1</p>"
+    assert scrape.download_html(URL) == "<p>v1</p>"
+    assert sent == [None, '"e1"']
+    cache = http_cache.get_cache()
+    assert cache.stats["revalidated"] == 1
+
+    # Within the freshness window no request is made at all.
+    cache.max_age = 3600
+    assert scrape.download_html(URL) == "<p>v1</p>"
+    assert len(sent) == 2
+
+
+@pytest.mark.analysis
+def test_download_html_304_without_body_refetches(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCRAPE_CACHE_DIR", str(tmp_path))
+    cache = http_cache.get_cache()
+    cache.store(URL, "old", etag='"e0"')
+    os.remove(cache._object_path(cache._entries[URL]["sha"]))
+    # The entry still exists in the index, so validators are sent.
+    cache._entries[URL]["etag"] = '"e0"'
+    sent = []
+
+    def fake_urlopen(req, timeout=60):
+        sent.append(req.get_header("If-none-match"))
+        if len(sent) == 1:
+            raise _not_modified(req)
+        return _Resp(b"new")
+
+    monkeypatch.setattr(scrape, "urlopen", fake_urlopen)
+    assert scrape.download_html(URL) == "new"
+    assert sent == ['"e0"', None]
+
+
+@pytest.mark.analysis
+def test_scrape_main_prints_cache_stats(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", ["scrape.py"])
+    monkeypatch.setenv("SCRAPE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(http_pool, "urlopen",
+                        lambda *a, **k: _Resp(b"<html></html>"))
+    monkeypatch.setattr(rate_control.time, "sleep", lambda x: None)
+
+    runpy.run_module("Scraper.scrape", run_name="__main__")
+    assert "Cache: " in capsys.readouterr().out
@@ -0,0 +1,252 @@
+# Tests for Scraper.http_pool (keep-alive connection pool)
+
+import http.client
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError, URLError
+from urllib.request import Request
+
+import pytest
+
+import Scraper.http_pool as http_pool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Tiny keep-alive server used to exercise the pool."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code, body=b"", headers=None):
+        self.send_response(code)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        if self.path == "/ok":
+            self._send(200, b"hello")
+        elif self.path.startswith("/redirect"):
+            self._send(302, headers={"Location": "/ok"})
+        elif self.path == "/loop":
+            self._send(302, headers={"Location": "/loop"})
+        elif self.path == "/close":
+            self._send(200, b"bye", headers={"Connection": "close"})
+        else:
+            self._send(404, b"missing")
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        body = self.rfile.read(length)
+        if self.path == "/see-other":
+            self._send(303, headers={"Location": "/ok"})
+        else:
+            self._send(200, body.upper())
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.connections = set()
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv, f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.mark.analysis
+def test_pool_reuses_connection(server):
+    srv, base = server
+    pool = http_pool.ConnectionPool()
+    for _ in range(3):
+        with http_pool.urlopen(f"{base}/ok", pool=pool) as resp:
+            assert resp.read() == b"hello"
+            assert resp.getheader("Content-Length") == "5"
+    assert pool.stats["created"] == 1
+    assert pool.stats["reused"] == 2
+    assert len(srv.connections) == 1
+    assert pool.idle_count() == 1
+    pool.close_all()
+    assert pool.idle_count() == 0
+
+
+@pytest.mark.analysis
+def test_pool_is_thread_safe(server):
+    _, base = server
+    pool = http_pool.ConnectionPool(max_idle_per_host=2)
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(5):
+                with http_pool.urlopen(f"{base}/ok", pool=pool) as resp:
+                    assert resp.read() == b"hello"
+        except Exception as e:  # pragma: no cover - only on failure
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert pool.stats["created"] + pool.stats["reused"] == 20
+    assert pool.idle_count() <= 2
+
+
+@pytest.mark.analysis
+def test_pool_redirects_errors_and_post(server):
+    _, base = server
+    pool = http_pool.ConnectionPool()
+
+    with http_pool.urlopen(Request(f"{base}/redirect"), pool=pool) as resp:
+        assert resp.read() == b"hello"
+        assert resp.url.endswith("/ok")
+
+    with pytest.raises(HTTPError) as err:
+        http_pool.urlopen(f"{base}/nope", pool=pool)
+    assert err.value.code == 404
+    assert err.value.read() == b"missing"
+
+    with pytest.raises(URLError, match="too many redirects"):
+        http_pool.urlopen(f"{base}/loop", pool=pool)
+
+    req = Request(f"{base}/echo?x=1", data=b"abc", method="POST")
+    with http_pool.urlopen(req, pool=pool) as resp:
+        assert resp.read() == b"ABC"
+
+    req = Request(f"{base}/see-other", data=b"abc", method="POST")
+    with http_pool.urlopen(req, pool=pool) as resp:
+        assert resp.read() == b"hello"
+
+
+@pytest.mark.analysis
+def test_pool_drops_closed_and_unread_connections(server):
+    _, base = server
+    pool = http_pool.ConnectionPool()
+
+    # Server asked to close: the connection is not kept.
+    with http_pool.urlopen(f"{base}/close", pool=pool) as resp:
+        assert resp.read() == b"bye"
+    assert pool.idle_count() == 0
+
+    # Body left unread: the connection cannot be reused.
+    with http_pool.urlopen(f"{base}/ok", pool=pool) as resp:
+        assert resp.status == 200
+    assert pool.idle_count() == 0
+
+    # Partial reads return the connection once the body is drained.
+    resp = http_pool.urlopen(f"{base}/ok", pool=pool)
+    assert resp.read(2) == b"he"
+    assert resp.read(10) == b"llo"
+    resp.close()
+    assert pool.idle_count() == 1
+
+
+@pytest.mark.analysis
+def test_pool_evicts_idle_and_caps_idle(server, monkeypatch):
+    _, base = server
+    now = [1000.0]
+    monkeypatch.setattr(http_pool.time, "monotonic", lambda: now[0])
+    pool = http_pool.ConnectionPool(max_idle_per_host=1, idle_timeout=5)
+
+    with http_pool.urlopen(f"{base}/ok", pool=pool) as resp:
+        resp.read()
+    now[0] += 10
+    with http_pool.urlopen(f"{base}/ok", pool=pool) as resp:
+        resp.read()
+    assert pool.stats["evicted"] == 1
+    assert pool.stats["created"] == 2
+
+    # A second idle connection beyond the cap is closed.
+    key = ("http", "127.0.0.1", int(base.rsplit(":", 1)[1]))
+    extra = http.client.HTTPConnection("127.0.0.1", key[2])
+    pool.release(key, extra)
+    assert pool.idle_count(key) == 1
+
+
+class _FakeConn:
+    """Connection stand-in that fails on demand."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.sock = None
+        self.timeout = None
+        self.closed = False
+
+    def request(self, *args, **kwargs):
+        if self.error is not None:
+            raise self.error
+
+    def getresponse(self):
+        raise AssertionError("not reached")  # pragma: no cover
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.analysis
+def test_pool_reconnects_after_reset(server, monkeypatch):
+    _, base = server
+    pool = http_pool.ConnectionPool()
+    key = ("http", "127.0.0.1", int(base.rsplit(":", 1)[1]))
+    stale = _FakeConn(http.client.RemoteDisconnected("gone"))
+    pool.release(key, stale)
+
+    with http_pool.urlopen(f"{base}/ok", pool=pool) as resp:
+        assert resp.read() == b"hello"
+    assert stale.closed
+    assert pool.stats["reconnects"] == 1
+
+
+@pytest.mark.analysis
+def test_pool_wraps_connection_errors(monkeypatch):
+    pool = http_pool.ConnectionPool()
+    monkeypatch.setattr(
+        pool, "_new_connection",
+        lambda key, timeout: _FakeConn(ConnectionResetError("reset"))
+    )
+    with pytest.raises(URLError):
+        pool.request("GET", "https://example.invalid/x")
+
+    monkeypatch.setattr(
+        pool, "_new_connection",
+        lambda key, timeout: _FakeConn(OSError("refused"))
+    )
+    with pytest.raises(URLError):
+        pool.request("GET", "http://example.invalid")
+
+
+@pytest.mark.analysis
+def test_pool_builds_https_connections():
+    pool = http_pool.ConnectionPool()
+    conn = pool._new_connection(("https", "example.com", 443), 5)
+    assert isinstance(conn, http.client.HTTPSConnection)
+
+
+@pytest.mark.analysis
+def test_pool_counts_under_its_lock():
+    pool = http_pool.ConnectionPool()
+    with pool._lock:
+        opener = threading.Thread(target=pool._new_connection,
+                                  args=(("http", "example.com", 80), 5))
+        opener.start()
+        opener.join(0.05)
+        # The counter waits for the lock instead of racing other threads.
+        assert opener.is_alive()
+        assert pool.stats["created"] == 0
+    opener.join()
+    assert pool.stats["created"] == 1
+    threads = [threading.Thread(target=pool._count, args=("reconnects",))
+               for _ in range(50)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert pool.stats["reconnects"] == 50
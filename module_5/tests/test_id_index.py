@@ -0,0 +1,159 @@
+# Tests for Scraper.id_index (sidecar index of known result_ids)
+
+import json
+import os
+import threading
+
+import pytest
+
+import Scraper.clean as clean
+import Scraper.id_index as id_index
+import Scraper.scrape as scrape
+
+
+def _write_master(path, rows):
+    path.write_text(json.dumps(rows, ensure_ascii=False, indent=2),
+                    encoding="utf-8")
+
+
+@pytest.mark.analysis
+def test_index_built_from_master_and_reused(tmp_path, monkeypatch):
+    master = tmp_path / "master.json"
+    _write_master(master, [
+        {"result_id": 30, "url": "https://www.thegradcafe.com/result/30"},
+        {"url": "https://www.thegradcafe.com/result/12"},
+        {"application_url_raw": "/result/7"},
+        {"result_id": None, "url": None},
+        {"result_id": 2 ** 40},
+    ])
+    with id_index.IdIndex(str(master)) as index:
+        assert list(index) == [7, 12, 30]
+        assert 12 in index and 13 not in index
+        assert None not in index and -1 not in index and "12" not in index
+
+    # A second open maps the existing file instead of reading the master.
+    def no_rebuild(_path):
+        raise AssertionError("master should not be re-read")
+
+    monkeypatch.setattr(id_index, "_ids_from_master", no_rebuild)
+    with id_index.IdIndex(str(master)) as index:
+        assert len(index) == 3
+
+
+@pytest.mark.analysis
+def test_index_rebuilt_when_master_changes(tmp_path):
+    master = tmp_path / "master.json"
+    _write_master(master, [{"result_id": 1}])
+    id_index.IdIndex(str(master)).close()
+
+    _write_master(master, [{"result_id": 1}, {"result_id": 2}])
+    os.utime(master, ns=(1, 1))
+    with id_index.IdIndex(str(master)) as index:
+        assert list(index) == [1, 2]
+
+
+@pytest.mark.analysis
+@pytest.mark.parametrize("content", [b"", b"short", b"NOTMAGIC" + b"\0" * 40])
+def test_index_rebuilt_when_file_is_bad(tmp_path, content):
+    master = tmp_path / "master.json"
+    _write_master(master, [{"result_id": 4}])
+    (tmp_path / "master.json.ids").write_bytes(content)
+    with id_index.IdIndex(str(master)) as index:
+        assert list(index) == [4]
+
+
+@pytest.mark.analysis
+def test_index_add_merges_in_order(tmp_path):
+    master = tmp_path / "missing.json"
+    with id_index.IdIndex(str(master)) as index:
+        assert len(index) == 0
+        index.add([9, 3, 9, None, "x", -5])
+        index.add([5, 3])
+        assert list(index) == [3, 5, 9]
+
+
+@pytest.mark.analysis
+def test_known_ids_tracks_run_additions(tmp_path):
+    master = tmp_path / "master.json"
+    _write_master(master, [{"result_id": 10}])
+    known = scrape.load_known_ids(str(master))
+    known.add(10)
+    known.update([11, 12])
+    assert 10 in known and 11 in known and 13 not in known
+    assert len(known) == 3
+    assert sorted(known) == [10, 11, 12]
+    known.index.close()
+
+
+@pytest.mark.analysis
+def test_append_rows_to_master_streams_and_updates_index(tmp_path):
+    master = tmp_path / "master.json"
+    old = [{"result_id": 2, "comments": "line\nbreak é"}, {"url": "/result/1"}]
+    _write_master(master, old)
+
+    added = clean.append_rows_to_master(
+        [{"result_id": 1}, {"result_id": 4}, {"result_id": 3},
+         {"result_id": 4}], str(master))
+    assert added == [{"result_id": 4}, {"result_id": 3}]
+    expected = tmp_path / "expected.json"
+    clean.save_data(added + old, str(expected))
+    assert master.read_text(encoding="utf-8") == \
+        expected.read_text(encoding="utf-8")
+
+    # The index was updated in place and still matches the master.
+    with id_index.IdIndex(str(master)) as index:
+        assert list(index) == [1, 2, 3, 4]
+
+    # Nothing new: the master is left alone.
+    before = master.stat().st_mtime_ns
+    assert clean.append_rows_to_master([{"result_id": 3}], str(master)) == []
+    assert master.stat().st_mtime_ns == before
+
+
+@pytest.mark.analysis
+@pytest.mark.parametrize("content", ["", "  \n", "[]", "[\n]", "not json"])
+def test_append_rows_to_empty_or_bad_master(tmp_path, content):
+    master = tmp_path / "master.json"
+    master.write_text(content, encoding="utf-8")
+    clean.append_rows_to_master([{"result_id": 8}], str(master))
+    assert json.loads(master.read_text()) == [{"result_id": 8}]
+
+
+@pytest.mark.analysis
+def test_append_rows_creates_missing_master(tmp_path):
+    master = tmp_path / "master.json"
+    assert clean.append_rows_to_master([], str(master)) == []
+    assert json.loads(master.read_text()) == []
+    assert scrape.load_data(str(tmp_path / "nope.json")) == []
+
+
+@pytest.mark.analysis
+def test_concurrent_rebuilds_do_not_collide(tmp_path, monkeypatch):
+    master = tmp_path / "master.json"
+    master.write_text(json.dumps([{"result_id": 5}]), encoding="utf-8")
+    # Both writers finish their temp file before either renames it.
+    both_written = threading.Barrier(2, timeout=5)
+    replace = os.replace
+
+    def replace_together(src, dst):
+        both_written.wait()
+        replace(src, dst)
+
+    monkeypatch.setattr(id_index.os, "replace", replace_together)
+    found, errors = [], []
+
+    def open_index():
+        try:
+            with id_index.IdIndex(str(master)) as index:
+                found.append(5 in index)
+        except OSError as e:  # pragma: no cover - only on failure
+            errors.append(e)
+
+    threads = [threading.Thread(target=open_index) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert found == [True, True]
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,168 @@
+# Tests for Scraper.listing (result text from the survey listing)
+
+import json
+
+import pytest
+
+import Scraper.archive as archive
+import Scraper.clean as clean
+import Scraper.listing as listing
+import Scraper.rate_control as rate_control
+import Scraper.reparse as reparse
+import Scraper.scrape as scrape
+
+SURVEY_HTML = """
+<table>
+  <tr>
+    <td>MIT</td>
+    <td><span>Computer Science</span> <span>PhD</span></td>
+    <td>January 31, 2026</td>
+    <td><div>Accepted on 29 Jan</div></td>
+    <td><a href="/result/7">See More</a></td>
+  </tr>
+  <tr>
+    <td><div>Fall 2026</div><div>International</div><div>GPA 3.87</div>
+        <div>GRE 328</div><div>GRE V 160</div><div>GRE AW 4.5</div>
+        <p>Funding offered.</p></td>
+  </tr>
+  <tr>
+    <td>Stanford</td><td>EE</td><td>January 30, 2026</td>
+    <td>Rejected</td><td><a href="/result/6">See More</a></td>
+  </tr>
+</table>
+"""
+
+
+@pytest.fixture(autouse=True)
+def _fresh_stats(monkeypatch):
+    monkeypatch.delenv("SCRAPE_DETAIL_REQUIRED", raising=False)
+    monkeypatch.delenv("SCRAPE_ARCHIVE_DIR", raising=False)
+    monkeypatch.setattr(archive, "_ARCHIVE", [None])
+    listing.reset_stats()
+
+
+def _row(program="Computer Science PhD", status="Accepted on 29 Jan",
+         added="January 31, 2026"):
+    return {"program_raw": program, "status_raw": status,
+            "date_added_raw": added}
+
+
+@pytest.mark.analysis
+def test_listing_text_reads_with_clean_extractors():
+    text = listing.listing_text(
+        _row(), "Fall 2026 International GPA 3.87 GRE 328 GRE V 160 "
+                "GRE AW 4.5 Funding offered.")
+    assert clean.extract_degree_type(text) == "PhD"
+    assert clean.extract_country_origin(text) == "International"
+    assert clean.extract_decision(text) == "Accepted"
+    assert clean.extract_notification_date(text) == "01/29/2026"
+    assert clean.extract_undergrad_gpa(text) == "3.87"
+    assert clean.extract_gre_general(text) == "328"
+    assert clean.extract_gre_verbal(text) == "160"
+    assert clean.extract_gre_aw(text) == "4.5"
+    assert clean.extract_term_year(text) == "Fall 2026"
+    assert clean.extract_notes(text) == "Funding offered."
+
+
+@pytest.mark.analysis
+def test_missing_fields_match_clean_extractors():
+    extractors = {
+        "decision": clean.extract_decision,
+        "notification": clean.extract_notification_date,
+        "degree": clean.extract_degree_type,
+        "origin": clean.extract_country_origin,
+        "gpa": clean.extract_undergrad_gpa,
+        "gre": clean.extract_gre_general,
+        "gre_v": clean.extract_gre_verbal,
+        "gre_aw": clean.extract_gre_aw,
+        "notes": clean.extract_notes,
+        "term": clean.extract_term_year,
+    }
+    assert set(extractors) == set(listing.FIELDS)
+    for text in (listing.listing_text(_row(), "Fall 2026 GRE 328 Notes"),
+                 listing.listing_text(_row(status="Other"), "American"),
+                 ""):
+        assert listing.missing_fields(text, tuple(extractors)) == \
+            [name for name, fn in extractors.items() if fn(text) is None]
+
+
+@pytest.mark.analysis
+def test_notification_year_and_missing_parts():
+    # December decision on a January post belongs to the year before.
+    text = listing.listing_text(_row(status="Rejected on 20 Dec",
+                                     added="January 3, 2026"), None)
+    assert clean.extract_notification_date(text) == "12/20/2025"
+    # No usable date added: decision without a date.
+    text = listing.listing_text(_row(added="soon"), "")
+    assert clean.extract_decision(text) == "Accepted"
+    assert clean.extract_notification_date(text) is None
+    text = listing.listing_text(_row(status="Interview"), None)
+    assert clean.extract_decision(text) == "Interview"
+    assert listing.listing_text(_row(program="EE", status=None), None) == ""
+
+
+@pytest.mark.analysis
+def test_required_fields(monkeypatch):
+    assert listing.required_fields() == ("decision", "degree", "origin")
+    assert listing.required_fields("gpa, Notes") == ("gpa", "notes")
+    assert listing.required_fields("always") is None
+    monkeypatch.setenv("SCRAPE_DETAIL_REQUIRED", "decision")
+    assert listing.required_fields() == ("decision",)
+    with pytest.raises(ValueError):
+        listing.required_fields("decision,shoe_size")
+
+
+@pytest.mark.analysis
+def test_fill_from_listing():
+    row = _row()
+    assert listing.fill_from_listing(row, "American", ("origin",))
+    assert "Country of Origin American" in row["result_text_raw"]
+    row = _row()
+    assert not listing.fill_from_listing(row, "", ("gpa",))
+    assert "result_text_raw" not in row
+
+
+@pytest.mark.analysis
+def test_scrape_data_skips_result_pages(monkeypatch):
+    fetched = []
+
+    def fake_download(url):
+        fetched.append(url)
+        return SURVEY_HTML if "survey" in url else "<p>Degree Type MS</p>"
+
+    monkeypatch.setattr(scrape, "download_html", fake_download)
+    monkeypatch.setattr(rate_control.time, "sleep", lambda _: None)
+    rows, _ = scrape.scrape_data(scrape.survey_page_url(1), set(), workers=1)
+
+    # Row 7 is complete in the listing; row 6 still needs its page.
+    assert fetched == [scrape.survey_page_url(1),
+                       f"{scrape.BASE_DOMAIN}/result/6"]
+    assert clean.extract_gre_general(rows[0]["result_text_raw"]) == "328"
+    assert rows[1]["result_text_raw"] == "Degree Type MS"
+    assert listing.stats_report().startswith("Listing: 1 of 2 ")
+
+
+@pytest.mark.analysis
+def test_listing_rows_are_archived_for_reparse(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCRAPE_ARCHIVE_DIR", str(tmp_path / "arc"))
+    monkeypatch.setattr(scrape, "download_html", lambda url: SURVEY_HTML
+                        if "survey" in url else "<p>Degree Type MS</p>")
+    monkeypatch.setattr(rate_control.time, "sleep", lambda _: None)
+    rows, _ = scrape.scrape_data(scrape.survey_page_url(1), set(), workers=1)
+
+    entries = archive.get_archive().entries()
+    assert [(e["result_id"], e["source"]) for e in entries] == [
+        (7, "listing"), (6, "page")]
+    out = tmp_path / "raw.json"
+    assert reparse.reparse(str(tmp_path / "arc"), str(out), 1) == 2
+    rebuilt = json.loads(out.read_text(encoding="utf-8"))
+    assert [r["result_text_raw"] for r in rebuilt] == \
+        [r["result_text_raw"] for r in rows]
+
+
+@pytest.mark.analysis
+def test_always_fetch(monkeypatch):
+    monkeypatch.setenv("SCRAPE_DETAIL_REQUIRED", "always")
+    rows, _ = scrape.parse_survey_page(SURVEY_HTML, set())
+    assert all(r["result_text_raw"] is None for r in rows)
+    assert listing.rows_to_fetch(rows) == rows
@@ -0,0 +1,172 @@
+# Tests for Scraper.llm_batching (adaptive batch size, bisection)
+
+from urllib.error import URLError
+
+import pytest
+
+import Scraper.clean as clean
+import Scraper.llm_batching as llm_batching
+
+
+@pytest.fixture(autouse=True)
+def _fresh_sizer():
+    llm_batching.reset_sizer()
+    yield
+    llm_batching.reset_sizer()
+
+
+@pytest.mark.analysis
+def test_size_follows_latency():
+    sizer = llm_batching.BatchSizer(size=10, min_size=2, max_size=14,
+                                    target_seconds=30)
+    assert sizer.timeout_for(10) == llm_batching.MAX_TIMEOUT
+    # 0.1 s per row: room to grow by a quarter, up to max_size.
+    sizer.success(10, 1.0)
+    assert sizer.size == 12
+    sizer.success(12, 1.2)
+    sizer.success(14, 1.4)
+    assert sizer.size == 14
+    assert sizer.timeout_for(14) == llm_batching.MIN_TIMEOUT
+
+    # 6 s per row: the size drops straight to what fits in 30 s.
+    slow = llm_batching.BatchSizer(size=10, min_size=2, target_seconds=30)
+    slow.success(10, 60.0)
+    assert slow.size == 5
+    assert slow.timeout_for(100) == llm_batching.MAX_TIMEOUT
+    slow.failure()
+    slow.failure()
+    assert slow.size == 2
+    assert "size 2 now (range 2-10)" in slow.stats_report()
+
+
+@pytest.mark.analysis
+def test_batches_use_the_size_at_each_step():
+    sizer = llm_batching.BatchSizer(size=4, min_size=1)
+    rows = list(range(10))
+    sizes = []
+    for batch in sizer.batches(rows):
+        sizes.append(len(batch))
+        sizer.failure()
+    assert sizes == [4, 2, 1, 1, 1, 1]
+    assert [len(b) for b in llm_batching.BatchSizer(size=4).batches(
+        rows, limit=3)] == [3, 3, 3, 1]
+
+
+@pytest.mark.analysis
+def test_poison_row_is_bisected_to_the_fallback(capsys):
+    calls = []
+
+    def post(url, batch, timeout_s=300, attempts=5):
+        calls.append((len(batch), attempts))
+        if "bad" in batch:
+            raise RuntimeError("LLM batch failed after retries")
+        return [f"llm:{row}" for row in batch]
+
+    sizer = llm_batching.BatchSizer(size=8, min_size=1)
+    send = llm_batching.bisecting(post, sizer, lambda row: f"rules:{row}",
+                                  retries=3)
+    batch = ["a", "b", "c", "bad", "e", "f", "g", "h"]
+    out = send("http://llm", batch, timeout_s=300)
+    assert out == ["llm:a", "llm:b", "llm:c", "rules:bad",
+                   "llm:e", "llm:f", "llm:g", "llm:h"]
+    # The full batch gets its retries, every half a single attempt.
+    assert calls[0] == (8, 3)
+    assert all(attempts == 1 for _, attempts in calls[1:])
+    assert len(calls) == 7
+    assert sizer.stats["bisected"] == 3
+    assert sizer.stats["fallback_rows"] == 1
+    # Only the full batch failing counts against the size.
+    assert sizer.stats["failed"] == 1
+    assert "using rules" in capsys.readouterr().out
+
+
+@pytest.mark.analysis
+def test_short_answer_counts_as_failure():
+    def post(url, batch, timeout_s=300, attempts=5):
+        return batch[:1]
+
+    sizer = llm_batching.BatchSizer(size=2, min_size=1)
+    send = llm_batching.bisecting(post, sizer, lambda row: "rules")
+    assert send("http://llm", ["a", "b"]) == ["a", "b"]
+    assert sizer.stats["bisected"] == 1
+
+
+@pytest.mark.analysis
+def test_dead_llm_stops_after_the_streak(monkeypatch):
+    def post(url, batch, timeout_s=300, attempts=5):
+        raise RuntimeError("LLM down")
+
+    sizer = llm_batching.BatchSizer(size=1, min_size=1)
+    monkeypatch.setattr(llm_batching, "FALLBACK_STREAK", 3)
+    send = llm_batching.bisecting(post, sizer, lambda row: "rules")
+    assert send("http://llm", ["a"]) == ["rules"]
+    assert send("http://llm", ["b"]) == ["rules"]
+    with pytest.raises(RuntimeError, match="3 rows in a row.*LLM down"):
+        send("http://llm", ["c"])
+
+
+@pytest.mark.analysis
+def test_timeout_shrinks_and_retries_without_bisecting(monkeypatch, capsys):
+    sleeps = []
+    monkeypatch.setattr(llm_batching.time, "sleep", sleeps.append)
+    monkeypatch.setattr(llm_batching, "TIMEOUT_BACKOFF", 2)
+    calls = []
+
+    def post(url, batch, timeout_s=300, attempts=5):
+        calls.append((len(batch), attempts))
+        if len(batch) > 2:
+            raise RuntimeError("LLM batch failed") from TimeoutError()
+        return [f"llm:{row}" for row in batch]
+
+    sizer = llm_batching.BatchSizer(size=8, min_size=1)
+    send = llm_batching.bisecting(post, sizer, lambda row: "rules",
+                                  retries=2)
+    batch = list("abcdefgh")
+    assert send("http://llm", batch) == [f"llm:{r}" for r in batch]
+    # 8 -> timeout, resent as 4s -> timeout, resent as 2s.
+    assert calls == [(8, 2), (4, 2), (2, 2), (2, 2), (4, 2), (2, 2), (2, 2)]
+    assert sleeps == [2, 4, 4]
+    assert sizer.stats["bisected"] == 0
+    assert sizer.stats["fallback_rows"] == 0
+    assert "timed out on 8 rows" in capsys.readouterr().out
+
+
+@pytest.mark.analysis
+@pytest.mark.parametrize("cause", [TimeoutError("read"),
+                                   URLError(TimeoutError("connect"))])
+def test_endless_timeouts_stop_the_run(monkeypatch, cause):
+    monkeypatch.setattr(llm_batching.time, "sleep", lambda _: None)
+    monkeypatch.setattr(llm_batching, "TIMEOUT_RETRIES", 2)
+
+    def post(url, batch, timeout_s=300, attempts=5):
+        raise RuntimeError("LLM batch failed") from cause
+
+    sizer = llm_batching.BatchSizer(size=1, min_size=1)
+    send = llm_batching.bisecting(post, sizer, lambda row: "rules")
+    with pytest.raises(RuntimeError, match="timed out 3 times in a row"):
+        send("http://llm", ["a"])
+    assert sizer.stats["failed"] == 3
+    assert sizer.stats["fallback_rows"] == 0
+
+
+@pytest.mark.analysis
+def test_llm_post_rows_keeps_the_cause(monkeypatch):
+    def slow(req, timeout=300):
+        raise TimeoutError("timed out")
+
+    monkeypatch.setattr(clean, "urlopen", slow)
+    with pytest.raises(RuntimeError) as info:
+        clean._llm_post_rows("http://llm", [{}], attempts=1)
+    assert llm_batching.timed_out(info.value)
+    assert not llm_batching.timed_out(RuntimeError("bad rows"))
+
+
+@pytest.mark.analysis
+def test_get_sizer_from_environment(monkeypatch):
+    assert llm_batching.current_sizer() is None
+    monkeypatch.setenv("LLM_BATCH_SIZE", "40")
+    monkeypatch.setenv("LLM_MAX_BATCH", "60")
+    sizer = llm_batching.get_sizer()
+    assert (sizer.size, sizer.max_size) == (40, 60)
+    assert llm_batching.get_sizer() is sizer
+    assert llm_batching.current_sizer() is sizer
@@ -0,0 +1,130 @@
+# Tests for Scraper.llm_cache (persistent LLM standardization cache)
+
+import json
+import runpy
+import sys
+
+import pytest
+
+import Scraper.llm_cache as llm_cache
+
+
+@pytest.fixture(autouse=True)
+def _reset_shared_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm_cache, "_CACHE", [None])
+    monkeypatch.setattr(llm_cache, "CACHE_FILE",
+                        str(tmp_path / "llm_cache.jsonl"))
+    monkeypatch.setattr(llm_cache, "VERSION_SALT", "")
+
+
+def _journal(path):
+    return [json.loads(line) for line in
+            path.read_text(encoding="utf-8").splitlines()]
+
+
+@pytest.mark.analysis
+def test_store_lookup_and_reopen(tmp_path):
+    path = str(tmp_path / "cache.jsonl")
+    cache = llm_cache.StandardizeCache(path, "v1")
+    assert cache.lookup(["CS, MIT"]) == {}
+    cache.store({"CS, MIT": ("Computer Science", "MIT")})
+    cache.store({})
+    assert cache.lookup(["CS, MIT", "Art, X"]) == {
+        "CS, MIT": ("Computer Science", "MIT")}
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 2
+
+    again = llm_cache.StandardizeCache(path, "v1")
+    assert again.lookup(["CS, MIT"]) == {
+        "CS, MIT": ("Computer Science", "MIT")}
+    assert "1 hits, 0 misses" in again.stats_report()
+    assert "1 entries" in again.stats_report()
+
+
+@pytest.mark.analysis
+def test_least_recently_used_is_evicted(tmp_path):
+    path = str(tmp_path / "cache.jsonl")
+    cache = llm_cache.StandardizeCache(path, "v1", max_entries=2)
+    cache.store({"a": ("A", "U"), "b": ("B", "U")})
+    cache.lookup(["a"])
+    cache.store({"c": ("C", "U")})
+    assert cache.lookup(["a", "b", "c"]).keys() == {"a", "c"}
+    assert cache.stats["evicted"] == 1
+
+    # The journal replays to the same entries and recency.
+    again = llm_cache.StandardizeCache(path, "v1", max_entries=2)
+    assert len(again) == 2
+    again.store({"d": ("D", "U")})
+    assert again.lookup(["a", "c", "d"]).keys() == {"c", "d"}
+
+    # A smaller cap evicts on open.
+    assert len(llm_cache.StandardizeCache(path, "v1", max_entries=1)) == 1
+
+
+@pytest.mark.analysis
+def test_new_version_invalidates_old_answers(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    llm_cache.StandardizeCache(str(path), "v1").store({"a": ("A", "U")})
+    cache = llm_cache.StandardizeCache(str(path), "v2")
+    assert cache.lookup(["a"]) == {}
+    assert cache.stats["invalidated"] == 1
+    # Old answers are compacted out of the journal.
+    assert path.read_text(encoding="utf-8") == ""
+
+
+@pytest.mark.analysis
+def test_torn_line_and_compaction(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    cache = llm_cache.StandardizeCache(str(path), "v1")
+    cache.store({"a": ("A", "U")})
+    for _ in range(120):
+        cache.lookup(["a"])
+    cache.store({"b": ("B", "U")})
+    # Compacted down to one put per chunk of live entries.
+    assert _journal(path) == [{"op": "put", "version": "v1",
+                               "entries": {"a": ["A", "U"],
+                                           "b": ["B", "U"]}}]
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "vers')
+    assert len(llm_cache.StandardizeCache(str(path), "v1")) == 2
+
+
+@pytest.mark.analysis
+def test_get_cache(monkeypatch):
+    assert llm_cache.get_cache(None) is None
+    cache = llm_cache.get_cache("v1")
+    assert llm_cache.get_cache("v1") is cache
+    assert llm_cache.current_cache() is cache
+    monkeypatch.setattr(llm_cache, "VERSION_SALT", "prompt-2")
+    salted = llm_cache.get_cache("v1")
+    assert salted is not cache
+    assert salted.version == "v1+prompt-2"
+    monkeypatch.setattr(llm_cache, "CACHE_FILE", "")
+    assert llm_cache.get_cache("v1") is None
+
+
+@pytest.mark.analysis
+def test_main_lists_and_clears(tmp_path, capsys):
+    path = tmp_path / "cache.jsonl"
+    assert llm_cache.main(["--file", str(path)]) == 1
+    assert "No LLM cache" in capsys.readouterr().out
+
+    llm_cache.StandardizeCache(str(path), "v1").store(
+        {"a": ("A", "U"), "b": ("B", "U")})
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("torn")
+    assert llm_cache.main(["--file", str(path)]) == 0
+    assert "v1: 2 answers stored" in capsys.readouterr().out
+
+    assert llm_cache.main(["--file", str(path), "--clear"]) == 0
+    assert not path.exists()
+    assert llm_cache.main(["--file", str(path), "--clear"]) == 0
+
+
+@pytest.mark.analysis
+def test_main_block(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["llm_cache.py", "--file",
+                                      str(tmp_path / "none.jsonl")])
+    with pytest.raises(SystemExit) as exc:
+        runpy.run_module("Scraper.llm_cache", run_name="__main__")
+    assert exc.value.code == 1
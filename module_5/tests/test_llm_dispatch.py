@@ -0,0 +1,89 @@
+# Tests for Scraper.llm_dispatch (concurrent LLM batch dispatch)
+
+import threading
+import time
+
+import pytest
+
+import Scraper.llm_dispatch as llm_dispatch
+
+
+def _echo(delays):
+    """Fake _llm_post_rows: answers each row with its url, after a delay."""
+    def post(url, batch, timeout_s=300):
+        time.sleep(delays.get(batch[0], 0))
+        return [f"{url}:{row}" for row in batch]
+    return post
+
+
+@pytest.mark.analysis
+def test_results_come_back_in_batch_order():
+    # Earlier batches finish last.
+    delays = {0: 0.06, 1: 0.03, 2: 0.0}
+    out = list(llm_dispatch.dispatch(_echo(delays), [[0], [1], [2]],
+                                     ["u"], inflight=3))
+    assert out == [["u:0"], ["u:1"], ["u:2"]]
+
+
+@pytest.mark.analysis
+def test_batches_overlap_up_to_inflight_per_endpoint():
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def post(url, batch, timeout_s=300):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return batch
+
+    out = list(llm_dispatch.dispatch(post, ([i] for i in range(12)),
+                                     ["a", "b"], inflight=2))
+    assert out == [[i] for i in range(12)]
+    assert peak[0] == 4
+
+
+@pytest.mark.analysis
+def test_slow_endpoint_gets_fewer_batches():
+    log = []
+
+    def post(url, batch, timeout_s=300):
+        log.append(url)
+        time.sleep(0.05 if url == "slow" else 0.005)
+        return batch
+
+    list(llm_dispatch.dispatch(post, ([i] for i in range(20)),
+                               ["slow", "fast"], inflight=1))
+    assert log.count("fast") > log.count("slow")
+
+
+@pytest.mark.analysis
+def test_submission_is_bounded_and_failure_stops_the_rest():
+    pulled = []
+
+    def batches():
+        for i in range(100):
+            pulled.append(i)
+            yield [i]
+
+    def post(url, batch, timeout_s=300):
+        if batch == [0]:
+            raise RuntimeError("LLM batch failed after retries")
+        time.sleep(0.01)
+        return batch
+
+    with pytest.raises(RuntimeError):
+        list(llm_dispatch.dispatch(post, batches(), ["u"], inflight=2))
+    # Window of 2 x pool size, plus the batch that found it full.
+    assert len(pulled) == 5
+
+
+@pytest.mark.analysis
+def test_endpoints_from_environment(monkeypatch):
+    assert llm_dispatch.endpoints("http://a/standardize") == [
+        "http://a/standardize"]
+    monkeypatch.setattr(llm_dispatch, "URLS", ["http://b/s", "http://c/s"])
+    assert llm_dispatch.endpoints("http://a/standardize") == [
+        "http://b/s", "http://c/s"]
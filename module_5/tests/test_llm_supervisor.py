@@ -0,0 +1,100 @@
+# Tests for Scraper.llm_supervisor (reuse/start/stop the LLM server)
+
+import io
+import json
+
+import pytest
+
+import Scraper.llm_supervisor as llm_supervisor
+
+
+class _Resp(io.BytesIO):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class _FakeServer:
+    """Stands in for the LLM server's / and /shutdown endpoints."""
+
+    def __init__(self, up=False):
+        self.up = up
+        self.shutdowns = 0
+
+    def urlopen(self, req, timeout=None):
+        url = req if isinstance(req, str) else req.full_url
+        if not self.up:
+            raise OSError("connection refused")
+        if url.endswith("/shutdown"):
+            self.shutdowns += 1
+            self.up = False
+            return _Resp(b'{"ok": true}')
+        return _Resp(json.dumps({"ok": True, "pid": 7,
+                                 "rss_bytes": 512 * 2**20,
+                                 "model_load_seconds": 3.5}).encode())
+
+
+def _supervisor(monkeypatch, server, idle_seconds=600, ready=True):
+    monkeypatch.setattr(llm_supervisor, "urlopen", server.urlopen)
+    calls = []
+
+    def start():
+        calls.append("start")
+
+    def wait(timeout_seconds=300):
+        calls.append("wait")
+        server.up = ready
+        return ready
+
+    return llm_supervisor.LlmSupervisor(start, wait,
+                                        idle_seconds=idle_seconds), calls
+
+
+@pytest.mark.analysis
+def test_reuses_healthy_server(monkeypatch):
+    sup, calls = _supervisor(monkeypatch, _FakeServer(up=True))
+    assert sup.ensure() is True
+    assert calls == []
+    assert sup.stats["reused"] is True and sup.stats["pid"] == 7
+    sup.finish()
+    assert sup.stats_report() == (
+        "LLM server: reused warm server (model load 3.5s avoided), pid 7, "
+        "RSS 512.0 MiB, stops after 600s idle")
+
+
+@pytest.mark.analysis
+def test_cold_start_when_no_server(monkeypatch):
+    server = _FakeServer()
+    sup, calls = _supervisor(monkeypatch, server, idle_seconds=0)
+    assert sup.ensure() is True
+    assert calls == ["start", "wait"]
+    assert sup.stats["reused"] is False
+    assert sup.stats["cold_start_seconds"] >= 0
+    assert sup.stats["rss_bytes"] == 512 * 2**20
+    # Not kept warm: stopped at the end of the run.
+    sup.finish()
+    assert server.shutdowns == 1 and sup.stats["stopped"] is True
+    report = sup.stats_report()
+    assert report.startswith("LLM server: cold start ")
+    assert "(model load 3.5s)" in report and report.endswith("stopped")
+
+
+@pytest.mark.analysis
+def test_server_never_ready(monkeypatch):
+    sup, calls = _supervisor(monkeypatch, _FakeServer(), ready=False)
+    assert sup.ensure(timeout_seconds=1) is False
+    assert calls == ["start", "wait"]
+    assert sup.stop() is False
+    assert sup.stats_report() == ("LLM server: not ready, pid None, "
+                                  "RSS n/a, stops after 600s idle")
+
+
+@pytest.mark.analysis
+def test_health_ignores_non_server_answers(monkeypatch):
+    sup = llm_supervisor.LlmSupervisor(None, None)
+    for body in (b"not json", b"[]", b'{"ok": false}', b""):
+        monkeypatch.setattr(llm_supervisor, "urlopen",
+                            lambda *a, b=body, **k: _Resp(b))
+        assert sup.health() is None
@@ -0,0 +1,197 @@
+# Tests for Scraper.parse_pool (parser processes behind fetch threads)
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import Scraper.crawl as crawl
+import Scraper.parse_pool as parse_pool
+import Scraper.rate_control as rate_control
+import Scraper.scrape as scrape
+
+SURVEY_HTML = """
+<table>
+  <tr><td>U1</td><td>P</td><td>D</td><td>S</td><td>C</td>
+      <td><a href="/result/12">View</a></td></tr>
+  <tr><td>Fall 2026</td></tr>
+  <tr><td>U2</td><td>P</td><td>D</td><td>S</td><td>C</td>
+      <td><a href="/result/11">View</a></td></tr>
+</table>
+"""
+
+
+# One real pool for the module: spawning parser processes is slow.
+@pytest.fixture(scope="module")
+def real_pool():
+    pool = parse_pool.ParsePool(1)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def shared_pool(monkeypatch, real_pool):
+    """Make real_pool the process-wide pool for one test."""
+    monkeypatch.setenv("SCRAPE_PARSE_WORKERS", "1")
+    monkeypatch.setattr(parse_pool, "_POOL", [real_pool])
+    return real_pool
+
+
+class _HeldExecutor:
+    """Executor stand-in whose futures finish only when told to."""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, *_args):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+
+@pytest.mark.analysis
+def test_parse_runs_backend_method():
+    assert parse_pool._parse("stream", "page_text", "<p>a</p><p>b</p>") == "a b"
+
+
+@pytest.mark.analysis
+def test_pool_parses_in_worker_process(real_pool):
+    assert real_pool.page_text("<b>hi</b> there").result() == "hi  there"
+    rows = real_pool.survey_rows(SURVEY_HTML).result()
+    assert rows[0]["href"] == "/result/12"
+
+
+@pytest.mark.analysis
+def test_submit_blocks_when_queue_is_full():
+    pool = parse_pool.ParsePool.__new__(parse_pool.ParsePool)
+    pool._executor = _HeldExecutor()
+    pool._pending = parse_pool.queue.Queue(maxsize=1)
+
+    first = pool.page_text("<p>1</p>")
+    started = threading.Event()
+    done = threading.Event()
+
+    def second():
+        started.set()
+        pool.page_text("<p>2</p>")
+        done.set()
+
+    thread = threading.Thread(target=second)
+    thread.start()
+    started.wait()
+    # The second page waits until the first one has been parsed.
+    assert not done.wait(0.2)
+    first.set_result("1")
+    assert done.wait(5)
+    thread.join()
+
+
+@pytest.mark.analysis
+def test_submit_failure_frees_slot():
+    pool = parse_pool.ParsePool.__new__(parse_pool.ParsePool)
+    pool._pending = parse_pool.queue.Queue(maxsize=1)
+
+    class _Broken:
+        def submit(self, *_args):
+            raise RuntimeError("pool is shut down")
+
+    pool._executor = _Broken()
+    with pytest.raises(RuntimeError):
+        pool.page_text("<p>x</p>")
+    assert pool._pending.empty()
+
+
+@pytest.mark.analysis
+def test_get_parse_pool_from_env(monkeypatch):
+    closed = []
+
+    class _FakePool:
+        def __init__(self, processes):
+            self.processes = processes
+
+        def close(self):
+            closed.append(self.processes)
+
+    monkeypatch.setattr(parse_pool, "ParsePool", _FakePool)
+    monkeypatch.setattr(parse_pool, "_POOL", [None])
+    monkeypatch.delenv("SCRAPE_PARSE_WORKERS", raising=False)
+    assert parse_pool.get_parse_pool() is None
+
+    monkeypatch.setenv("SCRAPE_PARSE_WORKERS", "2")
+    pool = parse_pool.get_parse_pool()
+    assert pool is parse_pool.get_parse_pool()
+    monkeypatch.setenv("SCRAPE_PARSE_WORKERS", "3")
+    assert parse_pool.get_parse_pool().processes == 3
+    assert closed == [2]
+
+    parse_pool.close_parse_pool()
+    parse_pool.close_parse_pool()
+    assert closed == [2, 3]
+
+
+@pytest.mark.analysis
+def test_fetch_detail_pages_through_pool(monkeypatch, shared_pool):
+    monkeypatch.setattr(scrape, "download_html",
+                        lambda url: f"<p>detail</p><p>{url[-2:]}</p>")
+    monkeypatch.setattr(rate_control.time, "sleep", lambda _: None)
+    rows = [{"application_url_raw": f"https://x/result/{n}"}
+            for n in (10, 11, 12)]
+
+    scrape.fetch_detail_pages(rows, workers=3)
+    assert [r["result_text_raw"] for r in rows] == [
+        "detail 10", "detail 11", "detail 12"
+    ]
+
+
+@pytest.mark.analysis
+def test_crawl_through_pool(monkeypatch, shared_pool):
+    def fake_download_html(url):
+        if "/result/" in url:
+            return f"<p>detail {url.rsplit('/', 1)[-1]}</p>"
+        return SURVEY_HTML
+
+    monkeypatch.setattr(scrape, "download_html", fake_download_html)
+    rows = asyncio.run(crawl.crawl(1, 2, set(), rate=0, workers=2))
+    assert [r["result_id"] for r in rows] == [12, 11]
+    assert rows[0]["term_inferred"] == "Fall 2026"
+    assert [r["result_text_raw"] for r in rows] == ["detail 12", "detail 11"]
+
+
+class _FailingPool:
+    """Parse pool stand-in whose parser died on page 11."""
+
+    def page_text(self, html_text):
+        future = Future()
+        if "11" in html_text:
+            future.set_exception(BrokenProcessPool("parser died"))
+        else:
+            future.set_result(html_text)
+        return future
+
+    def survey_rows(self, html_text):
+        future = Future()
+        future.set_result(parse_pool._parse(
+            parse_pool.parsers.get_backend().name, "survey_rows", html_text))
+        return future
+
+
+@pytest.mark.analysis
+def test_parse_failure_skips_only_that_row(monkeypatch, capsys):
+    monkeypatch.setattr(parse_pool, "get_parse_pool", _FailingPool)
+    monkeypatch.setattr(scrape, "download_html", lambda url: url[-2:])
+    monkeypatch.setattr(rate_control.time, "sleep", lambda _: None)
+    rows = [{"application_url_raw": f"https://x/result/{n}"}
+            for n in (10, 11, 12)]
+
+    scrape.fetch_detail_pages(rows, workers=1)
+    assert [r["result_text_raw"] for r in rows] == ["10", None, "12"]
+    assert "Could not parse https://x/result/11" in capsys.readouterr().out
+
+    monkeypatch.setattr(scrape, "download_html",
+                        lambda url: SURVEY_HTML if "/result/" not in url
+                        else url[-2:])
+    rows = asyncio.run(crawl.crawl(1, 2, set(), rate=0, workers=2))
+    assert [r["result_text_raw"] for r in rows] == ["12", None]
+    assert "Could not parse" in capsys.readouterr().out
@@ -0,0 +1,105 @@
+# Tests for Scraper.parsers: the streaming backend must give exactly
+# what the BeautifulSoup reference backend gives.
+
+import pytest
+
+import Scraper.parsers as parsers
+import Scraper.scrape as scrape
+
+SOUP = parsers.get_backend("soup")
+STREAM = parsers.get_backend("stream")
+
+# A survey page shaped like GradCafe's: main rows with a /result/ link,
+# one-cell detail rows, badges, entities, comments and scripts.
+SURVEY_PAGE = """<!DOCTYPE html>
+<html><head><title>Survey</title>
+<script>var rows = "<tr><td>not a row</td></tr>";</script>
+<style>td { color: red; }</style></head>
+<body>
+<table class="tw-min-w-full">
+  <thead><tr><th>Institution</th><th>Program</th></tr></thead>
+  <tbody>
+  <tr>
+    <td><div class="name">MIT</div></td>
+    <td><span>Computer Science</span> <svg><circle/></svg>
+        <span>PhD</span></td>
+    <td>January 31, 2026</td>
+    <td><div class="badge">Accepted on 29 Jan</div></td>
+    <td><a href="/survey/?q=x">Search</a>
+        <a href="/result/994157">See More</a><!-- hidden --></td>
+  </tr>
+  <tr class="detail">
+    <td colspan="5"><div>Fall 2026</div><div>International</div>
+        <div>GPA 3.9</div><p>Great &amp; fast&nbsp;reply</p></td>
+  </tr>
+  <tr>
+    <td>Stanford &lt;CA&gt;</td><td>EE<br>MS</td><td>Feb 1, 2026</td>
+    <td>Rejected</td>
+    <td><a href="https://www.thegradcafe.com/result/994158">x</a></td>
+  </tr>
+  <tr><td><pre>  </pre>   </td></tr>
+  </tbody>
+</table>
+</body></html>
+"""
+
+# Malformed and edge-case markup the tree builder handles in its own way.
+EDGE_CASES = [
+    "",
+    "plain text only",
+    "<table><tr><td>a<td>b</tr></table>",
+    "<tr><td><div>x</td>y</div>z</tr>",
+    "<table><tr><td>outer<table><tr><td>inner</td></tr></table></td>"
+    "</tr></table>",
+    "<tr><td>a < b &amp; c &#62; d</td></tr>",
+    "<tr><td>keep<!--c-->going</td><td><![CDATA[cdata]]></td></tr>",
+    "<tr><td><a href>none</a><a href=\"/result/1\">one</a>"
+    "<a href=\"/result/2\">two</a></td></tr>",
+    "<tr><td><template>t<b>u</b></template>r<ruby>b<rt>rt</rt></ruby>"
+    "</td></tr>",
+    "<tr><td>unclosed",
+    "</td></tr><p>stray end tags</span>",
+    "<tr><td><textarea>  </textarea>\n\n</td></tr>",
+    "<tr><th>header only</th></tr><tr></tr>",
+    "<?php echo 1 ?><tr><td>after pi</td></tr>",
+]
+
+
+@pytest.mark.analysis
+@pytest.mark.parametrize("html_text", [SURVEY_PAGE] + EDGE_CASES)
+def test_stream_matches_soup(html_text):
+    assert STREAM.survey_rows(html_text) == SOUP.survey_rows(html_text)
+    assert STREAM.page_text(html_text) == SOUP.page_text(html_text)
+
+
+@pytest.mark.analysis
+def test_survey_rows_shape():
+    rows = STREAM.survey_rows(SURVEY_PAGE)
+    assert len(rows) == 4
+    assert rows[0]["href"] == "/result/994157"
+    assert rows[0]["cells"][0] == "MIT"
+    assert rows[1]["cells"] == ["Fall 2026 International \n GPA 3.9 "
+                                "Great & fast\xa0reply"]
+    assert rows[2]["cells"][0] == "Stanford <CA>"
+    assert "not a row" not in STREAM.page_text(SURVEY_PAGE)
+
+
+@pytest.mark.analysis
+@pytest.mark.parametrize("backend", ["soup", "stream"])
+def test_parse_survey_page_same_rows(monkeypatch, backend):
+    monkeypatch.setenv("SCRAPE_PARSER", backend)
+    rows, stop = scrape.parse_survey_page(SURVEY_PAGE, set())
+    assert stop is False
+    assert [r["result_id"] for r in rows] == [994157, 994158]
+    assert rows[0]["term_inferred"] == "Fall 2026"
+    assert rows[1]["university_raw"] == "Stanford <CA>"
+
+
+@pytest.mark.analysis
+def test_get_backend_from_env(monkeypatch):
+    monkeypatch.delenv("SCRAPE_PARSER", raising=False)
+    assert parsers.get_backend() is STREAM
+    monkeypatch.setenv("SCRAPE_PARSER", " Soup ")
+    assert parsers.get_backend() is SOUP
+    with pytest.raises(ValueError):
+        parsers.get_backend("lxml")
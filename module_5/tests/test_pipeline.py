@@ -0,0 +1,301 @@
+# Tests for Scraper.pipeline (streaming crawl -> clean -> load)
+
+import contextlib
+import json
+import threading
+
+import pytest
+
+import Scraper.clean as clean
+import Scraper.crawl as crawl
+import Scraper.llm_batching as llm_batching
+import Scraper.llm_cache as llm_cache
+import Scraper.pipeline as pipeline
+import Scraper.rate_control as rate_control
+import Scraper.telemetry as telemetry
+import Scraper.warm_start as warm_start
+
+
+def _row(rid, program="Computer Science", uni="MIT"):
+    return {
+        "result_id": rid,
+        "university_raw": uni,
+        "program_raw": f"  {program}   Accepted",
+        "date_added_raw": "January 31, 2026",
+        "status_raw": "Accepted",
+        "application_url_raw": f"https://www.thegradcafe.com/result/{rid}",
+        "result_text_raw": ("Decision Accepted Notification on 01/02/2026 "
+                            "Degree Type PhD"),
+    }
+
+
+class _FakeConn:
+    """Stands in for a psycopg connection; records every instance."""
+
+    opened = []
+
+    def __init__(self):
+        self.commits = 0
+        self.closed = False
+        _FakeConn.opened.append(self)
+
+    def cursor(self):
+        return contextlib.nullcontext(None)
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def _fakes(monkeypatch, tmp_path):
+    """Fake LLM, no database, no parse pool; record LLM inputs."""
+    telemetry.reset()
+    monkeypatch.setattr(llm_cache, "_CACHE", [None])
+    monkeypatch.setattr(llm_batching, "_SIZER", [None])
+    monkeypatch.setattr(llm_cache, "CACHE_FILE",
+                        str(tmp_path / "llm_cache.jsonl"))
+    monkeypatch.setattr(clean, "llm_model_version", lambda llm_url: "v1")
+    monkeypatch.setattr(warm_start, "_LOOKUPS", {})
+    monkeypatch.setattr(warm_start, "MASTER_FILE", "")
+    _FakeConn.opened = []
+    sent = []
+
+    def fake_llm(llm_url, rows_payload, timeout_s=300, attempts=5):
+        sent.append([r["program"] for r in rows_payload])
+        return [{"llm-generated-program": r["program"].split(",")[0],
+                 "llm-generated-university": "Uni"} for r in rows_payload]
+
+    monkeypatch.setattr(clean, "_llm_post_rows", fake_llm)
+    monkeypatch.setattr(clean, "connect_postgres", _FakeConn)
+    monkeypatch.setattr(clean, "insert_rows",
+                        lambda cur, rows, table_name="applicants": len(rows))
+    monkeypatch.setattr(pipeline.parse_pool, "close_parse_pool",
+                        lambda: None)
+    yield sent
+    telemetry.reset()
+    rate_control.reset_controller()
+
+
+def _fake_crawl(pages, between=None):
+    """crawl.crawl stand-in that hands pages to the progress sink."""
+    async def fake(start_page, target, known_ids, progress=None):
+        for page, rows in enumerate(pages, start=1):
+            new = [r for r in rows if r["result_id"] not in known_ids]
+            progress.append_page(page, new)
+            known_ids.update(r["result_id"] for r in new)
+            if between is not None:
+                between()
+        return []
+    return fake
+
+
+@pytest.mark.analysis
+def test_pipeline_cleans_and_loads_rows(monkeypatch, tmp_path, _fakes):
+    master = tmp_path / "master.json"
+    master.write_text(json.dumps([{"result_id": 1}]), encoding="utf-8")
+    pages = [[_row(3), _row(2)], [_row(1), _row(0, "Physics")]]
+    monkeypatch.setattr(crawl, "crawl", _fake_crawl(pages))
+
+    pipe = pipeline.StreamingPipeline(str(master), "http://llm",
+                                      llm_batch=10, load_batch=10,
+                                      flush_seconds=0.01)
+    stats = pipe.run()
+
+    assert stats["scraped"] == 3 and stats["cleaned"] == 3
+    assert stats["saved"] == stats["inserted"] == 3
+    assert stats["first_row"] is not None
+    # The same program/university pair is only standardized once.
+    sent = [key for call in _fakes for key in call]
+    assert sorted(sent) == ["Computer Science, MIT", "Physics, MIT"]
+    assert pipe.llm_lookup["Physics, MIT"] == ("Physics", "Uni")
+
+    saved = json.loads(master.read_text(encoding="utf-8"))
+    # New rows are prepended once, newest first; the old row stays last.
+    assert [r["result_id"] for r in saved] == [3, 2, 0, 1]
+    row = next(r for r in saved if r["result_id"] == 3)
+    assert row["status"] == "Accepted on 01/02/2026"
+    assert row["program"] == "Computer Science, Uni"
+    hist = telemetry.get_telemetry().histograms["row_latency_seconds"]
+    assert hist.count == 3
+    report = pipe.stats_report()
+    assert "3 new rows saved" in report and "p99" in report
+
+
+@pytest.mark.analysis
+def test_load_stage_uses_one_connection(monkeypatch, tmp_path, capsys):
+    # Page 2 only repeats a loaded row, so its batch adds nothing.
+    pages = [[_row(3)], [_row(3)], [_row(2)]]
+    monkeypatch.setattr(crawl, "crawl", _fake_crawl(pages))
+    pipe = pipeline.StreamingPipeline(str(tmp_path / "m.json"),
+                                      load_batch=1, llm_batch=1,
+                                      flush_seconds=0.01)
+    stats = pipe.run()
+
+    assert stats["inserted"] == 2
+    [conn] = _FakeConn.opened
+    assert conn.commits == 2 and conn.closed
+    assert "No new rows" not in capsys.readouterr().out
+
+
+@pytest.mark.analysis
+def test_first_rows_load_before_the_crawl_finishes(monkeypatch, tmp_path):
+    loaded = threading.Event()
+    real_load = pipeline.StreamingPipeline._load_batch
+
+    def load_and_signal(self, batch, saved_ids, conn):
+        real_load(self, batch, saved_ids, conn)
+        loaded.set()
+
+    # Page 2 is only "scraped" once page 1 has reached the database.
+    monkeypatch.setattr(pipeline.StreamingPipeline, "_load_batch",
+                        load_and_signal)
+    waits = []
+    monkeypatch.setattr(crawl, "crawl", _fake_crawl(
+        [[_row(5)], [_row(4)]], between=lambda: waits.append(
+            loaded.wait(timeout=5))))
+
+    pipe = pipeline.StreamingPipeline(str(tmp_path / "m.json"),
+                                      load_db=False, flush_seconds=0.01)
+    stats = pipe.run()
+    assert waits[0] is True
+    assert stats["saved"] == 2 and stats["inserted"] == 0
+
+
+@pytest.mark.analysis
+def test_model_version_is_asked_once_per_run(monkeypatch, tmp_path, _fakes):
+    asked = []
+    monkeypatch.setattr(clean, "llm_model_version",
+                        lambda llm_url: asked.append(llm_url) or "v1")
+    pages = [[_row(i, f"Field{i}")] for i in range(6, 0, -1)]
+    monkeypatch.setattr(crawl, "crawl", _fake_crawl(pages))
+    pipe = pipeline.StreamingPipeline(str(tmp_path / "m.json"), "http://llm",
+                                      llm_batch=1, flush_seconds=0.01)
+    assert pipe.run()["cleaned"] == 6
+    assert len(_fakes) == 6
+    assert asked == ["http://llm"]
+
+
+@pytest.mark.analysis
+def test_stage_failure_stops_the_pipeline(monkeypatch, tmp_path):
+    def broken_llm(llm_url, rows_payload, timeout_s=300, attempts=5):
+        raise RuntimeError("LLM down")
+
+    monkeypatch.setattr(clean, "_llm_post_rows", broken_llm)
+    # The first row the LLM fails on alone already means it is down.
+    monkeypatch.setattr(pipeline.llm_batching, "FALLBACK_STREAK", 1)
+    # Far more rows than the queues hold: the crawl must not hang.
+    pages = [[_row(i)] for i in range(100, 0, -1)]
+    monkeypatch.setattr(crawl, "crawl", _fake_crawl(pages))
+    pipe = pipeline.StreamingPipeline(str(tmp_path / "m.json"),
+                                      queue_size=2, llm_batch=1,
+                                      flush_seconds=0.01)
+    with pytest.raises(RuntimeError, match="LLM down"):
+        pipe.run()
+    assert not (tmp_path / "m.json").exists()
+
+
+@pytest.mark.analysis
+def test_master_is_written_once_per_run(monkeypatch, tmp_path):
+    writes = []
+    real_append = clean.append_rows_to_master
+    monkeypatch.setattr(clean, "append_rows_to_master",
+                        lambda rows, path: writes.append(len(rows))
+                        or real_append(rows, path))
+    pages = [[_row(i)] for i in range(20, 0, -1)]
+    monkeypatch.setattr(crawl, "crawl", _fake_crawl(pages))
+    master = tmp_path / "m.json"
+    pipe = pipeline.StreamingPipeline(str(master), load_db=False,
+                                      load_batch=2, flush_seconds=0.01)
+    assert pipe.run()["saved"] == 20
+    assert writes == [20]
+    saved = json.loads(master.read_text(encoding="utf-8"))
+    assert [r["result_id"] for r in saved] == list(range(20, 0, -1))
+
+
+@pytest.mark.analysis
+def test_rows_loaded_before_a_failure_reach_the_master(monkeypatch,
+                                                         tmp_path):
+    def fail_on_row_4(cur, rows):
+        if rows[0]["result_id"] == 4:
+            raise RuntimeError("db down")
+        return len(rows)
+
+    monkeypatch.setattr(clean, "insert_rows", fail_on_row_4)
+    pages = [[_row(6), _row(5)], [_row(4)]]
+    monkeypatch.setattr(crawl, "crawl", _fake_crawl(pages))
+    master = tmp_path / "m.json"
+    pipe = pipeline.StreamingPipeline(str(master), load_batch=1,
+                                      llm_batch=1, flush_seconds=0.01)
+    with pytest.raises(RuntimeError, match="db down"):
+        pipe.run()
+    saved = json.loads(master.read_text(encoding="utf-8"))
+    assert [r["result_id"] for r in saved] == [6, 5]
+
+
+@pytest.mark.analysis
+def test_channel_flushes_partial_batches():
+    abort = threading.Event()
+    channel = pipeline._Channel(8, abort)
+    batches = channel.batches(3, flush_seconds=0.01)
+    channel.put(1)
+    assert next(batches) == [1]
+    for item in (2, 3, 4, 5, pipeline._DONE):
+        channel.put(item)
+    assert list(batches) == [[2, 3, 4], [5]]
+
+    abort.set()
+    with pytest.raises(pipeline.PipelineAborted):
+        channel.put(6)
+    with pytest.raises(pipeline.PipelineAborted):
+        next(channel.batches(3, 0.01))
+
+
+@pytest.mark.analysis
+def test_channel_put_waits_for_room():
+    channel = pipeline._Channel(1, threading.Event())
+    channel.put("a")
+    threading.Timer(0.15, lambda: next(channel.batches(1, 0.01))).start()
+    channel.put("b")  # blocks until the timer drains "a"
+
+
+@pytest.mark.analysis
+def test_run_writes_outputs_and_report(monkeypatch, tmp_path, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(telemetry, "REPORT_FILE", "report.json")
+    monkeypatch.setattr(crawl, "crawl", _fake_crawl([[_row(8), _row(7)]]))
+    assert pipeline.run("master.json", target=10) == 0
+
+    applicants = json.loads((tmp_path / "applicant_data.json")
+                            .read_text(encoding="utf-8"))
+    assert [r["result_id"] for r in applicants] == [8, 7]
+    assert "llm-generated-program" not in applicants[0]
+    report = json.loads((tmp_path / "report.json").read_text(encoding="utf-8"))
+    assert report["finished"] is True
+    assert report["pipeline"]["saved"] == 2
+    assert report["histograms"]["row_latency_seconds"]["count"] == 2
+    assert report["llm_cache"]["stored"] == 1
+    assert "Pipeline: 2 scraped" in capsys.readouterr().out
+
+
+@pytest.mark.analysis
+def test_later_runs_reuse_cached_llm_answers(monkeypatch, tmp_path, _fakes):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(crawl, "crawl", _fake_crawl([[_row(1)]]))
+    pipeline.StreamingPipeline("master.json", load_db=False).run()
+    # Next run, new process: a new row with the same program pair.
+    monkeypatch.setattr(llm_cache, "_CACHE", [None])
+    monkeypatch.setattr(crawl, "crawl", _fake_crawl([[_row(2)]]))
+    pipe = pipeline.StreamingPipeline("master.json", load_db=False)
+    pipe.run()
+    assert _fakes == [["Computer Science, MIT"]]
+    assert pipe.loaded[0]["program"] == "Computer Science, Uni"
+    assert llm_cache.current_cache().stats["hits"] == 1
+
+
+@pytest.mark.analysis
+def test_stats_report_without_rows():
+    pipe = pipeline.StreamingPipeline("unused.json")
+    assert pipe.stats_report().endswith("no rows loaded")
@@ -0,0 +1,160 @@
+# Tests for Scraper.profiler (per-stage run report and history)
+
+import json
+import os
+
+import pytest
+
+import Scraper.profiler as profiler
+
+
+def _report(run_id, **walls):
+    return {"run_id": run_id,
+            "stages": {name: {"wall_seconds": wall}
+                       for name, wall in walls.items()}}
+
+
+@pytest.mark.analysis
+def test_stage_accumulates_time_and_rows():
+    prof = profiler.StageProfiler(capture="")
+    for _ in range(2):
+        with prof.stage("regex_clean", rows_in=3) as counts:
+            counts["rows_out"] = 2
+    with prof.stage("llm_startup"):
+        pass
+    with pytest.raises(RuntimeError):
+        with prof.stage("postgres_insert", rows_in=1):
+            raise RuntimeError("db down")
+
+    stages = prof.report()["stages"]
+    clean = stages["regex_clean"]
+    assert clean["calls"] == 2
+    assert clean["rows_in"] == 6 and clean["rows_out"] == 4
+    assert clean["wall_seconds"] >= 0 and clean["cpu_seconds"] >= 0
+    assert clean["process_peak_rss_bytes"] > 0
+    assert stages["llm_startup"]["rows_in"] is None
+    # A failing stage is still recorded.
+    assert stages["postgres_insert"]["calls"] == 1
+
+
+@pytest.mark.analysis
+def test_parse_capture():
+    assert profiler.parse_capture("") == frozenset()
+    assert profiler.parse_capture(" cProfile , tracemalloc") == \
+        {"cprofile", "tracemalloc"}
+    with pytest.raises(ValueError, match="perf"):
+        profiler.parse_capture("cprofile,perf")
+
+
+@pytest.mark.analysis
+def test_cprofile_and_tracemalloc_capture(tmp_path):
+    prof = profiler.StageProfiler("cprofile,tracemalloc",
+                                  profile_dir=str(tmp_path))
+    with prof.stage("regex_clean"):
+        data = [str(i) * 10 for i in range(20000)]
+    del data
+    report = prof.write(str(tmp_path / "r.json"), str(tmp_path / "h.jsonl"))
+    run_dir = tmp_path / prof.run_id
+    assert (run_dir / "regex_clean.prof").stat().st_size > 0
+    sites = (run_dir / "regex_clean.tracemalloc.txt").read_text(
+        encoding="utf-8")
+    assert "test_profiler.py" in sites
+    assert report["stages"]["regex_clean"]["py_alloc_peak_bytes"] > 100000
+    assert report["capture"] == ["cprofile", "tracemalloc"]
+
+
+@pytest.mark.analysis
+def test_overlapping_stages_profile_one_at_a_time(tmp_path):
+    prof = profiler.StageProfiler("cprofile", profile_dir=str(tmp_path))
+    # A second active profiler raises ValueError on Python 3.12+.
+    with prof.stage("llm_standardize"):
+        with prof.stage("warm_start"):
+            pass
+    with prof.stage("warm_start"):
+        pass
+    stages = prof.report()["stages"]
+    assert stages["warm_start"]["calls"] == 2
+    assert stages["warm_start"]["cprofile_skipped"] == 1
+    assert "cprofile_skipped" not in stages["llm_standardize"]
+    assert not profiler._CPROFILE_LOCK.locked()
+
+
+@pytest.mark.analysis
+def test_tracemalloc_peak_only_for_stages_that_ran_alone(tmp_path,
+                                                         monkeypatch):
+    prof = profiler.StageProfiler("tracemalloc", profile_dir=str(tmp_path))
+    written = []
+    monkeypatch.setattr(prof, "_write_allocations",
+                        lambda name, snapshot: written.append(name))
+    # The peak is process-wide: overlapping stages get none.
+    with prof.stage("scrape"):
+        with prof.stage("regex_clean"):
+            pass
+    stages = prof.report()["stages"]
+    for name in ("scrape", "regex_clean"):
+        assert stages[name]["tracemalloc_skipped"] == 1
+        assert "py_alloc_peak_bytes" not in stages[name]
+    assert written == []
+
+    for _ in range(3):
+        with prof.stage("regex_clean"):
+            pass
+    clean = prof.report()["stages"]["regex_clean"]
+    assert clean["calls"] == 4 and clean["tracemalloc_skipped"] == 1
+    assert clean["py_alloc_peak_bytes"] >= 0
+    # Allocation sites are written once per stage name per run.
+    assert written == ["regex_clean"]
+    assert profiler._TRACE_STAGES["running"] == 0
+
+
+@pytest.mark.analysis
+def test_write_appends_history(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "REPORT_FILE", str(tmp_path / "r.json"))
+    monkeypatch.setattr(profiler, "HISTORY_FILE", str(tmp_path / "h.jsonl"))
+    assert profiler.load_history() == []
+    for _ in range(2):
+        prof = profiler.reset(capture="")
+        assert profiler.get_profiler() is prof
+        with profiler.stage("scrape") as counts:
+            counts["rows_out"] = 5
+        prof.write()
+    with open(tmp_path / "h.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"torn')
+    history = profiler.load_history()
+    assert len(history) == 2
+    assert history[-1]["stages"]["scrape"]["rows_out"] == 5
+    assert json.loads((tmp_path / "r.json").read_text(encoding="utf-8")) \
+        == history[-1]
+    assert not os.path.exists(tmp_path / "r.json.tmp")
+
+
+@pytest.mark.analysis
+def test_regressions_against_median():
+    history = [_report("a", scrape=10.0, clean=0.1),
+               _report("b", scrape=12.0, clean=0.1),
+               _report("c", scrape=11.0),
+               _report("d", scrape=20.0, clean=0.3, new=5.0)]
+    found = profiler.regressions(history)
+    # clean is 3x slower but under MIN_SECONDS; "new" has no baseline.
+    assert found == ["scrape: 20.00s vs median 11.00s over 3 run(s)"]
+    assert profiler.regressions(history[:1]) == []
+    assert profiler.regressions(history[:3]) == []
+
+
+@pytest.mark.analysis
+def test_history_cli(tmp_path, capsys):
+    path = tmp_path / "h.jsonl"
+    assert profiler.main(["--history", str(path)]) == 1
+    assert "No runs recorded" in capsys.readouterr().out
+
+    with open(path, "w", encoding="utf-8") as f:
+        for report in (_report("run1", scrape=1.0),
+                       _report("run2", scrape=2.0, validate=0.5)):
+            f.write(json.dumps(report) + "\n")
+    assert profiler.main(["--history", str(path)]) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert out[0].split()[1:] == ["scrape", "validate"]
+    assert out[1].split() == ["run1", "1.00", "-"]
+    assert out[2].split() == ["run2", "2.00", "0.50"]
+    assert out[3] == ("REGRESSION scrape: 2.00s vs median 1.00s "
+                      "over 1 run(s)")
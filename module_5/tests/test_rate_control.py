@@ -0,0 +1,124 @@
+# Tests for Scraper.rate_control (AIMD request pacing)
+
+import io
+from email.utils import formatdate
+from urllib.error import HTTPError
+
+import pytest
+
+import Scraper.rate_control as rate_control
+import Scraper.scrape as scrape
+
+
+class _Clock:
+    """Stand-in for time.monotonic/time.sleep that never really waits."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.slept.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _Clock()
+    monkeypatch.setattr(rate_control.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(rate_control.time, "sleep", fake.sleep)
+    rate_control.reset_controller()
+    yield fake
+    rate_control.reset_controller()
+
+
+@pytest.mark.analysis
+def test_additive_increase_multiplicative_decrease(clock):
+    ctl = rate_control.RateController(rate=2, min_rate=0.5, max_rate=3,
+                                      step=0.5)
+    ctl.success()
+    ctl.success()
+    ctl.success()
+    assert ctl.rate == 3
+    ctl.failure()
+    assert ctl.rate == 1.5
+    for _ in range(5):
+        ctl.failure()
+    assert ctl.rate == 0.5
+    assert ctl.stats["low"] == 0.5 and ctl.stats["high"] == 3
+
+
+@pytest.mark.analysis
+def test_wait_spaces_requests_by_current_rate(clock):
+    ctl = rate_control.RateController(rate=4, max_rate=4)
+    ctl.wait()
+    ctl.wait()
+    ctl.wait()
+    assert clock.slept == [pytest.approx(0.25), pytest.approx(0.25)]
+    # After a failure the next send waits one (slower) interval.
+    ctl.failure()
+    ctl.wait()
+    assert clock.slept[-1] == pytest.approx(0.5)
+
+
+@pytest.mark.analysis
+def test_retry_after_blocks_senders(clock):
+    ctl = rate_control.RateController(rate=10, max_rate=10)
+    ctl.failure(retry_after=30)
+    ctl.wait()
+    assert clock.slept == [pytest.approx(30)]
+    report = ctl.stats_report()
+    assert "1 throttled (1 with Retry-After)" in report
+    assert "5.00/s now" in report
+
+
+@pytest.mark.analysis
+def test_retry_after_seconds(monkeypatch):
+    assert rate_control.retry_after_seconds(None) is None
+    assert rate_control.retry_after_seconds({"Retry-After": " 7 "}) == 7
+    assert rate_control.retry_after_seconds({"Retry-After": "99999"}) == \
+        rate_control.MAX_RETRY_AFTER
+    assert rate_control.retry_after_seconds({"Retry-After": "soon"}) is None
+    when = formatdate(rate_control.time.time() + 60, usegmt=True)
+    assert 55 <= rate_control.retry_after_seconds({"Retry-After": when}) <= 60
+    past = formatdate(0, usegmt=True)
+    assert rate_control.retry_after_seconds({"Retry-After": past}) == 0
+
+
+@pytest.mark.analysis
+def test_get_controller_from_env(monkeypatch, clock):
+    monkeypatch.setenv("SCRAPE_RATE", "50")
+    monkeypatch.setenv("SCRAPE_MAX_RATE", "20")
+    ctl = rate_control.get_controller()
+    assert ctl is rate_control.get_controller()
+    assert ctl.rate == 20
+
+
+@pytest.mark.analysis
+def test_download_html_honours_429_retry_after(monkeypatch, clock):
+    calls = []
+
+    class FakeResp(io.BytesIO):
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+    def fake_urlopen(req, timeout=60):
+        calls.append(clock.now)
+        if len(calls) == 1:
+            raise HTTPError(req.full_url, 429, "Too Many Requests",
+                            {"Retry-After": "12"}, io.BytesIO())
+        if len(calls) == 2:
+            raise TimeoutError("read timed out")
+        return FakeResp(b"<html>ok</html>")
+
+    monkeypatch.setattr(scrape, "urlopen", fake_urlopen)
+    assert scrape.download_html("https://example.com") == "<html>ok</html>"
+    assert calls[1] - calls[0] == pytest.approx(12)
+    ctl = rate_control.get_controller()
+    assert ctl.stats["throttled"] == 2 and ctl.stats["ok"] == 1
@@ -0,0 +1,63 @@
+# Tests for Scraper.reparse (rebuild raw JSON from the HTML archive)
+
+import json
+
+import pytest
+
+import Scraper.archive as archive
+import Scraper.reparse as reparse
+
+
+def _row(rid):
+    return {
+        "result_id": rid,
+        "university_raw": f"U{rid}",
+        "program_raw": "CS",
+        "application_url_raw": f"https://www.thegradcafe.com/result/{rid}",
+    }
+
+
+@pytest.mark.analysis
+def test_reparse_rebuilds_raw_json(tmp_path):
+    arc_dir = tmp_path / "arc"
+    arc = archive.HtmlArchive(str(arc_dir), segment_bytes=60)
+    for rid in (10, 11, 12):
+        arc.put(_row(rid), f"<html><body><b>Decision</b> {rid}</body></html>")
+    out = tmp_path / "raw.json"
+
+    assert reparse.reparse(str(arc_dir), str(out), processes=2) == 3
+    rows = json.loads(out.read_text(encoding="utf-8"))
+    assert [r["result_id"] for r in rows] == [12, 11, 10]
+    assert rows[0]["result_text_raw"] == "Decision  12"
+    assert rows[0]["university_raw"] == "U12"
+
+
+@pytest.mark.analysis
+def test_one_segment_is_split_across_processes(tmp_path):
+    arc_dir = tmp_path / "arc"
+    arc = archive.HtmlArchive(str(arc_dir))
+    for rid in range(10):
+        arc.put(_row(rid), f"<p>{rid}</p>")
+    entries = arc.entries()
+    jobs = reparse._jobs(str(arc_dir), entries, processes=2)
+    assert len(jobs) == 5
+    assert {seg for _, seg, _ in jobs} == {"seg-00001.bin"}
+    # Each chunk is read front to back; together they cover every entry.
+    offsets = [e["offset"] for _, _, chunk in jobs for e in chunk]
+    assert offsets == sorted(offsets) and len(offsets) == 10
+
+    out = tmp_path / "raw.json"
+    assert reparse.reparse(str(arc_dir), str(out), processes=2) == 10
+    rows = json.loads(out.read_text(encoding="utf-8"))
+    assert [r["result_text_raw"] for r in rows] == \
+        [str(rid) for rid in range(9, -1, -1)]
+
+
+@pytest.mark.analysis
+def test_main_cli(tmp_path):
+    arc_dir = tmp_path / "arc"
+    archive.HtmlArchive(str(arc_dir)).put(_row(1), "<p>x</p>")
+    out = tmp_path / "raw.json"
+    reparse.main(["--archive", str(arc_dir), "--out", str(out),
+                  "--processes", "1"])
+    assert json.loads(out.read_text())[0]["result_text_raw"] == "x"
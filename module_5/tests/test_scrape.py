@@ -1,14 +1,30 @@
 import pytest
-from bs4 import BeautifulSoup
 # Import the scrape module that exists inside the src/module_4 directory
 # to test the functions within scrape.py.
+import Scraper.rate_control as rate_control
 import Scraper.scrape as scrape
+import Scraper.http_pool as http_pool
 import runpy
-import urllib.request
+import sys
 from urllib.error import HTTPError, URLError
 import time
 
 
+@pytest.fixture(autouse=True)
+def _fresh_rate():
+    """Slow-downs from one test must not leak into the next."""
+    rate_control.reset_controller()
+    yield
+    rate_control.reset_controller()
+
+
+# The __main__ tests run scrape.py as a script; keep pytest's own
+# command line out of its argument parser.
+@pytest.fixture(autouse=True)
+def _script_argv(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["scrape.py"])
+
+
 # This fixture simulates the GradCafe survey list page.
 # It has:
 # - One "main" row with 5 <td> cells and a link to /result page.
@@ -147,10 +163,9 @@ def test_extract_tr_rows_from_html():
 # dictionary from the HTML string.
 @pytest.mark.analysis
 def test_row_dict_from_tr_parses_fields():
-    # Build a BeautifulSoup row so we can test
+    # Parse the survey page so we can test
     # _row_dict_from_tr directly
-    soup = BeautifulSoup(SURVEY_PAGE_HTML, "html.parser")
-    tr = soup.find_all("tr")[0]
+    tr = scrape._extract_tr_rows_from_html(SURVEY_PAGE_HTML)[0]
 
     row = scrape._row_dict_from_tr(tr)
 
@@ -187,7 +202,7 @@ def test_scrape_data_happy_path(monkeypatch):
 
     # Avoid real sleeps during tests
     monkeypatch.setattr(scrape, "download_html", fake_download_html)
-    monkeypatch.setattr(scrape.time, "sleep", lambda x: None)
+    monkeypatch.setattr(rate_control.time, "sleep", lambda x: None)
 
     # Run scrape_data with no existing IDs
     rows, stop_now = scrape.scrape_data(
@@ -215,7 +230,7 @@ def test_scrape_data_stops_on_existing_id(monkeypatch):
         return SURVEY_PAGE_HTML
 
     monkeypatch.setattr(scrape, "download_html", fake_download_html)
-    monkeypatch.setattr(scrape.time, "sleep", lambda x: None)
+    monkeypatch.setattr(rate_control.time, "sleep", lambda x: None)
 
     # existing_ids already has 123, so scraper should stop immediately
     rows, stop_now = scrape.scrape_data(
@@ -237,7 +252,7 @@ def test_scrape_data_skips_rows_without_link(monkeypatch):
     # Use monkeypatch to replace the download_html function with the
     # fake function.
     monkeypatch.setattr(scrape, "download_html", fake_download_html)
-    monkeypatch.setattr(scrape.time, "sleep", lambda x: None)
+    monkeypatch.setattr(rate_control.time, "sleep", lambda x: None)
 
     # Run scrape_data with no existing IDs
     rows, stop_now = scrape.scrape_data(
@@ -268,7 +283,7 @@ def test_scrape_data_detail_fetch_error_sets_none(monkeypatch):
 
     # Use monkeypatch to replace download_html with the fake function.
     monkeypatch.setattr(scrape, "download_html", fake_download_html)
-    monkeypatch.setattr(scrape.time, "sleep", lambda x: None)
+    monkeypatch.setattr(rate_control.time, "sleep", lambda x: None)
 
     # Run scrape_data with no existing IDs
     rows, _ = scrape.scrape_data("https://www.thegradcafe.com/survey/", set())
@@ -293,12 +308,27 @@ def test_make_request_headers():
     assert req.get_method() == "GET"
 
 
+@pytest.mark.analysis
+# SCRAPE_BASE_DOMAIN points every URL at another host (e.g. the local
+# stand-in server used by the crawl benchmark).
+def test_base_domain_override(monkeypatch):
+    monkeypatch.setenv("SCRAPE_BASE_DOMAIN", "http://127.0.0.1:8765/")
+    module = runpy.run_module("Scraper.scrape")
+    assert module["BASE_DOMAIN"] == "http://127.0.0.1:8765"
+    assert module["survey_page_url"](2) == \
+        "http://127.0.0.1:8765/survey/?page=2"
+
+
 @pytest.mark.analysis
 # This test checks download_html returns decoded HTML.
 def test_download_html_success(monkeypatch):
 
     class FakeResp:
-        def read(self):
+        def read(self, amt=None):
+            # Stream-like: the body comes back once, then b"".
+            if getattr(self, "done", False):
+                return b""
+            self.done = True
             return b"<html>ok</html>"
 
         def __enter__(self):
@@ -319,7 +349,7 @@ def test_download_html_http_error_retries(monkeypatch):
         raise HTTPError(req.full_url, 500, "Server Error", hdrs=None, fp=None)
 
     monkeypatch.setattr(scrape, "urlopen", fake_urlopen)
-    monkeypatch.setattr(scrape.time, "sleep", lambda x: None)
+    monkeypatch.setattr(rate_control.time, "sleep", lambda x: None)
 
     with pytest.raises(RuntimeError):
         scrape.download_html("https://example.com")
@@ -346,7 +376,7 @@ def test_download_html_urlerror(monkeypatch):
         raise URLError("network")
 
     monkeypatch.setattr(scrape, "urlopen", fake_urlopen)
-    monkeypatch.setattr(scrape.time, "sleep", lambda x: None)
+    monkeypatch.setattr(rate_control.time, "sleep", lambda x: None)
 
     with pytest.raises(RuntimeError):
         scrape.download_html("https://example.com")
@@ -382,7 +412,7 @@ def test_scrape_data_missing_result_id(monkeypatch):
     </table>
     """
     monkeypatch.setattr(scrape, "download_html", lambda url: html)
-    monkeypatch.setattr(scrape.time, "sleep", lambda x: None)
+    monkeypatch.setattr(rate_control.time, "sleep", lambda x: None)
 
     rows, stop_now = scrape.scrape_data("https://example.com", set())
     assert rows == []
@@ -405,7 +435,7 @@ def test_scrape_data_detail_row_no_term(monkeypatch):
     </table>
     """
     monkeypatch.setattr(scrape, "download_html", lambda url: html)
-    monkeypatch.setattr(scrape.time, "sleep", lambda x: None)
+    monkeypatch.setattr(rate_control.time, "sleep", lambda x: None)
 
     rows, stop_now = scrape.scrape_data("https://example.com", set())
     assert len(rows) == 1
@@ -436,7 +466,11 @@ def test_scrape_load_bad_json(tmp_path):
 def test_scrape_main_block(monkeypatch, tmp_path):
 
     class FakeResp:
-        def read(self):
+        def read(self, amt=None):
+            # Stream-like: the body comes back once, then b"".
+            if getattr(self, "done", False):
+                return b""
+            self.done = True
             return b"<html></html>"
 
         def __enter__(self):
@@ -445,8 +479,8 @@ def test_scrape_main_block(monkeypatch, tmp_path):
         def __exit__(self, *args):
             return False
 
-    monkeypatch.setattr(urllib.request, "urlopen", lambda *a, **k: FakeResp())
-    monkeypatch.setattr(scrape.time, "sleep", lambda x: None)
+    monkeypatch.setattr(http_pool, "urlopen", lambda *a, **k: FakeResp())
+    monkeypatch.setattr(rate_control.time, "sleep", lambda x: None)
     monkeypatch.chdir(tmp_path)
 
     runpy.run_module("Scraper.scrape", run_name="__main__")
@@ -460,7 +494,11 @@ def test_scrape_main_loop_paths(monkeypatch, tmp_path):
     monkeypatch.chdir(tmp_path)
 
     class FakeResp:
-        def read(self):
+        def read(self, amt=None):
+            # Stream-like: the body comes back once, then b"".
+            if getattr(self, "done", False):
+                return b""
+            self.done = True
             return b"<html></html>"
 
         def __enter__(self):
@@ -470,7 +508,7 @@ def test_scrape_main_loop_paths(monkeypatch, tmp_path):
             return False
 
     # Patch the global urlopen used by the __main__ module
-    monkeypatch.setattr(urllib.request, "urlopen", lambda *a, **k: FakeResp())
+    monkeypatch.setattr(http_pool, "urlopen", lambda *a, **k: FakeResp())
     monkeypatch.setattr(time, "sleep", lambda x: None)
 
     runpy.run_module("Scraper.scrape", run_name="__main__")
@@ -480,20 +518,21 @@ def test_scrape_main_loop_paths(monkeypatch, tmp_path):
 # Forces the __main__ loop to stop when it hits
 # an already-known result_id.
 def test_scrape_main_loop_stop_now(monkeypatch, tmp_path):
-    import io, json, builtins
+    import json
     monkeypatch.chdir(tmp_path)
 
-    # Fake master data so existing_ids contains 123
-    def fake_open(path, mode="r", *args, **kwargs):
-        if "r" in mode:
-            return io.StringIO(json.dumps([{"url": "/result/123"}]))
-        return io.StringIO()
-    monkeypatch.setattr(builtins, "open", fake_open)
+    # Master data so existing_ids contains 123
+    (tmp_path / scrape.MASTER_DATA_FILE).write_text(
+        json.dumps([{"url": "/result/123"}]), encoding="utf-8")
 
     # List page HTML contains /result/123, so scrape_data
     # sets stop_now True
     class FakeResp:
-        def read(self):
+        def read(self, amt=None):
+            # Stream-like: the body comes back once, then b"".
+            if getattr(self, "done", False):
+                return b""
+            self.done = True
             return b"""
             <table>
               <tr>
@@ -509,7 +548,7 @@ def test_scrape_main_loop_stop_now(monkeypatch, tmp_path):
         def __exit__(self, *args):
             return False
 
-    monkeypatch.setattr(urllib.request, "urlopen", lambda *a, **k: FakeResp())
+    monkeypatch.setattr(http_pool, "urlopen", lambda *a, **k: FakeResp())
     monkeypatch.setattr(time, "sleep", lambda x: None)
 
     runpy.run_module("Scraper.scrape", run_name="__main__")
@@ -518,18 +557,21 @@ def test_scrape_main_loop_stop_now(monkeypatch, tmp_path):
 @pytest.mark.analysis
 # Forces a page scrape error once to cover the error-handling branch.
 def test_scrape_main_loop_error_path(monkeypatch, tmp_path):
-    import io, builtins
     monkeypatch.chdir(tmp_path)
 
-    # Fake master data
-    monkeypatch.setattr(builtins, "open", lambda *a, **k: io.StringIO("[]"))
+    # Empty master data
+    (tmp_path / scrape.MASTER_DATA_FILE).write_text("[]", encoding="utf-8")
 
     # First 5 urlopen calls raise HTTPError (download_html fails),
     # then return empty HTML so the loop exits.
     calls = {"n": 0}
     def fake_urlopen(req, timeout=60):
         class FakeResp:
-            def read(self):
+            def read(self, amt=None):
+                # Stream-like: the body comes back once, then b"".
+                if getattr(self, "done", False):
+                    return b""
+                self.done = True
                 return b"<html></html>"
 
             def __enter__(self):
@@ -549,7 +591,7 @@ def test_scrape_main_loop_error_path(monkeypatch, tmp_path):
             )
         return FakeResp()
 
-    monkeypatch.setattr(urllib.request, "urlopen", fake_urlopen)
+    monkeypatch.setattr(http_pool, "urlopen", fake_urlopen)
     monkeypatch.setattr(time, "sleep", lambda x: None)
 
     runpy.run_module("Scraper.scrape", run_name="__main__")
@@ -562,13 +604,10 @@ def test_scrape_main_loop_non_empty_then_empty(monkeypatch, tmp_path):
 
     monkeypatch.chdir(tmp_path)
 
-    # Fake master data so existing_ids gets populated
-    import io, json, builtins
-    def fake_open(path, mode="r", *args, **kwargs):
-        if "r" in mode:
-            return io.StringIO(json.dumps([{"url": "/result/999"}]))
-        return io.StringIO()
-    monkeypatch.setattr(builtins, "open", fake_open)
+    # Master data so existing_ids gets populated
+    import json
+    (tmp_path / scrape.MASTER_DATA_FILE).write_text(
+        json.dumps([{"url": "/result/999"}]), encoding="utf-8")
 
     # Return one real row on first page, then empty pages
     page_calls = {"n": 0}
@@ -577,7 +616,11 @@ def test_scrape_main_loop_non_empty_then_empty(monkeypatch, tmp_path):
             def __init__(self, text):
                 self.text = text
 
-            def read(self):
+            def read(self, amt=None):
+                # Stream-like: the body comes back once, then b"".
+                if getattr(self, "done", False):
+                    return b""
+                self.done = True
                 return self.text.encode("utf-8")
 
             def __enter__(self):
@@ -608,7 +651,7 @@ def test_scrape_main_loop_non_empty_then_empty(monkeypatch, tmp_path):
         # After that, return empty HTML
         return FakeResp("<html></html>")
 
-    monkeypatch.setattr(urllib.request, "urlopen", fake_urlopen)
+    monkeypatch.setattr(http_pool, "urlopen", fake_urlopen)
     monkeypatch.setattr(time, "sleep", lambda x: None)
 
     runpy.run_module("Scraper.scrape", run_name="__main__")
@@ -621,20 +664,18 @@ def test_scrape_main_loop_error_path(monkeypatch, tmp_path):
 
     monkeypatch.chdir(tmp_path)
 
-    # Fake master data (so load_data succeeds)
-    import io
-    import builtins
-    def fake_open(path, mode="r", *args, **kwargs):
-        if "r" in mode:
-            return io.StringIO("[]")
-        return io.StringIO()
-    monkeypatch.setattr(builtins, "open", fake_open)
+    # Empty master data (so load_data succeeds)
+    (tmp_path / scrape.MASTER_DATA_FILE).write_text("[]", encoding="utf-8")
 
     # First call raises HTTPError, then empty HTML to exit
     calls = {"n": 0}
     def fake_urlopen(req, timeout=60):
         class FakeResp:
-            def read(self):
+            def read(self, amt=None):
+                # Stream-like: the body comes back once, then b"".
+                if getattr(self, "done", False):
+                    return b""
+                self.done = True
                 return b"<html></html>"
 
             def __enter__(self):
@@ -654,7 +695,87 @@ def test_scrape_main_loop_error_path(monkeypatch, tmp_path):
             )
         return FakeResp()
 
-    monkeypatch.setattr(urllib.request, "urlopen", fake_urlopen)
+    monkeypatch.setattr(http_pool, "urlopen", fake_urlopen)
     monkeypatch.setattr(time, "sleep", lambda x: None)
 
     runpy.run_module("Scraper.scrape", run_name="__main__")
+
+
+@pytest.mark.analysis
+# This test checks the worker pool keeps row order and never runs more
+# requests against one host than the per-host limit allows.
+def test_fetch_detail_pages_pool_keeps_order(monkeypatch):
+    import threading
+
+    state = {"active": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def fake_download_html(url):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.01)
+        with lock:
+            state["active"] -= 1
+        return f"<html><body>page {url.rsplit('/', 1)[-1]}</body></html>"
+
+    monkeypatch.setattr(scrape, "download_html", fake_download_html)
+    monkeypatch.setattr(scrape, "_HOST_SLOTS", {})
+
+    rows = [
+        {"application_url_raw": f"https://www.thegradcafe.com/result/{n}"}
+        for n in range(8)
+    ]
+    out = scrape.fetch_detail_pages(rows, workers=6, per_host=2)
+
+    assert out is rows
+    assert [r["result_text_raw"] for r in rows] == [
+        f"page {n}" for n in range(8)
+    ]
+    assert state["peak"] <= 2
+
+
+@pytest.mark.analysis
+# This test checks every caller shares one slot per host: a later call
+# with a larger limit cannot raise the cap set by the first one.
+def test_host_slot_is_shared_per_host(monkeypatch):
+    monkeypatch.setattr(scrape, "_HOST_SLOTS", {})
+    url = "https://www.thegradcafe.com/result/1"
+    first = scrape._host_slot(url, 2)
+    assert scrape._host_slot(url + "0", 8) is first
+    assert scrape._host_slot("https://example.com/x", 8) is not first
+    assert first.acquire(blocking=False) and first.acquire(blocking=False)
+    assert not first.acquire(blocking=False)
+
+
+@pytest.mark.analysis
+# This test checks scrape_data passes the worker count through to the
+# detail phase and still returns rows in page order.
+def test_scrape_data_with_workers(monkeypatch):
+    html = """
+    <table>
+      <tr>
+        <td>U1</td><td>P1</td><td>D</td><td>S</td><td>C</td>
+        <td><a href="/result/1">View</a></td>
+      </tr>
+      <tr>
+        <td>U2</td><td>P2</td><td>D</td><td>S</td><td>C</td>
+        <td><a href="/result/2">View</a></td>
+      </tr>
+    </table>
+    """
+
+    def fake_download_html(url):
+        if "survey" in url:
+            return html
+        return f"<p>detail {url[-1]}</p>"
+
+    monkeypatch.setattr(scrape, "download_html", fake_download_html)
+    monkeypatch.setattr(rate_control.time, "sleep", lambda x: None)
+
+    rows, stop_now = scrape.scrape_data(
+        "https://www.thegradcafe.com/survey/", set(), workers=2
+    )
+    assert stop_now is False
+    assert [r["result_id"] for r in rows] == [1, 2]
+    assert [r["result_text_raw"] for r in rows] == ["detail 1", "detail 2"]
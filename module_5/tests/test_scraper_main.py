@@ -3,7 +3,9 @@
 import builtins
 import io
 import json
+import os
 import sys
+import time
 import types
 
 import pytest
@@ -11,15 +13,48 @@ import pytest
 import Scraper.main as scraper_main
 
 
+@pytest.fixture(autouse=True)
+def _batch_mode(monkeypatch, tmp_path):
+    """Most tests here cover the crawl-to-file then clean.main() path."""
+    monkeypatch.setattr(scraper_main, "PIPELINE_MODE", "batch")
+
+    # No warm server to reuse: every run launches the (fake) one.
+    def no_server(*args, **kwargs):
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(scraper_main.llm_supervisor, "urlopen", no_server)
+    # Stage profiles go to the test's directory, not src/Scraper.
+    monkeypatch.setattr(scraper_main.profiler, "REPORT_FILE",
+                        str(tmp_path / "run_profile.json"))
+    monkeypatch.setattr(scraper_main.profiler, "HISTORY_FILE",
+                        str(tmp_path / "run_profile_history.jsonl"))
+    yield
+    # Never leak one test's readiness pipe into the next.
+    scraper_main._close_ready_pipe()
+
+
+class _ReadyPopen:
+    """Fake LLM server process that reports ready at once."""
+
+    def __init__(self, *args, env=None, **kwargs):
+        fd = int(env["LLM_READY_FD"])
+        assert fd in kwargs["pass_fds"]
+        assert kwargs["start_new_session"] is True
+        os.write(fd, b"ready 8000\n")
+
+    def poll(self):
+        return None
+
+
+def _ready_popen(*args, **kwargs):
+    return _ReadyPopen(*args, **kwargs)
+
+
 def _patch_scraper_main(monkeypatch, tmp_path):
     """Apply mocks for scraper_main pipeline."""
     raw_file = tmp_path / "raw_scraped_data.json"
     raw_file.write_text(json.dumps([]), encoding="utf-8")
 
-    class FakePopen:
-        def poll(self):
-            return None
-
     class FakeResp:
         def read(self):
             return b"ok"
@@ -35,8 +70,7 @@ def _patch_scraper_main(monkeypatch, tmp_path):
             return io.StringIO("[]")
         raise FileNotFoundError(path)
 
-    monkeypatch.setattr(scraper_main.subprocess, "Popen",
-                        lambda *a, **k: FakePopen())
+    monkeypatch.setattr(scraper_main.subprocess, "Popen", _ready_popen)
     monkeypatch.setattr(
         scraper_main.subprocess, "run",
         lambda *a, **k: type('R', (), {'returncode': 0})()
@@ -50,6 +84,7 @@ def _patch_scraper_main(monkeypatch, tmp_path):
     )
     monkeypatch.setattr("builtins.open", fake_open)
     monkeypatch.setattr(scraper_main.clean, "main", lambda: None)
+    monkeypatch.setattr(scraper_main, "run_crawl", lambda *a, **k: 0)
     monkeypatch.chdir(tmp_path)
 
 
@@ -57,7 +92,128 @@ def _patch_scraper_main(monkeypatch, tmp_path):
 def test_scraper_main_function(monkeypatch, tmp_path):
     """Run Scraper.main.main() with mocks to cover the pipeline."""
     _patch_scraper_main(monkeypatch, tmp_path)
-    scraper_main.main()
+    resumed = []
+    monkeypatch.setattr(scraper_main, "run_crawl",
+                        lambda resume=False: resumed.append(resume) or 0)
+    scraper_main.main([])
+    monkeypatch.setenv("SCRAPE_RESUME", "1")
+    scraper_main.main([])
+    assert resumed == [False, True]
+
+
+@pytest.mark.analysis
+def test_scraper_main_reuses_warm_llm(monkeypatch, tmp_path, capsys):
+    """A healthy server is reused: nothing is launched."""
+    _patch_scraper_main(monkeypatch, tmp_path)
+
+    class Health(io.BytesIO):
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+    monkeypatch.setattr(
+        scraper_main.llm_supervisor, "urlopen",
+        lambda *a, **k: Health(b'{"ok": true, "pid": 42, '
+                               b'"rss_bytes": 1048576}'))
+    monkeypatch.setattr(scraper_main.subprocess, "Popen",
+                        lambda *a, **k: pytest.fail("launched a server"))
+    scraper_main.main([])
+    out = capsys.readouterr().out
+    assert "LLM server: reused warm server" in out
+    assert "pid 42, RSS 1.0 MiB" in out
+
+
+@pytest.mark.analysis
+def test_batch_mode_restarts_a_server_that_idled_out(monkeypatch, tmp_path,
+                                                     capsys):
+    """The server may stop itself during a long crawl; clean needs it."""
+    _patch_scraper_main(monkeypatch, tmp_path)
+    state = {"up": True, "launched": 0, "cleaned": False}
+
+    class Health(io.BytesIO):
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+    def health(*args, **kwargs):
+        if not state["up"]:
+            raise OSError("connection refused")
+        return Health(b'{"ok": true, "pid": 42}')
+
+    def crawl_past_idle_timeout(*args, **kwargs):
+        state["up"] = False
+        return 0
+
+    def launch(*args, **kwargs):
+        state["launched"] += 1
+        return _ready_popen(*args, **kwargs)
+
+    monkeypatch.setattr(scraper_main.llm_supervisor, "urlopen", health)
+    monkeypatch.setattr(scraper_main, "run_crawl", crawl_past_idle_timeout)
+    monkeypatch.setattr(scraper_main.subprocess, "Popen", launch)
+    monkeypatch.setattr(scraper_main.clean, "main",
+                        lambda: state.update(cleaned=True))
+    scraper_main.main([])
+    assert state["launched"] == 1 and state["cleaned"]
+    assert "LLM server: cold start" in capsys.readouterr().out
+
+
+@pytest.mark.analysis
+def test_batch_mode_skips_clean_without_a_server(monkeypatch, capsys):
+    supervisor = types.SimpleNamespace(ensure=lambda: False)
+    monkeypatch.setattr(scraper_main, "run_crawl", lambda *a, **k: 0)
+    monkeypatch.setattr(scraper_main, "json_sanity_check", lambda path: 0)
+    monkeypatch.setattr(scraper_main.clean, "main",
+                        lambda: pytest.fail("clean.main should not run"))
+    scraper_main.run_pipeline(supervisor)
+    assert "LLM server is not ready" in capsys.readouterr().out
+
+
+@pytest.mark.analysis
+def test_scraper_main_stream_mode(monkeypatch, tmp_path, capsys):
+    """Stream mode hands the whole run to pipeline.run()."""
+    _patch_scraper_main(monkeypatch, tmp_path)
+    monkeypatch.setattr(scraper_main, "PIPELINE_MODE", "stream")
+    calls = []
+    monkeypatch.setattr(scraper_main.pipeline, "run",
+                        lambda *a: calls.append(a) or 0)
+    monkeypatch.setattr(scraper_main.clean, "main",
+                        lambda: pytest.fail("clean.main should not run"))
+    scraper_main.main([])
+    assert calls == [(scraper_main.MASTER_FILE, scraper_main.SCRAPE_TARGET)]
+    assert "Pipeline complete" in capsys.readouterr().out
+
+
+@pytest.mark.analysis
+def test_write_profile_flags_regressions(monkeypatch, tmp_path, capsys):
+    """A stage slower than in earlier runs is called out."""
+    monkeypatch.setattr(scraper_main.profiler, "MIN_SECONDS", 0.0)
+    (tmp_path / "run_profile_history.jsonl").write_text(
+        json.dumps({"run_id": "old", "stages": {
+            "validate": {"wall_seconds": 0.0}}}) + "\n", encoding="utf-8")
+    scraper_main.profiler.reset(capture="")
+    with scraper_main.profiler.stage("validate"):
+        time.sleep(0.01)
+    scraper_main.write_profile()
+    out = capsys.readouterr().out
+    assert "Stage profile written to" in out
+    assert "Slower than recent runs: validate:" in out
+    report = json.loads((tmp_path / "run_profile.json")
+                        .read_text(encoding="utf-8"))
+    assert report["stages"]["validate"]["calls"] == 1
+
+
+@pytest.mark.analysis
+def test_write_profile_failure_is_reported(monkeypatch, tmp_path, capsys):
+    """An unwritable report does not fail the run."""
+    monkeypatch.setattr(scraper_main.profiler, "REPORT_FILE",
+                        str(tmp_path / "missing" / "run_profile.json"))
+    scraper_main.write_profile()
+    assert "Could not write the stage profile" in capsys.readouterr().out
 
 
 @pytest.mark.analysis
@@ -66,16 +222,16 @@ def test_scraper_main_wait_for_llm_fails(monkeypatch, tmp_path):
     monkeypatch.setattr(scraper_main, "wait_for_llm", lambda timeout_seconds=300: False)
     monkeypatch.setattr(
         scraper_main.subprocess, "Popen",
-        lambda *a, **k: type('P', (), {'poll': lambda: None})()
+        _ready_popen
     )
     monkeypatch.chdir(tmp_path)
 
-    scraper_main.main()  # Returns early when wait_for_llm fails
+    scraper_main.main([])  # Returns early when wait_for_llm fails
 
 
 @pytest.mark.analysis
-def test_scraper_main_run_scrape_fails(monkeypatch, tmp_path):
-    """Cover early return when run_scrape returns non-zero."""
+def test_scraper_main_run_crawl_fails(monkeypatch, tmp_path):
+    """Cover early return when run_crawl returns non-zero."""
     class FakeResp:
         def read(self):
             return b"ok"
@@ -86,22 +242,19 @@ def test_scraper_main_run_scrape_fails(monkeypatch, tmp_path):
         def __exit__(self, *args):
             return False
 
-    def fake_run(*args, **kwargs):
-        return type('R', (), {'returncode': 1})()
-
     monkeypatch.setattr(scraper_main, "urlopen", lambda *a, **k: FakeResp())
     monkeypatch.setattr(scraper_main.subprocess, "Popen",
-                        lambda *a, **k: type('P', (), {'poll': lambda: None})())
-    monkeypatch.setattr(scraper_main.subprocess, "run", fake_run)
+                        _ready_popen)
+    monkeypatch.setattr(scraper_main, "run_crawl", lambda *a, **k: 1)
     monkeypatch.setattr(scraper_main.time, "sleep", lambda x: None)
     monkeypatch.chdir(tmp_path)
 
-    scraper_main.main()
+    scraper_main.main([])
 
 
 @pytest.mark.analysis
-def test_scraper_main_wait_for_file_fails(monkeypatch, tmp_path):
-    """Cover early return when wait_for_file returns False."""
+def test_scraper_main_raw_file_missing(monkeypatch, tmp_path):
+    """Cover early return when the crawl left no raw file behind."""
     class FakeResp:
         def read(self):
             return b"ok"
@@ -113,19 +266,15 @@ def test_scraper_main_wait_for_file_fails(monkeypatch, tmp_path):
             return False
 
     monkeypatch.setattr(scraper_main, "urlopen", lambda *a, **k: FakeResp())
-    monkeypatch.setattr(
-        scraper_main, "wait_for_file",
-        lambda path, timeout_seconds=300: False
-    )
     monkeypatch.setattr(scraper_main.subprocess, "Popen",
-                        lambda *a, **k: type('P', (), {'poll': lambda: None})())
-    monkeypatch.setattr(
-        scraper_main.subprocess, "run",
-        lambda *a, **k: type('R', (), {'returncode': 0})()
-    )
+                        _ready_popen)
+    monkeypatch.setattr(scraper_main, "run_crawl", lambda *a, **k: 0)
+    monkeypatch.setattr(scraper_main.os, "chdir", lambda p: None)
+    monkeypatch.setattr(scraper_main.clean, "main",
+                        lambda: pytest.fail("clean.main should not run"))
     monkeypatch.chdir(tmp_path)
 
-    scraper_main.main()
+    scraper_main.main([])
 
 
 @pytest.mark.analysis
@@ -145,20 +294,13 @@ def test_scraper_main_json_sanity_check_fails(monkeypatch, tmp_path):
             return False
 
     monkeypatch.setattr(scraper_main, "urlopen", lambda *a, **k: FakeResp())
-    monkeypatch.setattr(
-        scraper_main, "wait_for_file",
-        lambda path, timeout_seconds=300: True
-    )
     monkeypatch.setattr(scraper_main.subprocess, "Popen",
-                        lambda *a, **k: type('P', (), {'poll': lambda: None})())
-    monkeypatch.setattr(
-        scraper_main.subprocess, "run",
-        lambda *a, **k: type('R', (), {'returncode': 0})()
-    )
+                        _ready_popen)
+    monkeypatch.setattr(scraper_main, "run_crawl", lambda *a, **k: 0)
     monkeypatch.setattr(scraper_main.os, "chdir", lambda p: None)
     monkeypatch.chdir(tmp_path)
 
-    scraper_main.main()
+    scraper_main.main([])
 
 
 @pytest.mark.analysis
@@ -178,25 +320,18 @@ def test_scraper_main_json_not_list(monkeypatch, tmp_path):
             return False
 
     monkeypatch.setattr(scraper_main, "urlopen", lambda *a, **k: FakeResp())
-    monkeypatch.setattr(
-        scraper_main, "wait_for_file",
-        lambda path, timeout_seconds=300: True
-    )
     monkeypatch.setattr(scraper_main.subprocess, "Popen",
-                        lambda *a, **k: type('P', (), {'poll': lambda: None})())
-    monkeypatch.setattr(
-        scraper_main.subprocess, "run",
-        lambda *a, **k: type('R', (), {'returncode': 0})()
-    )
+                        _ready_popen)
+    monkeypatch.setattr(scraper_main, "run_crawl", lambda *a, **k: 0)
     monkeypatch.setattr(scraper_main.os, "chdir", lambda p: None)
     monkeypatch.chdir(tmp_path)
 
-    scraper_main.main()
+    scraper_main.main([])
 
 
 @pytest.mark.analysis
 def test_scraper_main_helpers(tmp_path):
-    """Cover helper functions: json_sanity_check, wait_for_llm, wait_for_file."""
+    """Cover helper functions: json_sanity_check."""
     valid = tmp_path / "valid.json"
     valid.write_text("[]", encoding="utf-8")
     assert scraper_main.json_sanity_check(str(valid)) == 0
@@ -228,21 +363,68 @@ def test_wait_for_llm_timeout(monkeypatch):
     assert scraper_main.wait_for_llm(timeout_seconds=300) is False
 
 
+def _llm_script(tmp_path, monkeypatch, body):
+    """Point start_llm_server() at a tiny stand-in server script."""
+    (tmp_path / "fake_llm.py").write_text(
+        "import os, sys, time\n" + body, encoding="utf-8")
+    monkeypatch.setattr(scraper_main, "LLM_DIR", str(tmp_path))
+    monkeypatch.setattr(scraper_main, "LLM_SCRIPT", "fake_llm.py")
+
+
 @pytest.mark.analysis
-def test_wait_for_file_timeout(monkeypatch, tmp_path):
-    """Cover wait_for_file timeout path (loop and return False)."""
-    monkeypatch.setattr(scraper_main.os.path, "exists", lambda p: False)
-    t = [1000.0]  # mutable so fake_time can update
-    def fake_time():
-        return t[0]
-    def fake_sleep(x):
-        t[0] = 1010.0  # exceed timeout
-    monkeypatch.setattr(scraper_main.time, "time", fake_time)
-    monkeypatch.setattr(scraper_main.time, "sleep", fake_sleep)
-    monkeypatch.chdir(tmp_path)
-    assert scraper_main.wait_for_file(
-        "nonexistent.json", timeout_seconds=5
-    ) is False
+def test_llm_ready_pipe(monkeypatch, tmp_path, capsys):
+    """The server's "ready" line ends the wait without polling."""
+    _llm_script(tmp_path, monkeypatch,
+                "fd = int(os.environ['LLM_READY_FD'])\n"
+                "os.write(fd, b'ready 8123\\n')\n"
+                "os.close(fd)\n"
+                "time.sleep(30)\n")
+    monkeypatch.setattr(scraper_main, "urlopen",
+                        lambda *a, **k: pytest.fail("polled /"))
+    proc = scraper_main.start_llm_server()
+    try:
+        assert scraper_main.wait_for_llm(timeout_seconds=30) is True
+    finally:
+        proc.kill()
+        proc.wait()
+    assert "ready 8123" in capsys.readouterr().out
+    assert scraper_main._LLM_READY_FD[0] is None
+
+
+@pytest.mark.analysis
+def test_llm_exit_before_ready(monkeypatch, tmp_path, capsys):
+    """A server that dies while loading is reported at once (EOF)."""
+    _llm_script(tmp_path, monkeypatch, "sys.exit(1)\n")
+    proc = scraper_main.start_llm_server()
+    start = time.monotonic()
+    assert scraper_main.wait_for_llm(timeout_seconds=30) is False
+    assert time.monotonic() - start < 10
+    proc.wait()
+    assert "exited before it was ready" in capsys.readouterr().out
+
+
+@pytest.mark.analysis
+def test_llm_ready_timeout(monkeypatch, tmp_path, capsys):
+    """No line before the timeout; starting again drops the old pipe."""
+    _llm_script(tmp_path, monkeypatch, "time.sleep(30)\n")
+    first = scraper_main.start_llm_server()
+    second = scraper_main.start_llm_server()
+    try:
+        assert scraper_main.wait_for_llm(timeout_seconds=0.05) is False
+    finally:
+        for proc in (first, second):
+            proc.kill()
+            proc.wait()
+    assert "Timed out" in capsys.readouterr().out
+
+
+@pytest.mark.analysis
+def test_llm_launch_failure_closes_pipe(monkeypatch, tmp_path):
+    """A server that cannot be started leaves no pipe behind."""
+    monkeypatch.setattr(scraper_main, "LLM_DIR", str(tmp_path / "missing"))
+    with pytest.raises(OSError):
+        scraper_main.start_llm_server()
+    assert scraper_main._LLM_READY_FD[0] is None
 
 
 @pytest.mark.analysis
@@ -251,13 +433,28 @@ def test_main_import_error_fallback(monkeypatch):
     real_import = builtins.__import__
     fake_clean = types.ModuleType("clean")
     fake_clean.main = lambda: None
+    fakes = {
+        "clean": fake_clean,
+        "crawl": types.ModuleType("crawl"),
+        "scrape": types.ModuleType("scrape"),
+        "transfer": types.ModuleType("transfer"),
+        "http_cache": types.ModuleType("http_cache"),
+        "listing": types.ModuleType("listing"),
+        "llm_supervisor": types.ModuleType("llm_supervisor"),
+        "parse_pool": types.ModuleType("parse_pool"),
+        "pipeline": types.ModuleType("pipeline"),
+        "profiler": types.ModuleType("profiler"),
+        "rate_control": types.ModuleType("rate_control"),
+        "telemetry": types.ModuleType("telemetry"),
+        "checkpoint": types.ModuleType("checkpoint"),
+    }
 
     def fake_import(name, globals=None, locals=None, fromlist=(), level=0):
         # Simulate relative import failure for .clean
         if level >= 1 and fromlist and "clean" in fromlist:
             raise ImportError("attempted relative import with no known parent package")
-        if name == "clean":
-            return fake_clean
+        if name in fakes:
+            return fakes[name]
         return real_import(name, globals, locals, fromlist, level)
 
     monkeypatch.setattr(builtins, "__import__", fake_import)
@@ -267,6 +464,7 @@ def test_main_import_error_fallback(monkeypatch):
     try:
         import Scraper.main as mod
         assert mod.clean is fake_clean
+        assert mod.crawl is fakes["crawl"]
         mod.clean.main()  # no-op
     finally:
         # Restore modules for subsequent tests
@@ -274,3 +472,108 @@ def test_main_import_error_fallback(monkeypatch):
         if "Scraper.main" not in sys.modules:
             importlib.import_module("Scraper.main")
 
+
+
+@pytest.mark.analysis
+def test_run_crawl_saves_rows(monkeypatch, tmp_path):
+    """run_crawl drives crawl.crawl in-process and writes RAW_FILE."""
+    seen = {}
+
+    async def fake_crawl(start_page, target, known_ids, progress,
+                         skip_ids=frozenset()):
+        seen["args"] = (start_page, target, set(known_ids))
+        progress.append_page(start_page, [{"result_id": 5}])
+        return []
+
+    (tmp_path / "llm_extend_applicant_data.json").write_text(
+        json.dumps([{"url": "https://www.thegradcafe.com/result/4"}]),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(scraper_main.crawl, "crawl", fake_crawl)
+    monkeypatch.chdir(tmp_path)
+
+    assert scraper_main.run_crawl(target=10) == 0
+    assert seen["args"] == (1, 10, {4})
+    saved = json.loads((tmp_path / "raw_scraped_data.json").read_text())
+    assert saved == [{"result_id": 5}]
+
+
+@pytest.mark.analysis
+def test_wait_for_llm_polls_external_server(monkeypatch):
+    """Without a readiness pipe, / is polled with a growing interval."""
+    attempts = []
+
+    class FakeResp:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+    def fake_urlopen(*a, **k):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise OSError("refused")
+        return FakeResp()
+
+    sleeps = []
+    monkeypatch.setattr(scraper_main, "urlopen", fake_urlopen)
+    monkeypatch.setattr(scraper_main.time, "sleep", sleeps.append)
+    assert scraper_main.wait_for_llm(timeout_seconds=300) is True
+    assert sleeps == [0.05, 0.1]
+
+
+@pytest.mark.analysis
+def test_run_crawl_reports_cache(monkeypatch, tmp_path, capsys):
+    """run_crawl prints cache activity when SCRAPE_CACHE_DIR is set."""
+    async def fake_crawl(start_page, target, known_ids, progress,
+                         skip_ids=frozenset()):
+        return []
+
+    monkeypatch.setattr(scraper_main.crawl, "crawl", fake_crawl)
+    monkeypatch.setattr(scraper_main.http_cache, "_CACHE", [None])
+    monkeypatch.setenv("SCRAPE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+
+    assert scraper_main.run_crawl() == 0
+    assert "Cache: " in capsys.readouterr().out
+
+
+@pytest.mark.analysis
+def test_run_crawl_resume(monkeypatch, tmp_path):
+    """run_crawl(resume=True) continues from the saved checkpoint."""
+    monkeypatch.chdir(tmp_path)
+    progress = scraper_main.checkpoint.CrawlCheckpoint(scraper_main.RAW_FILE)
+    progress.start()
+    progress.append_page(3, [{"result_id": 8}])
+    seen = {}
+
+    async def fake_crawl(start_page, target, known_ids, progress,
+                         skip_ids=frozenset()):
+        seen["args"] = (start_page, set(known_ids), set(skip_ids))
+        progress.append_page(start_page, [{"result_id": 7}])
+        return []
+
+    monkeypatch.setattr(scraper_main.crawl, "crawl", fake_crawl)
+    assert scraper_main.run_crawl(resume=True) == 0
+    assert seen["args"] == (4, set(), {8})
+    saved = json.loads((tmp_path / "raw_scraped_data.json").read_text())
+    assert [r["result_id"] for r in saved] == [8, 7]
+
+
+@pytest.mark.analysis
+@pytest.mark.parametrize("mode", ["batch", "stream"])
+def test_main_resume_flag(monkeypatch, tmp_path, capsys, mode):
+    """--resume reaches run_crawl; stream mode says it cannot resume."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(scraper_main, "PIPELINE_MODE", mode)
+    calls = []
+    monkeypatch.setattr(scraper_main, "run_crawl",
+                        lambda resume=False: calls.append(resume) or 1)
+    monkeypatch.setattr(scraper_main.pipeline, "run",
+                        lambda *a, **k: calls.append("stream"))
+    scraper_main.run_pipeline(resume=True)
+    expected = [True] if mode == "batch" else ["stream"]
+    assert calls == expected
+    assert ("keeps no checkpoint" in capsys.readouterr().out) == \
+        (mode == "stream")
@@ -0,0 +1,148 @@
+# Tests for Scraper.telemetry (counters, histograms and run reports)
+
+import io
+import json
+import runpy
+from urllib.error import HTTPError, URLError
+
+import pytest
+
+import Scraper.http_pool as http_pool
+import Scraper.rate_control as rate_control
+import Scraper.scrape as scrape
+import Scraper.telemetry as telemetry
+
+
+@pytest.fixture(autouse=True)
+def _fresh_run(monkeypatch):
+    monkeypatch.setattr(rate_control.time, "sleep", lambda _: None)
+    rate_control.reset_controller()
+    telemetry.reset()
+    yield
+    rate_control.reset_controller()
+    telemetry.reset()
+
+
+class _Resp(io.BytesIO):
+    headers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+@pytest.mark.analysis
+def test_histogram_buckets_and_percentiles():
+    hist = telemetry.Histogram((1, 10, 100))
+    assert hist.snapshot()["p50"] is None
+    for value in (0.5, 2, 3, 4, 50, 500):
+        hist.observe(value)
+    snap = hist.snapshot()
+    assert snap["count"] == 6 and snap["min"] == 0.5 and snap["max"] == 500
+    assert snap["buckets"] == [[1, 1], [10, 3], [100, 1], ["inf", 1]]
+    assert snap["p50"] == 10
+    assert snap["p90"] == 500
+    # Percentiles never exceed the largest sample.
+    small = telemetry.Histogram((1, 10))
+    small.observe(2)
+    assert small.percentile(99) == 2
+
+
+@pytest.mark.analysis
+def test_publish_writes_report_atomically(tmp_path):
+    path = tmp_path / "report.json"
+    telemetry.reset(str(path))
+    telemetry.incr("requests", 2)
+    with telemetry.timer("fetch_seconds"):
+        pass
+    telemetry.publish()
+    live = json.loads(path.read_text(encoding="utf-8"))
+    assert live["finished"] is False
+    assert live["counters"] == {"requests": 2}
+    assert live["histograms"]["fetch_seconds"]["count"] == 1
+
+    report = telemetry.publish(finished=True, extra={"rows_saved": 5})
+    assert json.loads(path.read_text(encoding="utf-8")) == report
+    assert report["finished"] is True and report["rows_saved"] == 5
+    assert not (tmp_path / "report.json.tmp").exists()
+
+
+@pytest.mark.analysis
+def test_publish_without_path_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert telemetry.publish()["counters"] == {}
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.analysis
+def test_download_html_records_retries_by_cause(monkeypatch):
+    errors = [
+        HTTPError("u", 429, "Too Many", {}, io.BytesIO()),
+        HTTPError("u", 503, "Busy", {}, io.BytesIO()),
+        URLError(TimeoutError("timed out")),
+        URLError("refused"),
+    ]
+
+    def fake_urlopen(req, timeout=60):
+        if errors:
+            raise errors.pop(0)
+        return _Resp(b"<html>ok</html>")
+
+    monkeypatch.setattr(scrape, "urlopen", fake_urlopen)
+    assert scrape.download_html("https://example.com/") == "<html>ok</html>"
+    counters = telemetry.get_telemetry().counters
+    assert counters["requests"] == 5
+    assert counters["retries_http_429"] == counters["retries_http_5xx"] == 1
+    assert counters["retries_timeout"] == counters["retries_network"] == 1
+    assert counters["bytes_decoded"] == len(b"<html>ok</html>")
+    hists = telemetry.get_telemetry().histograms
+    assert hists["fetch_seconds"].count == 5
+    assert hists["response_bytes"].count == 1
+
+
+@pytest.mark.analysis
+def test_download_html_counts_failures(monkeypatch):
+    def not_found(req, timeout=60):
+        raise HTTPError("u", 404, "Not Found", {}, io.BytesIO())
+
+    monkeypatch.setattr(scrape, "urlopen", not_found)
+    with pytest.raises(HTTPError):
+        scrape.download_html("https://example.com/")
+
+    def down(req, timeout=60):
+        raise URLError("down")
+
+    monkeypatch.setattr(scrape, "urlopen", down)
+    with pytest.raises(RuntimeError):
+        scrape.download_html("https://example.com/")
+    counters = telemetry.get_telemetry().counters
+    assert counters["http_404"] == 1 and counters["fetch_failures"] == 1
+
+
+@pytest.mark.analysis
+def test_scrape_main_writes_run_report(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("sys.argv", ["scrape.py"])
+    survey = (b'<table><tr><td>U</td><td>P</td><td>D</td><td>S</td>'
+              b'<td><a href="/result/5">v</a></td></tr></table>')
+    calls = []
+
+    def fake_urlopen(req, timeout=60):
+        calls.append(req.full_url)
+        if len(calls) == 1:
+            return _Resp(survey)
+        return _Resp(b"<p>detail</p>" if "result" in req.full_url
+                     else b"<html></html>")
+
+    monkeypatch.setattr(http_pool, "urlopen", fake_urlopen)
+    runpy.run_module("Scraper.scrape", run_name="__main__")
+    report = json.loads((tmp_path / telemetry.REPORT_FILE)
+                        .read_text(encoding="utf-8"))
+    assert report["finished"] is True
+    assert report["rows_saved"] == 1
+    assert report["counters"]["survey_pages"] == 6
+    assert report["histograms"]["rows_per_page"]["max"] == 1
+    assert report["histograms"]["result_parse_seconds"]["count"] == 1
+    assert report["rate"]["requests"] == len(calls)
@@ -0,0 +1,146 @@
+# Tests for Scraper.transfer (compressed transfer decoding)
+
+import gzip
+import io
+import zlib
+from urllib.error import URLError
+
+import pytest
+
+import Scraper.scrape as scrape
+import Scraper.transfer as transfer
+
+PAGE = ("<html><body>" + "Decision Accepted café " * 200
+        + "</body></html>")
+
+
+class FakeResp:
+    """Response stand-in that hands back its body in small pieces."""
+
+    def __init__(self, body, encoding=None):
+        self._buf = io.BytesIO(body)
+        self.headers = {"Content-Encoding": encoding} if encoding else {}
+
+    def read(self, amt=None):
+        return self._buf.read(7 if amt else None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class FakeBrotli:
+    """Stand-in for the optional brotli module (zlib underneath)."""
+
+    error = zlib.error
+
+    class Decompressor:
+        def __init__(self):
+            self._obj = zlib.decompressobj()
+
+        def process(self, data):
+            return self._obj.decompress(data)
+
+    @staticmethod
+    def compress(data):
+        return zlib.compress(data)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_stats():
+    transfer.reset_stats()
+    yield
+    transfer.reset_stats()
+
+
+@pytest.mark.analysis
+@pytest.mark.parametrize("encoding,body", [
+    (None, PAGE.encode("utf-8")),
+    ("gzip", gzip.compress(PAGE.encode("utf-8"))),
+    ("deflate", zlib.compress(PAGE.encode("utf-8"))),
+    ("deflate", zlib.compress(PAGE.encode("utf-8"))[2:-4]),
+])
+def test_read_text_decodes_each_encoding(encoding, body):
+    assert transfer.read_text(FakeResp(body, encoding)) == PAGE
+    stats = transfer.TRANSFER_STATS
+    assert stats["responses"] == 1
+    assert stats["wire_bytes"] == len(body)
+    assert stats["decoded_bytes"] == len(PAGE.encode("utf-8"))
+
+
+@pytest.mark.analysis
+def test_read_text_brotli_optional(monkeypatch):
+    monkeypatch.setattr(transfer, "brotli", None)
+    assert transfer.accept_encoding() == "gzip, deflate"
+    with pytest.raises(ValueError):
+        transfer.StreamDecoder("br")
+
+    monkeypatch.setattr(transfer, "brotli", FakeBrotli)
+    assert transfer.accept_encoding() == "gzip, deflate, br"
+    body = FakeBrotli.compress(PAGE.encode("utf-8"))
+    assert transfer.read_text(FakeResp(body, "br")) == PAGE
+
+
+@pytest.mark.analysis
+@pytest.mark.parametrize("encoding", ["gzip", "deflate", "br"])
+def test_corrupt_body_raises_url_error(monkeypatch, encoding):
+    monkeypatch.setattr(transfer, "brotli", FakeBrotli)
+    magic = b"\x1f\x8b" if encoding == "gzip" else b"\x78\x9c"
+    body = magic + b"\xff" * 64
+    with pytest.raises(URLError, match=f"corrupt {encoding} body"):
+        transfer.read_text(FakeResp(body, encoding))
+    monkeypatch.setattr(transfer, "brotli", None)
+    assert transfer._decode_errors() == (zlib.error,)
+
+
+@pytest.mark.analysis
+def test_download_html_retries_corrupt_body(monkeypatch):
+    monkeypatch.setattr(scrape.rate_control.time, "sleep", lambda _: None)
+    bodies = [(b"\x1f\x8b" + b"\xff" * 32, "gzip"),
+              (gzip.compress(b"<p>ok</p>"), "gzip")]
+
+    def fake_urlopen(req, timeout=60):
+        return FakeResp(*bodies.pop(0))
+
+    monkeypatch.setattr(scrape, "urlopen", fake_urlopen)
+    assert scrape.download_html("https://example.test/r") == "<p>ok</p>"
+    assert bodies == []
+
+
+@pytest.mark.analysis
+def test_stats_report_and_breakdown():
+    assert "(0.0x)" in transfer.stats_report()
+    raw = PAGE.encode("utf-8")
+    transfer.read_text(FakeResp(gzip.compress(raw), "gzip"))
+    transfer.read_text(FakeResp(raw))
+    by_enc = transfer.TRANSFER_STATS["by_encoding"]
+    assert by_enc["gzip"]["responses"] == 1
+    assert by_enc["identity"]["wire_bytes"] == len(raw)
+    report = transfer.stats_report()
+    assert "2 responses" in report
+    assert f"{2 * len(raw)} bytes decoded" in report
+
+
+@pytest.mark.analysis
+def test_download_html_negotiates_and_decodes(monkeypatch):
+    seen = {}
+
+    def fake_urlopen(req, timeout=60):
+        seen["encoding"] = req.get_header("Accept-encoding")
+        return _Ctx(FakeResp(gzip.compress(PAGE.encode("utf-8")), "gzip"))
+
+    class _Ctx:
+        def __init__(self, resp):
+            self.resp = resp
+
+        def __enter__(self):
+            return self.resp
+
+        def __exit__(self, *args):
+            return False
+
+    monkeypatch.setattr(scrape, "urlopen", fake_urlopen)
+    assert scrape.download_html("https://example.com") == PAGE
+    assert "gzip" in seen["encoding"]
@@ -0,0 +1,160 @@
+# Tests for Scraper.warm_start (historical LLM answers from the master)
+
+import json
+
+import pytest
+
+import Scraper.archive as archive
+import Scraper.clean as clean
+import Scraper.scrape as scrape
+import Scraper.warm_start as warm_start
+
+
+@pytest.fixture(autouse=True)
+def _fresh_lookup(monkeypatch):
+    monkeypatch.setattr(warm_start, "_LOOKUPS", {})
+    monkeypatch.setattr(warm_start, "RAW_FILES", [])
+    monkeypatch.setattr(archive, "_ARCHIVE", [None])
+    monkeypatch.delenv("SCRAPE_ARCHIVE_DIR", raising=False)
+
+
+def _url(rid):
+    return f"https://www.thegradcafe.com/result/{rid}"
+
+
+def _master_row(rid, prog="Computer Science", uni="MIT"):
+    """A master row as clean.py writes it: no raw input, only answers."""
+    return {"result_id": rid, "program": f"{prog}, {uni}", "comments": None,
+            "url": _url(rid), "llm-generated-program": prog,
+            "llm-generated-university": uni}
+
+
+def _raw_row(rid, program_raw, university_raw="MIT"):
+    return {"university_raw": university_raw, "program_raw": program_raw,
+            "application_url_raw": _url(rid), "result_text_raw": None}
+
+
+def _write_master(path, rows):
+    """Write rows oldest first, so the master lists them newest first."""
+    for row in rows:
+        clean.append_rows_to_master([row], str(path))
+
+
+@pytest.mark.analysis
+def test_ranges_cover_every_row(tmp_path):
+    path = tmp_path / "master.json"
+    rows = [_master_row(i, f"Program {i}") for i in range(1, 41)]
+    _write_master(path, rows)
+    whole = warm_start.parse_range(str(path), 0, path.stat().st_size)
+    assert [a[0] for a in whole] == [_url(i) for i in range(40, 0, -1)]
+    assert whole[0][1:] == ("Program 40", "MIT")
+
+    ranges = warm_start.row_boundaries(str(path), 4)
+    assert len(ranges) == 4
+    data = path.read_bytes()
+    assert all(data[start:start + 3] == b"  {" for start, _ in ranges[1:])
+    parts = [a for s, e in ranges
+             for a in warm_start.parse_range(str(path), s, e)]
+    assert parts == whole
+    # Run in parallel, the rows come back in the same order.
+    assert warm_start.read_rows(str(path), workers=2,
+                                parallel_bytes=0) == whole
+
+    # Raw dumps (json.dump with indent=2) split the same way.
+    raw = tmp_path / "raw.json"
+    scrape.save_data([_raw_row(i, f"P{i}") for i in range(30)], str(raw))
+    picked = warm_start.read_rows(str(raw), warm_start.raw_input_of,
+                                  workers=3, parallel_bytes=0)
+    assert picked == [(_url(i), f"P{i}", "MIT") for i in range(30)]
+
+
+@pytest.mark.analysis
+def test_read_rows_edge_cases(tmp_path):
+    assert warm_start.read_rows(str(tmp_path / "missing.json")) == []
+    empty = tmp_path / "empty.json"
+    empty.write_text("[]", encoding="utf-8")
+    assert warm_start.read_rows(str(empty), workers=2,
+                                parallel_bytes=0) == []
+    # One line, no row boundaries: parsed as a single range.
+    flat = tmp_path / "flat.json"
+    flat.write_text(json.dumps([_master_row(1), _master_row(2, None, None),
+                                {"llm-generated-program": "No url"}]),
+                    encoding="utf-8")
+    assert warm_start.row_boundaries(str(flat), 3) == [
+        (0, flat.stat().st_size)]
+    assert warm_start.read_rows(str(flat), workers=3,
+                                parallel_bytes=0) == [
+        (_url(1), "Computer Science", "MIT")]
+    assert warm_start.raw_input_of({"program_raw": "CS"}) is None
+
+
+@pytest.mark.analysis
+def test_build_lookup_joins_raw_rows_on_url(tmp_path, monkeypatch):
+    path = tmp_path / "master.json"
+    _write_master(path, [
+        _master_row(1, "Old Answer"),
+        _master_row(2),
+        _master_row(3),
+        _master_row(4, "Art", "X"),   # its raw row was not kept
+    ])
+    raw = tmp_path / "raw.json"
+    scrape.save_data([_raw_row(1, "Comp Sci  Accepted"),
+                      _raw_row(3, "Comp Sci"),
+                      _raw_row(9, "Never cleaned")], str(raw))
+    # Row 2's listing row is in the HTML archive.
+    monkeypatch.setenv("SCRAPE_ARCHIVE_DIR", str(tmp_path / "archive"))
+    archive.get_archive().put({"result_id": 2, **_raw_row(2, "CS", "M.I.T.")},
+                              "<html></html>")
+    lookup = warm_start.build_lookup(str(path), clean.prepare_row,
+                                     [str(raw)])
+    assert lookup == {
+        "CS, M.I.T.": ("Computer Science", "MIT"),
+        # The newest answer wins.
+        "Comp Sci, MIT": ("Computer Science", "MIT"),
+    }
+    # The LLM's output ("program") never becomes a key.
+    assert "Computer Science, MIT" not in lookup
+
+
+@pytest.mark.analysis
+def test_cleaned_rows_add_no_master_field():
+    row = {"result_id": 7, "program_raw": "Comp Sci  Accepted",
+           "university_raw": "MIT"}
+    assert clean.prepare_row(row) == "Comp Sci, MIT"
+    final = clean.build_final_row(row)
+    assert "llm-input" not in final and "llm_input" not in row
+
+
+@pytest.mark.analysis
+def test_build_lookup_bad_files(tmp_path, capsys):
+    path = tmp_path / "master.json"
+    path.write_text("[{not json", encoding="utf-8")
+    assert warm_start.build_lookup(str(path), clean.prepare_row) == {}
+    assert "not valid JSON" in capsys.readouterr().out
+    # No answers: the raw dumps are not read at all.
+    path.write_text("[]", encoding="utf-8")
+    assert warm_start.build_lookup(str(path), clean.prepare_row,
+                                   [str(path / "nope")]) == {}
+    _write_master(path, [_master_row(1)])
+    bad_raw = tmp_path / "raw.json"
+    bad_raw.write_text("[{oops", encoding="utf-8")
+    assert warm_start.build_lookup(str(path), clean.prepare_row,
+                                   [str(bad_raw)]) == {}
+    assert "raw.json is not valid JSON, skipped" in capsys.readouterr().out
+
+
+@pytest.mark.analysis
+def test_get_lookup_builds_once(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "master.json"
+    _write_master(path, [_master_row(1)])
+    raw = tmp_path / "raw.json"
+    scrape.save_data([_raw_row(1, "CS")], str(raw))
+    monkeypatch.setattr(warm_start, "MASTER_FILE", str(path))
+    monkeypatch.setattr(warm_start, "RAW_FILES", [str(raw)])
+    lookup = warm_start.get_lookup(clean.prepare_row)
+    assert lookup == {"CS, MIT": ("Computer Science", "MIT")}
+    assert "1 historical LLM answers" in capsys.readouterr().out
+    path.unlink()
+    assert warm_start.get_lookup(clean.prepare_row) is lookup
+    monkeypatch.setattr(warm_start, "MASTER_FILE", "")
+    assert warm_start.get_lookup(clean.prepare_row) == {}